@@ -19,6 +19,7 @@
 from builtins import filter
 import functools
 import itertools
+from gtkmvc3.observable import Observable
 
 
 def wraps_safely(obj, attr_names=functools.WRAPPER_ASSIGNMENTS):
@@ -28,6 +29,27 @@ def wraps_safely(obj, attr_names=functools.WRAPPER_ASSIGNMENTS):
 global_lock_counter = 0
 
 
+# the classes of the objects, whose state machine is locked by lock_state_machine; they are imported on first use,
+# as they import this module
+_lockable_classes = None
+
+
+def _get_target_state_machine(self_reference):
+    """Returns the state machine to lock for a method of a state or state element"""
+    global _lockable_classes
+    if _lockable_classes is None:
+        from rafcon.core.state_elements.state_element import StateElement
+        from rafcon.core.states.state import State
+        _lockable_classes = (State, StateElement)
+    state_class, state_element_class = _lockable_classes
+    if isinstance(self_reference, state_class):
+        return self_reference.get_state_machine()
+    elif isinstance(self_reference, state_element_class):
+        if self_reference.parent:
+            return self_reference.parent.get_state_machine()
+    return None
+
+
 def lock_state_machine(func):
     @wraps_safely(func)
     def func_wrapper(*args, **kwargs):
@@ -35,16 +57,8 @@ def lock_state_machine(func):
         the respective state machine object edition will be locked by the respective thread until the handed function
         execution is finished.
         """
-        from rafcon.core.state_elements.state_element import StateElement
-        from rafcon.core.states.state import State
         global global_lock_counter
-        self_reference = args[0]
-        target_state_machine = None
-        if isinstance(self_reference, State):
-            target_state_machine = self_reference.get_state_machine()
-        elif isinstance(self_reference, StateElement):
-            if self_reference.parent:
-                target_state_machine = self_reference.parent.get_state_machine()
+        target_state_machine = _get_target_state_machine(args[0])
 
         if target_state_machine:
             target_state_machine.acquire_modification_lock()
@@ -60,3 +74,93 @@ def lock_state_machine(func):
                 global_lock_counter -= 1
         return return_value
     return func_wrapper
+
+
+def lock_scoped_data(func):
+    """Decorates methods changing the scoped data of a container state during execution
+
+    Instead of the modification lock of the whole state machine, the scoped data lock of the container state is
+    acquired. Thus, concurrent branches of a state machine do not block each other, if they write to the scoped data
+    of different container states.
+    """
+    @wraps_safely(func)
+    def func_wrapper(self, *args, **kwargs):
+        with self.scoped_data_lock:
+            return func(self, *args, **kwargs)
+    return func_wrapper
+
+
+# in headless mode, execution data is written without the modification lock of the state machine, see
+# set_headless_mode
+headless_mode = False
+
+
+def set_headless_mode(enabled):
+    """Enables or disables the headless fast path for setters of execution data
+
+    Headless mode is meant for executions without GUI, e.g. by rafcon_core. The setters decorated with
+    :func:`lock_state_machine_unless_headless` and :func:`observed_unless_headless` then do not acquire the
+    modification lock of the state machine anymore, as long as no observer is registered at their object.
+
+    :param bool enabled: whether the headless mode is enabled
+    """
+    global headless_mode
+    headless_mode = enabled
+
+
+def has_observers(observable):
+    """Checks whether any gtkmvc3 model or observer is registered at an observable
+
+    :param gtkmvc3.observable.Observable observable: the observable to check
+    :rtype: bool
+    """
+    # the attributes of gtkmvc3.support.wrappers.ObsWrapperBase are accessed directly, as this is called very often
+    return bool(observable._ObsWrapperBase__models or observable._ObsWrapperBase__observers)
+
+
+def lock_state_machine_unless_headless(func):
+    """Like :func:`lock_state_machine`, but the lock is skipped in headless mode if nobody observes the object"""
+    locked_func = lock_state_machine(func)
+
+    @wraps_safely(func)
+    def func_wrapper(self, *args, **kwargs):
+        if headless_mode and not has_observers(self):
+            return func(self, *args, **kwargs)
+        return locked_func(self, *args, **kwargs)
+    return func_wrapper
+
+
+def observed_unless_headless(func):
+    """Combines :func:`lock_state_machine` and `Observable.observed` with a fast path for unobserved objects
+
+    Notifications are only emitted if a model or observer is registered at the object, as emitting them to nobody
+    has no effect. In headless mode, the modification lock is skipped, too, thus the call becomes a direct attribute
+    write. With a GUI, the models of all states are registered and the full behavior is kept.
+    """
+    observed_func = lock_state_machine(Observable.observed(func))
+    locked_func = lock_state_machine(func)
+
+    @wraps_safely(func)
+    def func_wrapper(self, *args, **kwargs):
+        if has_observers(self):
+            return observed_func(self, *args, **kwargs)
+        if headless_mode:
+            return func(self, *args, **kwargs)
+        return locked_func(self, *args, **kwargs)
+    return func_wrapper
+
+
+def observed_unless_batch_edit(func):
+    """Combines :func:`lock_state_machine` and `Observable.observed`, unless a batch edit of the state is running
+
+    Within :meth:`rafcon.core.states.container_state.ContainerState.batch_edit`, the modification lock is held for
+    the whole batch and a single notification is emitted at its end, thus both are skipped for the single calls.
+    """
+    observed_func = lock_state_machine(Observable.observed(func))
+
+    @wraps_safely(func)
+    def func_wrapper(self, *args, **kwargs):
+        if self._batch_edit_depth:
+            return func(self, *args, **kwargs)
+        return observed_func(self, *args, **kwargs)
+    return func_wrapper
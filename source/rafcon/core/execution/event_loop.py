@@ -0,0 +1,146 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: event_loop
+   :synopsis: A module running the coroutines of asynchronous state scripts on a single event loop thread
+
+Scripts of execution states may define their execute function with ``async def``. Such a script awaits I/O, e.g.
+``await asyncio.sleep(1.)``, without blocking a thread. The coroutines of all states are executed by one event loop,
+which runs in a daemon thread.
+
+With the asyncio execution backend, the whole run of such an execution state is a task on the event loop, so that
+thousands of waiting concurrent branches do not need a thread each. With the other backends, the thread of the state
+waits for the coroutine. In both cases, the preemption of the state cancels the coroutine.
+
+This module requires Python 3.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from timeit import default_timer as timer
+
+from rafcon.core.execution import execution_metrics
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+#: The number of threads executing the blocking steps of the states on the event loop, e.g. setting them up
+EXECUTOR_THREADS = 4
+
+_event_loop = None
+_event_loop_thread = None
+_event_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """Returns the event loop executing the coroutines of the states, which is started on the first call
+
+    :rtype: asyncio.AbstractEventLoop
+    """
+    global _event_loop, _event_loop_thread
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            _event_loop.set_default_executor(ThreadPoolExecutor(EXECUTOR_THREADS))
+            _event_loop_thread = threading.Thread(target=_event_loop.run_forever, name="RAFCONEventLoop")
+            _event_loop_thread.daemon = True
+            _event_loop_thread.start()
+        return _event_loop
+
+
+def shutdown_event_loop():
+    """Stops the event loop thread, a new event loop is started on the next use"""
+    global _event_loop, _event_loop_thread
+    with _event_loop_lock:
+        event_loop, _event_loop = _event_loop, None
+        event_loop_thread, _event_loop_thread = _event_loop_thread, None
+    if event_loop is not None:
+        event_loop.call_soon_threadsafe(event_loop.stop)
+        event_loop_thread.join()
+        event_loop.close()
+
+
+def submit_coroutine(coroutine):
+    """Schedules a coroutine on the event loop
+
+    :param coroutine: the coroutine to be executed
+    :return: the future of the result of the coroutine
+    :rtype: concurrent.futures.Future
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop())
+
+
+def run_script_coroutine(state, coroutine):
+    """Executes the coroutine of a script on the event loop and waits for its result
+
+    :param rafcon.core.states.execution_state.ExecutionState state: the state of the script
+    :param coroutine: the coroutine returned by the execute function of the script
+    :return: the result of the coroutine or None, if the coroutine was cancelled due to a preemption
+    """
+    future = submit_coroutine(coroutine)
+    state.set_script_cancellation(future.cancel)
+    try:
+        return future.result()
+    except CancelledError:
+        return None
+    finally:
+        state.set_script_cancellation(None)
+
+
+async def _await_script(state, coroutine):
+    event_loop = asyncio.get_event_loop()
+    task = asyncio.ensure_future(coroutine)
+    state.set_script_cancellation(lambda: event_loop.call_soon_threadsafe(task.cancel))
+    try:
+        return await task
+    except asyncio.CancelledError:
+        return None
+    finally:
+        state.set_script_cancellation(None)
+
+
+def _start_script(state):
+    """Sets the state up and calls the execute function of its script
+
+    :return: the start time of the script and the result of the execute function, usually a coroutine
+    """
+    state.prepare_run()
+    script_start = timer()
+    state.script.build_module()
+    return script_start, state.script.execute(state, state.input_data, state.output_data, state.backward_execution,
+                                              await_coroutine=False)
+
+
+async def run_execution_state(state):
+    """Executes an execution state with an asynchronous script as task on the event loop
+
+    This is the counterpart of :meth:`rafcon.core.states.execution_state.ExecutionState.run` for the asyncio execution
+    backend. Only the coroutine of the script is executed on the event loop thread. Setting the state up, building
+    the script module and finalizing the state may block, e.g. on the modification lock of the state machine or on
+    the execution history, thus these steps are executed by the :data:`EXECUTOR_THREADS` threads of the default
+    executor of the event loop.
+
+    :param rafcon.core.states.execution_state.ExecutionState state: the state to be executed
+    """
+    event_loop = asyncio.get_event_loop()
+    start = timer()
+    try:
+        try:
+            script_start, result = await event_loop.run_in_executor(None, _start_script, state)
+            if asyncio.iscoroutine(result):
+                result = await _await_script(state, result)
+            if execution_metrics.is_enabled():
+                execution_metrics.record_duration(state, execution_metrics.SCRIPT_METRIC, timer() - script_start)
+            outcome = state.get_outcome_for_script_result(result, state.backward_execution)
+            return await event_loop.run_in_executor(None, state.complete_run, outcome)
+        except Exception as e:
+            return await event_loop.run_in_executor(None, state.abort_run, e)
+    finally:
+        if execution_metrics.is_enabled():
+            execution_metrics.record_duration(state, execution_metrics.STATE_METRIC, timer() - start)
@@ -0,0 +1,200 @@
+# Copyright (C) 2014-2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+#
+# Contributors:
+# Franz Steinmetz <franz.steinmetz@dlr.de>
+# Sebastian Brunner <sebastian.brunner@dlr.de>
+
+"""
+.. module:: execution_backend
+   :synopsis: A module providing the backends, which run the states in threads
+
+"""
+from builtins import object
+from collections import deque
+import threading
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+CLASSIC_BACKEND = "classic"
+POOLED_BACKEND = "pooled"
+ASYNCIO_BACKEND = "asyncio"
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def create_state_run(target, inline=False, coroutine_factory=None):
+    """Creates the run of a state with the execution backend selected in the core config
+
+    The classic backend starts a new thread for every run. The pooled backend executes the run in the calling thread
+    if `inline` is set and otherwise dispatches it to a pool of reusable worker threads. The asyncio backend executes
+    the run as task on the event loop thread, if the state provides a coroutine, and behaves like the pooled backend
+    otherwise.
+
+    :param target: the callable to be executed, i.e. the run method of a state
+    :param bool inline: whether the caller waits for the run anyway, so that it may be executed in the calling thread
+    :param coroutine_factory: a callable returning a coroutine executing the state or None, only called by the
+        asyncio backend
+    :return: a handle for the run with a start and a join method, behaving like a :class:`threading.Thread`
+    """
+    backend = global_config.get_config_value("EXECUTION_BACKEND", CLASSIC_BACKEND)
+    if backend not in (POOLED_BACKEND, ASYNCIO_BACKEND):
+        return threading.Thread(target=target)
+    if backend == ASYNCIO_BACKEND and coroutine_factory is not None:
+        coroutine = coroutine_factory()
+        if coroutine is not None:
+            return AsyncRun(coroutine)
+    if inline:
+        return InlineRun(target)
+    return PooledRun(target)
+
+
+def get_worker_pool():
+    """Returns the worker pool of the pooled execution backend, which is created on the first call
+
+    :return: the worker pool
+    :rtype: WorkerPool
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = WorkerPool(global_config.get_config_value("EXECUTION_WORKER_POOL_MAX_IDLE", 32))
+        return _worker_pool
+
+
+class StateRun(object):
+    """A run of a state, which is not executed in its own thread"""
+
+    def __init__(self, target):
+        self._target = target
+        self._started = False
+        self._finished = threading.Event()
+
+    def start(self):
+        self._started = True
+        self._start()
+
+    def _start(self):
+        raise NotImplementedError("The StateRun._start() function has to be implemented!")
+
+    def run(self):
+        try:
+            self._target()
+        except Exception:
+            logger.exception("Unhandled exception during the run of a state")
+        finally:
+            self._target = None
+            self._finished.set()
+
+    def join(self, timeout=None):
+        self._finished.wait(timeout)
+
+    def is_alive(self):
+        """Whether the run was started and has not finished yet, like :meth:`threading.Thread.is_alive`"""
+        return self._started and not self._finished.is_set()
+
+
+class InlineRun(StateRun):
+    """A run of a state, which is executed in the thread calling start"""
+
+    def _start(self):
+        self.run()
+
+
+class PooledRun(StateRun):
+    """A run of a state, which is executed by a worker of the :class:`WorkerPool`"""
+
+    def _start(self):
+        get_worker_pool().submit(self)
+
+
+class AsyncRun(StateRun):
+    """A run of a state, which is executed as task on the event loop thread"""
+
+    def __init__(self, coroutine):
+        super(AsyncRun, self).__init__(None)
+        self._coroutine = coroutine
+
+    def _start(self):
+        from rafcon.core.execution.event_loop import submit_coroutine
+        future = submit_coroutine(self._coroutine)
+        self._coroutine = None
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Unhandled exception during the run of a state: {0}".format(future.exception()))
+        self._finished.set()
+
+
+class WorkerPool(object):
+    """A pool of reusable daemon threads executing state runs
+
+    A run is handed to an idle worker if there is one. Otherwise a new worker is started, as the run might be a
+    concurrent branch, on which other workers are waiting. After finishing a run, a worker only waits for the next one
+    if less than `max_idle_workers` are idle, otherwise it terminates.
+
+    The number of busy workers is deliberately unbounded: a concurrency state waits in its worker until all its
+    branches finished, so a pool with a fixed maximum of workers deadlocks as soon as nested or parallel concurrency
+    states occupy all workers while their branches are queued. Instead, the number of busy workers equals the number
+    of concurrently running branches, which is bounded by the state machines themselves, just like the threads of the
+    classic backend. Thus, the pool is a cache of idle threads: only the number of idle workers is limited, by the
+    config option EXECUTION_WORKER_POOL_MAX_IDLE.
+
+    :ivar int max_idle_workers: the maximum number of workers kept alive while having nothing to do
+    """
+
+    def __init__(self, max_idle_workers):
+        self.max_idle_workers = max_idle_workers
+        self._condition = threading.Condition()
+        self._pending_runs = deque()
+        self._number_of_idle_workers = 0
+        self._number_of_workers = 0
+
+    @property
+    def number_of_workers(self):
+        """The number of workers currently alive, either busy or idle"""
+        return self._number_of_workers
+
+    @property
+    def number_of_idle_workers(self):
+        """The number of workers currently waiting for a run"""
+        return self._number_of_idle_workers
+
+    def submit(self, state_run):
+        """Executes a run in one of the workers
+
+        :param StateRun state_run: the run to be executed
+        """
+        with self._condition:
+            # every pending run has been assigned to an idle worker, which has not yet fetched it
+            if self._number_of_idle_workers > len(self._pending_runs):
+                self._pending_runs.append(state_run)
+                self._condition.notify()
+                return
+            self._number_of_workers += 1
+            name = "RAFCONWorker-{0}".format(self._number_of_workers)
+        worker = threading.Thread(target=self._work, args=(state_run,), name=name)
+        worker.daemon = True
+        worker.start()
+
+    def _work(self, state_run):
+        while True:
+            state_run.run()
+            with self._condition:
+                if self._number_of_idle_workers >= self.max_idle_workers:
+                    self._number_of_workers -= 1
+                    return
+                self._number_of_idle_workers += 1
+                while not self._pending_runs:
+                    self._condition.wait()
+                self._number_of_idle_workers -= 1
+                state_run = self._pending_runs.popleft()
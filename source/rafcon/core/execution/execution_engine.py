@@ -28,6 +28,7 @@ from threading import Lock, RLock
 import sys
 
 from gtkmvc3.observable import Observable
+from rafcon.core.execution import execution_metrics
 from rafcon.core.execution.execution_status import ExecutionStatus
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.utils import log
@@ -51,6 +52,7 @@ class ExecutionEngine(Observable):
     def __init__(self, state_machine_manager):
         Observable.__init__(self)
         self.state_machine_manager = state_machine_manager
+        state_machine_manager.execution_engine = self
         self._status = ExecutionStatus(StateMachineExecutionStatus.STOPPED)
         logger.debug("State machine execution engine initialized")
         self.start_state_paths = []
@@ -213,6 +215,7 @@ class ExecutionEngine(Observable):
         self.__running_state_machine.root_state.concurrency_queue = queue.Queue(maxsize=0)
 
         if self.__running_state_machine:
+            execution_metrics.apply_config()
             self.__running_state_machine.start()
 
             self.__wait_for_finishing_thread = threading.Thread(target=self._wait_for_finishing)
@@ -227,6 +230,7 @@ class ExecutionEngine(Observable):
         self.__running_state_machine.join()
         self.__set_execution_mode_to_finished()
         self.state_machine_manager.active_state_machine_id = None
+        execution_metrics.flush()
         plugins.run_on_state_machine_execution_finished()
         # self.__set_execution_mode_to_stopped()
         self.state_machine_running = False
@@ -334,12 +338,13 @@ class ExecutionEngine(Observable):
             wait = True
             # if there is not state in self.run_to_states then RAFCON waits for the next user input and simply does
             # one step
+            state_path_of_state = state.get_path()
+            next_child_state_path = None
+            # can be None in case of no transition given
+            if next_child_state_to_execute:
+                next_child_state_path = next_child_state_to_execute.get_path()
             for state_path in copy.deepcopy(self.run_to_states):
-                next_child_state_path = None
-                # can be None in case of no transition given
-                if next_child_state_to_execute:
-                    next_child_state_path = next_child_state_to_execute.get_path()
-                if state_path == state.get_path():
+                if state_path == state_path_of_state:
                     # the execution did a whole step_over for the hierarchy state "state"
                     # or a whole step_out for the hierarchy state "state"
                     # thus we delete its state path from self.run_to_states
@@ -420,8 +425,9 @@ class ExecutionEngine(Observable):
         if self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OVER or \
             self._status.execution_mode  is StateMachineExecutionStatus.FORWARD_OUT:
             step_over_to_step_out_transform_found = False
+            state_path_of_state = state.get_path()
             for state_path in copy.deepcopy(self.run_to_states):
-                if state_path == state.get_path():
+                if state_path == state_path_of_state:
                     self.run_to_states.remove(state_path)
                     step_over_to_step_out_transform_found = True
                     logger.debug("Step_over is transformed to a step out for state %s!", state.name)
@@ -23,19 +23,25 @@ from builtins import range
 from builtins import str
 import time
 import copy
+import sys
 from collections import Iterable, Sized
 import json
 from jsonconversion.decoder import JSONObjectDecoder
 from jsonconversion.encoder import JSONObjectEncoder
 
 import shelve
-from threading import Lock
+from collections import deque
+from threading import Lock, Event, Thread
 from enum import Enum
 from gtkmvc3.observable import Observable
 import traceback
 
+from rafcon.core.config import global_config
+from rafcon.core.execution.execution_metrics import measure, HISTORY_METRIC
 from rafcon.core.id_generator import history_item_id_generator
+from rafcon.core.state_elements.scope import is_passed_by_reference
 from rafcon.utils import log
+from rafcon.utils.segmented_log import SegmentedLogWriter
 logger = log.get_logger(__name__)
 import os
 import subprocess
@@ -44,32 +50,202 @@ from weakref import ref
 
 
 class ExecutionHistoryStorage(object):
-    def __init__(self, filename):
+    """A class writing the history items of an execution to a shelve file
+
+    When an item is stored, only a snapshot of its record is taken, see :meth:`HistoryItem.get_record_snapshot`, as
+    the states the items refer to might change afterwards. The snapshots are passed to a background thread via a
+    bounded queue. The thread converts them to records, including pickling their data, and writes them to the file in
+    batches, so that the executing threads are neither slowed down by pickling nor by accessing the file. If the
+    queue is full, the backpressure policy decides what happens to new items:
+
+    * ``"block"``: the executing thread waits until the queue has space again
+    * ``"drop-payload"``: the item is queued without its scoped data and input/output data, whose records are much
+      smaller and thus written faster; the executing thread does not wait, thus the queue might exceed its size by
+      such items
+    * ``"drop-item"``: the item is not logged at all
+
+    :ivar str filename: the path of the shelve file
+    :ivar int queue_size: the number of items in the queue, at which the backpressure policy is applied
+    :ivar str backpressure_policy: one of "block", "drop-payload" and "drop-item"
+    :ivar int batch_size: the maximum number of items written by the background thread at once
+    """
+
+    BACKPRESSURE_POLICIES = ("block", "drop-payload", "drop-item")
+
+    def __init__(self, filename, queue_size=None, backpressure_policy=None, batch_size=100, log_format=None):
         self.filename = filename
+        self.log_format = log_format if log_format is not None else \
+            global_config.get_config_value("EXECUTION_LOG_FORMAT", "segmented")
+        self.queue_size = queue_size if queue_size is not None else \
+            global_config.get_config_value("EXECUTION_LOG_QUEUE_SIZE", 1000)
+        self.backpressure_policy = backpressure_policy if backpressure_policy is not None else \
+            global_config.get_config_value("EXECUTION_LOG_BACKPRESSURE_POLICY", "block")
+        if self.backpressure_policy not in self.BACKPRESSURE_POLICIES:
+            raise ValueError("The backpressure policy must be one of {0}".format(self.BACKPRESSURE_POLICIES))
+        self.batch_size = batch_size
         self.store_lock = Lock()
+        self.store = None
         try:
-            # 'c' for read/write/create
-            # protocol 2 cause of in some cases smaller file size
-            # writeback disabled, cause we don't need caching of entries in memory but continuous writes to the disk
-            self.store = shelve.open(filename, flag='c', protocol=2, writeback=False)
+            self.store = self._open_store()
             logger.debug('Openend log file for writing %s' % self.filename)
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
 
+        # deque.append and deque.popleft are thread-safe, the events are only used to wake up waiting threads
+        self._queue = deque()
+        self._items_available = Event()
+        self._space_available = Event()
+        self._counter_lock = Lock()
+        self._dropped_items = 0
+        self._dropped_payloads = 0
+        self._written_items = 0
+        self._closed = False
+        self._closed_marker = None
+        self._writer = Thread(target=self._write_items, name="ExecutionHistoryStorageWriter")
+        self._writer.daemon = True
+        self._writer.start()
+
+    def _open_store(self):
+        if self.log_format == "shelve":
+            # 'c' for read/write/create
+            # protocol 2 cause of in some cases smaller file size
+            # writeback disabled, cause we don't need caching of entries in memory but continuous writes to the disk
+            return shelve.open(self.filename, flag='c', protocol=2, writeback=False)
+        return SegmentedLogWriter(self.filename)
+
+    @property
+    def queue_depth(self):
+        """The number of items waiting to be written"""
+        return len(self._queue)
+
+    @property
+    def dropped_items(self):
+        """The number of items not logged due to the "drop-item" backpressure policy"""
+        return self._dropped_items
+
+    @property
+    def dropped_payloads(self):
+        """The number of items logged without their data due to the "drop-payload" backpressure policy"""
+        return self._dropped_payloads
+
+    @property
+    def written_items(self):
+        """The number of items written to the file so far"""
+        return self._written_items
+
     def store_item(self, key, value):
-        self.store_lock.acquire()
+        """Queues a record for being written to the file
+
+        :param key: the key of the record, usually the history item id
+        :param dict value: the record
+        """
+        self._enqueue(native_str(key), lambda with_payload: value, is_snapshot=False)
+
+    def store_history_item(self, history_item):
+        """Takes a snapshot of the record of a history item and queues it for being written to the file
+
+        :param HistoryItem history_item: the history item to store
+        """
+        self._enqueue(native_str(history_item.history_item_id),
+                      lambda with_payload: self._get_record_snapshot(history_item, with_payload), is_snapshot=True)
+
+    def _enqueue(self, key, get_value, is_snapshot):
+        """Applies the backpressure policy and queues the value returned by get_value
+
+        :param str key: the key of the record
+        :param get_value: a function returning the record or its snapshot, its argument tells whether to include the
+            payload
+        :param bool is_snapshot: whether the value is a record snapshot, which is converted by the writer thread
+        """
+        if self._closed:
+            logger.error("Cannot store item in closed log file {0}".format(self.filename))
+            return
+        with_payload = True
+        if len(self._queue) >= self.queue_size:
+            if self.backpressure_policy == "drop-item":
+                with self._counter_lock:
+                    self._dropped_items += 1
+                return
+            elif self.backpressure_policy == "drop-payload":
+                with self._counter_lock:
+                    self._dropped_payloads += 1
+                with_payload = False
+        # the snapshot is taken before waiting, as the state might change in the meantime
+        value = get_value(with_payload)
+        if value is None:
+            return
+        if self.backpressure_policy == "block":
+            while len(self._queue) >= self.queue_size and self._writer.is_alive():
+                self._space_available.clear()
+                if len(self._queue) >= self.queue_size:
+                    self._space_available.wait(0.1)
+        self._queue.append((key, value, is_snapshot))
+        self._items_available.set()
+
+    def _write_items(self):
+        while True:
+            self._items_available.wait()
+            self._items_available.clear()
+            while self._queue:
+                # this is the only thread taking items from the queue
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._space_available.set()
+                markers = []
+                written_items = 0
+                with self.store_lock:
+                    for key, value, is_snapshot in batch:
+                        if key is None:  # marker of flush or close
+                            markers.append(value)
+                            continue
+                        try:
+                            self.store[key] = create_record(value) if is_snapshot else value
+                            written_items += 1
+                        except Exception as e:
+                            logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
+                    if self.log_format != "shelve" and written_items:
+                        # make the records visible to readers tailing the log
+                        self.store.sync()
+                self._written_items += written_items
+                for marker in markers:
+                    marker.set()
+                    if marker is self._closed_marker:
+                        return
+
+    @staticmethod
+    def _get_record_snapshot(history_item, with_payload):
         try:
-            self.store[native_str(key)] = value
+            if isinstance(history_item, ScopedDataItem):
+                return history_item.get_record_snapshot(with_payload=with_payload)
+            return history_item.get_record_snapshot()
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
-        finally:
-            self.store_lock.release()
+
+    def _wait_for_written_items(self, close=False):
+        """Waits until all queued items are written
+
+        :param bool close: whether the background thread shall terminate afterwards
+        """
+        marker = Event()
+        if close:
+            self._closed_marker = marker
+        self._queue.append((None, marker, False))
+        self._items_available.set()
+        while not marker.wait(0.1):
+            if not self._writer.is_alive():
+                break
 
     def flush(self):
+        """Writes all queued items to the file and persists it"""
+        if self._closed:
+            return
+        self._wait_for_written_items()
         self.store_lock.acquire()
         try:
-            self.store.close()
-            self.store = shelve.open(self.filename, flag='c', protocol=2, writeback=False)
+            if self.log_format == "shelve":
+                self.store.close()
+                self.store = self._open_store()
+            else:
+                self.store.sync(durable=True)
             logger.debug('Flushed log file %s' % self.filename)
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
@@ -77,30 +253,93 @@ class ExecutionHistoryStorage(object):
             self.store_lock.release()
 
     def close(self, make_read_and_writable_for_all=False):
+        """Writes all queued items to the file and closes it
+
+        The storage is shared by the execution histories of concurrent branches, thus it might be closed several times.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wait_for_written_items(close=True)
         self.store_lock.acquire()
         try:
             self.store.close()
             logger.debug('Closed log file %s' % self.filename)
             if make_read_and_writable_for_all:
-                ret = subprocess.call(['chmod', 'a+rw', self.filename])
+                if os.path.isdir(self.filename):
+                    ret = subprocess.call(['chmod', '-R', 'a+rwX', self.filename])
+                else:
+                    ret = subprocess.call(['chmod', 'a+rw', self.filename])
                 if ret:
                     logger.debug('Could not make log file readable for all. chmod a+rw failed on %s.' % self.filename)
                 else:
                     logger.debug('Set log file readable for all via chmod a+rw, file %s' % self.filename)
+            if self.dropped_items or self.dropped_payloads:
+                logger.warning("{0} history items were not logged and {1} were logged without their data, as "
+                               "the writer of log file {2} could not keep up".format(self.dropped_items,
+                                                                                    self.dropped_payloads,
+                                                                                    self.filename))
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
         finally:
             self.store_lock.release()
-    
+
     def __del__(self):
-        self.store_lock.acquire()
+        if getattr(self, "store", None) is not None:
+            self.close()
+
+
+def _pickle_values(values):
+    """Pickles the values of a dictionary, values which cannot be pickled are stored as strings with the error
+
+    :param dict values: the values by their names
+    :return: the pickled values by their names, the names of values which could not be pickled are prefixed with "!"
+    :rtype: dict
+    """
+    pickled_values = {}
+    for name, value in values.items():
         try:
-            self.store.close()
-            logger.debug('Closed log file %s' % self.filename)
+            pickled_values[name] = pickle.dumps(value)
         except Exception as e:
-            logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
-        finally:
-            self.store_lock.release()
+            pickled_values['!' + name] = (str(e), str(value))
+    return pickled_values
+
+
+def create_record(record_snapshot):
+    """Converts the snapshot of the record of a history item into the record stored in the execution log
+
+    :param dict record_snapshot: the snapshot, see :meth:`HistoryItem.get_record_snapshot`, which is modified
+    :return: the record, whose semantic data, scoped data and input/output data is pickled
+    :rtype: dict
+    """
+    for field in ('semantic_data', 'scoped_data', 'input_output_data'):
+        if field in record_snapshot:
+            record_snapshot[field] = _pickle_values(record_snapshot[field])
+    return record_snapshot
+
+
+def _get_approximate_size(value, seen):
+    """Estimates the memory needed by a value and all values contained in it
+
+    :param value: the value
+    :param set seen: the ids of the values already counted
+    :return: the estimated size in bytes
+    :rtype: int
+    """
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value, 0)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += _get_approximate_size(key, seen) + _get_approximate_size(item, seen)
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        for item in value:
+            size += _get_approximate_size(item, seen)
+    elif hasattr(value, 'nbytes'):
+        # e.g. numpy arrays, whose getsizeof does not include the data in all versions
+        size = max(size, value.nbytes)
+    return size
 
 
 class ExecutionHistory(Observable, Iterable, Sized):
@@ -108,16 +347,35 @@ class ExecutionHistory(Observable, Iterable, Sized):
 
         It stores all history elements in a stack wise fashion.
 
+        If the core config defines a retention policy by EXECUTION_HISTORY_MAX_ITEMS or EXECUTION_HISTORY_MAX_AGE,
+        the oldest items are removed from the history when new items are pushed. If the execution log is enabled,
+        these items are still contained in the log (spilled), otherwise they are dropped. Thus, the history might
+        start with the return items of states, whose call items were removed.
+
+        Iterating the history iterates a snapshot of its items, which is not affected by items pushed or removed
+        concurrently, e.g. while the GUI shows the history of a running state machine.
+
         :ivar initial_prev: optional link to a previous element for the first element pushed into this history of
                             type :class:`rafcon.core.execution.execution_history.HistoryItem`
+        :ivar max_items: the maximum number of items kept in memory, 0 for no limit
+        :ivar max_age: the maximum age in seconds of the items kept in memory, 0 for no limit
     """
 
+    # the last items are required to determine the previously executed state and are thus never removed
+    MIN_RETAINED_ITEMS = 2
+
     def __init__(self, initial_prev=None):
         super(ExecutionHistory, self).__init__()
-        self._history_items = []            
+        self._history_items = deque()
+        # guards all modifications of _history_items and the snapshots taken of it
+        self._history_items_lock = Lock()
         self.initial_prev = initial_prev
         self.execution_history_storage = None
         self.new_execution_command_handled = True
+        self.max_items = global_config.get_config_value("EXECUTION_HISTORY_MAX_ITEMS", 0) or 0
+        self.max_age = global_config.get_config_value("EXECUTION_HISTORY_MAX_AGE", 0) or 0
+        self._evicted_items = 0
+        self._spilled_items = 0
 
     def destroy(self):
         # logger.verbose("Destroy execution history!")
@@ -133,7 +391,16 @@ class ExecutionHistory(Observable, Iterable, Sized):
         self.initial_prev = None
 
     def __iter__(self):
-        return iter(self._history_items)                        
+        return iter(self.get_history_items())
+
+    def get_history_items(self):
+        """Returns a snapshot of the history items
+
+        :return: the history items kept in memory, from the oldest to the newest item
+        :rtype: list[HistoryItem]
+        """
+        with self._history_items_lock:
+            return list(self._history_items)
 
     def set_execution_history_storage(self, execution_history_storage):
         self.execution_history_storage = execution_history_storage
@@ -142,6 +409,8 @@ class ExecutionHistory(Observable, Iterable, Sized):
         return len(self._history_items)
 
     def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.get_history_items()[index]
         return self._history_items[index]
 
     def get_last_history_item(self):
@@ -161,10 +430,74 @@ class ExecutionHistory(Observable, Iterable, Sized):
         if last_history_item is not None:
             last_history_item.next = current_item
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(current_item.history_item_id, current_item.to_dict())
-        self._history_items.append(current_item)
+            self.execution_history_storage.store_history_item(current_item)
+        with self._history_items_lock:
+            self._history_items.append(current_item)
+            if self.max_items or self.max_age:
+                self._apply_retention_policy()
         return current_item
 
+    def _apply_retention_policy(self):
+        """Removes the oldest items exceeding the maximum number of items or the maximum age
+
+        Must be called with the lock of the history items being acquired.
+        """
+        history_items = self._history_items
+        min_timestamp = time.time() - self.max_age if self.max_age else None
+        evicted = False
+        while len(history_items) > self.MIN_RETAINED_ITEMS and \
+                ((self.max_items and len(history_items) > self.max_items) or
+                 (min_timestamp is not None and history_items[0].timestamp < min_timestamp)):
+            self._count_evicted_item(history_items.popleft())
+            evicted = True
+        if evicted:
+            # otherwise, the first item would keep all removed items alive via their prev links
+            history_items[0].unlink_prev()
+
+    def _count_evicted_item(self, history_item):
+        number_of_items = 1
+        spilled_items = 0
+        if isinstance(history_item, ConcurrencyItem):
+            for execution_history in history_item.execution_histories:
+                statistics = execution_history.get_statistics(estimate_memory=False)
+                number_of_items += statistics['items'] + statistics['evicted_items']
+                spilled_items += statistics['spilled_items']
+        if self.execution_history_storage is not None:
+            spilled_items = number_of_items
+        self._evicted_items += number_of_items
+        self._spilled_items += spilled_items
+
+    def get_statistics(self, estimate_memory=True):
+        """Returns statistics about the items of the history, including those of concurrent branches
+
+        :param bool estimate_memory: whether to estimate the memory needed by the scoped data and the input/output
+            data of the items, which requires to visit all data
+        :return: a dictionary with the number of 'items' kept in memory, the number of 'evicted_items' removed by the
+            retention policy, split into 'spilled_items' contained in the execution log and 'dropped_items', and, if
+            requested, the 'payload_bytes' of the kept items. Data shared between items is only counted once.
+        :rtype: dict
+        """
+        statistics = {'items': 0, 'evicted_items': self._evicted_items, 'spilled_items': self._spilled_items}
+        seen = set() if estimate_memory else None
+        if estimate_memory:
+            statistics['payload_bytes'] = 0
+        self._add_item_statistics(statistics, seen)
+        statistics['dropped_items'] = statistics['evicted_items'] - statistics['spilled_items']
+        return statistics
+
+    def _add_item_statistics(self, statistics, seen):
+        for history_item in self.get_history_items():
+            statistics['items'] += 1
+            if isinstance(history_item, ConcurrencyItem):
+                for execution_history in history_item.execution_histories:
+                    statistics['evicted_items'] += execution_history._evicted_items
+                    statistics['spilled_items'] += execution_history._spilled_items
+                    execution_history._add_item_statistics(statistics, seen)
+            elif seen is not None and isinstance(history_item, ScopedDataItem):
+                statistics['payload_bytes'] += _get_approximate_size(history_item.scoped_data, seen) + \
+                    _get_approximate_size(history_item.child_state_input_output_data, seen)
+
+    @measure(HISTORY_METRIC, state_argument=0)
     @Observable.observed
     def push_call_history_item(self, state, call_type, state_for_scoped_data, input_data=None):
         """Adds a new call-history-item to the history item list
@@ -186,6 +519,7 @@ class ExecutionHistory(Observable, Iterable, Sized):
                                state.run_id)
         return self._push_item(last_history_item, return_item)
 
+    @measure(HISTORY_METRIC, state_argument=0)
     @Observable.observed
     def push_return_history_item(self, state, call_type, state_for_scoped_data, output_data=None):
         """Adds a new return-history-item to the history item list
@@ -207,6 +541,7 @@ class ExecutionHistory(Observable, Iterable, Sized):
                                  state.run_id)
         return self._push_item(last_history_item, return_item)
 
+    @measure(HISTORY_METRIC, state_argument=0)
     @Observable.observed
     def push_concurrency_history_item(self, state, number_concurrent_threads):
         """Adds a new concurrency-history-item to the history item list
@@ -228,8 +563,9 @@ class ExecutionHistory(Observable, Iterable, Sized):
     def push_state_machine_start_history_item(self, state_machine, run_id):
         return_item = StateMachineStartItem(state_machine, run_id)
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(return_item.history_item_id, return_item.to_dict())
-        self._history_items.append(return_item)
+            self.execution_history_storage.store_history_item(return_item)
+        with self._history_items_lock:
+            self._history_items.append(return_item)
         return return_item
 
     @Observable.observed
@@ -240,9 +576,14 @@ class ExecutionHistory(Observable, Iterable, Sized):
         :rtype: HistoryItem
         """
         try:
-            return self._history_items.pop()
+            with self._history_items_lock:
+                return self._history_items.pop()
         except IndexError:
-            logger.error("No item left in the history item list in the execution history.")
+            if self._evicted_items:
+                logger.error("No item left in the execution history, older items were removed by the retention "
+                             "policy (EXECUTION_HISTORY_MAX_ITEMS and EXECUTION_HISTORY_MAX_AGE).")
+            else:
+                logger.error("No item left in the history item list in the execution history.")
             return None
 
 
@@ -268,6 +609,7 @@ class HistoryItem(object):
         self.next = None
         self.history_item_id = history_item_id_generator()
         self.state_type = str(type(state).__name__)
+        self._prev_history_item_id = None
 
     def destroy(self):
         self._state_reference = None
@@ -285,10 +627,29 @@ class HistoryItem(object):
         """
         return self._state_reference
 
+    def unlink_prev(self):
+        """Removes the link to the previous item, while keeping its id for the execution log"""
+        prev = self.prev
+        if prev is not None:
+            self._prev_history_item_id = prev.history_item_id
+            self.prev = None
+
     def __str__(self):
         return "HistoryItem with reference state name %s (time: %s)" % (self.state_reference.name, self.timestamp)
 
     def to_dict(self):
+        return create_record(self.get_record_snapshot())
+
+    def get_record_snapshot(self):
+        """Captures the record of the item, without pickling its data
+
+        The snapshot only contains copies of the current properties of the state and references to the data of the
+        item, which is not changed anymore, thus it is cheap to take. It is converted into the record by
+        :func:`create_record`. The semantic data of the state is copied shallowly.
+
+        :return: the snapshot of the record
+        :rtype: dict
+        """
         record = dict()
 
         # here always the correct path is desired
@@ -319,20 +680,13 @@ class HistoryItem(object):
         record['history_item_id'] = self.history_item_id
 
         # semantic data
-        semantic_data_dict = {}
-        for k, v in target_state.semantic_data.items():
-            try:
-                semantic_data_dict[k] = pickle.dumps(v)
-            except Exception as e:
-                semantic_data_dict['!' + k] = (str(e), str(v))
-        record['semantic_data'] = semantic_data_dict
+        record['semantic_data'] = dict(target_state.semantic_data)
 
         record['description'] = target_state.description
 
-        if self.prev is not None:
-            record['prev_history_item_id'] = self.prev.history_item_id
-        else:
-            record['prev_history_item_id'] = None
+        # the item might be unlinked from its predecessor concurrently
+        prev = self.prev
+        record['prev_history_item_id'] = prev.history_item_id if prev is not None else self._prev_history_item_id
         # store the specialized class name as item_type,
         # e.g. CallItem, ReturnItem, StatemachineStartItem when saved
         record['item_type'] = self.__class__.__name__
@@ -350,8 +704,8 @@ class StateMachineStartItem(HistoryItem):
     def __str__(self):
         return "StateMachineStartItem with name %s (time: %s)" % (self.sm_dict['root_state_storage_id'], self.timestamp)
 
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
+    def get_record_snapshot(self):
+        record = HistoryItem.get_record_snapshot(self)
         record.update(self.sm_dict)
         record['call_type'] = 'EXECUTE'
         record['state_name'] = 'StateMachineStartItem'
@@ -381,29 +735,60 @@ class ScopedDataItem(HistoryItem):
         else:
             raise Exception('unkown calltype, neither CONTAINER nor EXECUTE')
         self.call_type = call_type
-        self.scoped_data = {} if state_for_scoped_data is None else copy.deepcopy(state_for_scoped_data._scoped_data)
-        self.child_state_input_output_data = copy.deepcopy(child_state_input_output_data)
+        self.scoped_data = {} if state_for_scoped_data is None else \
+            self._snapshot(state_for_scoped_data._scoped_data, by_data_port_name=False)
+        self.child_state_input_output_data = self._snapshot(child_state_input_output_data, by_data_port_name=True)
 
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
-        scoped_data_dict = {}
-        for k, v in self.scoped_data.items():
-            try:
-                scoped_data_dict[v.name] = pickle.dumps(v.value)
-            except Exception as e:
-                scoped_data_dict['!' + v.name] = (str(e), str(v.value))
-            # logger.debug('TypeError: Could not serialize one of the scoped data port types.')
-            # record['scoped_data'] = json.dumps({'error_type': 'TypeError',
-            #                                     'error_message': e}, cls=JSONObjectEncoder)
-        record['scoped_data'] = scoped_data_dict
-
-        child_state_input_output_dict = {}
-        for k, v in self.child_state_input_output_data.items():
-            try:
-                child_state_input_output_dict[k] = pickle.dumps(v)
-            except Exception as e:
-                child_state_input_output_dict['!' + k] = (str(e), str(v))
-        record['input_output_data'] = child_state_input_output_dict
+    @staticmethod
+    def _snapshot(data, by_data_port_name):
+        """Creates a copy of scoped data or of input/output data, which is not affected by the further execution
+
+        Values passed by reference are shared with the original dictionary and thus with all previous snapshots, as
+        the container states replace their scoped data instead of modifying it. Only the remaining values are deep
+        copied. Thus, the memory needed per history item does not depend on the size of values passed by reference.
+
+        :param dict data: the scoped data or the input/output data
+        :param bool by_data_port_name: whether the keys of the dictionary are data port names
+        :return: the snapshot of the data
+        """
+        if not data:
+            return copy.deepcopy(data)
+        if not global_config.get_config_value("DATA_PASSING_BY_REFERENCE", False) and \
+                not global_config.get_config_value("DATA_PORTS_PASSED_BY_REFERENCE"):
+            return copy.deepcopy(data)
+        snapshot = {}
+        for key, value in data.items():
+            data_port_name = key if by_data_port_name else value.name
+            snapshot[key] = value if is_passed_by_reference(data_port_name) else copy.deepcopy(value)
+        return snapshot
+
+    def to_dict(self, with_payload=True):
+        """Converts the history item into a record of the execution log
+
+        :param bool with_payload: whether to include the scoped data and the input/output data
+        :return: the record
+        :rtype: dict
+        """
+        return create_record(self.get_record_snapshot(with_payload))
+
+    def get_record_snapshot(self, with_payload=True):
+        """Captures the record of the item, without pickling its data, see :meth:`HistoryItem.get_record_snapshot`
+
+        :param bool with_payload: whether to include the scoped data and the input/output data
+        :return: the snapshot of the record
+        :rtype: dict
+        """
+        record = HistoryItem.get_record_snapshot(self)
+        record['call_type'] = self.call_type_str
+        if not with_payload:
+            record['scoped_data'] = {}
+            record['input_output_data'] = {}
+            record['payload_dropped'] = True
+            return record
+
+        # the scoped data and the input/output data of the item are snapshots already
+        record['scoped_data'] = {scoped_data.name: scoped_data.value for scoped_data in self.scoped_data.values()}
+        record['input_output_data'] = dict(self.child_state_input_output_data)
 
         # from rafcon.core.states.container_state import ContainerState
         # if isinstance(self.state_reference, ContainerState):
@@ -420,7 +805,6 @@ class ScopedDataItem(HistoryItem):
         # else:
         #     record['scoped_variables'] = json.dumps({})
 
-        record['call_type'] = self.call_type_str
         return record
 
     def __str__(self):
@@ -437,10 +821,6 @@ class CallItem(ScopedDataItem):
     def __str__(self):
         return "CallItem %s" % (ScopedDataItem.__str__(self))
 
-    def to_dict(self):
-        record = ScopedDataItem.to_dict(self)
-        return record
-
 
 class ReturnItem(ScopedDataItem):
     """A history item to represent the return of a root state call
@@ -452,8 +832,8 @@ class ReturnItem(ScopedDataItem):
     def __str__(self):
         return "ReturnItem %s" % (ScopedDataItem.__str__(self))
 
-    def to_dict(self):
-        record = ScopedDataItem.to_dict(self)
+    def get_record_snapshot(self, with_payload=True):
+        record = ScopedDataItem.get_record_snapshot(self, with_payload)
         if self.outcome is not None:
             record['outcome_name'] = self.outcome.to_dict()['name']
             record['outcome_id'] = self.outcome.to_dict()['outcome_id']
@@ -478,8 +858,8 @@ class ConcurrencyItem(HistoryItem):
     def __str__(self):
         return "ConcurrencyItem %s" % (HistoryItem.__str__(self))
 
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
+    def get_record_snapshot(self):
+        record = HistoryItem.get_record_snapshot(self)
         record['call_type'] = 'CONTAINER'
         return record
 
@@ -0,0 +1,396 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_metrics
+   :synopsis: A module measuring the execution times of states and aggregating them in histograms
+
+The metrics are recorded per state path. For each state, the following durations are measured:
+
+* ``state``: the time from the entry to the exit of the run of the state
+* ``script``: the time spent in the execute function of the script of an execution state
+* ``data_passing``: the time the parent needs to collect the inputs of the state and to store its outputs
+* ``history``: the time needed to create and log the execution history items of the state
+
+Recording is disabled by default and costs a single boolean check per measured call in this case.
+"""
+
+from builtins import object
+from builtins import range
+from functools import wraps
+from bisect import bisect_left
+from threading import Lock, Event, Thread
+from timeit import default_timer as timer
+import json
+import os
+import time
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+from rafcon.utils.constants import RAFCON_TEMP_PATH_BASE
+
+logger = log.get_logger(__name__)
+
+STATE_METRIC = "state"
+SCRIPT_METRIC = "script"
+DATA_PASSING_METRIC = "data_passing"
+HISTORY_METRIC = "history"
+METRICS = (STATE_METRIC, SCRIPT_METRIC, DATA_PASSING_METRIC, HISTORY_METRIC)
+
+JSON_FORMAT = "json"
+PROMETHEUS_FORMAT = "prometheus"
+
+# upper bounds of the histogram buckets in seconds, from 1 us to about 134 s, doubling from bucket to bucket
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** i for i in range(28))
+
+_enabled = False
+_metrics = {}
+_metrics_lock = Lock()
+_dumper = None
+_dumper_lock = Lock()
+
+
+class Histogram(object):
+    """Counts durations in buckets with logarithmically growing bounds
+
+    Besides the bucket counts, the number of durations, their sum and their extreme values are kept, so that mean
+    values and quantile estimates can be derived.
+    """
+
+    __slots__ = ('bucket_counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self):
+        # the last bucket counts the durations exceeding the largest bound
+        self.bucket_counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.
+        self.min = None
+        self.max = None
+
+    def observe(self, duration):
+        self.bucket_counts[bisect_left(BUCKET_BOUNDS, duration)] += 1
+        self.count += 1
+        self.sum += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    def to_dict(self):
+        """Returns the histogram as dictionary with cumulative bucket counts
+
+        :return: a dictionary with the keys 'count', 'sum', 'min', 'max' and 'buckets', the latter being a list of
+            (upper bound, number of durations lower or equal to the bound) pairs
+        :rtype: dict
+        """
+        buckets = []
+        cumulative_count = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS + (float('inf'),), self.bucket_counts):
+            cumulative_count += bucket_count
+            buckets.append((bound, cumulative_count))
+        return {'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max, 'buckets': buckets}
+
+
+class StateMetrics(object):
+    """The histograms and the last entry and exit timestamps of a single state path"""
+
+    __slots__ = ('histograms', 'last_entry', 'last_exit')
+
+    def __init__(self):
+        self.histograms = {}
+        self.last_entry = None
+        self.last_exit = None
+
+    def to_dict(self):
+        metrics_dict = {metric: histogram.to_dict() for metric, histogram in self.histograms.items()}
+        metrics_dict['last_entry'] = self.last_entry
+        metrics_dict['last_exit'] = self.last_exit
+        return metrics_dict
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    """Enables or disables the recording of execution metrics
+
+    Already recorded metrics are kept, when the recording is disabled.
+
+    :param bool enabled: whether to record execution metrics
+    """
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def reset_metrics():
+    """Discards all recorded execution metrics"""
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _get_state_metrics(state_path):
+    state_metrics = _metrics.get(state_path)
+    if state_metrics is None:
+        state_metrics = _metrics[state_path] = StateMetrics()
+    return state_metrics
+
+
+def record_duration(state, metric, duration):
+    """Adds a measured duration to the histogram of the given state and metric
+
+    :param rafcon.core.states.state.State state: the state the duration is attributed to
+    :param str metric: the name of the metric, one of :data:`METRICS`
+    :param float duration: the duration in seconds
+    """
+    state_path = state.get_path()
+    with _metrics_lock:
+        histograms = _get_state_metrics(state_path).histograms
+        histogram = histograms.get(metric)
+        if histogram is None:
+            histogram = histograms[metric] = Histogram()
+        histogram.observe(duration)
+
+
+def _record_entry(state_path):
+    with _metrics_lock:
+        _get_state_metrics(state_path).last_entry = time.time()
+
+
+def _record_exit(state_path, duration):
+    with _metrics_lock:
+        state_metrics = _get_state_metrics(state_path)
+        state_metrics.last_exit = time.time()
+        histogram = state_metrics.histograms.get(STATE_METRIC)
+        if histogram is None:
+            histogram = state_metrics.histograms[STATE_METRIC] = Histogram()
+        histogram.observe(duration)
+
+
+def measure_state_run(state, run):
+    """Wraps the run method of a state, so that its entry, exit and duration are recorded
+
+    If the recording is disabled, the run method is returned unchanged and thus causes no overhead.
+
+    :param rafcon.core.states.state.State state: the state to be run
+    :param run: the run method of the state
+    :return: the run method or its measured replacement
+    """
+    if not _enabled:
+        return run
+
+    def measured_run(*args, **kwargs):
+        state_path = state.get_path()
+        _record_entry(state_path)
+        start = timer()
+        try:
+            return run(*args, **kwargs)
+        finally:
+            _record_exit(state_path, timer() - start)
+    return measured_run
+
+
+def measure(metric, state_argument=None):
+    """Decorator recording the duration of a method in the execution metrics, if the recording is enabled
+
+    :param str metric: the name of the metric, one of :data:`METRICS`
+    :param int state_argument: the index of the positional argument holding the state the duration is attributed to.
+        If None, the duration is attributed to the instance of the method.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not _enabled:
+                return func(self, *args, **kwargs)
+            start = timer()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                duration = timer() - start
+                state = self if state_argument is None else args[state_argument]
+                record_duration(state, metric, duration)
+        return wrapper
+    return decorator
+
+
+def get_metrics():
+    """Returns a snapshot of all recorded execution metrics
+
+    :return: a dictionary mapping the state paths onto dictionaries, which map the names of the metrics onto the
+        dictionaries of their histograms (see :meth:`Histogram.to_dict`) and the keys 'last_entry' and 'last_exit'
+        onto the last timestamps (seconds since the epoch) at which the state was entered and left
+    :rtype: dict
+    """
+    with _metrics_lock:
+        return {state_path: state_metrics.to_dict() for state_path, state_metrics in _metrics.items()}
+
+
+def to_json(metrics=None):
+    """Serializes the execution metrics to JSON
+
+    :param dict metrics: the metrics as returned by :func:`get_metrics`, by default the current metrics
+    :return: the JSON string, in which the infinite bound of the last bucket is written as the string "+Inf"
+    :rtype: str
+    """
+    if metrics is None:
+        metrics = get_metrics()
+
+    def replace_infinite_bound(value):
+        if isinstance(value, dict):
+            return {key: replace_infinite_bound(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [replace_infinite_bound(item) for item in value]
+        return "+Inf" if value == float('inf') else value
+    return json.dumps(replace_infinite_bound(metrics), indent=2, sort_keys=True)
+
+
+def _escape_label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus_text(metrics=None):
+    """Serializes the execution metrics in the text exposition format of Prometheus
+
+    Each metric becomes a histogram family ``rafcon_<metric>_duration_seconds`` with the label ``state_path``. The
+    entry and exit timestamps are exposed as the gauges ``rafcon_state_last_entry_timestamp_seconds`` and
+    ``rafcon_state_last_exit_timestamp_seconds``.
+
+    :param dict metrics: the metrics as returned by :func:`get_metrics`, by default the current metrics
+    :return: the metrics in the Prometheus text format
+    :rtype: str
+    """
+    if metrics is None:
+        metrics = get_metrics()
+    lines = []
+    state_paths = sorted(metrics.keys())
+    for metric in METRICS:
+        name = "rafcon_{0}_duration_seconds".format(metric)
+        lines.append("# HELP {0} Duration of the {1} metric of RAFCON states".format(name, metric))
+        lines.append("# TYPE {0} histogram".format(name))
+        for state_path in state_paths:
+            histogram_dict = metrics[state_path].get(metric)
+            if histogram_dict is None:
+                continue
+            label = 'state_path="{0}"'.format(_escape_label_value(state_path))
+            for bound, cumulative_count in histogram_dict['buckets']:
+                bound = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append('{0}_bucket{{{1},le="{2}"}} {3}'.format(name, label, bound, cumulative_count))
+            lines.append('{0}_sum{{{1}}} {2!r}'.format(name, label, histogram_dict['sum']))
+            lines.append('{0}_count{{{1}}} {2}'.format(name, label, histogram_dict['count']))
+    for key in ('last_entry', 'last_exit'):
+        name = "rafcon_state_{0}_timestamp_seconds".format(key)
+        lines.append("# HELP {0} Timestamp of the {1} of RAFCON states".format(name, key.replace('_', ' ')))
+        lines.append("# TYPE {0} gauge".format(name))
+        for state_path in state_paths:
+            timestamp = metrics[state_path][key]
+            if timestamp is not None:
+                lines.append('{0}{{state_path="{1}"}} {2!r}'.format(name, _escape_label_value(state_path), timestamp))
+    return "\n".join(lines) + "\n"
+
+
+def dump(file_path, dump_format=JSON_FORMAT):
+    """Writes the execution metrics atomically to a file
+
+    :param str file_path: the path of the file
+    :param str dump_format: either "json" or "prometheus"
+    """
+    if dump_format == PROMETHEUS_FORMAT:
+        text = to_prometheus_text()
+    elif dump_format == JSON_FORMAT:
+        text = to_json()
+    else:
+        raise ValueError("Unknown execution metrics format: {0}".format(dump_format))
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    temp_file_path = "{0}.{1}.tmp".format(file_path, os.getpid())
+    with open(temp_file_path, 'w') as metrics_file:
+        metrics_file.write(text)
+    getattr(os, 'replace', os.rename)(temp_file_path, file_path)
+
+
+class MetricsDumper(Thread):
+    """Thread periodically dumping the execution metrics to a file
+
+    :param str file_path: the path of the file
+    :param float interval: the time in seconds between two dumps
+    :param str dump_format: either "json" or "prometheus"
+    """
+
+    def __init__(self, file_path, interval, dump_format=JSON_FORMAT):
+        super(MetricsDumper, self).__init__(name="MetricsDumper")
+        self.daemon = True
+        self.file_path = file_path
+        self.interval = interval
+        self.dump_format = dump_format
+        self._stop_event = Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        try:
+            dump(self.file_path, self.dump_format)
+        except Exception as e:
+            logger.error("Could not dump the execution metrics to {0}: {1}".format(self.file_path, e))
+
+    def stop(self):
+        """Stops the thread and writes the final metrics"""
+        self._stop_event.set()
+        self.join()
+        self.dump()
+
+
+def start_dumping(file_path, interval, dump_format=JSON_FORMAT):
+    """Starts dumping the execution metrics periodically to a file, replacing a previously started dumper
+
+    :param str file_path: the path of the file
+    :param float interval: the time in seconds between two dumps
+    :param str dump_format: either "json" or "prometheus"
+    """
+    global _dumper
+    if dump_format not in (JSON_FORMAT, PROMETHEUS_FORMAT):
+        raise ValueError("Unknown execution metrics format: {0}".format(dump_format))
+    stop_dumping()
+    with _dumper_lock:
+        _dumper = MetricsDumper(file_path, interval, dump_format)
+        _dumper.start()
+
+
+def stop_dumping():
+    """Stops the periodic dump of the execution metrics after writing them a last time"""
+    global _dumper
+    with _dumper_lock:
+        dumper, _dumper = _dumper, None
+    if dumper is not None:
+        dumper.stop()
+
+
+def flush():
+    """Writes the execution metrics right away, if they are dumped periodically"""
+    dumper = _dumper
+    if dumper is not None:
+        dumper.dump()
+
+
+def apply_config():
+    """Enables the recording and the periodic dump of the execution metrics as defined in the core config
+
+    Called before each state machine execution. The dump is only (re)started, if its settings changed.
+    """
+    set_enabled(global_config.get_config_value("EXECUTION_METRICS_ENABLE", False))
+    file_path = global_config.get_config_value("EXECUTION_METRICS_DUMP_PATH", None)
+    if not _enabled or not file_path:
+        stop_dumping()
+        return
+    file_path = file_path.replace('%RAFCON_TEMP_PATH_BASE', RAFCON_TEMP_PATH_BASE)
+    interval = float(global_config.get_config_value("EXECUTION_METRICS_DUMP_INTERVAL", 10.))
+    dump_format = global_config.get_config_value("EXECUTION_METRICS_DUMP_FORMAT", JSON_FORMAT)
+    dumper = _dumper
+    if dumper is None or (dumper.file_path, dumper.interval, dumper.dump_format) != (file_path, interval, dump_format):
+        start_dumping(file_path, interval, dump_format)
@@ -0,0 +1,144 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: multi_instance_execution
+   :synopsis: A module executing many instances of state machines concurrently in one process
+
+Each instance is a copy of the submitted state machine, which is executed by its own execution engine. Thus, the
+execution status, the execution histories and the scoped data of the instances are isolated from each other and from
+the state machines executed by the engine singleton. The instances share the loaded libraries of the library manager,
+the compiled scripts and the global variable manager.
+
+Example of a Monte Carlo evaluation::
+
+    with MultiInstanceExecutor(max_workers=8) as executor:
+        futures = [executor.submit(state_machine, {"seed": seed}) for seed in range(100)]
+        outcomes = [future.result().final_outcome.name for future in futures]
+"""
+
+from builtins import object
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from threading import Lock
+
+from rafcon.core.execution.execution_engine import ExecutionEngine
+from rafcon.core.state_machine_manager import StateMachineManager
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+#: The result of the execution of a state machine instance. The execution histories of the instance can be accessed
+#: via the state machine, they should be destroyed by the caller, when they are no longer needed.
+ExecutionResult = namedtuple("ExecutionResult", ["final_outcome", "output_data", "state_machine"])
+
+
+def create_instance(state_machine, input_data=None):
+    """Creates an instance of a state machine, which can be executed independently of the original
+
+    :param rafcon.core.state_machine.StateMachine state_machine: the state machine to be instantiated
+    :param dict input_data: values for the input data ports of the root state, by their names, overriding the default
+        values
+    :return: the copy of the state machine
+    :rtype: rafcon.core.state_machine.StateMachine
+    :raises exceptions.ValueError: if the root state has no input data port of a given name
+    """
+    instance = copy(state_machine)
+    if input_data:
+        input_data_ports = {port.name: port for port in instance.root_state.input_data_ports.values()}
+        for name, value in input_data.items():
+            if name not in input_data_ports:
+                raise ValueError("The root state of state machine {0} has no input data port '{1}'"
+                                 "".format(state_machine.state_machine_id, name))
+            # the copy is private to the instance, thus its default values can be used to pass the input data
+            input_data_ports[name].default_value = value
+    return instance
+
+
+class MultiInstanceExecutor(object):
+    """Executes instances of state machines concurrently and delivers their results as futures
+
+    :ivar int max_workers: the maximum number of instances being executed at the same time, further instances are
+        queued
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._thread_pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._running_engines = set()
+        self._running_engines_lock = Lock()
+        self._stopped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+        return False
+
+    def submit(self, state_machine, input_data=None):
+        """Submits the execution of an instance of a state machine
+
+        The state machine is copied immediately, later changes of the state machine do not affect the instance.
+
+        :param rafcon.core.state_machine.StateMachine state_machine: the state machine to be executed
+        :param dict input_data: values for the input data ports of the root state, by their names
+        :return: the future of the :class:`ExecutionResult` of the instance
+        :rtype: concurrent.futures.Future
+        """
+        instance = create_instance(state_machine, input_data)
+        return self._thread_pool.submit(self._execute_instance, instance)
+
+    def map(self, state_machine, input_data_list):
+        """Submits the execution of one instance of a state machine per set of input data
+
+        :param rafcon.core.state_machine.StateMachine state_machine: the state machine to be executed
+        :param input_data_list: an iterable of dicts with values for the input data ports of the root state
+        :return: the futures of the :class:`ExecutionResult` of the instances, in the order of the input data
+        :rtype: list
+        """
+        return [self.submit(state_machine, input_data) for input_data in input_data_list]
+
+    def _execute_instance(self, instance):
+        """Executes an instance with its own execution engine and waits for it to finish"""
+        execution_engine = ExecutionEngine(StateMachineManager([instance]))
+        instance.execution_engine = execution_engine
+        # the start is locked, so that a concurrent stop either precedes or follows it
+        with self._running_engines_lock:
+            if self._stopped:
+                raise RuntimeError("The executor was stopped before the instance was started")
+            self._running_engines.add(execution_engine)
+            execution_engine.start(instance.state_machine_id)
+        try:
+            if not execution_engine.join():
+                raise RuntimeError("The execution of state machine {0} could not be started"
+                                   "".format(instance.state_machine_id))
+        finally:
+            with self._running_engines_lock:
+                self._running_engines.discard(execution_engine)
+        root_state = instance.root_state
+        return ExecutionResult(root_state.final_outcome, dict(root_state.output_data), instance)
+
+    def stop(self):
+        """Stops all running instances, the futures of the queued instances raise a RuntimeError"""
+        with self._running_engines_lock:
+            self._stopped = True
+            running_engines = list(self._running_engines)
+        logger.debug("Stop {0} running state machine instances".format(len(running_engines)))
+        for execution_engine in running_engines:
+            execution_engine.stop()
+
+    def shutdown(self, wait=True, stop=False):
+        """Shuts the executor down, no further instances can be submitted afterwards
+
+        :param bool wait: whether to wait for the submitted instances to finish
+        :param bool stop: whether to stop the running and the queued instances
+        """
+        if stop:
+            self.stop()
+        self._thread_pool.shutdown(wait=wait)
@@ -0,0 +1,464 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: process_pool
+   :synopsis: A module executing the scripts of CPU-bound execution states in a pool of worker processes
+
+A script is executed in a worker process, if it defines ``EXECUTE_IN_PROCESS = True`` on module level. Thus, the
+scripts of concurrent execution states do not contend on the GIL. The worker processes are started once and reused.
+
+Within the worker, the ``self`` argument of the execute function is a stand-in for the execution state, providing its
+``name``, ``state_id``, ``logger``, ``persistent_variables``, ``get_path()``, ``preempted`` and
+``wait_for_interruption()``. The ``gvm`` argument forwards all calls to the global variable manager of the RAFCON
+process. The input and output data are pickled, except for numpy arrays exceeding
+EXECUTION_PROCESS_SHARED_MEMORY_THRESHOLD bytes, which are passed as memory-mapped files in shared memory.
+
+The preemption of the state is signalled to the worker with SIGUSR1, which sets the ``preempted`` flag of the
+stand-in. On platforms without SIGUSR1, the worker is terminated instead. Pausing the state is not signalled.
+"""
+
+from builtins import object
+from builtins import range
+import binascii
+import inspect
+import os
+import sys
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import traceback
+import types
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+#: The name of the module level flag of scripts to be executed in a worker process
+EXECUTE_IN_PROCESS_FLAG = "EXECUTE_IN_PROCESS"
+PREEMPTION_SIGNAL = getattr(signal, "SIGUSR1", None)
+# the interval in which the executing thread checks the preemption of the state, while waiting for the worker
+PREEMPTION_POLL_INTERVAL = 0.05
+
+# the kinds of the messages exchanged between the RAFCON process and a worker
+RESULT_MESSAGE = "result"
+ERROR_MESSAGE = "error"
+GVM_REQUEST_MESSAGE = "gvm_request"
+
+GVM_METHODS = frozenset(["set_variable", "get_variable", "variable_can_be_referenced", "delete_variable",
+                         "lock_variable", "unlock_variable", "set_locked_variable", "get_locked_variable",
+                         "variable_exist", "data_type_exist", "is_locked", "get_all_keys_starting_with",
+                         "get_all_keys", "get_representation", "get_data_type"])
+
+AUTHKEY_ENVIRONMENT_VARIABLE = "RAFCON_PROCESS_POOL_AUTHKEY"
+WORKER_COMMAND = "from rafcon.core.execution.process_pool import main; main()"
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def execute_in_process(compiled_module):
+    """Checks whether a script requests to be executed in a worker process
+
+    :param compiled_module: the built module of the script
+    :rtype: bool
+    """
+    return getattr(compiled_module, EXECUTE_IN_PROCESS_FLAG, False) is True
+
+
+def get_process_pool():
+    """Returns the process pool, which is created on the first call
+
+    :return: the process pool
+    :rtype: ProcessPool
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            size = global_config.get_config_value("EXECUTION_PROCESS_POOL_SIZE", 0)
+            _process_pool = ProcessPool(size if size > 0 else multiprocessing.cpu_count())
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """Terminates the idle worker processes of the process pool, a new pool is created on the next use"""
+    global _process_pool
+    with _process_pool_lock:
+        process_pool, _process_pool = _process_pool, None
+    if process_pool is not None:
+        process_pool.shutdown()
+
+
+def _get_shared_memory_path():
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+class SharedArray(object):
+    """A numpy array passed to another process as memory-mapped file
+
+    The receiver maps the file copy-on-write and removes it, thus the array is only copied into shared memory once.
+
+    :ivar str path: the path of the file holding the array
+    """
+
+    def __init__(self, array, directory):
+        import numpy
+        file_descriptor, self.path = tempfile.mkstemp(prefix="rafcon_array_", suffix=".npy", dir=directory)
+        with os.fdopen(file_descriptor, 'wb') as array_file:
+            numpy.save(array_file, array)
+
+    def load(self):
+        import numpy
+        array = numpy.load(self.path, mmap_mode='c')
+        self.remove()
+        return array
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def pack_data(data, threshold, directory):
+    """Replaces large numpy arrays in a dictionary of data by shared arrays
+
+    :param dict data: the data, e.g. the inputs of a state
+    :param int threshold: the minimal size of shared arrays in bytes, 0 to pickle all arrays
+    :param str directory: the directory of the shared memory files
+    :return: the data to be sent
+    :rtype: dict
+    """
+    # numpy is only checked if it was imported by someone else, thus it stays an optional dependency
+    numpy = sys.modules.get('numpy', None)
+    if not threshold or numpy is None:
+        return data
+    packed_data = {}
+    for key, value in data.items():
+        if isinstance(value, numpy.ndarray) and not value.dtype.hasobject and value.nbytes >= threshold:
+            value = SharedArray(value, directory)
+        packed_data[key] = value
+    return packed_data
+
+
+def unpack_data(packed_data):
+    """Maps the shared arrays of received data
+
+    :param dict packed_data: the data created by :func:`pack_data`
+    :return: the data with numpy arrays
+    :rtype: dict
+    """
+    return {key: value.load() if isinstance(value, SharedArray) else value for key, value in packed_data.items()}
+
+
+def remove_shared_arrays(packed_data):
+    """Removes the files of shared arrays, which were not received"""
+    for value in packed_data.values():
+        if isinstance(value, SharedArray):
+            value.remove()
+
+
+def send_message(connection, kind, payload):
+    """Sends a message and replaces payloads which cannot be pickled by an error"""
+    try:
+        connection.send((kind, payload))
+    except Exception as e:
+        error = RuntimeError("The {0} could not be sent to the other process: {1}: {2}"
+                             "".format(kind, type(e).__name__, e))
+        connection.send((ERROR_MESSAGE, (error, "")))
+
+
+def call_global_variable_manager(request):
+    """Executes a call of a worker on the global variable manager
+
+    :param tuple request: the name of the method and its positional and keyword arguments
+    :return: the kind of the reply and its payload, the return value or the raised exception and an empty traceback
+    """
+    import rafcon.core.singleton
+    name, args, kwargs = request
+    if name not in GVM_METHODS:
+        return ERROR_MESSAGE, (AttributeError("The global variable manager has no method '{0}'".format(name)), "")
+    try:
+        return RESULT_MESSAGE, getattr(rafcon.core.singleton.global_variable_manager, name)(*args, **kwargs)
+    except Exception as e:
+        return ERROR_MESSAGE, (e, "")
+
+
+class ProcessPool(object):
+    """A pool of persistent worker processes executing scripts
+
+    :ivar int size: the maximum number of worker processes, scripts wait for a worker if all are busy
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._condition = threading.Condition()
+        self._idle_workers = []
+        self._number_of_workers = 0
+
+    @property
+    def number_of_workers(self):
+        """The number of worker processes currently alive, either busy or idle"""
+        return self._number_of_workers
+
+    def execute(self, script, state, inputs, outputs, backward_execution=False):
+        """Executes a script in a worker process and waits for its result
+
+        :param rafcon.core.script.Script script: the script to be executed
+        :param rafcon.core.states.execution_state.ExecutionState state: the state of the script
+        :param dict inputs: the input data of the script
+        :param dict outputs: the output data of the script, updated with the outputs of the worker
+        :param bool backward_execution: Flag whether to run the script in backwards mode
+        :return: Return value of the execute script
+        """
+        worker = self._acquire_worker()
+        try:
+            return worker.execute(script, state, inputs, outputs, backward_execution)
+        finally:
+            self._release_worker(worker)
+
+    def shutdown(self):
+        """Terminates all idle worker processes"""
+        with self._condition:
+            idle_workers, self._idle_workers = self._idle_workers, []
+            self._number_of_workers -= len(idle_workers)
+        for worker in idle_workers:
+            worker.close()
+
+    def _acquire_worker(self):
+        with self._condition:
+            while not self._idle_workers and self._number_of_workers >= self.size:
+                self._condition.wait()
+            if self._idle_workers:
+                return self._idle_workers.pop()
+            self._number_of_workers += 1
+        try:
+            return WorkerProcess()
+        except Exception:
+            with self._condition:
+                self._number_of_workers -= 1
+                self._condition.notify()
+            raise
+
+    def _release_worker(self, worker):
+        with self._condition:
+            if worker.is_alive():
+                self._idle_workers.append(worker)
+            else:
+                self._number_of_workers -= 1
+            self._condition.notify()
+
+
+class WorkerProcess(object):
+    """A Python process executing one script after another, controlled via a connection
+
+    The process is not started with :mod:`multiprocessing`, as this would import the main module of the RAFCON process
+    in the worker again.
+    """
+
+    def __init__(self):
+        authkey = os.urandom(32)
+        listener = Listener(authkey=authkey)
+        environment = dict(os.environ)
+        environment[AUTHKEY_ENVIRONMENT_VARIABLE] = binascii.hexlify(authkey).decode('ascii')
+        environment['PYTHONPATH'] = os.pathsep.join(path for path in sys.path if path)
+        try:
+            self._process = subprocess.Popen([sys.executable, "-c", WORKER_COMMAND, str(listener.address)],
+                                             env=environment)
+            self._connection = self._accept(listener)
+        finally:
+            listener.close()
+
+    def _accept(self, listener):
+        accepted_connections = []
+        accept_thread = threading.Thread(target=lambda: accepted_connections.append(listener.accept()))
+        accept_thread.daemon = True
+        accept_thread.start()
+        while accept_thread.is_alive():
+            accept_thread.join(0.1)
+            if self._process.poll() is not None:
+                raise RuntimeError("The worker process terminated with exit code {0} before connecting"
+                                   "".format(self._process.returncode))
+        if not accepted_connections:
+            self._process.terminate()
+            raise RuntimeError("The worker process could not connect")
+        return accepted_connections[0]
+
+    def is_alive(self):
+        return self._process.poll() is None
+
+    def close(self):
+        """Stops the worker process"""
+        try:
+            self._connection.send(None)
+        except (IOError, OSError):
+            pass
+        for _ in range(10):
+            if not self.is_alive():
+                break
+            time.sleep(0.1)
+        else:
+            self._process.terminate()
+            self._process.wait()
+        self._connection.close()
+
+    def _preempt(self):
+        if PREEMPTION_SIGNAL is not None:
+            os.kill(self._process.pid, PREEMPTION_SIGNAL)
+        else:
+            self._process.terminate()
+
+    def execute(self, script, state, inputs, outputs, backward_execution=False):
+        """Executes a script in the worker process, see :meth:`ProcessPool.execute`"""
+        threshold = global_config.get_config_value("EXECUTION_PROCESS_SHARED_MEMORY_THRESHOLD", 1048576)
+        directory = _get_shared_memory_path()
+        task = {
+            'script_text': script.script,
+            'filename': script.filename,
+            'name': state.name,
+            'state_id': state.state_id,
+            'path': state.get_path(),
+            'persistent_variables': state.persistent_variables,
+            'inputs': pack_data(inputs, threshold, directory),
+            'outputs': pack_data(outputs, threshold, directory),
+            'backward_execution': backward_execution,
+            'shared_memory_threshold': threshold,
+            'shared_memory_path': directory,
+        }
+        try:
+            self._connection.send(task)
+            preempted = False
+            while True:
+                if not self._connection.poll(PREEMPTION_POLL_INTERVAL):
+                    if not preempted and state.preempted:
+                        preempted = True
+                        self._preempt()
+                    continue
+                try:
+                    kind, payload = self._connection.recv()
+                except (EOFError, IOError, OSError):
+                    if preempted and PREEMPTION_SIGNAL is None:
+                        return None
+                    raise RuntimeError("The worker process executing {0} terminated unexpectedly".format(state))
+                if kind == GVM_REQUEST_MESSAGE:
+                    send_message(self._connection, *call_global_variable_manager(payload))
+                elif kind == ERROR_MESSAGE:
+                    exception, worker_traceback = payload
+                    logger.error("Traceback of {0} in its worker process:\n{1}".format(state, worker_traceback))
+                    raise exception
+                else:
+                    outcome, worker_outputs, persistent_variables = payload
+                    outputs.update(unpack_data(worker_outputs))
+                    state.persistent_variables = persistent_variables
+                    return outcome
+        finally:
+            remove_shared_arrays(task['inputs'])
+            remove_shared_arrays(task['outputs'])
+
+
+class StateStandIn(object):
+    """Stands in for the execution state in the worker process"""
+
+    def __init__(self, name, state_id, path, persistent_variables, preempted_event):
+        self.name = name
+        self.state_id = state_id
+        self.logger = log.get_logger(name)
+        self.persistent_variables = persistent_variables
+        self._path = path
+        self._preempted = preempted_event
+
+    def get_path(self):
+        return self._path
+
+    @property
+    def preempted(self):
+        return self._preempted.is_set()
+
+    @property
+    def paused(self):
+        return False
+
+    def wait_for_interruption(self, timeout=None):
+        return self._preempted.wait(timeout)
+
+
+class GlobalVariableManagerProxy(object):
+    """Forwards the calls of a script in a worker process to the global variable manager of the RAFCON process"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if name not in GVM_METHODS:
+            raise AttributeError("The global variable manager has no method '{0}'".format(name))
+
+        def call(*args, **kwargs):
+            send_message(self._connection, GVM_REQUEST_MESSAGE, (name, args, kwargs))
+            kind, payload = self._connection.recv()
+            if kind == ERROR_MESSAGE:
+                raise payload[0]
+            return payload
+        return call
+
+
+def main():
+    """The entry point of a worker process, connecting to the address passed as first argument"""
+    authkey = binascii.unhexlify(os.environ.pop(AUTHKEY_ENVIRONMENT_VARIABLE))
+    work(Client(sys.argv[1], authkey=authkey))
+
+
+def work(connection):
+    """The main function of a worker process
+
+    :param connection: the connection to the RAFCON process
+    """
+    preempted = threading.Event()
+    if PREEMPTION_SIGNAL is not None:
+        signal.signal(PREEMPTION_SIGNAL, lambda signal_number, frame: preempted.set())
+    # keyboard interrupts are handled by the RAFCON process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    global_variable_manager = GlobalVariableManagerProxy(connection)
+    code_cache = {}
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        preempted.clear()
+        try:
+            code_key = (task['filename'], task['script_text'])
+            if code_key not in code_cache:
+                code_cache[code_key] = compile(task['script_text'], task['filename'], 'exec')
+            module = types.ModuleType(os.path.splitext(task['filename'])[0])
+            exec(code_cache[code_key], module.__dict__)
+
+            state = StateStandIn(task['name'], task['state_id'], task['path'], task['persistent_variables'],
+                                 preempted)
+            inputs = unpack_data(task['inputs'])
+            outputs = unpack_data(task['outputs'])
+            if task['backward_execution']:
+                backward_execute = getattr(module, "backward_execute", None)
+                outcome = backward_execute(state, inputs, outputs, global_variable_manager) \
+                    if backward_execute else None
+            else:
+                outcome = module.execute(state, inputs, outputs, global_variable_manager)
+            if getattr(inspect, "iscoroutine", lambda value: False)(outcome):
+                import asyncio
+                outcome = asyncio.get_event_loop().run_until_complete(outcome)
+            payload = (outcome, pack_data(outputs, task['shared_memory_threshold'], task['shared_memory_path']),
+                       state.persistent_variables)
+            send_message(connection, RESULT_MESSAGE, payload)
+        except Exception as e:
+            send_message(connection, ERROR_MESSAGE, (e, traceback.format_exc()))
@@ -21,26 +21,60 @@
 """
 
 from builtins import str
+import sys
 import time
 import copy
+from future.utils import integer_types, string_types
 from gtkmvc3.observable import Observable
-from threading import Lock, currentThread, RLock
+from threading import Lock, currentThread
 from rafcon.core.id_generator import *
 
 from rafcon.utils.type_helpers import type_inherits_of_type
+from rafcon.utils.rw_lock import ReadWriteLock
 from rafcon.utils import log
 from rafcon.utils import type_helpers
 logger = log.get_logger(__name__)
 
+NUMBER_OF_SHARDS = 16
+
+# values of these types are returned without copying them, as they cannot be changed
+IMMUTABLE_TYPES = (type(None), bool, float, complex, bytes, frozenset) + integer_types + string_types
+
+
+def create_snapshot(value):
+    """Creates an immutable copy of a value
+
+    Values of immutable types are not copied at all. Numpy arrays are copied once into a read-only array, which can
+    be passed to all readers without copying it again. All other values are deep copied.
+
+    :param value: the value to create a snapshot of
+    :return: the snapshot and whether it is immutable
+    :rtype: tuple
+    """
+    if isinstance(value, IMMUTABLE_TYPES):
+        return value, True
+    # numpy is only checked if it was imported by someone else, thus it stays an optional dependency
+    numpy = sys.modules.get('numpy', None)
+    if numpy is not None and isinstance(value, numpy.ndarray) and not value.dtype.hasobject:
+        snapshot = value.copy()
+        snapshot.flags.writeable = False
+        return snapshot, True
+    return copy.deepcopy(value), False
+
 
 class GlobalVariableManager(Observable):
     """A class for organizing all global variables of the state machine
 
+    The variables are distributed to shards by their key. Each shard is protected by a reader-writer lock, thus
+    concurrent readers do not block each other. Variables stored per value are stored as snapshots, immutable
+    snapshots (e.g. of numbers or numpy arrays, which become read-only) are returned without copying them.
+
     :ivar __global_variable_dictionary: the dictionary, where all global variables are stored
-    :ivar __variable_locks: a dictionary that holds one mutex for each global variable
-    :ivar __global_lock: a mutex to prevent that the dictionary is written by two threads simultaneously
+    :ivar __variable_locks: a dictionary that holds one mutex for each global variable, used for explicit locking
+    :ivar __shard_locks: the reader-writer locks of the shards of the dictionary
     :ivar __access_keys: a dictionary that holds an access key to each locked global variable
     :ivar __variable_references: a dictionary that stores whether a variable can be returned by reference or not
+    :ivar __immutable_variables: a dictionary that stores whether the value of a variable is an immutable snapshot
     """
 
     def __init__(self):
@@ -48,9 +82,20 @@ class GlobalVariableManager(Observable):
         self.__global_variable_dictionary = {}
         self.__global_variable_type_dictionary = {}
         self.__variable_locks = {}
-        self.__global_lock = RLock()
+        self.__shard_locks = [ReadWriteLock() for _ in range(NUMBER_OF_SHARDS)]
         self.__access_keys = {}
         self.__variable_references = {}
+        self.__immutable_variables = {}
+
+    def __get_shard_lock(self, key):
+        return self.__shard_locks[hash(key) % NUMBER_OF_SHARDS]
+
+    def __wait_for_unlocked_variable(self, key):
+        """Blocks until an explicitly locked variable is unlocked"""
+        variable_lock = self.__variable_locks.get(key, None)
+        if variable_lock is not None:
+            variable_lock.acquire()
+            variable_lock.release()
 
     @Observable.observed
     def set_variable(self, key, value, per_reference=False, access_key=None, data_type=None):
@@ -72,34 +117,26 @@ class GlobalVariableManager(Observable):
         assert isinstance(data_type, type)
         self.check_value_and_type(value, data_type)
 
-        with self.__global_lock:
-            unlock = True
-            if self.variable_exist(key):
+        # the snapshot is created before locking, thus readers are not blocked while copying
+        if per_reference:
+            immutable = False
+        else:
+            value, immutable = create_snapshot(value)
+
+        with self.__get_shard_lock(key).write_locked():
+            if key in self.__variable_locks:
                 if self.is_locked(key) and self.__access_keys[key] != access_key:
                     raise RuntimeError("Wrong access key for accessing global variable")
-                elif self.is_locked(key):
-                    unlock = False
-                else:
-                    access_key = self.lock_variable(key, block=True)
             else:
                 self.__variable_locks[key] = Lock()
-                access_key = self.lock_variable(key, block=True)
-
-            # --- variable locked
-            if per_reference:
-                self.__global_variable_dictionary[key] = value
-                self.__global_variable_type_dictionary[key] = data_type
-                self.__variable_references[key] = True
-            else:
-                self.__global_variable_dictionary[key] = copy.deepcopy(value)
-                self.__global_variable_type_dictionary[key] = data_type
-                self.__variable_references[key] = False
-            # --- release variable
+                self.__access_keys[key] = None
 
-            if unlock:
-                self.unlock_variable(key, access_key)
+            self.__global_variable_dictionary[key] = value
+            self.__global_variable_type_dictionary[key] = data_type
+            self.__variable_references[key] = bool(per_reference)
+            self.__immutable_variables[key] = immutable
 
-        logger.debug("Global variable '{}' was set to value '{}' with type '{}'".format(key, value, data_type.__name__))
+        logger.debug("Global variable '%s' was set to value '%s' with type '%s'", key, value, data_type.__name__)
 
     def get_variable(self, key, per_reference=None, access_key=None, default=None):
         """Fetches the value of a global variable
@@ -112,39 +149,27 @@ class GlobalVariableManager(Observable):
         :raises exceptions.RuntimeError: if a wrong access key is passed or the variable cannot be accessed by reference
         """
         key = str(key)
-        if self.variable_exist(key):
-            unlock = True
-            if self.is_locked(key):
-                if self.__access_keys[key] == access_key:
-                    unlock = False
-                else:
-                    if not access_key:
-                        access_key = self.lock_variable(key, block=True)
-                    else:
-                        raise RuntimeError("Wrong access key for accessing global variable")
-            else:
-                access_key = self.lock_variable(key, block=True)
-
-            # --- variable locked
-            if self.variable_can_be_referenced(key):
-                if per_reference or per_reference is None:
-                    return_value = self.__global_variable_dictionary[key]
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
-            else:
-                if per_reference:
-                    self.unlock_variable(key, access_key)
-                    raise RuntimeError("Variable cannot be accessed by reference")
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
-            # --- release variable
-
-            if unlock:
-                self.unlock_variable(key, access_key)
-            return return_value
-        else:
-            # logger.warning("Global variable '{0}' not existing, returning default value".format(key))
-            return default
+        if self.is_locked(key) and self.__access_keys[key] != access_key:
+            if access_key:
+                raise RuntimeError("Wrong access key for accessing global variable")
+            self.__wait_for_unlocked_variable(key)
+
+        with self.__get_shard_lock(key).read_locked():
+            if key not in self.__global_variable_dictionary:
+                # logger.warning("Global variable '{0}' not existing, returning default value".format(key))
+                return default
+            value = self.__global_variable_dictionary[key]
+            by_reference = self.__variable_references[key]
+            immutable = self.__immutable_variables[key]
+
+        # copies are created after unlocking, as stored values are never changed in place
+        if by_reference:
+            if per_reference or per_reference is None:
+                return value
+            return copy.deepcopy(value)
+        if per_reference:
+            raise RuntimeError("Variable cannot be accessed by reference")
+        return value if immutable else copy.deepcopy(value)
 
     def variable_can_be_referenced(self, key):
         """Checks whether the value of the variable can be returned by reference
@@ -166,17 +191,17 @@ class GlobalVariableManager(Observable):
         if self.is_locked(key):
             raise RuntimeError("Global variable is locked")
 
-        with self.__global_lock:
+        with self.__get_shard_lock(key).write_locked():
             if key in self.__global_variable_dictionary:
-                access_key = self.lock_variable(key, block=True)
                 del self.__global_variable_dictionary[key]
-                self.unlock_variable(key, access_key)
                 del self.__variable_locks[key]
                 del self.__variable_references[key]
+                del self.__immutable_variables[key]
+                self.__access_keys.pop(key, None)
             else:
                 raise AttributeError("Global variable %s does not exist!" % str(key))
 
-        logger.debug("Global variable %s was deleted!" % str(key))
+        logger.debug("Global variable %s was deleted!", key)
 
     @Observable.observed
     def lock_variable(self, key, block=False):
@@ -296,7 +321,7 @@ class GlobalVariableManager(Observable):
         output_list = []
         if len(self.__global_variable_dictionary) == 0:
             return output_list
-        for g_key in self.__global_variable_dictionary.keys():
+        for g_key in list(self.__global_variable_dictionary.keys()):
             # string comparison
             if g_key and start_key in g_key:
                 output_list.append(g_key)
@@ -310,8 +335,8 @@ class GlobalVariableManager(Observable):
     def global_variable_dictionary(self):
         """Property for the _global_variable_dictionary field"""
         dict_copy = {}
-        for key, value in self.__global_variable_dictionary.items():
-            if key in self.__variable_references and self.__variable_references[key]:
+        for key, value in list(self.__global_variable_dictionary.items()):
+            if self.__variable_references.get(key, False) or self.__immutable_variables.get(key, False):
                 dict_copy[key] = value
             else:
                 dict_copy[key] = copy.deepcopy(value)
@@ -22,6 +22,7 @@ from builtins import range
 import string
 import random
 import uuid
+from threading import Lock
 
 STATE_ID_LENGTH = 6
 RUN_ID_LENGTH = 10
@@ -38,6 +39,9 @@ semantic_data_id_counter = 0
 used_run_ids = []
 used_global_variable_ids = []
 
+# run ids and history item ids are generated concurrently by the states of state machines executed in parallel
+_execution_id_lock = Lock()
+
 
 def generate_state_machine_id():
     """
@@ -110,15 +114,17 @@ def generate_script_id():
 
 def run_id_generator():
     global run_id_counter
-    run_id_counter += 1
-    final_run_id = experiment_id + ".run_id." + '%020d' % run_id_counter
+    with _execution_id_lock:
+        run_id_counter += 1
+        final_run_id = experiment_id + ".run_id." + '%020d' % run_id_counter
     return final_run_id
 
 
 def history_item_id_generator():
     global history_item_id_counter
-    history_item_id_counter += 1
-    final_id = experiment_id + ".history_item_id." + '%020d' % history_item_id_counter
+    with _execution_id_lock:
+        history_item_id_counter += 1
+        final_id = experiment_id + ".history_item_id." + '%020d' % history_item_id_counter
     return final_id
 
 
@@ -20,6 +20,11 @@
 import os
 import shutil
 import copy
+import hashlib
+import pickle
+import time
+from collections import namedtuple
+from threading import Event, Lock, Thread, current_thread
 from gtkmvc3.observable import Observable
 
 from rafcon.core import interface
@@ -28,6 +33,7 @@ from rafcon.core.custom_exceptions import LibraryNotFoundException
 import rafcon.core.config as config
 
 from rafcon.utils import log
+from rafcon.utils.constants import RAFCON_TEMP_PATH_BASE
 logger = log.get_logger(__name__)
 
 try:
@@ -35,6 +41,14 @@ try:
 except ImportError:
     OrderedDict = dict
 
+#: A change of the libraries found by :meth:`LibraryManager.update_libraries`, the change_type is one of 'added',
+#: 'removed' and 'modified'
+LibraryChange = namedtuple('LibraryChange', ['change_type', 'library_path', 'library_name', 'library_os_path'])
+
+# folders modified within this number of seconds before they were listed are listed again during the next update, as
+# the file system might not have a finer resolution for the modification time
+RACY_MODIFICATION_TIME_INTERVAL = 2.
+
 
 class LibraryManager(Observable):
     """This class manages all libraries
@@ -62,15 +76,42 @@ class LibraryManager(Observable):
         self._skipped_states = []
         self._skipped_library_roots = []
 
-        # loaded libraries
+        # the loaded library state machines by their path, whose root states are copied for each library instance
         self._loaded_libraries = {}
         self._libraries_instances = {}
+        self._library_fingerprints = {}
+        self._cache_statistics = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        # the modification times of all library folders, which are not libraries themselves
+        self._folder_modification_times = {}
+        self._update_lock = Lock()
+        self._watcher = None
 
     def prepare_destruction(self):
+        self.stop_watching()
         self.clean_loaded_libraries()
 
     def clean_loaded_libraries(self):
-        self._loaded_libraries.clear()
+        with self._update_lock:
+            self._loaded_libraries.clear()
+            self._library_fingerprints.clear()
+
+    @property
+    def cache_statistics(self):
+        """The hits and misses of the library cache
+
+        A memory hit is a library being instantiated again from the loaded library, a disk hit a library being loaded
+        from the library cache on disk and a miss a library being read from its state machine files.
+
+        :return: a copy of the statistics, the keys are 'memory_hits', 'disk_hits' and 'misses'
+        :rtype: dict
+        """
+        return dict(self._cache_statistics)
+
+    def reset_cache_statistics(self):
+        """Sets all hit and miss counters to zero"""
+        for key in self._cache_statistics:
+            self._cache_statistics[key] = 0
 
     def initialize(self):
         """Initializes the library manager
@@ -81,11 +122,33 @@ class LibraryManager(Observable):
         singleton.py before the state*.pys are loaded
         """
         logger.debug("Initializing LibraryManager: Loading libraries ... ")
-        self._libraries = {}
-        self._library_root_paths = {}
-        self._replaced_libraries = {}
-        self._skipped_states = []
-        self._skipped_library_roots = []
+        self.stop_watching()
+        with self._update_lock:
+            libraries = {}
+            self._library_root_paths = {}
+            self._folder_modification_times = {}
+            self._replaced_libraries = {}
+            self._skipped_states = []
+            self._skipped_library_roots = []
+
+            for library_root_key, library_root_path in self._get_library_root_paths().items():
+                libraries[library_root_key] = self._load_libraries_from_root_path(library_root_key, library_root_path)
+
+            # the new library tree replaces the current one at once, thus readers see either of them
+            self._libraries = OrderedDict(sorted(libraries.items()))
+        logger.debug("Initialization of LibraryManager done")
+
+        watch_interval = config.global_config.get_config_value("LIBRARY_WATCH_INTERVAL", 0)
+        if watch_interval:
+            self.start_watching(watch_interval)
+
+    def _get_library_root_paths(self):
+        """Collects the library root paths from config.yaml and the environment variable RAFCON_LIBRARY_PATH
+
+        :return: the cleaned library root paths by their library root keys
+        :rtype: dict
+        """
+        library_root_paths = OrderedDict()
 
         # 1. Load libraries from config.yaml
         for library_root_key, library_root_path in config.global_config.get_config_value("LIBRARY_PATHS").items():
@@ -93,7 +156,7 @@ class LibraryManager(Observable):
             if os.path.exists(library_root_path):
                 logger.debug("Adding library root key '{0}' from path '{1}'".format(
                     library_root_key, library_root_path))
-                self._load_libraries_from_root_path(library_root_key, library_root_path)
+                library_root_paths[library_root_key] = library_root_path
             else:
                 logger.warning("Configured path for library root key '{}' does not exist: {}".format(
                     library_root_key, library_root_path))
@@ -109,20 +172,18 @@ class LibraryManager(Observable):
                 logger.warning("The library specified in RAFCON_LIBRARY_PATH does not exist: {}".format(library_root_path))
                 continue
             _, library_root_key = os.path.split(library_root_path)
-            if library_root_key in self._libraries:
-                if os.path.realpath(self._library_root_paths[library_root_key]) == os.path.realpath(library_root_path):
+            if library_root_key in library_root_paths:
+                if os.path.realpath(library_root_paths[library_root_key]) == os.path.realpath(library_root_path):
                     logger.info("The library root key '{}' and root path '{}' exists multiple times in your environment"
                                 " and will be skipped.".format(library_root_key, library_root_path))
                 else:
                     logger.warning("The library '{}' is already existing and will be overridden with '{}'".format(
                         library_root_key, library_root_path))
-                    self._load_libraries_from_root_path(library_root_key, library_root_path)
+                    library_root_paths[library_root_key] = library_root_path
             else:
-                self._load_libraries_from_root_path(library_root_key, library_root_path)
+                library_root_paths[library_root_key] = library_root_path
             logger.debug("Adding library '{1}' from {0}".format(library_root_path, library_root_key))
-
-        self._libraries = OrderedDict(sorted(self._libraries.items()))
-        logger.debug("Initialization of LibraryManager done")
+        return library_root_paths
 
     @staticmethod
     def _clean_path(path):
@@ -144,9 +205,9 @@ class LibraryManager(Observable):
 
     def _load_libraries_from_root_path(self, library_root_key, library_root_path):
         self._library_root_paths[library_root_key] = library_root_path
-        self._libraries[library_root_key] = {}
-        self._load_nested_libraries(library_root_path, self._libraries[library_root_key])
-        self._libraries[library_root_key] = OrderedDict(sorted(self._libraries[library_root_key].items()))
+        library_dict = {}
+        self._load_nested_libraries(library_root_path, library_dict)
+        return OrderedDict(sorted(library_dict.items()))
 
     def check_clean_path_of_library(self, folder_path, folder_name):
         library_root_path = self._library_root_paths[self._get_library_root_key_for_os_path(folder_path)]
@@ -168,6 +229,7 @@ class LibraryManager(Observable):
         :param library_path: the path to add all libraries from
         :param target_dict: the target dictionary to store all loaded libraries to
         """
+        self._remember_folder_modification_time(library_path)
         for library_name in os.listdir(library_path):
             library_folder_path, library_name = self.check_clean_path_of_library(library_path, library_name)
             full_library_path = os.path.join(library_path, library_name)
@@ -180,11 +242,196 @@ class LibraryManager(Observable):
                     self._load_nested_libraries(full_library_path, target_dict[library_name])
                     target_dict[library_name] = OrderedDict(sorted(target_dict[library_name].items()))
 
+    def _remember_folder_modification_time(self, folder_path):
+        """Stores the modification time of a library folder before it is listed
+
+        :return: whether the modification time of the folder differs from the stored one
+        :rtype: bool
+        """
+        try:
+            modification_time = os.stat(folder_path).st_mtime
+        except OSError:
+            modification_time = None
+        if modification_time is not None and \
+                modification_time == self._folder_modification_times.get(folder_path, None):
+            return False
+        if modification_time is not None and time.time() - modification_time < RACY_MODIFICATION_TIME_INTERVAL:
+            # changes within the same time step would not be visible, thus the folder is listed again next time
+            modification_time = None
+        self._folder_modification_times[folder_path] = modification_time
+        return True
+
+    def _update_nested_libraries(self, folder_path, library_dict, library_path, changes):
+        """Recursively applies the changes of a library folder to its library dictionary
+
+        Only folders whose modification time changed are listed again. The library dictionaries are not modified, as
+        they might be read concurrently, but changed folders get new dictionaries. Unchanged entries keep their
+        dictionaries.
+
+        :param str folder_path: the os path of the folder
+        :param dict library_dict: the current library dictionary of the folder
+        :param str library_path: the library_path of the libraries within the folder
+        :param list changes: the list to append the found LibraryChanges to
+        :return: the updated library dictionary, which is library_dict itself if neither the folder nor any of its
+                 sub folders changed
+        :rtype: dict
+        """
+        if not self._remember_folder_modification_time(folder_path):
+            updated_library_items = {}
+            for library_name, library_item in library_dict.items():
+                if isinstance(library_item, dict):
+                    updated_library_item = self._update_nested_libraries(
+                        os.path.join(folder_path, library_name), library_item,
+                        library_path + os.sep + library_name, changes)
+                    if updated_library_item is not library_item:
+                        updated_library_items[library_name] = updated_library_item
+            if not updated_library_items:
+                return library_dict
+            updated_library_dict = OrderedDict(library_dict)
+            updated_library_dict.update(updated_library_items)
+            return updated_library_dict
+
+        try:
+            library_names = os.listdir(folder_path)
+        except OSError:
+            library_names = []
+        updated_library_dict = {}
+        for library_name in library_names:
+            full_library_path = os.path.join(folder_path, library_name)
+            if not os.path.isdir(full_library_path) or library_name[0] == '.':
+                continue
+            previous_item = library_dict.get(library_name, None)
+            sub_library_path = library_path + os.sep + library_name
+            if os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE)) \
+                    or os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE_OLD)):
+                updated_library_dict[library_name] = full_library_path
+                if previous_item != full_library_path:
+                    self.check_clean_path_of_library(folder_path, library_name)
+                    if isinstance(previous_item, dict):
+                        self._remove_libraries(previous_item, sub_library_path, changes)
+                    changes.append(LibraryChange('added', library_path, library_name, full_library_path))
+            elif isinstance(previous_item, dict):
+                updated_library_dict[library_name] = self._update_nested_libraries(full_library_path, previous_item,
+                                                                                   sub_library_path, changes)
+            else:
+                self.check_clean_path_of_library(folder_path, library_name)
+                if previous_item is not None:
+                    self._remove_library(library_path, library_name, previous_item, changes)
+                new_library_dict = {}
+                self._load_nested_libraries(full_library_path, new_library_dict)
+                updated_library_dict[library_name] = OrderedDict(sorted(new_library_dict.items()))
+                for added_library in self._iter_libraries(new_library_dict, sub_library_path):
+                    changes.append(LibraryChange('added', *added_library))
+
+        for library_name, previous_item in library_dict.items():
+            if library_name not in updated_library_dict:
+                if isinstance(previous_item, dict):
+                    self._remove_libraries(previous_item, library_path + os.sep + library_name, changes)
+                else:
+                    self._remove_library(library_path, library_name, previous_item, changes)
+        return OrderedDict(sorted(updated_library_dict.items()))
+
+    def _iter_libraries(self, library_dict, library_path):
+        """Yields the library_path, library_name and library_os_path of all libraries within a library dictionary"""
+        for library_name, library_item in library_dict.items():
+            if isinstance(library_item, dict):
+                for library in self._iter_libraries(library_item, library_path + os.sep + library_name):
+                    yield library
+            else:
+                yield library_path, library_name, library_item
+
+    def _remove_libraries(self, library_dict, library_path, changes):
+        for removed_library in list(self._iter_libraries(library_dict, library_path)):
+            self._remove_library(*removed_library, changes=changes)
+
+    def _remove_library(self, library_path, library_name, library_os_path, changes):
+        self._invalidate_loaded_library(library_os_path)
+        changes.append(LibraryChange('removed', library_path, library_name, library_os_path))
+
+    def _invalidate_loaded_library(self, library_os_path):
+        """Removes a library from the loaded libraries, thus it is read again for its next instance
+
+        :return: whether the library was loaded
+        :rtype: bool
+        """
+        self._library_fingerprints.pop(library_os_path, None)
+        return self._loaded_libraries.pop(library_os_path, None) is not None
+
+    def _update_libraries(self):
+        changes = []
+        with self._update_lock:
+            # the updated library tree replaces the current one at once, thus readers see either of them
+            libraries = OrderedDict(self._libraries)
+            for library_root_key, library_root_path in self._library_root_paths.items():
+                libraries[library_root_key] = self._update_nested_libraries(
+                    library_root_path, libraries[library_root_key], library_root_key, changes)
+            self._libraries = libraries
+
+            removed_library_os_paths = set(change.library_os_path for change in changes)
+            for library_os_path, fingerprint in list(self._library_fingerprints.items()):
+                if library_os_path in removed_library_os_paths:
+                    continue
+                if not os.path.isdir(library_os_path) or \
+                        self._get_library_fingerprint(library_os_path) != fingerprint:
+                    self._invalidate_loaded_library(library_os_path)
+                    library_path, library_name = self.get_library_path_and_name_for_os_path(library_os_path)
+                    changes.append(LibraryChange('modified', library_path, library_name, library_os_path))
+        return changes
+
+    def update_libraries(self):
+        """Applies the changes of the library folders to the library tree
+
+        In contrast to :meth:`initialize`, only library folders whose modification time changed are listed again and
+        the loaded libraries are only invalidated if their files changed. The changes are published to all observers
+        with :meth:`notify_library_changes`.
+
+        :return: the found changes
+        :rtype: list[LibraryChange]
+        """
+        changes = self._update_libraries()
+        if changes:
+            self.notify_library_changes(changes)
+        return changes
+
+    @Observable.observed
+    def notify_library_changes(self, changes):
+        """Notifies all observers about changed libraries
+
+        :param list[LibraryChange] changes: the changes of the libraries
+        """
+        for change in changes:
+            logger.debug("Library {0} {1}".format(os.path.join(change.library_path, change.library_name),
+                                                  change.change_type))
+
     @Observable.observed
     def refresh_libraries(self):
-        """Deletes all loaded libraries and reloads them from the file system
+        """Updates the libraries from the file system
+
+        If the library root paths did not change, only changed library folders are listed again, see
+        :meth:`update_libraries`. Otherwise all libraries are searched again.
         """
-        self.initialize()
+        if self._get_library_root_paths() != self._library_root_paths:
+            self.initialize()
+            return
+        self._replaced_libraries = {}
+        self._skipped_states = []
+        self._skipped_library_roots = []
+        self._update_libraries()
+
+    def start_watching(self, interval):
+        """Starts a thread, which updates the libraries periodically from the file system
+
+        :param float interval: the time between two updates in seconds
+        """
+        self.stop_watching()
+        self._watcher = LibraryWatcher(self, interval)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stops the thread updating the libraries, if it runs"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc3
@@ -377,6 +624,9 @@ class LibraryManager(Observable):
     def get_library_state_copy_instance(self, lib_os_path):
         """ A method to get a state copy of the library specified via the lib_os_path.
 
+        A library is loaded once and its state machine serves as template for all instances, which get a copy of its
+        root state. The template itself is never handed out, thus it remains unchanged by edits of the instances.
+
         :param lib_os_path: the location of the library to get a copy for
         :return:
         """
@@ -385,25 +635,117 @@ class LibraryManager(Observable):
         # state_machine = storage.load_state_machine_from_path(lib_os_path)
         # return state_machine.version, state_machine.root_state
 
-        # TODO observe changes on file system and update data
-        if lib_os_path in self._loaded_libraries:
-            # this list can also be taken to open library state machines TODO -> implement it -> because faster
-            state_machine = self._loaded_libraries[lib_os_path]
-            # logger.info("Take copy of {0}".format(lib_os_path))
-            # as long as the a library state root state is never edited so the state first has to be copied here
-            state_copy = copy.deepcopy(state_machine.root_state)
-            return state_machine.version, state_copy
+        # the loaded libraries are invalidated by the library watcher thread, thus they are only read once
+        with self._update_lock:
+            state_machine = self._loaded_libraries.get(lib_os_path, None)
+
+        if state_machine is not None:
+            self._cache_statistics['memory_hits'] += 1
         else:
-            state_machine = storage.load_state_machine_from_path(lib_os_path)
-            self._loaded_libraries[lib_os_path] = state_machine
-            if config.global_config.get_config_value("NO_PROGRAMMATIC_CHANGE_OF_LIBRARY_STATES_PERFORMED", False):
-                return state_machine.version, state_machine.root_state
-            else:
-                state_copy = copy.deepcopy(state_machine.root_state)
-                return state_machine.version, state_copy
+            library_files = self._read_library_files(lib_os_path)
+            state_machine = storage.load_state_machine_from_path(lib_os_path, state_machine_files=library_files)
+            with self._update_lock:
+                self._loaded_libraries[lib_os_path] = state_machine
+        # the states copy themselves from their already validated elements, without the memo of copy.deepcopy
+        return state_machine.version, copy.copy(state_machine.root_state)
+
+    @staticmethod
+    def _get_library_fingerprint(lib_os_path):
+        """Creates a fingerprint of a library from the modification times and sizes of all its files"""
+        file_stats = []
+        for dir_path, dir_names, file_names in os.walk(lib_os_path):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                file_stat = os.stat(os.path.join(dir_path, file_name))
+                file_stats.append((os.path.relpath(os.path.join(dir_path, file_name), lib_os_path),
+                                   file_stat.st_mtime, file_stat.st_size))
+        return hashlib.sha1(repr(file_stats).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _get_library_cache_path():
+        """Returns the directory of the library cache on disk
+
+        :return: the path of the cache or None, if the cache is disabled
+        """
+        library_cache_path = config.global_config.get_config_value("LIBRARY_CACHE_PATH",
+                                                                   "%RAFCON_TEMP_PATH_USER/library_cache")
+        if not library_cache_path:
+            return None
+        return library_cache_path.replace('%RAFCON_TEMP_PATH_USER', os.path.dirname(RAFCON_TEMP_PATH_BASE))
+
+    def _read_library_files(self, lib_os_path):
+        """Reads the files of a library from the library cache on disk or from the library itself
+
+        The library cache holds the files of each library in a single pickle, which is valid as long as the
+        modification times and sizes of the library files do not change.
+
+        :param lib_os_path: the location of the library
+        :return: the files of the library, see rafcon.core.storage.storage.read_state_machine_files
+        """
+        # the fingerprint is also used to detect changes of loaded libraries, see update_libraries
+        fingerprint = self._get_library_fingerprint(lib_os_path)
+        with self._update_lock:
+            self._library_fingerprints[lib_os_path] = fingerprint
+        library_cache_path = self._get_library_cache_path()
+        if library_cache_path is None:
+            self._cache_statistics['misses'] += 1
+            return storage.read_state_machine_files(lib_os_path)
+
+        cache_file_path = os.path.join(library_cache_path,
+                                       hashlib.sha1(lib_os_path.encode('utf-8')).hexdigest() + ".pickle")
+        try:
+            with open(cache_file_path, 'rb') as cache_file:
+                cached_fingerprint, cached_lib_os_path, library_files = pickle.load(cache_file)
+            if cached_fingerprint == fingerprint and cached_lib_os_path == lib_os_path:
+                self._cache_statistics['disk_hits'] += 1
+                return library_files
+        except Exception:
+            # not cached yet or an incompatible cache file
+            pass
+
+        self._cache_statistics['misses'] += 1
+        library_files = storage.read_state_machine_files(lib_os_path)
+        try:
+            if not os.path.isdir(library_cache_path):
+                os.makedirs(library_cache_path)
+            # write to a temporary file first, as other RAFCON instances might read the cache concurrently
+            temporary_file_path = "{0}.{1}.tmp".format(cache_file_path, os.getpid())
+            with open(temporary_file_path, 'wb') as cache_file:
+                pickle.dump((fingerprint, lib_os_path, library_files), cache_file, protocol=2)
+            getattr(os, 'replace', os.rename)(temporary_file_path, cache_file_path)
+        except (IOError, OSError) as e:
+            logger.warning("The library {0} could not be written to the library cache: {1}".format(lib_os_path, e))
+        return library_files
 
     def remove_library_from_file_system(self, library_path, library_name):
         """Remove library from hard disk."""
         library_file_system_path = self.get_os_path_to_library(library_path, library_name)[0]
         shutil.rmtree(library_file_system_path)
         self.refresh_libraries()
+
+
+class LibraryWatcher(Thread):
+    """A thread, which periodically applies changes of the library folders to a library manager
+
+    :param LibraryManager library_manager: the library manager to update
+    :param float interval: the time between two updates in seconds
+    """
+
+    def __init__(self, library_manager, interval):
+        Thread.__init__(self, name="LibraryWatcher")
+        self.daemon = True
+        self._library_manager = library_manager
+        self._interval = interval
+        self._stopped = Event()
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self._library_manager.update_libraries()
+            except Exception as e:
+                logger.exception("The libraries could not be updated: {0}".format(e))
+
+    def stop(self):
+        self._stopped.set()
+        if self is not current_thread():
+            self.join()
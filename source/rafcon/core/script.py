@@ -16,17 +16,27 @@
 
 """
 
-from future.utils import string_types
+from future.utils import string_types, native_str
 from builtins import str
 import os
-import imp
+import sys
+import types
+import inspect
+import hashlib
+import marshal
+from collections import OrderedDict
+from threading import Lock
 import yaml
 from gtkmvc3.observable import Observable
 
 from rafcon.core.id_generator import generate_script_id
+from rafcon.core.config import global_config
+from rafcon.core.execution import process_pool
 import rafcon.core.singleton
 
 from rafcon.utils import filesystem
+from rafcon.utils.hashable import MerkleHashable
+from rafcon.utils.constants import RAFCON_TEMP_PATH_BASE
 from rafcon.core.storage.storage import SCRIPT_FILE
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -36,11 +46,128 @@ DEFAULT_SCRIPT_FILE = "default_script.py"
 
 DEFAULT_SCRIPT = filesystem.read_file(os.path.dirname(__file__), DEFAULT_SCRIPT_FILE)
 
+# the code objects of the recently compiled scripts by the hash of their script text and filename, the least recently
+# used code objects are removed first, if the cache exceeds SCRIPT_CODE_CACHE_SIZE
+_code_cache = OrderedDict()
+_code_cache_lock = Lock()
+_code_cache_statistics = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+# code objects can only be unmarshalled by the Python version, which marshalled them
+CODE_CACHE_FILE_SUFFIX = ".py{0}{1}.code".format(*sys.version_info[:2])
+# coroutine functions (async def) only exist in Python 3
+CO_COROUTINE = getattr(inspect, "CO_COROUTINE", 0)
+is_coroutine = getattr(inspect, "iscoroutine", lambda value: False)
 
-class Script(Observable, yaml.YAMLObject):
+
+def get_code_cache_statistics():
+    """The hits and misses of the code cache of the scripts
+
+    A memory hit is a script compiled before in this process, a disk hit a code object loaded from the code cache on
+    disk and a miss a compiled script.
+
+    :return: a copy of the statistics, the keys are 'memory_hits', 'disk_hits' and 'misses'
+    :rtype: dict
+    """
+    with _code_cache_lock:
+        return dict(_code_cache_statistics)
+
+
+def reset_code_cache_statistics():
+    """Sets all hit and miss counters of the code cache to zero"""
+    with _code_cache_lock:
+        for key in _code_cache_statistics:
+            _code_cache_statistics[key] = 0
+
+
+def clear_code_cache():
+    """Removes all code objects from the code cache in memory"""
+    with _code_cache_lock:
+        _code_cache.clear()
+
+
+def _count_code_cache_access(key):
+    with _code_cache_lock:
+        _code_cache_statistics[key] += 1
+
+
+def _add_to_code_cache(content_hash, code):
+    """Adds a code object to the code cache in memory and removes the least recently used ones exceeding its size
+
+    :param str content_hash: the hash of the script text and filename
+    :param code: the code object
+    """
+    max_size = global_config.get_config_value("SCRIPT_CODE_CACHE_SIZE", 1000)
+    with _code_cache_lock:
+        _code_cache.pop(content_hash, None)
+        _code_cache[content_hash] = code
+        if max_size:
+            while len(_code_cache) > max_size:
+                _code_cache.popitem(last=False)
+
+
+def _get_code_cache_path():
+    """Returns the directory of the code cache on disk
+
+    :return: the path of the cache or None, if the code objects are not stored on disk
+    """
+    code_cache_path = global_config.get_config_value("SCRIPT_CODE_CACHE_PATH", None)
+    if not code_cache_path:
+        return None
+    return code_cache_path.replace('%RAFCON_TEMP_PATH_USER', os.path.dirname(RAFCON_TEMP_PATH_BASE))
+
+
+def compile_script(script_text, filename):
+    """Compiles the text of a script or returns the code object of an identical script compiled before
+
+    Code objects are immutable, thus all scripts with the same text share one code object. The code objects of the
+    SCRIPT_CODE_CACHE_SIZE most recently used scripts are kept in memory. If SCRIPT_CODE_CACHE_PATH is set, the code
+    objects are also stored on disk, similar to the __pycache__ of Python.
+
+    :param str script_text: the source code of the script
+    :param str filename: the filename of the script, which is shown in tracebacks
+    :return: the code object of the script
+    """
+    content_hash = hashlib.sha1((filename + "\0" + script_text).encode('utf-8')).hexdigest()
+    with _code_cache_lock:
+        code = _code_cache.pop(content_hash, None)
+        if code is not None:
+            _code_cache[content_hash] = code
+            _code_cache_statistics['memory_hits'] += 1
+            return code
+
+    code_cache_path = _get_code_cache_path()
+    cache_file_path = None
+    if code_cache_path is not None:
+        cache_file_path = os.path.join(code_cache_path, content_hash + CODE_CACHE_FILE_SUFFIX)
+        try:
+            with open(cache_file_path, 'rb') as cache_file:
+                code = marshal.load(cache_file)
+        except Exception:
+            # not cached yet or an incompatible cache file
+            code = None
+    if code is not None:
+        _count_code_cache_access('disk_hits')
+    else:
+        _count_code_cache_access('misses')
+        code = compile(script_text, '%s (%s)' % (filename, content_hash[:10]), 'exec')
+        if cache_file_path is not None:
+            try:
+                if not os.path.isdir(code_cache_path):
+                    os.makedirs(code_cache_path)
+                temporary_file_path = "{0}.{1}.tmp".format(cache_file_path, os.getpid())
+                with open(temporary_file_path, 'wb') as cache_file:
+                    marshal.dump(code, cache_file)
+                getattr(os, 'replace', os.rename)(temporary_file_path, cache_file_path)
+            except (IOError, OSError) as e:
+                logger.warning("The script {0} could not be written to the code cache: {1}".format(filename, e))
+    _add_to_code_cache(content_hash, code)
+    return code
+
+
+class Script(Observable, yaml.YAMLObject, MerkleHashable):
     """A class for representing the script file for all execution states in a state machine.
 
-    It inherits from Observable to make a change of its fields observable.
+    It inherits from Observable to make a change of its fields observable. As part of the hash of its state, it
+    caches the digest of its script text, see :class:`rafcon.utils.hashable.MerkleHashable`.
 
     :ivar path: the path where the script resides
     :ivar filename: the full name of the script file
@@ -77,14 +204,27 @@ class Script(Observable, yaml.YAMLObject):
         if not isinstance(value, string_types):
             raise ValueError("The script text needs to be string")
         self._script = value
+        # the script text is not observed, thus the cached digests of the script and its state are invalidated here
+        self.invalidate_hash()
+
+    def update_hash(self, obj_hash):
+        obj_hash.update(self.get_object_hash_string(self._script))
+
+    def get_hash_parent(self):
+        return self.parent
 
-    def execute(self, state, inputs=None, outputs=None, backward_execution=False):
+    def execute(self, state, inputs=None, outputs=None, backward_execution=False, await_coroutine=True):
         """Execute the user 'execute' function specified in the script
 
+        If the script sets EXECUTE_IN_PROCESS to True, it is executed in a worker process, see
+        :mod:`rafcon.core.execution.process_pool`. If the execute function is a coroutine function, the coroutine is
+        executed on the event loop thread, see :mod:`rafcon.core.execution.event_loop`.
+
         :param ExecutionState state: the state belonging to the execute function, refers to 'self'
         :param dict inputs: the input data of the script
         :param dict outputs: the output data of the script
         :param bool backward_execution: Flag whether to run the script in backwards mode
+        :param bool await_coroutine: whether to wait for the result of a coroutine, otherwise the coroutine is returned
         :return: Return value of the execute script
         :rtype: str | int
         """
@@ -92,17 +232,37 @@ class Script(Observable, yaml.YAMLObject):
             outputs = {}
         if not inputs:
             inputs = {}
+        if process_pool.execute_in_process(self._compiled_module):
+            return process_pool.get_process_pool().execute(self, state, inputs, outputs, backward_execution)
         if backward_execution:
             if hasattr(self._compiled_module, "backward_execute"):
-                return self._compiled_module.backward_execute(
+                result = self._compiled_module.backward_execute(
                     state, inputs, outputs, rafcon.core.singleton.global_variable_manager
                 )
             else:
                 logger.debug("No backward execution method found for state %s" % state.name)
                 return None
         else:
-            return self._compiled_module.execute(state, inputs, outputs,
-                                                 rafcon.core.singleton.global_variable_manager)
+            result = self._compiled_module.execute(state, inputs, outputs,
+                                                   rafcon.core.singleton.global_variable_manager)
+        if await_coroutine and is_coroutine(result):
+            from rafcon.core.execution.event_loop import run_script_coroutine
+            return run_script_coroutine(state, result)
+        return result
+
+    def is_coroutine_function(self, function_name="execute"):
+        """Checks whether the script defines a function of the given name with `async def`
+
+        Only the code object of the script is inspected, the script is not executed.
+
+        :param str function_name: the name of the function defined on module level
+        :rtype: bool
+        """
+        code = compile_script(self.script, self.filename)
+        for constant in code.co_consts:
+            if isinstance(constant, types.CodeType) and constant.co_name == function_name:
+                return bool(constant.co_flags & CO_COROUTINE)
+        return False
 
     def _load_script(self):
         """Loads the script from the filesystem
@@ -119,26 +279,23 @@ class Script(Observable, yaml.YAMLObject):
     def build_module(self):
         """Builds a temporary module from the script file
 
+        The code object is taken from the code cache, see :func:`compile_script`. The module is not registered in
+        sys.modules, thus the global import lock is not needed.
+
         :raises exceptions.IOError: if the compilation of the script module failed
         """
-        try:
-            imp.acquire_lock()
-            module_name = os.path.splitext(self.filename)[0] + str(self._script_id)
+        module_name = os.path.splitext(self.filename)[0] + str(self._script_id)
+        tmp_module = types.ModuleType(native_str(module_name))
 
-            # load module
-            tmp_module = imp.new_module(module_name)
+        code = compile_script(self.script, self.filename)
 
-            code = compile(self.script, '%s (%s)' % (self.filename, self._script_id), 'exec')
+        try:
+            exec(code, tmp_module.__dict__)
+        except RuntimeError as e:
+            raise IOError("The compilation of the script module failed - error message: %s" % str(e))
 
-            try:
-                exec(code, tmp_module.__dict__)
-            except RuntimeError as e:
-                raise IOError("The compilation of the script module failed - error message: %s" % str(e))
-
-            # return the module
-            self.compiled_module = tmp_module
-        finally:
-            imp.release_lock()
+        # return the module
+        self.compiled_module = tmp_module
 
     @classmethod
     def to_yaml(cls, dumper, data):
@@ -40,6 +40,7 @@ from rafcon.core.config import global_config
 import rafcon.core.singleton as core_singletons
 from rafcon.core.storage import storage
 from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core.decorators import set_headless_mode
 
 from rafcon.utils import plugins
 from rafcon.utils import log
@@ -267,6 +268,10 @@ def main():
 
     post_setup_plugins(user_input)
 
+    if not user_input.remote:
+        # no GUI is attached, thus execution data can be written without locking the state machine
+        set_headless_mode(True)
+
     first_sm = None
     for sm_path in user_input.state_machine_path:
         sm = open_state_machine(sm_path)
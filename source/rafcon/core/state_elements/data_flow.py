@@ -119,6 +119,17 @@ class DataFlow(StateElement):
             'to_key': state_element.to_key
         }
 
+    def _notify_parent_about_ports_change(self, old_origin, old_target):
+        """Informs the parent state about modified ports to keep its data flow indices up to date
+
+        :param tuple old_origin: The (from_state, from_key) tuple before the modification
+        :param tuple old_target: The (to_state, to_key) tuple before the modification
+        """
+        parent = self.parent
+        if parent is not None and (old_origin != (self._from_state, self._from_key) or
+                                   old_target != (self._to_state, self._to_key)):
+            parent.data_flow_ports_changed(self, old_origin, old_target)
+
 #########################################################################
 # Properties for all class field that must be observed by the gtkmvc3
 #########################################################################
@@ -147,6 +158,7 @@ class DataFlow(StateElement):
             self._from_state = old_from_state
             self._from_key = old_from_key
             raise ValueError("The data flow origin could not be changed: {0}".format(message))
+        self._notify_parent_about_ports_change((old_from_state, old_from_key), (self._to_state, self._to_key))
 
     @property
     def from_state(self):
@@ -161,7 +173,9 @@ class DataFlow(StateElement):
         if not isinstance(from_state, string_types):
             raise ValueError("from_state must be a string")
 
+        old_origin, old_target = (self._from_state, self._from_key), (self._to_state, self._to_key)
         self._change_property_with_validity_check('_from_state', from_state)
+        self._notify_parent_about_ports_change(old_origin, old_target)
 
     @property
     def from_key(self):
@@ -176,7 +190,9 @@ class DataFlow(StateElement):
         if not isinstance(from_key, int):
             raise ValueError("from_key must be of type int")
 
+        old_origin, old_target = (self._from_state, self._from_key), (self._to_state, self._to_key)
         self._change_property_with_validity_check('_from_key', from_key)
+        self._notify_parent_about_ports_change(old_origin, old_target)
 
     @lock_state_machine
     @Observable.observed
@@ -202,6 +218,7 @@ class DataFlow(StateElement):
             self._to_state = old_to_state
             self._to_key = old_to_key
             raise ValueError("The data flow target could not be changed: {0}".format(message))
+        self._notify_parent_about_ports_change((self._from_state, self._from_key), (old_to_state, old_to_key))
 
     @property
     def to_state(self):
@@ -216,7 +233,9 @@ class DataFlow(StateElement):
         if not isinstance(to_state, string_types):
             raise ValueError("to_state must be a string")
 
+        old_origin, old_target = (self._from_state, self._from_key), (self._to_state, self._to_key)
         self._change_property_with_validity_check('_to_state', to_state)
+        self._notify_parent_about_ports_change(old_origin, old_target)
 
     @property
     def to_key(self):
@@ -231,7 +250,9 @@ class DataFlow(StateElement):
         if not isinstance(to_key, int):
             raise ValueError("to_key must be of type int")
 
+        old_origin, old_target = (self._from_state, self._from_key), (self._to_state, self._to_key)
         self._change_property_with_validity_check('_to_key', to_key)
+        self._notify_parent_about_ports_change(old_origin, old_target)
 
     @property
     def data_flow_id(self):
@@ -148,6 +148,8 @@ class DataPort(StateElement):
                         "This name is internally used for error propagation as well. "
                         "Only proceed if you know, what you are doing, otherwise rename the data port.")
         self._change_property_with_validity_check('_name', name)
+        if self.parent is not None:
+            self.parent.data_port_name_changed()
 
     @property
     def data_type(self):
@@ -22,9 +22,10 @@ import time
 
 from gtkmvc3.observable import Observable
 
+from rafcon.core.config import global_config
 from rafcon.core.state_elements.state_element import StateElement
 from rafcon.core.state_elements.data_port import DataPort
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import observed_unless_headless
 from rafcon.utils import type_helpers
 
 
@@ -45,6 +46,21 @@ def get_human_readable_time(timestamp):
     return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
 
 
+def is_passed_by_reference(data_port_name):
+    """Checks whether the value of a data port is passed by reference between states
+
+    This is the case if either DATA_PASSING_BY_REFERENCE is enabled or the name of the data port is listed in
+    DATA_PORTS_PASSED_BY_REFERENCE. All other values are deep copied whenever they are read from the scoped data.
+    Values passed by reference must not be modified in place by the states, but have to be replaced by new objects.
+
+    :param str data_port_name: the name of the data port
+    :return: True, if the value of the data port is not copied
+    """
+    if global_config.get_config_value("DATA_PASSING_BY_REFERENCE", False):
+        return True
+    return data_port_name in global_config.get_config_value("DATA_PORTS_PASSED_BY_REFERENCE", ())
+
+
 class ScopedVariable(DataPort):
     """A class for representing a scoped variable in a container state
 
@@ -174,8 +190,7 @@ class ScopedData(StateElement):
         return self._name
 
     @name.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_headless
     def name(self, name):
         if not isinstance(name, string_types):
             raise TypeError("key_name must be a string")
@@ -191,8 +206,7 @@ class ScopedData(StateElement):
         return self._value
 
     @value.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_headless
     def value(self, value):
         # check for primitive data types
         if value is not None and not type_helpers.type_inherits_of_type(type(value), self.value_type):
@@ -216,8 +230,7 @@ class ScopedData(StateElement):
         return self._value_type
 
     @value_type.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_headless
     def value_type(self, value_type):
         self._value_type = type_helpers.convert_string_to_type(value_type)
 
@@ -229,8 +242,7 @@ class ScopedData(StateElement):
         return self._from_state
 
     @from_state.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_headless
     def from_state(self, from_state):
         if from_state is not None:
             if not isinstance(from_state, string_types):
@@ -248,8 +260,7 @@ class ScopedData(StateElement):
         return self._data_port_type
 
     @data_port_type.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_headless
     def data_port_type(self, data_port_type):
         if not issubclass(data_port_type, DataPort):
             raise TypeError("data_port_type must be a subclass of DataPort")
@@ -265,8 +276,7 @@ class ScopedData(StateElement):
     # WARNING: This setter function should never be used, as the timestamp is generated when the setter function of
     # the self._result variable is called
     @timestamp.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_headless
     def timestamp(self, timestamp):
         if not isinstance(timestamp, float):
             raise TypeError("timestamp must be of type float")
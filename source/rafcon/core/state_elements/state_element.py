@@ -28,12 +28,12 @@ from rafcon.core.custom_exceptions import RecoveryModeException
 from rafcon.core.config import global_config
 from rafcon.core.decorators import lock_state_machine
 from rafcon.utils import log
-from rafcon.utils.hashable import Hashable
+from rafcon.utils.hashable import Hashable, MerkleHashable
 
 logger = log.get_logger(__name__)
 
 
-class StateElement(Observable, YAMLObject, JSONObject, Hashable):
+class StateElement(Observable, YAMLObject, JSONObject, MerkleHashable):
     """A abstract base class for all elements of a state (ports, connections)
 
     It inherits from Observable to make a change of its fields observable. It also inherits from YAMLObject,
@@ -145,6 +145,14 @@ class StateElement(Observable, YAMLObject, JSONObject, Hashable):
     def update_hash(self, obj_hash):
         return Hashable.update_hash_from_dict(obj_hash, self.to_dict())
 
+    def get_hash_parent(self):
+        return self.parent
+
+    def _notify_method_after(self, instance, name, res_val, args, kwargs):
+        # all changes of the data fields of a state element are observed, thus the cached digest is invalidated here
+        self.invalidate_hash()
+        super(StateElement, self)._notify_method_after(instance, name, res_val, args, kwargs)
+
     @classmethod
     def from_dict(cls, dictionary):
         raise NotImplementedError()
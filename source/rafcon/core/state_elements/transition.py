@@ -103,6 +103,15 @@ class Transition(StateElement):
             'to_outcome': state_element.to_outcome
         }
 
+    def _notify_parent_about_origin_change(self, old_origin):
+        """Informs the parent state about a modified origin to keep its transition index up to date
+
+        :param tuple old_origin: The (from_state, from_outcome) tuple before the modification
+        """
+        parent = self.parent
+        if parent is not None and old_origin != (self._from_state, self._from_outcome):
+            parent.transition_origin_changed(self, old_origin)
+
 #########################################################################
 # Properties for all class field that must be observed by the gtkmvc3
 #########################################################################
@@ -132,6 +141,7 @@ class Transition(StateElement):
             self._from_state = old_from_state
             self._from_outcome = old_from_outcome
             raise ValueError("The transition origin could not be changed: {0}".format(message))
+        self._notify_parent_about_origin_change((old_from_state, old_from_outcome))
 
     @lock_state_machine
     @Observable.observed
@@ -174,7 +184,9 @@ class Transition(StateElement):
         if from_state is not None and not isinstance(from_state, string_types):
             raise ValueError("from_state must be a string")
 
+        old_origin = (self._from_state, self._from_outcome)
         self._change_property_with_validity_check('_from_state', from_state)
+        self._notify_parent_about_origin_change(old_origin)
 
     @property
     def from_outcome(self):
@@ -190,7 +202,9 @@ class Transition(StateElement):
         if from_outcome is not None and not isinstance(from_outcome, int):
             raise ValueError("from_outcome must be of type int")
 
+        old_origin = (self._from_state, self._from_outcome)
         self._change_property_with_validity_check('_from_outcome', from_outcome)
+        self._notify_parent_about_origin_change(old_origin)
 
     @property
     def to_state(self):
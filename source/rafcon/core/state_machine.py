@@ -28,6 +28,7 @@ from contextlib import contextmanager
 from copy import copy
 from threading import RLock
 from datetime import datetime
+from itertools import count
 
 from gtkmvc3.observable import Observable
 from jsonconversion.jsonobject import JSONObject
@@ -36,7 +37,7 @@ import rafcon
 from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage
 from rafcon.core.id_generator import generate_state_machine_id, run_id_generator
 from rafcon.utils import log
-from rafcon.utils.hashable import Hashable
+from rafcon.utils.hashable import Hashable, MerkleHashable, diff_hash_trees
 from rafcon.utils.storage_utils import get_current_time_string
 import time
 
@@ -46,8 +47,11 @@ import os
 
 logger = log.get_logger(__name__)
 
+# counts the execution logs created by this process, next() of the counter is atomic
+_execution_log_counter = count(1)
 
-class StateMachine(Observable, JSONObject, Hashable):
+
+class StateMachine(Observable, JSONObject, MerkleHashable):
     """A class for to organizing all main components of a state machine
 
     It inherits from Observable to make a change of its fields observable.
@@ -55,9 +59,14 @@ class StateMachine(Observable, JSONObject, Hashable):
     :ivar int StateMachine.state_machine_id: the id of the state machine
     :ivar rafcon.core.states.state StateMachine.root_state: the root state of the state machine
     :ivar str StateMachine.base_path: the path, where to save the state machine
+    :ivar rafcon.core.execution.execution_engine.ExecutionEngine StateMachine.execution_engine: the engine
+        executing the state machine, if it is not executed by the engine singleton
     """
 
     state_machine_id = None
+    execution_engine = None
+    # the hierarchy version and the indices of all states cached by _get_state_registry
+    _state_registry = (-1, None, None)
     version = None
 
     old_marked_dirty = True
@@ -121,7 +130,30 @@ class StateMachine(Observable, JSONObject, Hashable):
         return self.state_machine_to_dict(self)
 
     def update_hash(self, obj_hash):
-        self.root_state.update_hash(obj_hash)
+        Hashable.update_hash_from_dict(obj_hash, self.root_state)
+
+    def get_hash_children(self):
+        return {self.root_state.state_id: self.root_state} if self.root_state else {}
+
+    def _notify_method_after(self, instance, name, res_val, args, kwargs):
+        self.invalidate_hash()
+        super(StateMachine, self)._notify_method_after(instance, name, res_val, args, kwargs)
+
+    def diff(self, other_state_machine):
+        """Determines the differences to another state machine by comparing the digests of their subtrees
+
+        Only subtrees with different digests are compared element by element. As the digests are cached until the
+        next change, comparing a state machine to a modified copy only hashes the modified elements again.
+
+        :param StateMachine other_state_machine: The state machine to compare with
+        :return: The path of each differing state or state element with either "added", "removed" or "changed",
+            e.g. ("ROOT_ID/CHILD_ID/transitions:3", "removed"); the parents of a changed element are listed as changed
+            too
+        :rtype: list[(str, str)]
+        """
+        from rafcon.core.states.state import PATH_SEPARATOR
+        return [(PATH_SEPARATOR.join(path), change) for path, change in diff_hash_trees(self, other_state_machine)
+                if path]
 
     @staticmethod
     def state_machine_to_dict(state_machine):
@@ -206,6 +238,9 @@ class StateMachine(Observable, JSONObject, Hashable):
                 raise AttributeError("root_state has to be of type State")
             root_state.parent = self
         self._root_state = root_state
+        # the registry of the states might have been rebuilt for the old root state while setting the parent
+        from rafcon.core.states.state import _increment_hierarchy_version
+        _increment_hierarchy_version()
 
     @property
     def execution_histories(self):
@@ -220,6 +255,23 @@ class StateMachine(Observable, JSONObject, Hashable):
             execution_history.destroy()
         self.clear_execution_histories()
 
+    def get_execution_history_statistics(self, estimate_memory=True):
+        """Returns the statistics of the execution histories of all runs of the state machine
+
+        :param bool estimate_memory: whether to estimate the memory needed by the data of the history items
+        :return: the statistics of :meth:`ExecutionHistory.get_statistics`, summed over all execution histories,
+            and the number of 'execution_histories'
+        :rtype: dict
+        """
+        statistics = dict.fromkeys(['execution_histories', 'items', 'evicted_items', 'spilled_items', 'dropped_items'], 0)
+        if estimate_memory:
+            statistics['payload_bytes'] = 0
+        for execution_history in list(self._execution_histories):
+            statistics['execution_histories'] += 1
+            for key, value in execution_history.get_statistics(estimate_memory).items():
+                statistics[key] += value
+        return statistics
+
     @Observable.observed
     def _add_new_execution_history(self):
         new_execution_history = ExecutionHistory()
@@ -230,10 +282,14 @@ class StateMachine(Observable, JSONObject, Hashable):
                 base_dir = base_dir.replace('%RAFCON_TEMP_PATH_BASE', RAFCON_TEMP_PATH_BASE)
             if not os.path.exists(base_dir):
                 os.makedirs(base_dir)
-            shelve_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s.shelve' %
-                                       (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
-                                        self.root_state.name.replace(' ', '-')))
-            execution_history_store = ExecutionHistoryStorage(shelve_name)
+            log_format = global_config.get_config_value("EXECUTION_LOG_FORMAT", "segmented")
+            # the id of the state machine, the process id and a counter make the name unique, even for instances of
+            # the same state machine started within the same second
+            log_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s_sm-%s_%d-%d.%s' %
+                                    (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
+                                     self.root_state.name.replace(' ', '-'), self.state_machine_id, os.getpid(),
+                                     next(_execution_log_counter), 'shelve' if log_format == 'shelve' else 'log'))
+            execution_history_store = ExecutionHistoryStorage(log_name, log_format=log_format)
             new_execution_history.set_execution_history_storage(execution_history_store)
         self._execution_histories.append(new_execution_history)
         return new_execution_history
@@ -267,12 +323,79 @@ class StateMachine(Observable, JSONObject, Hashable):
         self.old_marked_dirty = self._marked_dirty
         self._marked_dirty = marked_dirty
 
+    def _get_state_registry(self):
+        """Returns the indices of all states of the state machine by their path and by their state id
+
+        The indices are rebuilt after the parent or the id of any state has changed, see
+        :func:`rafcon.core.states.state.get_hierarchy_version`. Library states are indexed including their state copy.
+
+        :return: the states by path and the tuples of states by state id
+        :rtype: (dict, dict)
+        """
+        from rafcon.core.states.state import get_hierarchy_version, PATH_SEPARATOR
+        # the version is read before walking the hierarchy, thus changes in between invalidate the result
+        version = get_hierarchy_version()
+        cached_version, states_by_path, states_by_id = self._state_registry
+        if cached_version == version:
+            return states_by_path, states_by_id
+
+        from rafcon.core.states.container_state import ContainerState
+        from rafcon.core.states.library_state import LibraryState
+        states_by_path = {}
+        states_by_id = {}
+        pending_states = [(self.root_state, self.root_state.state_id)] if self.root_state is not None else []
+        while pending_states:
+            state, path = pending_states.pop()
+            states_by_path[path] = state
+            states_by_id[state.state_id] = states_by_id.get(state.state_id, ()) + (state,)
+            if isinstance(state, LibraryState):
+                child_states = [state.state_copy] if state.state_copy is not None else []
+            elif isinstance(state, ContainerState):
+                child_states = list(state.states.values())
+            else:
+                child_states = []
+            pending_states.extend((child_state, path + PATH_SEPARATOR + child_state.state_id)
+                                  for child_state in child_states)
+        self._state_registry = (version, states_by_path, states_by_id)
+        return states_by_path, states_by_id
+
+    def get_states_by_id(self, state_id):
+        """Returns all states of the state machine with the given state id
+
+        State ids are only unique among sibling states, e.g. the copies of the same library contain equal state ids.
+
+        :param str state_id: the id of the searched states
+        :return: the states with the id
+        :rtype: tuple
+        """
+        return self._get_state_registry()[1].get(state_id, ())
+
     def get_state_by_path(self, path, as_check=False):
+        """Returns the state with the given path
+
+        The state is looked up in an index of all states, which is cached until the hierarchy of states changes.
+
+        :param str path: the path of state ids, see :meth:`rafcon.core.states.state.State.get_path`
+        :param bool as_check: whether a warning is suppressed if the path is not valid
+        :return: the state or None if the path is invalid
+        """
         if not path:
             logger.debug("No start state specified!")
             return None
+        state = self._get_state_registry()[0].get(path)
+        if state is not None:
+            return state
+        # determine the reason for the invalid path
+        return self._find_state_by_path(path, as_check)
+
+    def _find_state_by_path(self, path, as_check=False):
         from rafcon.core.states.library_state import LibraryState
         from rafcon.core.states.execution_state import ExecutionState
+        if self.root_state is None:
+            if not as_check:
+                logger.warning("Invalid path '{0}' for state machine '{1}' without root state".format(
+                    path, self.state_machine_id))
+            return None
         path_item_list = path.split('/')
         prev_state_id = path_item_list.pop(0)
         if not prev_state_id == self.root_state.state_id:
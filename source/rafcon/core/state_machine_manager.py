@@ -34,9 +34,11 @@ class StateMachineManager(Observable):
 
     :ivar _state_machines: a list of all state machines that are managed by the state machine manager
     :ivar _active_state_machine_id: the id of the currently active state machine
+    :ivar execution_engine: the execution engine of the state machines, None for the engine singleton
     """
 
     _active_state_machine_id = None
+    execution_engine = None
 
     def __init__(self, state_machines=None):
         Observable.__init__(self)
@@ -123,6 +125,10 @@ class StateMachineManager(Observable):
 
         # destroy execution history
         removed_state_machine.destroy_execution_histories()
+        if removed_state_machine.file_system_path:
+            from rafcon.core.storage import storage
+            # the files of the state machine are not remembered any longer to skip writing unchanged files
+            storage.forget_stored_files(removed_state_machine.file_system_path)
         return removed_state_machine
 
     def get_active_state_machine(self):
@@ -161,11 +167,14 @@ class StateMachineManager(Observable):
     @active_state_machine_id.setter
     @Observable.observed
     def active_state_machine_id(self, state_machine_id):
-        import rafcon.core.singleton as core_singletons
+        execution_engine = self.execution_engine
+        if execution_engine is None:
+            import rafcon.core.singleton as core_singletons
+            execution_engine = core_singletons.state_machine_execution_engine
         if state_machine_id is not None:
             if state_machine_id not in self.state_machines.keys():
                 raise AttributeError("State machine not in list of all state machines")
-        if not core_singletons.state_machine_execution_engine.finished_or_stopped() and \
+        if not execution_engine.finished_or_stopped() and \
                 state_machine_id != self._active_state_machine_id:
             raise AttributeError("Active state machine can not be changed because state machine execution is active.")
 
@@ -196,7 +196,7 @@ class BarrierConcurrencyState(ConcurrencyState):
         # standard state execution
         decider_state.input_data = self.get_inputs_for_state(decider_state)
         decider_state.output_data = self.create_output_dictionary_for_state(decider_state)
-        decider_state.start(self.execution_history, backward_execution=False)
+        decider_state.start(self.execution_history, backward_execution=False, inline=True)
         decider_state.join()
         decider_state_error = None
         if decider_state.final_outcome.outcome_id == -1:
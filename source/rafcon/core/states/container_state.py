@@ -22,18 +22,19 @@
 from builtins import str
 import traceback
 from copy import copy, deepcopy
-from threading import Condition
+from contextlib import contextmanager
+from threading import Condition, RLock
 
 from gtkmvc3.observable import Observable
 
 from rafcon.core.custom_exceptions import RecoveryModeException
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_scoped_data, observed_unless_batch_edit
+from rafcon.core.execution.execution_metrics import measure, DATA_PASSING_METRIC
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.id_generator import *
-from rafcon.core.singleton import state_machine_execution_engine
 from rafcon.core.state_elements.data_flow import DataFlow
 from rafcon.core.state_elements.logical_port import Outcome
-from rafcon.core.state_elements.scope import ScopedData, ScopedVariable
+from rafcon.core.state_elements.scope import ScopedData, ScopedVariable, is_passed_by_reference
 from rafcon.core.state_elements.data_port import InputDataPort, OutputDataPort
 from rafcon.core.state_elements.state_element import StateElement
 from rafcon.core.state_elements.transition import Transition
@@ -75,13 +76,24 @@ class ContainerState(State):
 
         self._states = OrderedDict()
         self._transitions = {}
+        # index of all transitions by their origin, see get_transition_for_outcome
+        self._transitions_by_origin = {}
         self._data_flows = {}
+        # indices of all data flows by their origin and target port, used to route data during execution
+        self._data_flows_by_origin = {}
+        self._data_flows_by_target = {}
         self._scoped_variables = {}
         self._scoped_data = {}
+        # protects the scoped data during execution instead of the modification lock of the state machine
+        self._scoped_data_lock = RLock()
         self._current_state = None
         # condition variable to wait for not connected states
         self._transitions_cv = Condition()
         self._child_execution = False
+        # number of nested batch edits, see batch_edit
+        self._batch_edit_depth = 0
+        # set while the transitions and data flows are validated at the end of a batch edit
+        self._batch_validation_running = False
 
         State.__init__(self, name, state_id, input_data_ports, output_data_ports, income, outcomes)
 
@@ -284,7 +296,7 @@ class ContainerState(State):
                 return None
 
             # depending on the execution mode pause execution
-            execution_signal = state_machine_execution_engine.handle_execution_mode(self)
+            execution_signal = self.execution_engine.handle_execution_mode(self)
             if execution_signal is StateMachineExecutionStatus.STOPPED:
                 # this will be caught at the end of the run method
                 self.last_child.state_execution_status = StateExecutionStatus.INACTIVE
@@ -312,7 +324,7 @@ class ContainerState(State):
         start_state = self.get_start_state(set_final_outcome=True)
         while not start_state:
             # depending on the execution mode pause execution
-            execution_signal = state_machine_execution_engine.handle_execution_mode(self)
+            execution_signal = self.execution_engine.handle_execution_mode(self)
             if execution_signal is StateMachineExecutionStatus.STOPPED:
                 # this will be caught at the end of the run method
                 return None
@@ -758,8 +770,88 @@ class ContainerState(State):
         old_state.destroy(recursive=True)
         return old_state
 
+    @contextmanager
+    def batch_edit(self):
+        """Context manager to add many states, transitions and data flows at once
+
+        Within the context, :meth:`add_state`, :meth:`add_transition` and :meth:`add_data_flow` neither check the
+        validity of the new transitions and data flows nor emit notifications and the modification lock of the state
+        machine is acquired only once. Thus, transitions and data flows can also be added before the states they
+        connect. At the end of the outermost context, all transitions and data flows are validated by
+        :meth:`finish_batch_edit` in a single pass.
+
+        The batch edit only concerns the direct children of this state, child container states have their own batch
+        edits. It must only be used by the thread editing the state.
+
+        Example::
+
+            with hierarchy_state.batch_edit():
+                for state in states:
+                    hierarchy_state.add_state(state)
+
+        :raises exceptions.ValueError: if transitions or data flows are invalid, these have been removed again
+        """
+        state_machine = self.get_state_machine()
+        if state_machine:
+            state_machine.acquire_modification_lock()
+        self._batch_edit_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_edit_depth -= 1
+            try:
+                invalid_elements = self.finish_batch_edit() if not self._batch_edit_depth else []
+            finally:
+                if state_machine:
+                    state_machine.release_modification_lock()
+        if invalid_elements:
+            raise ValueError("Invalid elements within state \"{0}\" (id {1}) removed after batch edit:\n{2}".format(
+                self.name, self.state_id, "\n".join("{0}: {1}".format(element, message)
+                                                    for element, message in invalid_elements)))
+
     @lock_state_machine
     @Observable.observed
+    def finish_batch_edit(self):
+        """Validates all transitions and data flows at the end of a batch edit
+
+        The checks of :meth:`check_child_validity` are applied to the transitions and data flows in the order of their
+        addition. Instead of comparing each element with all others, the origin and target indices are rebuilt along
+        the way and consulted for already connected outcomes and ports. Thus, the pass is linear in the number of
+        elements. Invalid elements are removed again, as their add method would have rejected them. Being observed,
+        the method emits a single notification for the whole batch edit.
+
+        :return: the removed elements and the reasons of their rejection
+        :rtype: list[(rafcon.core.state_elements.state_element.StateElement, str)]
+        """
+        invalid_elements = []
+        self._batch_validation_running = True
+        try:
+            self._transitions_by_origin = {}
+            for transition in list(self._transitions.values()):
+                valid, message = self._check_transition_validity(transition)
+                if valid:
+                    self._index_transition(transition)
+                else:
+                    invalid_elements.append((transition, message))
+                    del self._transitions[transition.transition_id]
+                    transition.parent = None
+            self._data_flows_by_origin = {}
+            self._data_flows_by_target = {}
+            for data_flow in list(self._data_flows.values()):
+                valid, message = self._check_data_flow_validity(data_flow)
+                if valid:
+                    self._index_data_flow(data_flow)
+                else:
+                    invalid_elements.append((data_flow, message))
+                    del self._data_flows[data_flow.data_flow_id]
+                    data_flow.parent = None
+        finally:
+            self._batch_validation_running = False
+        with self._transitions_cv:
+            self._transitions_cv.notify_all()
+        return invalid_elements
+
+    @observed_unless_batch_edit
     def add_state(self, state, storage_load=False):
         """Adds a state to the container state.
 
@@ -1092,10 +1184,11 @@ class ContainerState(State):
         """
 
         # overwrite the start state in the case that a specific start state is specific e.g. by start_from_state
-        if self.get_path() in state_machine_execution_engine.start_state_paths:
+        start_state_paths = self.execution_engine.start_state_paths
+        if self.get_path() in start_state_paths:
             for state_id, state in self.states.items():
-                if state.get_path() in state_machine_execution_engine.start_state_paths:
-                    state_machine_execution_engine.start_state_paths.remove(self.get_path())
+                if state.get_path() in start_state_paths:
+                    start_state_paths.remove(self.get_path())
                     return state
 
         if self.start_state_id is None:
@@ -1211,6 +1304,7 @@ class ContainerState(State):
         else:
             self.transitions[transition_id] = \
                 Transition(None, None, to_state_id, to_outcome, transition_id, self)
+        self._index_transition(self.transitions[transition_id])
 
         # notify all states waiting for transition to be connected
         self._transitions_cv.acquire()
@@ -1219,8 +1313,7 @@ class ContainerState(State):
 
         return transition_id
 
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_batch_edit
     def add_transition(self, from_state_id, from_outcome, to_state_id, to_outcome, transition_id=None):
         """Adds a transition to the container state
 
@@ -1242,6 +1335,7 @@ class ContainerState(State):
 
         new_transition = Transition(from_state_id, from_outcome, to_state_id, to_outcome, transition_id, self)
         self.transitions[transition_id] = new_transition
+        self._index_transition(new_transition)
 
         # notify all states waiting for transition to be connected
         self._transitions_cv.acquire()
@@ -1262,11 +1356,44 @@ class ContainerState(State):
             raise TypeError("state must be of type State")
         if not isinstance(outcome, Outcome):
             raise TypeError("outcome must be of type Outcome")
-        result_transition = None
-        for key, transition in self.transitions.items():
-            if transition.from_state == state.state_id and transition.from_outcome == outcome.outcome_id:
-                result_transition = transition
-        return result_transition
+        return self._transitions_by_origin.get((state.state_id, outcome.outcome_id), None)
+
+    def _index_transition(self, transition):
+        """Adds a transition to the origin index used by :meth:`get_transition_for_outcome`
+
+        :param rafcon.core.state_elements.transition.Transition transition: The transition to be indexed
+        """
+        self._transitions_by_origin[(transition.from_state, transition.from_outcome)] = transition
+
+    def _unindex_transition(self, transition, origin=None):
+        """Removes a transition from the origin index
+
+        :param rafcon.core.state_elements.transition.Transition transition: The transition to be removed
+        :param tuple origin: The (from_state, from_outcome) key the transition was indexed with, defaults to the
+            current origin of the transition
+        """
+        if origin is None:
+            origin = (transition.from_state, transition.from_outcome)
+        if self._transitions_by_origin.get(origin) is transition:
+            del self._transitions_by_origin[origin]
+
+    def _rebuild_transition_index(self):
+        """Recreates the origin index from all transitions of the state"""
+        self._transitions_by_origin = {(transition.from_state, transition.from_outcome): transition
+                                       for transition in self._transitions.values()}
+
+    def transition_origin_changed(self, transition, old_origin):
+        """Updates the origin index after the from_state or from_outcome of a child transition has been modified
+
+        The method is called by the transition itself.
+
+        :param rafcon.core.state_elements.transition.Transition transition: The modified transition
+        :param tuple old_origin: The (from_state, from_outcome) tuple before the modification
+        """
+        if self._transitions.get(transition.transition_id) is not transition:
+            return
+        self._unindex_transition(transition, old_origin)
+        self._index_transition(transition)
 
     @lock_state_machine
     @Observable.observed
@@ -1282,6 +1409,7 @@ class ContainerState(State):
             raise AttributeError("The transition_id %s does not exist" % str(transition_id))
 
         self.transitions[transition_id].parent = None
+        self._unindex_transition(self.transitions[transition_id])
         return self.transitions.pop(transition_id)
 
     @lock_state_machine
@@ -1317,8 +1445,7 @@ class ContainerState(State):
                 data_flow_id = generate_data_flow_id()
         return data_flow_id
 
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_batch_edit
     # Primary key is data_flow_id.
     def add_data_flow(self, from_state_id, from_data_port_id, to_state_id, to_data_port_id, data_flow_id=None):
         """Adds a data_flow to the container state
@@ -1333,6 +1460,7 @@ class ContainerState(State):
 
         self.data_flows[data_flow_id] = DataFlow(from_state_id, from_data_port_id, to_state_id, to_data_port_id,
                                                  data_flow_id, self)
+        self._index_data_flow(self.data_flows[data_flow_id])
         return data_flow_id
 
     @lock_state_machine
@@ -1347,8 +1475,68 @@ class ContainerState(State):
             raise AttributeError("The data_flow_id %s does not exist" % str(data_flow_id))
 
         self._data_flows[data_flow_id].parent = None
+        self._unindex_data_flow(self._data_flows[data_flow_id])
         return self._data_flows.pop(data_flow_id)
 
+    def _index_data_flow(self, data_flow):
+        """Adds a data flow to the origin and target indices
+
+        The indices hold tuples, which are replaced instead of modified, so that they can safely be iterated during
+        execution.
+
+        :param rafcon.core.state_elements.data_flow.DataFlow data_flow: The data flow to be indexed
+        """
+        origin = (data_flow.from_state, data_flow.from_key)
+        target = (data_flow.to_state, data_flow.to_key)
+        self._data_flows_by_origin[origin] = self._data_flows_by_origin.get(origin, ()) + (data_flow,)
+        self._data_flows_by_target[target] = self._data_flows_by_target.get(target, ()) + (data_flow,)
+
+    def _unindex_data_flow(self, data_flow, origin=None, target=None):
+        """Removes a data flow from the origin and target indices
+
+        :param rafcon.core.state_elements.data_flow.DataFlow data_flow: The data flow to be removed
+        :param tuple origin: The (from_state, from_key) key the data flow was indexed with, defaults to the current
+            origin of the data flow
+        :param tuple target: The (to_state, to_key) key the data flow was indexed with, defaults to the current
+            target of the data flow
+        """
+        if origin is None:
+            origin = (data_flow.from_state, data_flow.from_key)
+        if target is None:
+            target = (data_flow.to_state, data_flow.to_key)
+        for index, key in ((self._data_flows_by_origin, origin), (self._data_flows_by_target, target)):
+            remaining_data_flows = tuple(df for df in index.get(key, ()) if df is not data_flow)
+            if remaining_data_flows:
+                index[key] = remaining_data_flows
+            elif key in index:
+                del index[key]
+
+    def _rebuild_data_flow_index(self):
+        """Recreates the origin and target indices from all data flows of the state"""
+        data_flows_by_origin = {}
+        data_flows_by_target = {}
+        for data_flow in self._data_flows.values():
+            origin = (data_flow.from_state, data_flow.from_key)
+            target = (data_flow.to_state, data_flow.to_key)
+            data_flows_by_origin[origin] = data_flows_by_origin.get(origin, ()) + (data_flow,)
+            data_flows_by_target[target] = data_flows_by_target.get(target, ()) + (data_flow,)
+        self._data_flows_by_origin = data_flows_by_origin
+        self._data_flows_by_target = data_flows_by_target
+
+    def data_flow_ports_changed(self, data_flow, old_origin, old_target):
+        """Updates the indices after the origin or target of a child data flow has been modified
+
+        The method is called by the data flow itself.
+
+        :param rafcon.core.state_elements.data_flow.DataFlow data_flow: The modified data flow
+        :param tuple old_origin: The (from_state, from_key) tuple before the modification
+        :param tuple old_target: The (to_state, to_key) tuple before the modification
+        """
+        if self._data_flows.get(data_flow.data_flow_id) is not data_flow:
+            return
+        self._unindex_data_flow(data_flow, old_origin, old_target)
+        self._index_data_flow(data_flow)
+
     @lock_state_machine
     def remove_data_flows_with_data_port_id(self, data_port_id):
         """Remove an data ports whose from_key or to_key equals the passed data_port_id
@@ -1467,12 +1655,9 @@ class ContainerState(State):
         """
         if state_id == self.state_id:
             return self.get_data_port_by_id(port_id)
-        for child_state_id, child_state in self.states.items():
-            if state_id != child_state_id:
-                continue
-            port = child_state.get_data_port_by_id(port_id)
-            if port:
-                return port
+        child_state = self.states.get(state_id)
+        if child_state is not None:
+            return child_state.get_data_port_by_id(port_id)
         return None
 
     def get_data_port_by_id(self, data_port_id):
@@ -1497,6 +1682,7 @@ class ContainerState(State):
     # ---------------------------------- input data handling --------------------------------------
     # ---------------------------------------------------------------------------------------------
 
+    @measure(DATA_PASSING_METRIC, state_argument=0)
     def get_inputs_for_state(self, state):
         """Retrieves all input data of a state. If several data flows are connected to an input port the
         most current data is used for the specific input port.
@@ -1513,18 +1699,17 @@ class ContainerState(State):
             # for all input keys fetch the correct data_flow connection and read data into the result_dict
             actual_value = None
             actual_value_time = 0
-            for data_flow_key, data_flow in self.data_flows.items():
-
-                if data_flow.to_key == input_port_key:
-                    if data_flow.to_state == state.state_id:
-                        # fetch data from the scoped_data list: the key is the data_port_key + the state_id
-                        key = str(data_flow.from_key) + data_flow.from_state
-                        if key in self.scoped_data:
-                            if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
-                                actual_value = deepcopy(self.scoped_data[key].value)
-                                actual_value_time = self.scoped_data[key].timestamp
+            for data_flow in self._data_flows_by_target.get((state.state_id, input_port_key), ()):
+                # fetch data from the scoped_data list: the key is the data_port_key + the state_id
+                key = str(data_flow.from_key) + data_flow.from_state
+                if key in self.scoped_data:
+                    if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
+                        actual_value = self.scoped_data[key].value
+                        actual_value_time = self.scoped_data[key].timestamp
 
             if actual_value is not None:
+                if not is_passed_by_reference(value.name):
+                    actual_value = deepcopy(actual_value)
                 result_dict[value.name] = actual_value
 
         return result_dict
@@ -1533,7 +1718,7 @@ class ContainerState(State):
     # ---------------------------- functions to modify the scoped data ----------------------------
     # ---------------------------------------------------------------------------------------------
 
-    @lock_state_machine
+    @lock_scoped_data
     def add_input_data_to_scoped_data(self, dictionary):
         """Add a dictionary to the scoped data
 
@@ -1543,40 +1728,46 @@ class ContainerState(State):
         :param dictionary: The dictionary that is added to the scoped data
         :param state: The state to which the input_data was passed (should be self in most cases)
         """
+        input_data_port_ids_by_name = self._get_io_data_port_ids_by_name(InputDataPort)
         for dict_key, value in dictionary.items():
-            for input_data_port_key, data_port in list(self.input_data_ports.items()):
-                if dict_key == data_port.name:
-                    self.scoped_data[str(input_data_port_key) + self.state_id] = \
-                        ScopedData(data_port.name, value, type(value), self.state_id, ScopedVariable, parent=self)
-                    # forward the data to scoped variables
-                    for data_flow_key, data_flow in self.data_flows.items():
-                        if data_flow.from_key == input_data_port_key and data_flow.from_state == self.state_id:
-                            if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
-                                current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                                self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                    ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
-                                               ScopedVariable, parent=self)
-
-    @lock_state_machine
+            input_data_port_key = input_data_port_ids_by_name.get(dict_key)
+            if input_data_port_key is None:
+                continue
+            data_port = self.input_data_ports[input_data_port_key]
+            self.scoped_data[str(input_data_port_key) + self.state_id] = \
+                ScopedData(data_port.name, value, type(value), self.state_id, ScopedVariable, parent=self)
+            # forward the data to scoped variables
+            for data_flow in self._data_flows_by_origin.get((self.state_id, input_data_port_key), ()):
+                if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
+                    current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                    self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                        ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
+                                   ScopedVariable, parent=self)
+
+    @measure(DATA_PASSING_METRIC, state_argument=1)
+    @lock_scoped_data
     def add_state_execution_output_to_scoped_data(self, dictionary, state):
         """Add a state execution output to the scoped data
 
         :param dictionary: The dictionary that is added to the scoped data
         :param state: The state that finished execution and provide the dictionary
         """
+        output_data_port_ids_by_name = state._get_io_data_port_ids_by_name(OutputDataPort)
         for output_name, value in dictionary.items():
-            for output_data_port_key, data_port in list(state.output_data_ports.items()):
-                if output_name == data_port.name:
-                    if not isinstance(value, data_port.data_type):
-                        if (not ((type(value) is float or type(value) is int) and
-                                     (data_port.data_type is float or data_port.data_type is int)) and
-                                not (isinstance(value, type(None)))):
-                            logger.error("The data type of output port {0} should be of type {1}, but is of type {2}".
-                                         format(output_name, data_port.data_type, type(value)))
-                    self.scoped_data[str(output_data_port_key) + state.state_id] = \
-                        ScopedData(data_port.name, value, type(value), state.state_id, OutputDataPort, parent=self)
-
-    @lock_state_machine
+            output_data_port_key = output_data_port_ids_by_name.get(output_name)
+            if output_data_port_key is None:
+                continue
+            data_port = state.output_data_ports[output_data_port_key]
+            if not isinstance(value, data_port.data_type):
+                if (not ((type(value) is float or type(value) is int) and
+                             (data_port.data_type is float or data_port.data_type is int)) and
+                        not (isinstance(value, type(None)))):
+                    logger.error("The data type of output port {0} should be of type {1}, but is of type {2}".
+                                 format(output_name, data_port.data_type, type(value)))
+            self.scoped_data[str(output_data_port_key) + state.state_id] = \
+                ScopedData(data_port.name, value, type(value), state.state_id, OutputDataPort, parent=self)
+
+    @lock_scoped_data
     def add_default_values_of_scoped_variables_to_scoped_data(self):
         """Add the scoped variables default values to the scoped_data dictionary
 
@@ -1586,32 +1777,30 @@ class ContainerState(State):
                 ScopedData(scoped_var.name, scoped_var.default_value, scoped_var.data_type, self.state_id,
                            ScopedVariable, parent=self)
 
-    @lock_state_machine
+    @measure(DATA_PASSING_METRIC, state_argument=1)
+    @lock_scoped_data
     def update_scoped_variables_with_output_dictionary(self, dictionary, state):
         """Update the values of the scoped variables with the output dictionary of a specific state.
 
         :param: the dictionary to update the scoped variables with
         :param: the state the output dictionary belongs to
         """
+        output_data_port_ids_by_name = state._get_io_data_port_ids_by_name(OutputDataPort)
         for key, value in dictionary.items():
-            output_data_port_key = None
             # search for the correct output data port key of the source state
-            for o_key, o_port in state.output_data_ports.items():
-                if o_port.name == key:
-                    output_data_port_key = o_key
-                    break
+            output_data_port_key = output_data_port_ids_by_name.get(key)
             if output_data_port_key is None:
                 if not key == "error":
                     logger.warning("Output variable %s was written during state execution, "
                                    "that has no data port connected to it.", str(key))
-            for data_flow_key, data_flow in self.data_flows.items():
-                if data_flow.from_key == output_data_port_key and data_flow.from_state == state.state_id:
-                    if data_flow.to_state == self.state_id:  # is target of data flow own state id?
-                        if data_flow.to_key in self.scoped_variables.keys():  # is target data port scoped?
-                            current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                            self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                ScopedData(current_scoped_variable.name, value, type(value), state.state_id,
-                                           ScopedVariable, parent=self)
+                continue
+            for data_flow in self._data_flows_by_origin.get((state.state_id, output_data_port_key), ()):
+                if data_flow.to_state == self.state_id:  # is target of data flow own state id?
+                    if data_flow.to_key in self.scoped_variables:  # is target data port scoped?
+                        current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                        self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                            ScopedData(current_scoped_variable.name, value, type(value), state.state_id,
+                                       ScopedVariable, parent=self)
 
     # ---------------------------------------------------------------------------------------------
     # ------------------------ functions to modify the scoped data end ----------------------------
@@ -1627,20 +1816,26 @@ class ContainerState(State):
         """
         old_state_id = self.state_id
         super(ContainerState, self).change_state_id(state_id)
-        # Use private variables to change ids to prevent validity checks
+        # Use private variables to change ids to prevent validity checks, thus the cached digests are invalidated here
         # change id in all transitions
         for transition in self.transitions.values():
             if transition.from_state == old_state_id:
                 transition._from_state = self.state_id
+                transition.invalidate_hash()
             if transition.to_state == old_state_id:
                 transition._to_state = self.state_id
+                transition.invalidate_hash()
+        self._rebuild_transition_index()
 
         # change id in all data_flows
         for data_flow in self.data_flows.values():
             if data_flow.from_state == old_state_id:
                 data_flow._from_state = self.state_id
+                data_flow.invalidate_hash()
             if data_flow.to_state == old_state_id:
                 data_flow._to_state = self.state_id
+                data_flow.invalidate_hash()
+        self._rebuild_data_flow_index()
 
     def get_state_for_transition(self, transition):
         """Calculate the target state of a transition
@@ -1673,26 +1868,26 @@ class ContainerState(State):
             actual_value = None
             actual_value_was_written = False
             actual_value_time = 0
-            for data_flow_id, data_flow in self.data_flows.items():
-                if data_flow.to_state == self.state_id:
-                    if data_flow.to_key == output_port_id:
-                        scoped_data_key = str(data_flow.from_key) + data_flow.from_state
-                        if scoped_data_key in self.scoped_data:
-                            # if self.scoped_data[scoped_data_key].timestamp > actual_value_time is True
-                            # the data of a previous execution of the same state is overwritten
-                            if actual_value is None or self.scoped_data[scoped_data_key].timestamp > actual_value_time:
-                                actual_value = deepcopy(self.scoped_data[scoped_data_key].value)
-                                actual_value_time = self.scoped_data[scoped_data_key].timestamp
-                                actual_value_was_written = True
-                        else:
-                            if not self.backward_execution:
-                                logger.debug(
-                                    "Output data with name {0} of state {1} was not found in the scoped data "
-                                    "of state {2}. Thus the state did not write onto this output. "
-                                    "This can mean a state machine design error.".format(
-                                        str(output_name), str(self.states[data_flow.from_state].get_path()),
-                                        self.get_path()))
+            for data_flow in self._data_flows_by_target.get((self.state_id, output_port_id), ()):
+                scoped_data_key = str(data_flow.from_key) + data_flow.from_state
+                if scoped_data_key in self.scoped_data:
+                    # if self.scoped_data[scoped_data_key].timestamp > actual_value_time is True
+                    # the data of a previous execution of the same state is overwritten
+                    if actual_value is None or self.scoped_data[scoped_data_key].timestamp > actual_value_time:
+                        actual_value = self.scoped_data[scoped_data_key].value
+                        actual_value_time = self.scoped_data[scoped_data_key].timestamp
+                        actual_value_was_written = True
+                else:
+                    if not self.backward_execution:
+                        logger.debug(
+                            "Output data with name {0} of state {1} was not found in the scoped data "
+                            "of state {2}. Thus the state did not write onto this output. "
+                            "This can mean a state machine design error.".format(
+                                str(output_name), str(self.states[data_flow.from_state].get_path()),
+                                self.get_path()))
             if actual_value_was_written:
+                if not is_passed_by_reference(output_name):
+                    actual_value = deepcopy(actual_value)
                 output_dict[output_name] = actual_value
 
     # ---------------------------------------------------------------------------------------------
@@ -1709,6 +1904,9 @@ class ContainerState(State):
         :return bool validity, str message: validity is True, when the child is valid, False else. message gives more
             information especially if the child is not valid
         """
+        # Within a batch edit, transitions and data flows are validated at its end, see finish_batch_edit
+        if self._batch_edit_depth and isinstance(child, (DataFlow, Transition)):
+            return True, "validity check deferred to the end of the batch edit"
         # First let the state do validity checks for outcomes and data ports
         valid, message = super(ContainerState, self).check_child_validity(child)
         if not valid and not message.startswith("Invalid state element"):
@@ -1873,6 +2071,12 @@ class ContainerState(State):
             return False, "Data flows must not connect two scoped variables -> {}".format(data_flow)
 
         # Check, whether the target port is already connected
+        if self._batch_validation_running:
+            # only the already validated data flows are indexed, see finish_batch_edit
+            for existing_data_flow in self._data_flows_by_target.get((to_state_id, to_data_port_id), ()):
+                if (existing_data_flow.from_state, existing_data_flow.from_key) == (from_state_id, from_data_port_id):
+                    return False, "Exactly the same data flow is already existing -> {0}".format(data_flow)
+            return True, "valid"
         for existing_data_flow in self.data_flows.values():
             to_data_port_existing = self.get_data_port(existing_data_flow.to_state, existing_data_flow.to_key)
             from_data_port_existing = self.get_data_port(existing_data_flow.from_state, existing_data_flow.from_key)
@@ -1960,10 +2164,15 @@ class ContainerState(State):
         :return bool validity, str message: validity is True, when the transition is valid, False else. message gives
             more information especially if the transition is not valid
         """
-        for transition in self.transitions.values():
-            if transition.from_state is None:
-                if start_transition is not transition:
-                    return False, "Only one start transition is allowed"
+        if self._batch_validation_running:
+            # only the already validated transitions are indexed, see finish_batch_edit
+            if (None, None) in self._transitions_by_origin:
+                return False, "Only one start transition is allowed"
+        else:
+            for transition in self.transitions.values():
+                if transition.from_state is None:
+                    if start_transition is not transition:
+                        return False, "Only one start transition is allowed"
 
         if start_transition.from_outcome is not None:
             return False, "from_outcome must not be set in start transition"
@@ -2034,11 +2243,16 @@ class ContainerState(State):
         to_outcome_id = check_transition.to_outcome
 
         # check for connected origin
-        for transition in self.transitions.values():
-            if transition.from_state == from_state_id:
-                if transition.from_outcome == from_outcome_id:
-                    if check_transition is not transition:
-                        return False, "transition origin already connected to another transition"
+        if self._batch_validation_running:
+            # only the already validated transitions are indexed, see finish_batch_edit
+            if (from_state_id, from_outcome_id) in self._transitions_by_origin:
+                return False, "transition origin already connected to another transition"
+        else:
+            for transition in self.transitions.values():
+                if transition.from_state == from_state_id:
+                    if transition.from_outcome == from_outcome_id:
+                        if check_transition is not transition:
+                            return False, "transition origin already connected to another transition"
 
         if from_state_id in self.states and to_state_id in self.states and to_outcome_id is not None:
             return False, "no transition from one outcome to another one on the same hierarchy allowed"
@@ -2174,6 +2388,7 @@ class ContainerState(State):
 
         self._transitions = dict((transition_id, t) for (transition_id, t) in self._transitions.items()
                                  if transition_id not in transition_ids_to_delete)
+        self._rebuild_transition_index()
 
         # check that all old_transitions are no more referencing self as there parent
         for old_transition in old_transitions.values():
@@ -2231,6 +2446,7 @@ class ContainerState(State):
 
         self._data_flows = dict((data_flow_id, d) for (data_flow_id, d) in self._data_flows.items()
                                 if data_flow_id not in data_flow_ids_to_delete)
+        self._rebuild_data_flow_index()
 
         # check that all old_data_flows are no more referencing self as there parent
         for old_data_flow in old_data_flows.values():
@@ -2336,6 +2552,11 @@ class ContainerState(State):
             if old_scoped_variable not in self._scoped_variables.values() and old_scoped_variable.parent is self:
                 old_scoped_variable.parent = None
 
+    @property
+    def scoped_data_lock(self):
+        """The lock of the scoped data, which is held while the scoped data is changed during execution"""
+        return self._scoped_data_lock
+
     @property
     def scoped_data(self):
         """Property for the _scoped_data field
@@ -2344,7 +2565,7 @@ class ContainerState(State):
         return self._scoped_data
 
     @scoped_data.setter
-    @lock_state_machine
+    @lock_scoped_data
     # @Observable.observed
     def scoped_data(self, scoped_data):
         if not isinstance(scoped_data, dict):
@@ -32,6 +32,7 @@ from rafcon.core.state_elements.logical_port import Outcome
 from rafcon.core.script import Script
 from rafcon.core.states.state import StateExecutionStatus
 from rafcon.core.execution.execution_history import CallType
+from rafcon.core.execution.execution_metrics import measure, SCRIPT_METRIC
 
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -51,6 +52,7 @@ class ExecutionState(State):
 
         State.__init__(self, name, state_id, input_data_ports, output_data_ports, income, outcomes)
         self._script = None
+        self._cancel_script = None
         self.script = Script(path, filename, check_path=check_path, parent=self)
         self.logger = log.get_logger(self.name)
         # here all persistent variables that should be available for the next state run should be stored
@@ -82,7 +84,12 @@ class ExecutionState(State):
     @lock_state_machine
     def update_hash(self, obj_hash):
         super(ExecutionState, self).update_hash(obj_hash)
-        obj_hash.update(self.get_object_hash_string(self.script.script))
+        self.update_hash_from_dict(obj_hash, self.script)
+
+    def get_hash_children(self):
+        children = super(ExecutionState, self).get_hash_children()
+        children['script'] = self.script
+        return children
 
     @classmethod
     def from_dict(cls, dictionary):
@@ -101,6 +108,7 @@ class ExecutionState(State):
             logger.warning("Erroneous description for state '{1}': {0}".format(formatted_lines[-1], dictionary['name']))
         return state
 
+    @measure(SCRIPT_METRIC)
     def _execute(self, execute_inputs, execute_outputs, backward_execution=False):
         """Calls the custom execute function of the script.py of the state
 
@@ -109,6 +117,15 @@ class ExecutionState(State):
 
         outcome_item = self._script.execute(self, execute_inputs, execute_outputs, backward_execution)
 
+        return self.get_outcome_for_script_result(outcome_item, backward_execution)
+
+    def get_outcome_for_script_result(self, outcome_item, backward_execution=False):
+        """Determines the outcome of the state from the return value of the execute function of its script
+
+        :param outcome_item: the returned outcome id or outcome name
+        :param bool backward_execution: Flag whether the script was run in backwards mode
+        :return: the outcome or None in the case of backward execution
+        """
         # in the case of backward execution the outcome is not relevant
         if backward_execution:
             return
@@ -129,11 +146,48 @@ class ExecutionState(State):
         logger.error("Returned outcome of {0} not existing: {1}".format(self, outcome_item))
         return Outcome(-1, "aborted")
 
+    def create_run_coroutine(self):
+        """Creates a coroutine executing the state, if the execute function of its script is a coroutine function
+
+        :return: the coroutine or None, if the script is synchronous
+        """
+        function_name = "backward_execute" if self.backward_execution else "execute"
+        if not self._script.is_coroutine_function(function_name):
+            return None
+        from rafcon.core.execution.event_loop import run_execution_state
+        return run_execution_state(self)
+
+    def set_script_cancellation(self, cancel):
+        """Registers a function cancelling the running script coroutine of the state, when it is preempted
+
+        :param cancel: the function or None, if no script coroutine is running
+        """
+        self._cancel_script = cancel
+        if cancel is not None and self.preempted:
+            cancel()
+
+    def recursively_preempt_states(self):
+        """Preempt the state and cancel its script, if it is a running coroutine
+        """
+        super(ExecutionState, self).recursively_preempt_states()
+        cancel = self._cancel_script
+        if cancel is not None:
+            cancel()
+
     def run(self):
         """ This defines the sequence of actions that are taken when the execution state is executed
 
         :return:
         """
+        self.prepare_run()
+        try:
+            outcome = self._execute(self.input_data, self.output_data, self.backward_execution)
+            return self.complete_run(outcome)
+        except Exception as e:
+            return self.abort_run(e)
+
+    def prepare_run(self):
+        """Sets the state up for its execution, before its script is executed"""
         if self.is_root_state:
             self.execution_history.push_call_history_item(self, CallType.EXECUTE, None, self.input_data)
 
@@ -143,34 +197,45 @@ class ExecutionState(State):
         else:
             self.setup_run()
 
-        try:
-            outcome = self._execute(self.input_data, self.output_data, self.backward_execution)
-            self.state_execution_status = StateExecutionStatus.WAIT_FOR_NEXT_STATE
-
-            if self.backward_execution:
-                # outcome handling is not required as we are in backward mode and the execution order is fixed
-                result = self.finalize()
-            else:
-                # check output data
-                self.check_output_data_type()
-                result = self.finalize(outcome)
-
-            if self.is_root_state:
-                self.execution_history.push_return_history_item(self, CallType.EXECUTE, None, self.output_data)
-            return result
-        except Exception as e:
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            formatted_exc = traceback.format_exception(exc_type, exc_value, exc_traceback)
-            truncated_exc = []
-            for line in formatted_exc:
-                if os.path.join("rafcon", "core") not in line:
-                    truncated_exc.append(line)
-            logger.error("{0} had an internal error: {1}: {2}\n{3}".format(self, type(e).__name__, e,
-                                                                           ''.join(truncated_exc)))
-            # write error to the output_data of the state
-            self.output_data["error"] = e
-            self.state_execution_status = StateExecutionStatus.WAIT_FOR_NEXT_STATE
-            return self.finalize(Outcome(-1, "aborted"))
+    def complete_run(self, outcome):
+        """Finalizes the state after its script was executed
+
+        :param outcome: the outcome determined from the result of the script
+        """
+        self.state_execution_status = StateExecutionStatus.WAIT_FOR_NEXT_STATE
+
+        if self.backward_execution:
+            # outcome handling is not required as we are in backward mode and the execution order is fixed
+            result = self.finalize()
+        else:
+            # check output data
+            self.check_output_data_type()
+            result = self.finalize(outcome)
+
+        if self.is_root_state:
+            self.execution_history.push_return_history_item(self, CallType.EXECUTE, None, self.output_data)
+        return result
+
+    def abort_run(self, e):
+        """Finalizes the state with the aborted outcome after an error during its execution
+
+        :param Exception e: the raised exception
+        """
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        if exc_value is not e:
+            # the error is not handled in this thread, e.g. with the asyncio execution backend
+            exc_type, exc_value, exc_traceback = type(e), e, getattr(e, '__traceback__', None)
+        formatted_exc = traceback.format_exception(exc_type, exc_value, exc_traceback)
+        truncated_exc = []
+        for line in formatted_exc:
+            if os.path.join("rafcon", "core") not in line:
+                truncated_exc.append(line)
+        logger.error("{0} had an internal error: {1}: {2}\n{3}".format(self, type(e).__name__, e,
+                                                                       ''.join(truncated_exc)))
+        # write error to the output_data of the state
+        self.output_data["error"] = e
+        self.state_execution_status = StateExecutionStatus.WAIT_FOR_NEXT_STATE
+        return self.finalize(Outcome(-1, "aborted"))
 
 #########################################################################
 # Properties for all class fields that must be observed by gtkmvc3
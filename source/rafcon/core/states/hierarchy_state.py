@@ -24,7 +24,6 @@ import copy
 from rafcon.utils import log
 from rafcon.core.states.container_state import ContainerState
 from rafcon.core.state_elements.logical_port import Outcome
-import rafcon.core.singleton as singleton
 from rafcon.core.execution.execution_history import CallItem, ReturnItem
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.states.state import StateExecutionStatus
@@ -97,7 +96,7 @@ class HierarchyState(ContainerState):
             while self.child_state is not self:
                 # print("hs1", self.name)
                 self.handling_execution_mode = True
-                execution_mode = singleton.state_machine_execution_engine.handle_execution_mode(self, self.child_state)
+                execution_mode = self.execution_engine.handle_execution_mode(self, self.child_state)
                 self.handling_execution_mode = False
                 if self.state_execution_status is not StateExecutionStatus.EXECUTE_CHILDREN:
                     self.state_execution_status = StateExecutionStatus.EXECUTE_CHILDREN
@@ -183,7 +182,7 @@ class HierarchyState(ContainerState):
             self.execution_history.push_call_history_item(
                 self.child_state, CallType.EXECUTE, self, self.child_state.input_data)
         self.child_state.start(self.execution_history, backward_execution=self.backward_execution,
-                               generate_run_id=False)
+                               generate_run_id=False, inline=True)
 
         self.child_state.join()
 
@@ -262,7 +261,7 @@ class HierarchyState(ContainerState):
             self.final_outcome = self.outcomes[transition.to_outcome]
 
         if self.child_state is self:
-            singleton.state_machine_execution_engine.modify_run_to_states(self)
+            self.execution_engine.modify_run_to_states(self)
         return False
 
     def _finalize_hierarchy(self):
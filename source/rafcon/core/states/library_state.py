@@ -376,7 +376,12 @@ class LibraryState(State):
 
     def update_hash(self, obj_hash):
         super(LibraryState, self).update_hash(obj_hash)
-        self.state_copy.update_hash(obj_hash)
+        self.update_hash_from_dict(obj_hash, self.state_copy)
+
+    def get_hash_children(self):
+        children = super(LibraryState, self).get_hash_children()
+        children['state_copy'] = self.state_copy
+        return children
 
     @staticmethod
     def state_to_dict(state):
@@ -37,6 +37,8 @@ from gtkmvc3.observable import Observable
 from jsonconversion.jsonobject import JSONObject
 from yaml import YAMLObject
 
+from rafcon.core.execution.execution_backend import create_state_run
+from rafcon.core.execution.execution_metrics import measure_state_run
 from rafcon.core.id_generator import *
 from rafcon.core.state_elements.state_element import StateElement
 from rafcon.core.state_elements.data_port import DataPort, InputDataPort, OutputDataPort
@@ -47,15 +49,47 @@ from rafcon.utils import classproperty
 from rafcon.utils import log
 from rafcon.utils import multi_event
 from rafcon.utils.constants import RAFCON_TEMP_PATH_STORAGE
-from rafcon.utils.hashable import Hashable
+from rafcon.utils.hashable import Hashable, MerkleHashable
 from rafcon.utils.vividict import Vividict
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_unless_headless, observed_unless_headless
 
 logger = log.get_logger(__name__)
 PATH_SEPARATOR = '/'
 
+# the version of the state hierarchy, which is incremented whenever the parent of any state changes and thus
+# invalidates the cached state machines of all states, see State.get_state_machine
+_hierarchy_version = 0
+_hierarchy_version_lock = threading.Lock()
 
-class State(Observable, YAMLObject, JSONObject, Hashable):
+
+def _increment_hierarchy_version():
+    global _hierarchy_version
+    with _hierarchy_version_lock:
+        _hierarchy_version += 1
+
+
+def get_hierarchy_version():
+    """Returns the version of the hierarchy of all states, which changes with the parent or the id of any state
+
+    Caches depending on the hierarchy, e.g. of the paths of states, are valid as long as the version is unchanged.
+
+    :rtype: int
+    """
+    return _hierarchy_version
+
+
+def _create_hash_invalidation_callback(state):
+    """Returns a function invalidating the cached digest of the state, which does not keep the state alive"""
+    state_ref = ref(state)
+
+    def invalidate_hash():
+        referenced_state = state_ref()
+        if referenced_state is not None:
+            referenced_state.invalidate_hash()
+    return invalidate_hash
+
+
+class State(Observable, YAMLObject, JSONObject, MerkleHashable):
 
     """A class for representing a state in the state machine
 
@@ -73,6 +107,10 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     """
 
     _parent = None
+    # the hierarchy version and a weak reference of the state machine cached by get_state_machine
+    _state_machine_cache = (-1, None)
+    # the hierarchy version and the path of the state cached by get_path
+    _path_cache = (-1, None)
     _state_element_attrs = ['income', 'outcomes', 'input_data_ports', 'output_data_ports']
 
     def __init__(self, name=None, state_id=None, input_data_ports=None, output_data_ports=None,
@@ -83,6 +121,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         self._name = None
         self._input_data_ports = {}
         self._output_data_ports = {}
+        # lazily created mapping of data port names onto data port ids, see _get_io_data_port_ids_by_name
+        self._data_port_ids_by_name = {}
         self._income = None
         self._outcomes = {}
         # the input data of the state during execution
@@ -115,6 +155,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         self._run_id = None
 
         self._semantic_data = Vividict()
+        # in-place changes of the semantic data are not observed, but must invalidate the cached digest
+        self._semantic_data.set_change_callback(_create_hash_invalidation_callback(self))
 
         if name is None:
             name = "Untitled"
@@ -195,6 +237,37 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         Hashable.update_hash_from_dict(obj_hash, self.semantic_data)
         return obj_hash
 
+    @lock_state_machine
+    def merkle_digest(self):
+        return super(State, self).merkle_digest()
+
+    def get_hash_parent(self):
+        return self.parent
+
+    def get_hash_children(self):
+        """Returns the state elements and child states, whose digests are contained in the hash of the state
+
+        Child states are identified by their state id, state elements by the name of their attribute and their id,
+        e.g. "outcomes:0".
+
+        :rtype: dict
+        """
+        children = {}
+        for attr_name in self.state_element_attrs:
+            if attr_name == 'income':
+                children[attr_name] = self.income
+            elif attr_name == 'states':
+                children.update(self.states)
+            else:
+                for element_id, element in getattr(self, attr_name).items():
+                    children["{0}:{1}".format(attr_name, element_id)] = element
+        return children
+
+    def _notify_method_after(self, instance, name, res_val, args, kwargs):
+        # all changes of the data fields of a state are observed, thus the cached digest is invalidated here
+        self.invalidate_hash()
+        super(State, self)._notify_method_after(instance, name, res_val, args, kwargs)
+
     @classmethod
     def from_dict(cls, dictionary):
         """ An abstract method each state has to implement.
@@ -244,21 +317,34 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     # ---------------------------------------------------------------------------------------------
 
     # give the state the appearance of a thread that can be started several times
-    def start(self, execution_history, backward_execution=False, generate_run_id=True):
+    def start(self, execution_history, backward_execution=False, generate_run_id=True, inline=False):
         """ Starts the execution of the state in a new thread.
 
+        Depending on the execution backend configured in the core config, the thread is either newly created or taken
+        from a worker pool. With the asyncio backend, states providing a run coroutine are executed on the event loop.
+
+        :param bool inline: whether the caller joins the state right away, so that the pooled execution backend may
+            execute the state in the calling thread
         :return:
         """
         self.execution_history = execution_history
         if generate_run_id:
             self._run_id = run_id_generator()
         self.backward_execution = copy.copy(backward_execution)
-        self.thread = threading.Thread(target=self.run)
+        self.thread = create_state_run(measure_state_run(self, self.run), inline=inline,
+                                       coroutine_factory=self.create_run_coroutine)
         self.thread.start()
 
     def generate_run_id(self):
         self._run_id = run_id_generator()
 
+    def create_run_coroutine(self):
+        """Creates a coroutine executing the state on the event loop of the asyncio execution backend
+
+        :return: the coroutine or None, if the state is run in a thread
+        """
+        return None
+
     def join(self):
         """ Waits until the state finished execution.
 
@@ -392,12 +478,14 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
             # All data port ids have to passed to the id generation as the data port id has to be unique inside a state
             data_port_id = generate_data_port_id(self.get_data_port_ids())
         self._input_data_ports[data_port_id] = InputDataPort(name, data_type, default_value, data_port_id, self)
+        self.data_port_name_changed()
 
         # Check for name uniqueness
         valid, message = self._check_data_port_name(self._input_data_ports[data_port_id])
         if not valid:
             self._input_data_ports[data_port_id].parent = None
             del self._input_data_ports[data_port_id]
+            self.data_port_name_changed()
             raise ValueError(message)
 
         return data_port_id
@@ -415,7 +503,9 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
             if destroy:
                 self.remove_data_flows_with_data_port_id(data_port_id)
             self._input_data_ports[data_port_id].parent = None
-            return self._input_data_ports.pop(data_port_id)
+            data_port = self._input_data_ports.pop(data_port_id)
+            self.data_port_name_changed()
+            return data_port
         else:
             raise AttributeError("input data port with name %s does not exit", data_port_id)
 
@@ -456,12 +546,14 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
             # All data port ids have to passed to the id generation as the data port id has to be unique inside a state
             data_port_id = generate_data_port_id(self.get_data_port_ids())
         self._output_data_ports[data_port_id] = OutputDataPort(name, data_type, default_value, data_port_id, self)
+        self.data_port_name_changed()
 
         # Check for name uniqueness
         valid, message = self._check_data_port_name(self._output_data_ports[data_port_id])
         if not valid:
             self._output_data_ports[data_port_id].parent = None
             del self._output_data_ports[data_port_id]
+            self.data_port_name_changed()
             raise ValueError(message)
 
         return data_port_id
@@ -478,7 +570,9 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
             if destroy:
                 self.remove_data_flows_with_data_port_id(data_port_id)
             self._output_data_ports[data_port_id].parent = None
-            return self._output_data_ports.pop(data_port_id)
+            data_port = self._output_data_ports.pop(data_port_id)
+            self.data_port_name_changed()
+            return data_port
         else:
             raise AttributeError("output data port with name %s does not exit", data_port_id)
 
@@ -491,19 +585,42 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         :raises exceptions.AttributeError: if the specified data port does not exist in the input or output data ports
         """
         if data_port_type is InputDataPort:
-            for ip_id, output_port in self.input_data_ports.items():
-                if output_port.name == name:
-                    return ip_id
+            data_port_ids_by_name = self._get_io_data_port_ids_by_name(InputDataPort)
+            if name in data_port_ids_by_name:
+                return data_port_ids_by_name[name]
             raise AttributeError("Name '{0}' is not in input_data_ports".format(name))
         elif data_port_type is OutputDataPort:
-            for op_id, output_port in self.output_data_ports.items():
-                if output_port.name == name:
-                    return op_id
+            data_port_ids_by_name = self._get_io_data_port_ids_by_name(OutputDataPort)
+            if name in data_port_ids_by_name:
+                return data_port_ids_by_name[name]
             # 'error' is an automatically generated output port in case of errors and exception and doesn't have an id
             if name == "error":
                 return
             raise AttributeError("Name '{0}' is not in output_data_ports".format(name))
 
+    def _get_io_data_port_ids_by_name(self, data_port_type):
+        """Returns a dictionary mapping the names of the input or output data ports onto their ids
+
+        The dictionary is created on first access and dropped by :meth:`data_port_name_changed`.
+
+        :param data_port_type: Either InputDataPort or OutputDataPort
+        :return: The data port ids of the requested data port type, accessible by the data port names
+        :rtype: dict
+        """
+        data_port_ids_by_name = self._data_port_ids_by_name.get(data_port_type)
+        if data_port_ids_by_name is None:
+            data_ports = self._input_data_ports if data_port_type is InputDataPort else self._output_data_ports
+            data_port_ids_by_name = {data_port.name: data_port_id for data_port_id, data_port in data_ports.items()}
+            self._data_port_ids_by_name[data_port_type] = data_port_ids_by_name
+        return data_port_ids_by_name
+
+    def data_port_name_changed(self):
+        """Drops the name to id mapping of the data ports
+
+        Must be called whenever a data port of the state is added, removed or renamed.
+        """
+        self._data_port_ids_by_name = {}
+
     def get_data_port_by_id(self, data_port_id):
         """Search for the given data port id in the data ports of the state
 
@@ -531,11 +648,26 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         concatenates either State.state_id (always unique) or State.name (maybe not unique but human readable) as
         state identifier for the path.
 
+        The path of state ids is cached until the parent or the id of any state changes.
+
         :param str appendix: the part of the path that was already calculated by previous function calls
         :param bool by_name: The boolean enables name usage to generate the path
         :rtype: str
         :return: the full path to the root state
         """
+        if appendix is None and not by_name:
+            cached_version, path = self._path_cache
+            if cached_version == _hierarchy_version:
+                return path
+            # the version is read before walking up the hierarchy, thus changes in between invalidate the result
+            version = _hierarchy_version
+            if self.is_root_state:
+                path = self.state_id
+            else:
+                path = self.parent.get_path() + PATH_SEPARATOR + self.state_id
+            self._path_cache = (version, path)
+            return path
+
         if by_name:
             state_identifier = self.name
         else:
@@ -578,16 +710,41 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     def get_state_machine(self):
         """Get a reference of the state_machine the state belongs to
 
+        The state machine is cached until the parent of any state changes.
+
         :rtype rafcon.core.state_machine.StateMachine
         :return: respective state machine
         """
+        cached_version, state_machine_reference = self._state_machine_cache
+        if cached_version == _hierarchy_version:
+            return state_machine_reference() if state_machine_reference is not None else None
+
+        # the version is read before walking up the hierarchy, thus changes in between invalidate the result
+        version = _hierarchy_version
+        state_machine = None
         if self.parent:
             if self.is_root_state:
-                return self.parent
+                state_machine = self.parent
             else:
-                return self.parent.get_state_machine()
+                state_machine = self.parent.get_state_machine()
+        self._state_machine_cache = (version, ref(state_machine) if state_machine is not None else None)
+        return state_machine
 
-        return None
+    @property
+    def execution_engine(self):
+        """Get the execution engine executing the state
+
+        This is the engine of the state machine of the state, if it is executed as one of several instances, otherwise
+        the engine singleton.
+
+        :rtype rafcon.core.execution.execution_engine.ExecutionEngine
+        :return: the execution engine of the state
+        """
+        state_machine = self.get_state_machine()
+        if state_machine is not None and state_machine.execution_engine is not None:
+            return state_machine.execution_engine
+        from rafcon.core.singleton import state_machine_execution_engine
+        return state_machine_execution_engine
 
     @property
     def file_system_path(self):
@@ -890,6 +1047,9 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 state_id = state_id_generator(used_state_ids=used_ids)
 
         self._state_id = state_id
+        self.invalidate_hash()
+        # the paths of the state and its descendants change
+        _increment_hierarchy_version()
 
     def get_states_statistics(self, hierarchy_level):
         """Get states statistic tuple
@@ -1030,6 +1190,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 raise TypeError("parent must be of type State or StateMachine or None")
 
             self._parent = ref(parent)
+        _increment_hierarchy_version()
 
     @property
     def input_data_ports(self):
@@ -1076,11 +1237,13 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
         old_input_data_ports = self._input_data_ports
         self._input_data_ports = input_data_ports
+        self.data_port_name_changed()
         for port_id, port in input_data_ports.items():
             try:
                 port.parent = self
             except ValueError:
                 self._input_data_ports = old_input_data_ports
+                self.data_port_name_changed()
                 raise
 
         # check that all old_input_data_ports are no more referencing self as there parent
@@ -1134,11 +1297,13 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
         old_output_data_ports = self._output_data_ports
         self._output_data_ports = output_data_ports
+        self.data_port_name_changed()
         for port_id, port in output_data_ports.items():
             try:
                 port.parent = self
             except ValueError:
                 self._output_data_ports = old_output_data_ports
+                self.data_port_name_changed()
                 raise
 
         # check that all old_output_data_ports are no more referencing self as there parent
@@ -1234,7 +1399,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._input_data
 
     @input_data.setter
-    @lock_state_machine
+    @lock_state_machine_unless_headless
     #@Observable.observed
     def input_data(self, input_data):
         if not isinstance(input_data, dict):
@@ -1249,7 +1414,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._output_data
 
     @output_data.setter
-    @lock_state_machine
+    @lock_state_machine_unless_headless
     #@Observable.observed
     def output_data(self, output_data):
         if not isinstance(output_data, dict):
@@ -1263,7 +1428,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._preempted.is_set()
 
     @preempted.setter
-    @lock_state_machine
+    @lock_state_machine_unless_headless
     def preempted(self, preempted):
         if not isinstance(preempted, bool):
             raise TypeError("preempted must be of type bool")
@@ -1279,7 +1444,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._started.is_set()
 
     @started.setter
-    @lock_state_machine
+    @lock_state_machine_unless_headless
     def started(self, started):
         if not isinstance(started, bool):
             raise TypeError("started must be of type bool")
@@ -1295,7 +1460,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._paused.is_set()
 
     @paused.setter
-    @lock_state_machine
+    @lock_state_machine_unless_headless
     def paused(self, paused):
         if not isinstance(paused, bool):
             raise TypeError("paused must be of type bool")
@@ -1330,7 +1495,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._concurrency_queue
 
     @concurrency_queue.setter
-    @lock_state_machine
+    @lock_state_machine_unless_headless
     #@Observable.observed
     def concurrency_queue(self, concurrency_queue):
         if not isinstance(concurrency_queue, queue.Queue):
@@ -1349,7 +1514,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._final_outcome
 
     @final_outcome.setter
-    @lock_state_machine
+    @lock_state_machine_unless_headless
     #@Observable.observed
     def final_outcome(self, final_outcome):
         if not isinstance(final_outcome, Outcome):
@@ -1394,8 +1559,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._state_execution_status
 
     @state_execution_status.setter
-    @lock_state_machine
-    @Observable.observed
+    @observed_unless_headless
     def state_execution_status(self, state_execution_status):
         if not isinstance(state_execution_status, StateExecutionStatus):
             raise TypeError("state_execution_status must be of type StateExecutionStatus")
@@ -1514,6 +1678,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
             self._semantic_data = Vividict(semantic_data)
         else:
             self._semantic_data = semantic_data
+        self._semantic_data.set_change_callback(_create_hash_invalidation_callback(self))
 
 
 StateType = Enum('STATE_TYPE', 'EXECUTION HIERARCHY BARRIER_CONCURRENCY PREEMPTION_CONCURRENCY LIBRARY DECIDER_STATE')
@@ -17,6 +17,7 @@
 """
 
 from future.utils import string_types
+from builtins import object
 from builtins import str
 import os
 import re
@@ -24,12 +25,18 @@ import math
 import shutil
 import glob
 import copy
+import hashlib
+import io
+import posixpath
+import threading
+import zipfile
 import yaml
+from collections import defaultdict, OrderedDict
 from distutils.version import StrictVersion
 
 import rafcon
 
-from rafcon.utils.filesystem import read_file, write_file
+from rafcon.utils.filesystem import read_file, write_file_atomically
 from rafcon.utils import storage_utils
 from rafcon.utils import log
 from rafcon.utils.timer import measure_time
@@ -53,10 +60,20 @@ SEMANTIC_DATA_FILE = 'semantic_data.json'
 STATEMACHINE_FILE = 'statemachine.json'
 STATEMACHINE_FILE_OLD = 'statemachine.yaml'
 ID_NAME_DELIMITER = "_"
+#: The comment of packed state machine files, followed by the name of the serializer of their files
+PACKED_FILE_COMMENT_PREFIX = b"RAFCON packed state machine, serializer: "
 
 REPLACED_CHARACTERS_FOR_NO_OS_LIMITATION = {'/': '', r'\0': '', '<': '', '>': '', ':': '_',
                                             '\\': '', '|': '_', '?': '', '*': '_'}
 
+#: The maximum number of files, whose content is remembered to skip writing unchanged files
+MAX_STORED_FILE_HASHES = 100000
+# maps the paths of the files of stored state machines to the hash of their content and their modification time and
+# size, when they were last written or read, so that unchanged files are not written again; the least recently stored
+# files are forgotten first
+_stored_file_hashes = OrderedDict()
+_stored_file_hashes_lock = threading.Lock()
+
 # clean the DEFAULT_SCRIPT_PATH folder at each program start
 if os.path.exists(DEFAULT_SCRIPT_PATH):
     files = glob.glob(os.path.join(DEFAULT_SCRIPT_PATH, "*"))
@@ -64,6 +81,93 @@ if os.path.exists(DEFAULT_SCRIPT_PATH):
         shutil.rmtree(f)
 
 
+def get_folder_serializer():
+    """Returns the serializer of the files of state machines stored in folders, see config option STORAGE_SERIALIZER
+
+    :rtype: rafcon.utils.storage_utils.Serializer
+    :raises exceptions.ValueError: if the configured serializer does not create JSON
+    """
+    serializer = storage_utils.get_serializer(global_config.get_config_value("STORAGE_SERIALIZER", "json"))
+    if serializer.file_extension != ".json":
+        raise ValueError("The serializer {0} cannot be used for state machine folders, as they contain JSON files, "
+                         "use a packed state machine file instead".format(serializer.name))
+    return serializer
+
+
+def _get_serializer_of_files(files):
+    """Returns the serializer of the files of a state machine or a state, which were read from a folder or packed file
+
+    :param dict files: the files, see :func:`read_state_machine_files`
+    :rtype: rafcon.utils.storage_utils.Serializer
+    """
+    if files.get('serializer') is not None:
+        return storage_utils.get_serializer(files['serializer'])
+    return get_folder_serializer()
+
+
+def _get_content_hash(content):
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).digest()
+
+
+def _remember_file_content(file_path, content):
+    """Remembers the content of a file, which was just read or written
+
+    :param str file_path: the absolute path of the file
+    :param str content: the content of the file
+    """
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return
+    stored_file_hash = (_get_content_hash(content), file_stat.st_mtime, file_stat.st_size)
+    with _stored_file_hashes_lock:
+        _stored_file_hashes.pop(file_path, None)
+        _stored_file_hashes[file_path] = stored_file_hash
+        while len(_stored_file_hashes) > MAX_STORED_FILE_HASHES:
+            _stored_file_hashes.popitem(last=False)
+
+
+def forget_stored_files(base_path):
+    """Forgets the content of all files below a path, e.g. when a state machine is closed
+
+    The files are written again by the next save, even if they are unchanged.
+
+    :param str base_path: the path of a state machine or of a state
+    """
+    base_path = os.path.join(os.path.abspath(base_path), "")
+    with _stored_file_hashes_lock:
+        for file_path in [file_path for file_path in _stored_file_hashes if file_path.startswith(base_path)]:
+            del _stored_file_hashes[file_path]
+
+
+def write_file_if_changed(file_path, content):
+    """Writes a file of a state machine atomically, if its content changed
+
+    The file is not written, if it was written or read with the same content before and was not modified since then.
+
+    :param str file_path: the path of the file
+    :param str content: the content of the file
+    :return: True, if the file was written
+    :rtype: bool
+    """
+    file_path = os.path.abspath(file_path)
+    with _stored_file_hashes_lock:
+        stored_file_hash = _stored_file_hashes.get(file_path, None)
+    if stored_file_hash is not None:
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            pass
+        else:
+            if stored_file_hash == (_get_content_hash(content), file_stat.st_mtime, file_stat.st_size):
+                return False
+    write_file_atomically(file_path, content)
+    _remember_file_content(file_path, content)
+    return True
+
+
 def remove_obsolete_folders(states, path):
     """Removes obsolete state machine folders
 
@@ -154,6 +258,8 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
     :param str base_path: base_path to which all further relative paths refers to
     :param bool delete_old_state_machine: Whether to delete any state machine existing at the given path
     :param bool as_copy: Whether to use a copy storage for the state machine
+    :return: the number of written files, files with unchanged content are not written again
+    :rtype: int
     """
     # warns the user in the logger when using deprecated names
     clean_path_from_deprecated_naming(base_path)
@@ -174,7 +280,10 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
         old_update_time = state_machine.last_update
         state_machine.last_update = storage_utils.get_current_time_string()
         state_machine_dict = state_machine.to_dict()
-        storage_utils.write_dict_to_json(state_machine_dict, os.path.join(base_path, STATEMACHINE_FILE))
+        number_of_written_files = 0
+        if write_file_if_changed(os.path.join(base_path, STATEMACHINE_FILE),
+                                 get_folder_serializer().dumps(state_machine_dict)):
+            number_of_written_files += 1
 
         # set the file_system_path of the state machine
         if not as_copy:
@@ -184,11 +293,13 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
 
         # add root state recursively
         remove_obsolete_folders([root_state], base_path)
-        save_state_recursively(root_state, base_path, "", as_copy)
+        number_of_written_files += save_state_recursively(root_state, base_path, "", as_copy)
 
         if state_machine.marked_dirty and not as_copy:
             state_machine.marked_dirty = False
-        logger.debug("State machine with id {0} was saved at {1}".format(state_machine.state_machine_id, base_path))
+        logger.debug("State machine with id {0} was saved at {1}, {2} files were written".format(
+            state_machine.state_machine_id, base_path, number_of_written_files))
+        return number_of_written_files
     except Exception:
         raise
     finally:
@@ -203,14 +314,17 @@ def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=F
     :param state: The state of which the script file should be saved
     :param str state_path_full: The path to the file system storage location of the state
     :param bool as_copy: Temporary storage flag to signal that the given path is not the new file_system_path
+    :return: True, if the script file was written
+    :rtype: bool
     """
     from rafcon.core.states.execution_state import ExecutionState
+    written = False
     if isinstance(state, ExecutionState):
         source_script_file = os.path.join(state.script.path, state.script.filename)
         destination_script_file = os.path.join(state_path_full, SCRIPT_FILE)
 
         try:
-            write_file(destination_script_file, state.script_text)
+            written = write_file_if_changed(destination_script_file, state.script_text)
         except Exception:
             logger.exception("Storing of script file failed: {0} -> {1}".format(state.get_path(),
                                                                                 destination_script_file))
@@ -219,6 +333,7 @@ def save_script_file_for_state_and_source_path(state, state_path_full, as_copy=F
         if not source_script_file == destination_script_file and not as_copy:
             state.script.filename = SCRIPT_FILE
             state.script.path = state_path_full
+    return written
 
 
 def save_semantic_data_for_state(state, state_path_full):
@@ -226,12 +341,14 @@ def save_semantic_data_for_state(state, state_path_full):
 
     :param state: The state of which the script file should be saved
     :param str state_path_full: The path to the file system storage location of the state
+    :return: True, if the semantic data file was written
+    :rtype: bool
     """
 
     destination_script_file = os.path.join(state_path_full, SEMANTIC_DATA_FILE)
 
     try:
-        storage_utils.write_dict_to_json(state.semantic_data, destination_script_file)
+        return write_file_if_changed(destination_script_file, get_folder_serializer().dumps(state.semantic_data))
     except IOError:
         logger.exception("Storing of semantic data for state {0} failed! Destination path: {1}".
                          format(state.get_path(), destination_script_file))
@@ -247,7 +364,8 @@ def save_state_recursively(state, base_path, parent_path, as_copy=False):
     :param base_path: Path to the state machine
     :param parent_path: Path to the parent state
     :param bool as_copy: Temporary storage flag to signal that the given path is not the new file_system_path
-    :return:
+    :return: the number of written files
+    :rtype: int
     """
     from rafcon.core.states.execution_state import ExecutionState
     from rafcon.core.states.container_state import ContainerState
@@ -257,37 +375,50 @@ def save_state_recursively(state, base_path, parent_path, as_copy=False):
     if not os.path.exists(state_path_full):
         os.makedirs(state_path_full)
 
-    storage_utils.write_dict_to_json(state, os.path.join(state_path_full, FILE_NAME_CORE_DATA))
+    number_of_written_files = 0
+    if write_file_if_changed(os.path.join(state_path_full, FILE_NAME_CORE_DATA),
+                             get_folder_serializer().dumps(state)):
+        number_of_written_files += 1
     if not as_copy:
         state.file_system_path = state_path_full
 
     if isinstance(state, ExecutionState):
-        save_script_file_for_state_and_source_path(state, state_path_full, as_copy)
+        if save_script_file_for_state_and_source_path(state, state_path_full, as_copy):
+            number_of_written_files += 1
 
-    save_semantic_data_for_state(state, state_path_full)
+    if save_semantic_data_for_state(state, state_path_full):
+        number_of_written_files += 1
 
     # create yaml files for all children
     if isinstance(state, ContainerState):
         remove_obsolete_folders(state.states.values(), os.path.join(base_path, state_path))
         for state in state.states.values():
-            save_state_recursively(state, base_path, state_path, as_copy)
+            number_of_written_files += save_state_recursively(state, base_path, state_path, as_copy)
+    return number_of_written_files
 
 
 @measure_time
-def load_state_machine_from_path(base_path, state_machine_id=None):
+def load_state_machine_from_path(base_path, state_machine_id=None, state_machine_files=None):
     """Loads a state machine from the given path
 
-    :param base_path: An optional base path for the state machine.
+    :param base_path: An optional base path for the state machine, either a folder or a packed state machine file, see
+           :func:`save_state_machine_to_packed_file`
+    :param dict state_machine_files: the files of the state machine read before by :func:`read_state_machine_files`,
+           if given, the files are not read again
     :return: a tuple of the loaded container state, the version of the state and the creation time
     :raises ValueError: if the provided path does not contain a valid state machine
     """
     logger.debug("Loading state machine from path {0}...".format(base_path))
 
+    if state_machine_files is None and is_packed_file(base_path):
+        state_machine_files = read_packed_state_machine_files(base_path)
+
     state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
     state_machine_file_path_old = os.path.join(base_path, STATEMACHINE_FILE_OLD)
 
     # was the root state specified as state machine base_path to load from?
-    if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
+    if state_machine_files is None and not os.path.exists(state_machine_file_path) and \
+            not os.path.exists(state_machine_file_path_old):
 
         # catch the case that a state machine root file is handed
         if os.path.exists(base_path) and os.path.isfile(base_path):
@@ -298,7 +429,10 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
         if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
             raise ValueError("Provided path doesn't contain a valid state machine: {0}".format(base_path))
 
-    state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
+    if state_machine_files is not None:
+        state_machine_dict = _get_serializer_of_files(state_machine_files).loads(state_machine_files['state_machine'])
+    else:
+        state_machine_dict = get_folder_serializer().loads(read_file(state_machine_file_path))
     if 'used_rafcon_version' in state_machine_dict:
         previously_used_rafcon_version = StrictVersion(state_machine_dict['used_rafcon_version']).version
         active_rafcon_version = StrictVersion(rafcon.__version__).version
@@ -345,8 +479,14 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
     root_state_path = os.path.join(base_path, root_state_storage_id)
     state_machine.file_system_path = base_path
     dirty_states = []
-    state_machine.root_state = load_state_recursively(parent=state_machine, state_path=root_state_path,
-                                                      dirty_states=dirty_states)
+    state_file_reader = StateFileReader(global_config.get_config_value("STORAGE_LOADING_THREADS", 4),
+                                        state_machine_files['states'] if state_machine_files else None)
+    try:
+        state_machine.root_state = load_state_recursively(parent=state_machine, state_path=root_state_path,
+                                                          dirty_states=dirty_states,
+                                                          state_file_reader=state_file_reader)
+    finally:
+        state_file_reader.shutdown()
     if len(dirty_states) > 0:
         state_machine.marked_dirty = True
     else:
@@ -362,16 +502,314 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
     return state_machine
 
 
+def read_state_machine_files(base_path):
+    """Reads all files of a state machine, which are needed to load it, without decoding them
+
+    The result can be passed to :func:`load_state_machine_from_path` and be pickled, e.g. to cache the state machine.
+
+    :param str base_path: the path of the state machine, either a folder or a packed state machine file
+    :return: a dict with the content of the state machine file and the files of all states by their path
+    :rtype: dict
+    :raises exceptions.ValueError: if the provided path does not contain a valid state machine
+    """
+    if is_packed_file(base_path):
+        return read_packed_state_machine_files(base_path)
+    state_machine_file = read_file(base_path, STATEMACHINE_FILE)
+    if state_machine_file is None:
+        raise ValueError("Provided path doesn't contain a valid state machine: {0}".format(base_path))
+    states = {}
+    state_file_reader = StateFileReader(global_config.get_config_value("STORAGE_LOADING_THREADS", 4))
+
+    def read_state_files_recursively(state_path):
+        try:
+            states[state_path] = state_file_reader.read(state_path)
+        except ValueError:
+            # not a state, load_state_recursively reports the error
+            return
+        for child_state_path in states[state_path]['child_state_paths']:
+            read_state_files_recursively(child_state_path)
+
+    try:
+        root_state_paths = _get_child_state_paths(base_path)
+        for root_state_path in root_state_paths:
+            state_file_reader.prefetch(root_state_path)
+        for root_state_path in root_state_paths:
+            read_state_files_recursively(root_state_path)
+    finally:
+        state_file_reader.shutdown()
+    return {'state_machine': state_machine_file, 'states': states}
+
+
+def save_state_machine_to_packed_file(state_machine, file_path, serializer_name=None):
+    """Saves a state machine into a single packed file, e.g. to deploy it
+
+    The packed file is an uncompressed zip archive with the files of the folder layout, whose index allows to read the
+    files of single states without reading the whole file. Empty semantic data are omitted. The state machine and the
+    states are serialized with the given serializer. The file is written atomically. As when saving a copy, the file
+    system path and the dirty flag of the state machine are not changed.
+
+    :param rafcon.core.state_machine.StateMachine state_machine: the state machine to be saved
+    :param str file_path: the path of the packed file
+    :param str serializer_name: the name of the serializer, by default "msgpack" if the package msgpack is installed
+           and "compact_json" otherwise
+    """
+    from rafcon.core.states.execution_state import ExecutionState
+    from rafcon.core.states.container_state import ContainerState
+    if serializer_name is None:
+        serializer_name = "msgpack" if storage_utils.msgpack is not None else "compact_json"
+    serializer = storage_utils.get_serializer(serializer_name)
+
+    buffer = io.BytesIO()
+    state_machine.acquire_modification_lock()
+    try:
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as packed_file:
+            packed_file.comment = PACKED_FILE_COMMENT_PREFIX + serializer.name.encode('ascii')
+            packed_file.writestr(_get_packed_file_name(STATEMACHINE_FILE, serializer),
+                                 serializer.dumps(state_machine.to_dict()))
+            pending_states = [(state_machine.root_state, get_storage_id_for_state(state_machine.root_state))]
+            while pending_states:
+                state, state_path = pending_states.pop()
+                packed_file.writestr(posixpath.join(state_path, _get_packed_file_name(FILE_NAME_CORE_DATA, serializer)),
+                                     serializer.dumps(state))
+                if state.semantic_data:
+                    packed_file.writestr(posixpath.join(state_path,
+                                                        _get_packed_file_name(SEMANTIC_DATA_FILE, serializer)),
+                                         serializer.dumps(state.semantic_data))
+                if isinstance(state, ExecutionState):
+                    packed_file.writestr(posixpath.join(state_path, SCRIPT_FILE), state.script_text)
+                if isinstance(state, ContainerState):
+                    pending_states.extend(
+                        (child_state, posixpath.join(state_path, get_storage_id_for_state(child_state)))
+                        for child_state in state.states.values())
+    finally:
+        state_machine.release_modification_lock()
+    write_file_atomically(file_path, buffer.getvalue())
+    logger.debug("State machine with id {0} was packed into {1}".format(state_machine.state_machine_id, file_path))
+
+
+def _get_packed_file_name(file_name, serializer):
+    return os.path.splitext(file_name)[0] + serializer.file_extension
+
+
+def _get_packed_file_serializer(packed_file):
+    """Returns the serializer of a packed state machine file
+
+    :param zipfile.ZipFile packed_file: the opened packed file
+    :rtype: rafcon.utils.storage_utils.Serializer
+    :raises exceptions.ValueError: if the file is no packed state machine file
+    """
+    if not packed_file.comment.startswith(PACKED_FILE_COMMENT_PREFIX):
+        raise ValueError("{0} is no packed state machine file".format(packed_file.filename))
+    return storage_utils.get_serializer(packed_file.comment[len(PACKED_FILE_COMMENT_PREFIX):].decode('ascii'))
+
+
+def is_packed_file(path):
+    """Checks whether a path is a packed state machine file, see :func:`save_state_machine_to_packed_file`
+
+    :param str path: the path to be checked
+    :rtype: bool
+    """
+    if not os.path.isfile(path) or not zipfile.is_zipfile(path):
+        return False
+    # the comment is at the end of a zip file, thus the index of the zip file is not read
+    with open(path, 'rb') as packed_file:
+        packed_file.seek(-min(os.path.getsize(path), 256), os.SEEK_END)
+        return PACKED_FILE_COMMENT_PREFIX in packed_file.read()
+
+
+def _split_packed_file_path(path):
+    """Splits a path leading into a packed state machine file into the path of the file and the path within it
+
+    :param str path: the path, e.g. of a state within a packed file
+    :return: the path of the packed file and the path within it, or (None, None) if the path does not lead into a
+             packed file
+    """
+    packed_file_path = path
+    while not os.path.exists(packed_file_path):
+        parent_path = os.path.dirname(packed_file_path)
+        if parent_path == packed_file_path:
+            return None, None
+        packed_file_path = parent_path
+    if packed_file_path == path or not is_packed_file(packed_file_path):
+        return None, None
+    return packed_file_path, os.path.relpath(path, packed_file_path)
+
+
+def read_packed_state_machine_files(file_path, state_path=None):
+    """Reads the files of a state machine from a packed state machine file without decoding them
+
+    The result has the format of :func:`read_state_machine_files`, the paths of the states lead into the packed file.
+    Via the index of the packed file, only the files of a single state and its descendants can be read.
+
+    :param str file_path: the path of the packed file
+    :param str state_path: the path of a state within the packed file, e.g. "root_ABCDEF/child_GHIJKL", to only read
+           the files of this state and its descendants
+    :return: a dict with the content of the state machine file, the files of the states by their path and the name of
+             their serializer
+    :rtype: dict
+    :raises exceptions.ValueError: if the file is no packed state machine file
+    """
+    with zipfile.ZipFile(file_path) as packed_file:
+        serializer = _get_packed_file_serializer(packed_file)
+        file_names = set(packed_file.namelist())
+
+        def read_member(name, binary=serializer.binary):
+            if name not in file_names:
+                return None
+            content = packed_file.read(name)
+            return content if binary else content.decode('utf-8')
+
+        core_data_file_name = _get_packed_file_name(FILE_NAME_CORE_DATA, serializer)
+        semantic_data_file_name = _get_packed_file_name(SEMANTIC_DATA_FILE, serializer)
+        prefix = posixpath.join(*state_path.split(os.sep)) + "/" if state_path else ""
+        packed_state_paths = [posixpath.dirname(name) for name in file_names
+                              if name.startswith(prefix) and posixpath.basename(name) == core_data_file_name]
+        child_state_paths = defaultdict(list)
+        for packed_state_path in packed_state_paths:
+            child_state_paths[posixpath.dirname(packed_state_path)].append(packed_state_path)
+
+        def get_full_path(packed_state_path):
+            return os.path.join(file_path, *packed_state_path.split("/"))
+
+        states = {}
+        for packed_state_path in packed_state_paths:
+            states[get_full_path(packed_state_path)] = {
+                'core_data_path': get_full_path(posixpath.join(packed_state_path, core_data_file_name)),
+                'core_data': read_member(posixpath.join(packed_state_path, core_data_file_name)),
+                'script': read_member(posixpath.join(packed_state_path, SCRIPT_FILE), binary=False),
+                'semantic_data': read_member(posixpath.join(packed_state_path, semantic_data_file_name)),
+                'child_state_paths': [get_full_path(child_state_path)
+                                      for child_state_path in child_state_paths[packed_state_path]],
+                'serializer': serializer.name}
+        state_machine_file = read_member(_get_packed_file_name(STATEMACHINE_FILE, serializer))
+    return {'state_machine': state_machine_file, 'states': states, 'serializer': serializer.name}
+
+
 def load_state_from_path(state_path):
     """Loads a state from a given path
 
+    The path can also lead into a packed state machine file, e.g. "/path/to/state_machine.zip/root_ABCDEF/child_GHIJKL",
+    then only the files of the state and its descendants are read from the packed file.
+
     :param state_path: The path of the state on the file system.
     :return: the loaded state
     """
-    return load_state_recursively(parent=None, state_path=state_path)
+    state_files = None
+    packed_file_path, packed_state_path = _split_packed_file_path(state_path)
+    if packed_file_path is not None:
+        state_files = read_packed_state_machine_files(packed_file_path, packed_state_path)['states']
+    state_file_reader = StateFileReader(global_config.get_config_value("STORAGE_LOADING_THREADS", 4), state_files)
+    try:
+        return load_state_recursively(parent=None, state_path=state_path, state_file_reader=state_file_reader)
+    finally:
+        state_file_reader.shutdown()
+
 
+def _read_state_files(state_path):
+    """Reads the files of a state without decoding them
+
+    :param str state_path: the path of the state on the file system
+    :return: a dict with the path and the content of the core data file, the content of the default script and
+             semantic data files (None, if not existing) and the paths of the child states
+    :raises exceptions.ValueError: if the core data file was not found
+    """
+    path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA)
+    # TODO: Should be removed with next minor release
+    if not os.path.exists(path_core_data):
+        path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA_OLD)
+    core_data = read_file(path_core_data)
+    if core_data is None:
+        raise ValueError("Data file not found: {0}".format(path_core_data))
+    state_files = {'core_data_path': path_core_data,
+                   'core_data': core_data,
+                   'script': read_file(state_path, SCRIPT_FILE),
+                   'semantic_data': read_file(state_path, SEMANTIC_DATA_FILE)}
+    # unchanged files are not written when saving the state machine
+    for file_path, content in [(path_core_data, core_data),
+                               (os.path.join(state_path, SCRIPT_FILE), state_files['script']),
+                               (os.path.join(state_path, SEMANTIC_DATA_FILE), state_files['semantic_data'])]:
+        if content is not None:
+            _remember_file_content(os.path.abspath(file_path), content)
+    return state_files
+
+
+def _get_child_state_paths(state_path):
+    return [child_state_path for child_state_path in (os.path.join(state_path, p) for p in os.listdir(state_path))
+            if os.path.isdir(child_state_path)]
+
+
+class StateFileReader(object):
+    """Reads the files of the states of a state machine, optionally ahead of time in a thread pool
+
+    With more than one thread, reading the files of a state also schedules the reading of its child states. Thus, the
+    files of sibling states and of whole subtrees are read concurrently, while :func:`load_state_recursively` decodes
+    the files and creates the states in the calling thread. The decoding cannot be done in the pool, as the creation
+    of states is not thread-safe, e.g. library states are loaded via the library manager.
+
+    :ivar int number_of_threads: the number of threads reading files, 1 to read the files on demand
+    """
 
-def load_state_recursively(parent, state_path=None, dirty_states=[]):
+    def __init__(self, number_of_threads=1, state_files=None):
+        """
+        :param int number_of_threads: the number of threads reading files, 1 to read the files on demand
+        :param dict state_files: files of states by their path, which were read before, see
+               :func:`read_state_machine_files`
+        """
+        self.number_of_threads = number_of_threads
+        self._state_files = state_files if state_files is not None else {}
+        self._executor = None
+        if number_of_threads > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(number_of_threads)
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def prefetch(self, state_path):
+        """Schedules the reading of the files of a state and its descendants
+
+        :param str state_path: the path of the state on the file system
+        """
+        with self._lock:
+            if self._executor is None or state_path in self._futures or state_path in self._state_files:
+                return
+            self._futures[state_path] = self._executor.submit(self._read_and_prefetch, state_path)
+
+    def _read_and_prefetch(self, state_path):
+        child_state_paths = _get_child_state_paths(state_path)
+        for child_state_path in child_state_paths:
+            self.prefetch(child_state_path)
+        state_files = _read_state_files(state_path)
+        state_files['child_state_paths'] = child_state_paths
+        return state_files
+
+    def read(self, state_path):
+        """Returns the files of a state, waiting for them, if they are being read
+
+        :param str state_path: the path of the state on the file system
+        :return: the files of the state, see :func:`_read_state_files`, and the paths of its child states
+        :rtype: dict
+        :raises exceptions.ValueError: if the core data file was not found
+        """
+        if state_path in self._state_files:
+            return self._state_files[state_path]
+        with self._lock:
+            future = self._futures.pop(state_path, None)
+        if future is None:
+            state_files = _read_state_files(state_path)
+            state_files['child_state_paths'] = _get_child_state_paths(state_path)
+            return state_files
+        return future.result()
+
+    def shutdown(self):
+        """Stops the thread pool after all scheduled files have been read"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._futures = {}
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def load_state_recursively(parent, state_path=None, dirty_states=[], state_file_reader=None):
     """Recursively loads the state
 
     It calls this method on each sub-state of a container state.
@@ -379,29 +817,31 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
     :param parent:  the root state of the last load call to which the loaded state will be added
     :param state_path: the path on the filesystem where to find the meta file for the state
     :param dirty_states: a dict of states which changed during loading
+    :param StateFileReader state_file_reader: the reader for the files of the states, if not given, the files are
+           read on demand
     :return:
     """
     from rafcon.core.states.execution_state import ExecutionState
     from rafcon.core.states.container_state import ContainerState
     from rafcon.core.states.hierarchy_state import HierarchyState
 
-    path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA)
-
     logger.debug("Load state recursively: {0}".format(str(state_path)))
 
-    # TODO: Should be removed with next minor release
-    if not os.path.exists(path_core_data):
-        path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA_OLD)
+    if state_file_reader is None:
+        state_file_reader = StateFileReader()
+    state_file_reader.prefetch(state_path)
 
     try:
-        state_info = load_data_file(path_core_data)
+        state_files = state_file_reader.read(state_path)
+        serializer = _get_serializer_of_files(state_files)
+        state_info = serializer.loads(state_files['core_data'])
     except ValueError as e:
         logger.exception("Error while loading state data: {0}".format(e))
         return
     except LibraryNotFoundException as e:
         logger.error("Library could not be loaded: {0}\n"
                      "Skipping library and continuing loading the state machine".format(e))
-        state_info = storage_utils.load_objects_from_json(path_core_data, as_dict=True)
+        state_info = serializer.loads(state_files['core_data'], as_dict=True)
         state_id = state_info["state_id"]
         dummy_state = HierarchyState(LIBRARY_NOT_FOUND_DUMMY_STATE_NAME, state_id=state_id)
         # set parent of dummy state
@@ -429,12 +869,15 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
 
     # read script file if an execution state
     if isinstance(state, ExecutionState):
-        script_text = read_file(state_path, state.script.filename)
+        if state.script.filename == SCRIPT_FILE:
+            script_text = state_files['script']
+        else:
+            script_text = read_file(state_path, state.script.filename)
         state.script_text = script_text
 
     # load semantic data
     try:
-        semantic_data = load_data_file(os.path.join(state_path, SEMANTIC_DATA_FILE))
+        semantic_data = serializer.loads(state_files['semantic_data'])
         state.semantic_data = semantic_data
     except Exception as e:
         # semantic data file does not have to be there
@@ -443,12 +886,10 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
     one_of_my_child_states_not_found = False
 
     # load child states
-    for p in os.listdir(state_path):
-        child_state_path = os.path.join(state_path, p)
-        if os.path.isdir(child_state_path):
-            child_state = load_state_recursively(state, child_state_path, dirty_states)
-            if child_state.name is LIBRARY_NOT_FOUND_DUMMY_STATE_NAME:
-                one_of_my_child_states_not_found = True
+    for child_state_path in state_files['child_state_paths']:
+        child_state = load_state_recursively(state, child_state_path, dirty_states, state_file_reader)
+        if child_state.name is LIBRARY_NOT_FOUND_DUMMY_STATE_NAME:
+            one_of_my_child_states_not_found = True
 
     if one_of_my_child_states_not_found:
         # omit adding transitions and data flows in this case
@@ -385,19 +385,21 @@ class ExecutionHistoryTreeController(ExtendedController):
             return
 
         for execution_number, execution_history in enumerate(selected_sm_m.state_machine.execution_histories):
-            if len(execution_history) > 0:
-                first_history_item = execution_history[0]
+            # the history might be extended by the running state machine, thus a snapshot of it is shown
+            history_items = execution_history.get_history_items()
+            if len(history_items) > 0:
+                first_history_item = history_items[0]
                 # the next lines filter out the StateMachineStartItem, which is not intended to
                 # be displayed, but merely as convenient entry point in the saved log file
                 if isinstance(first_history_item, StateMachineStartItem):
-                    if len(execution_history) > 1:
-                        first_history_item = execution_history[1]
+                    if len(history_items) > 1:
+                        first_history_item = history_items[1]
                         tree_item = self.history_tree_store.insert_after(
                             None,
                             None,
                             (first_history_item.state_reference.name + " - Run " + str(execution_number + 1),
                              first_history_item, self.TOOL_TIP_TEXT))
-                        self.insert_execution_history(tree_item, execution_history[1:], is_root=True)
+                        self.insert_execution_history(tree_item, history_items[1:], is_root=True)
                     else:
                         pass  # there was only the Start item in the history
                 else:
@@ -406,7 +408,7 @@ class ExecutionHistoryTreeController(ExtendedController):
                         None,
                         (first_history_item.state_reference.name + " - Run " + str(execution_number + 1),
                          first_history_item, self.TOOL_TIP_TEXT))
-                    self.insert_execution_history(tree_item, execution_history, is_root=True)
+                    self.insert_execution_history(tree_item, history_items, is_root=True)
 
         self._restore_expansion_state()
         self._update_lock.release()
@@ -443,13 +445,17 @@ class ExecutionHistoryTreeController(ExtendedController):
     def insert_execution_history(self, parent, execution_history, is_root=False):
         """Insert a list of history items into a the tree store
 
-        If there are concurrency history items, the method is called recursively.
+        If there are concurrency history items, the method is called recursively. The call items of the first states
+        might have been removed by the retention policy of the execution history. The exits of these states are
+        inserted on the level of the parent.
 
         :param Gtk.TreeItem parent: the parent to add the next history item to
-        :param ExecutionHistory execution_history: all history items of a certain state machine execution
+        :param list[HistoryItem] execution_history: all history items of a certain state machine execution
         :param bool is_root: Whether this is the root execution history
         """
         current_parent = parent
+        # the number of container states entered below the parent
+        depth = 0
         execution_history_iterator = iter(execution_history)
         for history_item in execution_history_iterator:
             if isinstance(history_item, ConcurrencyItem):
@@ -465,6 +471,7 @@ class ExecutionHistoryTreeController(ExtendedController):
                     next_history_item = history_item.next
                     if next_history_item and next_history_item.call_type is CallType.CONTAINER:
                         current_parent = tree_item
+                        depth += 1
                         self.insert_history_item(current_parent, next_history_item, "Enter")
                         try:
                             next(execution_history_iterator)  # skips the next history item in the iterator
@@ -482,7 +489,9 @@ class ExecutionHistoryTreeController(ExtendedController):
                     self.insert_history_item(current_parent, history_item, "Return")
                 else:  # CONTAINER
                     self.insert_history_item(current_parent, history_item, "Exit")
-                    current_parent = self.history_tree_store.iter_parent(current_parent)
+                    if depth > 0:
+                        depth -= 1
+                        current_parent = self.history_tree_store.iter_parent(current_parent)
 
             is_root = False
 
@@ -494,9 +503,10 @@ class ExecutionHistoryTreeController(ExtendedController):
         :return:
         """
         for execution_history in concurrent_execution_histories:
-            if len(execution_history) >= 1:
-                first_history_item = execution_history[0]
+            history_items = execution_history.get_history_items()
+            if len(history_items) >= 1:
+                first_history_item = history_items[0]
                 # this is just a dummy item to have an extra parent for each branch
                 # gives better overview in case that one of the child state is a simple execution state
                 tree_item = self.insert_history_item(parent, first_history_item, "Concurrency Branch", dummy=True)
-                self.insert_execution_history(tree_item, execution_history)
+                self.insert_execution_history(tree_item, history_items)
@@ -20,12 +20,14 @@
 
 """
 
+from gi.repository import GLib
 from gi.repository import GObject
 from gi.repository import Gtk
 from gi.repository import Gdk
 from future.utils import string_types
 from builtins import str
 import os
+import threading
 from functools import partial
 
 from rafcon.core.states.library_state import LibraryState
@@ -156,7 +158,12 @@ class LibraryTreeController(ExtendedController):
 
     @ExtendedController.observe("library_manager", after=True)
     def model_changed(self, model, prop_name, info):
-        self.update()
+        # the library watcher notifies about library changes from its own thread, but widgets may only be changed
+        # within the GTK main loop
+        if isinstance(threading.current_thread(), threading._MainThread):
+            self.update()
+        else:
+            GLib.idle_add(self.update)
 
     def store_expansion_state(self):
         # print("\n\n store of state machine {0} \n\n".format(self.__my_selected_sm_id))
@@ -276,6 +276,17 @@ class ContainerStateModel(StateModel):
         if info.method_name in ['start_state_id', 'add_transition', 'remove_transition']:
             self.update_child_is_start()
 
+        if info.method_name == "finish_batch_edit":
+            # a batch edit adds many children with a single notification, see ContainerState.batch_edit
+            for state_id, state in self.state.states.items():
+                if state_id not in self.states:
+                    self.add_missing_model(self.states, {state_id: state}, "state",
+                                           get_state_model_class_for_state(state), "state_id")
+            for model_name in ["transition", "data_flow", "scoped_variable"]:
+                self.re_initiate_model_list(*self._get_model_info(model_name))
+            self.update_child_is_start()
+            return
+
         if info.method_name in ["add_transition", "remove_transition", "transitions"]:
             (model_list, data_list, model_name, model_class, model_key) = self._get_model_info("transition")
         elif info.method_name in ["add_data_flow", "remove_data_flow", "data_flows"]:
@@ -12,19 +12,36 @@
 
 from future.utils import string_types, native_str
 from builtins import range
+from builtins import object
 from builtins import str
+import io
+import numbers
+import os
 import shelve
 import json
 import pickle
 
 from rafcon.utils import log
+from rafcon.utils.segmented_log import SegmentedLogReader, is_segmented_log
 logger = log.get_logger(__name__)
 
 
+def open_execution_log(filename):
+    """Opens an execution log for reading, independent of its format
+
+    :param str filename: the path of the execution log, either a segmented log or a shelve
+    :return: the history items of the log, mapping history item ids to records
+    :rtype: rafcon.utils.segmented_log.SegmentedLogReader | shelve.Shelf
+    """
+    if is_segmented_log(filename):
+        return SegmentedLogReader(filename)
+    return shelve.open(filename, 'r')
+
+
 def log_to_raw_structure(execution_history_items):
     """
     :param dict execution_history_items: history items, in the simplest case
-           directly the opened shelve log file
+           directly the opened log file (see :func:`open_execution_log`)
     :return: start_item, the StateMachineStartItem of the log file
              previous, a dict mapping history_item_id --> history_item_id of previous history item
              next_, a dict mapping history_item_id --> history_item_id of the next history item (except if
@@ -84,7 +101,7 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
     The collapsed items hold input as well as output data (direct and scoped), and the outcome
     the state execution.
     :param dict execution_history_items: history items, in the simplest case
-           directly the opened shelve log file
+           directly the opened log file (see :func:`open_execution_log`)
     :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled
     :param bool include_erroneous_data_ports: flag if to include erroneous data ports
     :param bool full_next: flag to indicate if the next relationship has also to be created at the end
@@ -168,60 +185,9 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
 
             collapsed_next[rid] = execution_history_items[next_[gitems[0]['history_item_id']]]['run_id']
             collapsed_items[rid] = execution_item
-        elif gitems[0]['state_type'] == 'ExecutionState' or \
-             gitems[0]['state_type'] == 'HierarchyState' or \
-             gitems[0]['state_type'] == 'LibraryState' or \
-             'Concurrency' in gitems[0]['state_type']:
-
-            # for item in gitems:
-            #     if item["description"] is not None:
-            #         print(item["item_type"], item["call_type"], item["state_type"], item["state_name"])
-            #     print(item["description"])
-
-            # select call and return items for this state
-            try:
-                call_item = gitems[[gitems[i]['item_type'] == 'CallItem' and \
-                                    gitems[i]['call_type'] == 'EXECUTE' \
-                                    for i in range(len(gitems))].index(True)]
-            except ValueError:
-                # fall back to container call, should only happen for root state
-                try:
-                    call_item = gitems[[gitems[i]['item_type'] == 'CallItem' and \
-                                        gitems[i]['call_type'] == 'CONTAINER' \
-                                        for i in range(len(gitems))].index(True)]
-                except ValueError:
-                    logger.warning('Could not find a CallItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
-                    ## create dummy returnitem with the properties referenced later in this code
-                    call_item = dict(description=None,
-                                     history_item_id=None,
-                                     path_by_name=None,
-                                     state_name=None,
-                                     run_id=None,
-                                     state_type=None,
-                                     path=None,
-                                     timestamp=None,
-                                     input_output_data={},
-                                     scoped_data={})
-
-            try:
-                return_item = gitems[[gitems[i]['item_type'] == 'ReturnItem' and \
-                                      gitems[i]['call_type'] == 'EXECUTE' \
-                                      for i in range(len(gitems))].index(True)]
-            except ValueError:
-                # fall back to container call, should only happen for root state
-                try:
-                    return_item = gitems[[gitems[i]['item_type'] == 'ReturnItem' and \
-                                          gitems[i]['call_type'] == 'CONTAINER' \
-                                          for i in range(len(gitems))].index(True)]
-                except ValueError:
-                    logger.warning('Could not find a ReturnItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
-                    ## create dummy returnitem with the properties referenced later in this code
-                    return_item = dict(history_item_id=None,
-                                       outcome_name=None,
-                                       outcome_id=None,
-                                       timestamp=None,
-                                       input_output_data={},
-                                       scoped_data={})
+        elif _is_collapsible_state_type(gitems[0]['state_type']):
+
+            call_item, return_item = _get_call_and_return_item(rid, gitems)
 
             # next item (on same hierarchy level) is always after return item
             if return_item['history_item_id'] in next_:
@@ -248,58 +214,212 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
                     else:
                         collapsed_concurrent[prev_rid] = [rid]
 
-            # assemble grouped item
-            execution_item = {}
-            ## add base properties will throw if not existing
-            for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path']:
-                execution_item[l] = call_item[l]
+            collapsed_items[rid] = _create_collapsed_item(call_item, return_item, throw_on_pickle_error,
+                                                          include_erroneous_data_ports)
 
-            ## add extended properties (added in later rafcon versions),
-            ## will add default value if not existing instead
-            for l, default in [('semantic_data', {}),
-                                 ('is_library', None),
-                                 ('library_state_name', None),
-                                 ('library_name', None),
-                                 ('library_path', None)]:
-                execution_item[l] = return_item.get(l, default)
-
-            for l in ['outcome_name', 'outcome_id']:
-                execution_item[l] = return_item[l]
-            for l in ['timestamp']:
-                execution_item[l+'_call'] = call_item[l]
-                execution_item[l+'_return'] = return_item[l]
-
-            def unpickle_data(data_dict):
-                r = dict()
-                # support backward compatibility
-                if isinstance(data_dict, string_types):  # formerly data dict was a json string
-                    r = json.loads(data_dict)
-                else:
-                    for k, v in data_dict.items():
-                        if not k.startswith('!'): # ! indicates storage error
-                            try:
-                                r[k] = pickle.loads(v)
-                            except Exception as e:
-                                if throw_on_pickle_error:
-                                    raise
-                                elif include_erroneous_data_ports:
-                                    r['!' + k] = (str(e), v)
-                                else:
-                                    pass # ignore
-                        elif include_erroneous_data_ports:
-                            r[k] = v
-
-                return r
-
-            execution_item['data_ins'] = unpickle_data(call_item['input_output_data'])
-            execution_item['data_outs'] = unpickle_data(return_item['input_output_data'])
-            execution_item['scoped_data_ins'] = unpickle_data(call_item['scoped_data'])
-            execution_item['scoped_data_outs'] = unpickle_data(return_item['scoped_data'])
-            execution_item['semantic_data'] = unpickle_data(execution_item['semantic_data'])
+    return start_item, collapsed_next, collapsed_concurrent, collapsed_hierarchy, collapsed_items
 
-            collapsed_items[rid] = execution_item
 
-    return start_item, collapsed_next, collapsed_concurrent, collapsed_hierarchy, collapsed_items
+def _is_collapsible_state_type(state_type):
+    return state_type in ('ExecutionState', 'HierarchyState', 'LibraryState') or 'Concurrency' in state_type
+
+
+def _get_call_and_return_item(rid, gitems):
+    """Selects the call and return item of a state execution from all history items with the same run_id
+
+    :param str rid: the run_id of the state execution
+    :param list gitems: all history items with this run_id
+    :return: the call item and the return item, dummy items are returned for missing ones
+    :rtype: tuple
+    """
+    # select call and return items for this state
+    try:
+        call_item = gitems[[gitems[i]['item_type'] == 'CallItem' and \
+                            gitems[i]['call_type'] == 'EXECUTE' \
+                            for i in range(len(gitems))].index(True)]
+    except ValueError:
+        # fall back to container call, should only happen for root state
+        try:
+            call_item = gitems[[gitems[i]['item_type'] == 'CallItem' and \
+                                gitems[i]['call_type'] == 'CONTAINER' \
+                                for i in range(len(gitems))].index(True)]
+        except ValueError:
+            logger.warning('Could not find a CallItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
+            ## create dummy returnitem with the properties referenced later in this code
+            call_item = dict(description=None,
+                             history_item_id=None,
+                             path_by_name=None,
+                             state_name=None,
+                             run_id=None,
+                             state_type=None,
+                             path=None,
+                             timestamp=None,
+                             input_output_data={},
+                             scoped_data={})
+
+    try:
+        return_item = gitems[[gitems[i]['item_type'] == 'ReturnItem' and \
+                              gitems[i]['call_type'] == 'EXECUTE' \
+                              for i in range(len(gitems))].index(True)]
+    except ValueError:
+        # fall back to container call, should only happen for root state
+        try:
+            return_item = gitems[[gitems[i]['item_type'] == 'ReturnItem' and \
+                                  gitems[i]['call_type'] == 'CONTAINER' \
+                                  for i in range(len(gitems))].index(True)]
+        except ValueError:
+            logger.warning('Could not find a ReturnItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
+            ## create dummy returnitem with the properties referenced later in this code
+            return_item = dict(history_item_id=None,
+                               outcome_name=None,
+                               outcome_id=None,
+                               timestamp=None,
+                               input_output_data={},
+                               scoped_data={})
+
+    return call_item, return_item
+
+
+def _unpickle_data(data_dict, throw_on_pickle_error=True, include_erroneous_data_ports=False, selected_keys=None):
+    """Unpickles the values of a data dict of a history item, e.g. the input/output data or the scoped data
+
+    :param dict data_dict: the data dict with pickled values
+    :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled
+    :param bool include_erroneous_data_ports: flag if to include erroneous data ports
+    :param selected_keys: if given, only the values of these keys are unpickled, all others are omitted
+    :return: the data dict with unpickled values
+    :rtype: dict
+    """
+    r = dict()
+    # support backward compatibility
+    if isinstance(data_dict, string_types):  # formerly data dict was a json string
+        r = json.loads(data_dict)
+        if selected_keys is not None:
+            r = {k: v for k, v in r.items() if k in selected_keys}
+    else:
+        for k, v in data_dict.items():
+            if selected_keys is not None and k.lstrip('!') not in selected_keys:
+                continue
+            if not k.startswith('!'): # ! indicates storage error
+                try:
+                    r[k] = pickle.loads(v)
+                except Exception as e:
+                    if throw_on_pickle_error:
+                        raise
+                    elif include_erroneous_data_ports:
+                        r['!' + k] = (str(e), v)
+                    else:
+                        pass # ignore
+            elif include_erroneous_data_ports:
+                r[k] = v
+
+    return r
+
+
+def _create_collapsed_item(call_item, return_item, throw_on_pickle_error=True, include_erroneous_data_ports=False,
+                           selected_keys=None):
+    """Merges the call and the return item of a state execution into one collapsed item
+
+    :param dict call_item: the call item of the state execution
+    :param dict return_item: the return item of the state execution
+    :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled
+    :param bool include_erroneous_data_ports: flag if to include erroneous data ports
+    :param dict selected_keys: optionally maps 'data_ins', 'data_outs', 'scoped_data_ins', 'scoped_data_outs' and
+           'semantic_data' to the keys, which are to be unpickled; all keys are unpickled for a missing entry
+    :return: the collapsed item
+    :rtype: dict
+    """
+    selected_keys = {} if selected_keys is None else selected_keys
+    execution_item = {}
+    ## add base properties will throw if not existing
+    for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path']:
+        execution_item[l] = call_item[l]
+
+    ## add extended properties (added in later rafcon versions),
+    ## will add default value if not existing instead
+    for l, default in [('semantic_data', {}),
+                         ('is_library', None),
+                         ('library_state_name', None),
+                         ('library_name', None),
+                         ('library_path', None)]:
+        execution_item[l] = return_item.get(l, default)
+
+    for l in ['outcome_name', 'outcome_id']:
+        execution_item[l] = return_item[l]
+    for l in ['timestamp']:
+        execution_item[l+'_call'] = call_item[l]
+        execution_item[l+'_return'] = return_item[l]
+
+    for key, data_dict in [('data_ins', call_item['input_output_data']),
+                           ('data_outs', return_item['input_output_data']),
+                           ('scoped_data_ins', call_item['scoped_data']),
+                           ('scoped_data_outs', return_item['scoped_data']),
+                           ('semantic_data', execution_item['semantic_data'])]:
+        execution_item[key] = _unpickle_data(data_dict, throw_on_pickle_error, include_erroneous_data_ports,
+                                             selected_keys.get(key))
+    return execution_item
+
+
+def _iter_records_in_order(execution_history_items):
+    """Yields the history items of a log in the order they were created"""
+    if isinstance(execution_history_items, SegmentedLogReader):
+        for record in execution_history_items.values():
+            yield record
+    else:
+        # history item ids end with a zero-padded counter, thus sorting them restores the order of creation
+        for key in sorted(execution_history_items.keys()):
+            yield execution_history_items[key]
+
+
+def iter_collapsed_items(execution_history_items, data_in_columns=None, data_out_columns=None,
+                         scoped_in_columns=None, scoped_out_columns=None, semantic_data_columns=None,
+                         throw_on_pickle_error=True, include_erroneous_data_ports=False):
+    """
+    Yields the collapsed items of a log (see log_to_collapsed_structure) one by one, as soon as the execution of the
+    respective state is complete. Only the history items of states being executed at that point are kept in memory.
+    Thus, logs not fitting into memory can be analyzed, as long as they are streamed, like segmented logs (see
+    open_execution_log). Shelve logs are accessed by key in the order of the history item ids.
+    In contrast to log_to_collapsed_structure, the start item of the state machine is not yielded and the relations
+    between the items (next, concurrent, hierarchy) are not determined.
+    :param dict execution_history_items: history items, in the simplest case
+           directly the opened log file (see :func:`open_execution_log`)
+    :param list data_in_columns: names of the input data ports to unpickle, None to unpickle all
+    :param list data_out_columns: names of the output data ports to unpickle, None to unpickle all
+    :param list scoped_in_columns: names of the scoped data ports at call time to unpickle, None to unpickle all
+    :param list scoped_out_columns: names of the scoped data ports at return time to unpickle, None to unpickle all
+    :param list semantic_data_columns: semantic data keys to unpickle, None to unpickle all
+    :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled
+    :param bool include_erroneous_data_ports: flag if to include erroneous data ports
+    :return: a generator of collapsed items
+    """
+    selected_keys = {'data_ins': data_in_columns,
+                     'data_outs': data_out_columns,
+                     'scoped_data_ins': scoped_in_columns,
+                     'scoped_data_outs': scoped_out_columns,
+                     'semantic_data': semantic_data_columns}
+    pending = {}
+    for item in _iter_records_in_order(execution_history_items):
+        if item['item_type'] in ('StateMachineStartItem', 'ConcurrencyItem') or \
+                not _is_collapsible_state_type(item['state_type']):
+            continue
+        rid = item['run_id']
+        gitems = pending.setdefault(rid, [])
+        gitems.append(item)
+        # container states also create a return item of call type CONTAINER before the one of type EXECUTE,
+        # only the root state has no items of call type EXECUTE
+        if item['item_type'] == 'ReturnItem' and \
+                (item['call_type'] == 'EXECUTE' or
+                 not any(i['item_type'] == 'CallItem' and i['call_type'] == 'EXECUTE' for i in gitems)):
+            del pending[rid]
+            call_item, return_item = _get_call_and_return_item(rid, gitems)
+            yield _create_collapsed_item(call_item, return_item, throw_on_pickle_error, include_erroneous_data_ports,
+                                         selected_keys)
+
+    # states whose execution did not finish
+    for rid, gitems in pending.items():
+        call_item, return_item = _get_call_and_return_item(rid, gitems)
+        yield _create_collapsed_item(call_item, return_item, throw_on_pickle_error, include_erroneous_data_ports,
+                                     selected_keys)
 
 
 def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_columns=[], scoped_in_columns=[],
@@ -322,15 +442,16 @@ def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_colum
     except ImportError:
         raise ImportError("The Python package 'pandas' is required for log_to_DataFrame.")
 
-    start, next_, concurrency, hierarchy, gitems = log_to_collapsed_structure(
-        execution_history_items, throw_on_pickle_error=throw_on_pickle_error)
-    gitems.pop(start['run_id'])
-    if len(gitems) == 0:
+    # only the selected data ports are unpickled
+    items = list(iter_collapsed_items(execution_history_items, data_in_columns, data_out_columns, scoped_in_columns,
+                                      scoped_out_columns, semantic_data_columns,
+                                      throw_on_pickle_error=throw_on_pickle_error))
+    if len(items) == 0:
         return pd.DataFrame()
 
     # remove columns which are not generic over all states (basically the
     # data flow stuff)
-    df_keys = list(list(gitems.values())[0].keys())
+    df_keys = list(items[0].keys())
     df_keys.remove('data_ins')
     df_keys.remove('data_outs')
     df_keys.remove('scoped_data_ins')
@@ -340,7 +461,7 @@ def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_colum
 
     df_items = []
 
-    for rid, item in gitems.items():
+    for item in items:
         row_data = [item[k] for k in df_keys]
 
         for key, selected_columns in [('data_ins', data_in_columns),
@@ -370,6 +491,185 @@ def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_colum
     return df_timed
 
 
+COLUMNS_METADATA_FILENAME = 'columns.json'
+BASE_COLUMNS = [('run_id', 'categorical'),
+                ('state_name', 'categorical'),
+                ('state_type', 'categorical'),
+                ('path', 'categorical'),
+                ('path_by_name', 'categorical'),
+                ('outcome_name', 'categorical'),
+                ('library_name', 'categorical'),
+                ('library_path', 'categorical'),
+                ('outcome_id', 'numeric'),
+                ('is_library', 'numeric'),
+                ('timestamp_call', 'numeric'),
+                ('timestamp_return', 'numeric')]
+
+
+class _ColumnWriter(object):
+    """Writes the values of a column chunk-wise into a raw file and converts it into a .npy file when finished
+
+    Numeric columns are stored as float64 with NaN for missing values, categorical columns as int32 codes with -1 for
+    missing values. The kind of data columns is derived from their first value.
+    """
+
+    def __init__(self, name, filename, kind=None):
+        self.name = name
+        self.filename = filename
+        self.kind = kind
+        self.categories = []
+        self._codes = {}
+        self._values = []
+        self._length = 0
+        self._raw_file = io.open(filename + '.raw', 'wb')
+
+    def append(self, value):
+        self._values.append(value)
+
+    def _code(self, value):
+        if value is None:
+            return -1
+        category = value if isinstance(value, string_types) else str(value)
+        if category not in self._codes:
+            self._codes[category] = len(self.categories)
+            self.categories.append(category)
+        return self._codes[category]
+
+    @staticmethod
+    def _to_float(value):
+        if isinstance(value, numbers.Number):
+            return float(value)
+        return float('nan')
+
+    @property
+    def dtype(self):
+        return 'float64' if self.kind == 'numeric' else 'int32'
+
+    def flush(self, final=False):
+        import numpy as np
+        if self.kind is None:
+            first_value = next((v for v in self._values if v is not None), None)
+            if first_value is None and not final:
+                # keep the values until the kind can be derived
+                return
+            self.kind = 'numeric' if isinstance(first_value, numbers.Number) else 'categorical'
+        if self.kind == 'numeric':
+            array = np.array([self._to_float(v) for v in self._values], dtype=self.dtype)
+        else:
+            array = np.array([self._code(v) for v in self._values], dtype=self.dtype)
+        array.tofile(self._raw_file)
+        self._length += len(array)
+        self._values = []
+
+    def finish(self):
+        import numpy as np
+        self.flush(final=True)
+        self._raw_file.close()
+        column = np.lib.format.open_memmap(self.filename, mode='w+', dtype=self.dtype, shape=(self._length,))
+        if self._length > 0:
+            column[:] = np.memmap(self.filename + '.raw', dtype=self.dtype, mode='r', shape=(self._length,))
+        column.flush()
+        del column
+        os.remove(self.filename + '.raw')
+
+
+def log_to_columns(execution_history_items, directory, data_in_columns=[], data_out_columns=[], scoped_in_columns=[],
+                   scoped_out_columns=[], semantic_data_columns=[], throw_on_pickle_error=True, chunk_size=100000):
+    """
+    Exports all collapsed items of a log column-wise into numpy arrays, which can be memory-mapped for analysis (see
+    :func:`load_columns`). In contrast to log_to_DataFrame, the items are streamed and written in chunks of
+    `chunk_size` items, so that the log does not have to fit into memory.
+
+    Each column is stored as .npy file in the given directory. Numeric columns (e.g. the timestamps or the outcome_id)
+    are stored as float64 with NaN for missing values. All other columns, like the state_name, are stored as int32
+    codes with -1 for missing values; the categories of the codes are stored along with the column names in
+    columns.json. As in log_to_DataFrame, data ports and semantic data can be exported by listing their names in the
+    *_columns parameters, the columns are named e.g. data_ins__<port name>. A data column is numeric, if its first
+    value is a number.
+
+    :param dict execution_history_items: history items, in the simplest case
+           directly the opened log file (see :func:`open_execution_log`)
+    :param str directory: the directory to store the columns in
+    :param int chunk_size: the number of items being held in memory before writing them
+    :return: the number of exported items
+    :rtype: int
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("The Python package 'numpy' is required for log_to_columns.")
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    selected_columns = [('data_ins', data_in_columns),
+                        ('data_outs', data_out_columns),
+                        ('scoped_data_ins', scoped_in_columns),
+                        ('scoped_data_outs', scoped_out_columns),
+                        ('semantic_data', semantic_data_columns)]
+    column_writers = []
+    for name, kind in BASE_COLUMNS:
+        column_writers.append((None, name, _ColumnWriter(name, os.path.join(
+            directory, 'column_{0}.npy'.format(len(column_writers))), kind)))
+    for key, columns in selected_columns:
+        for column_key in columns:
+            name = key + '__' + column_key
+            column_writers.append((key, column_key, _ColumnWriter(name, os.path.join(
+                directory, 'column_{0}.npy'.format(len(column_writers))))))
+
+    number_of_items = 0
+    for item in iter_collapsed_items(execution_history_items, data_in_columns, data_out_columns, scoped_in_columns,
+                                     scoped_out_columns, semantic_data_columns,
+                                     throw_on_pickle_error=throw_on_pickle_error):
+        for key, column_key, column_writer in column_writers:
+            if key is None:
+                column_writer.append(item[column_key])
+            else:
+                column_writer.append(item[key].get(column_key, None))
+        number_of_items += 1
+        if number_of_items % chunk_size == 0:
+            for _, _, column_writer in column_writers:
+                column_writer.flush()
+
+    metadata = {'number_of_items': number_of_items, 'columns': []}
+    for _, _, column_writer in column_writers:
+        column_writer.finish()
+        metadata['columns'].append({'name': column_writer.name,
+                                    'filename': os.path.basename(column_writer.filename),
+                                    'kind': column_writer.kind,
+                                    'categories': column_writer.categories})
+    with io.open(os.path.join(directory, COLUMNS_METADATA_FILENAME), 'w', encoding='utf-8') as metadata_file:
+        metadata_file.write(str(json.dumps(metadata, indent=2)))
+    return number_of_items
+
+
+def load_columns(directory, mmap_mode='r'):
+    """
+    Loads the columns exported by :func:`log_to_columns`. By default, the columns are memory-mapped, so that only
+    the accessed parts are read from disk.
+
+    :param str directory: the directory holding the columns
+    :param str mmap_mode: the mmap_mode passed to numpy.load, None to load the columns into memory
+    :return: a dict mapping the column names to numpy arrays and a dict mapping the names of categorical columns to
+             the list of their categories, the codes of the column are indices into this list
+    :rtype: tuple
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("The Python package 'numpy' is required for load_columns.")
+
+    with io.open(os.path.join(directory, COLUMNS_METADATA_FILENAME), 'r', encoding='utf-8') as metadata_file:
+        metadata = json.load(metadata_file)
+    columns = {}
+    categories = {}
+    for column in metadata['columns']:
+        columns[column['name']] = np.load(os.path.join(directory, column['filename']), mmap_mode=mmap_mode)
+        if column['kind'] == 'categorical':
+            categories[column['name']] = column['categories']
+    return columns, categories
+
+
 def log_to_ganttplot(execution_history_items):
     """
     Example how to use the DataFrame representation
@@ -20,9 +20,14 @@ import os
 import tarfile
 import stat
 import shutil
+import tempfile
 from os.path import realpath, dirname, join, expanduser
 import shutil, errno
 
+# the permissions of new files are derived from the umask, which can only be read by setting it
+_umask = os.umask(0)
+os.umask(_umask)
+
 
 def create_path(path):
     """Creates a absolute path in the file system.
@@ -105,7 +110,44 @@ def write_file(file_path, content, create_full_path=False):
     with open(file_path, 'w') as file_pointer:
         file_pointer.write(content)
     
-        
+
+
+def write_file_atomically(file_path, content):
+    """Writes a file by writing a temporary file next to it, which then replaces the file
+
+    Thus, the file either has its old or its new content, even if writing is interrupted. The temporary file has a
+    unique name, so that several threads or processes can write the same file. The file keeps its permissions or gets
+    the default permissions of new files.
+
+    :param str file_path: the path of the file
+    :param content: the new content of the file, bytes are written in binary mode
+    :type content: str or bytes
+    """
+    file_path = os.path.realpath(file_path)
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except OSError:
+        mode = 0o666 & ~_umask
+    directory, file_name = os.path.split(file_path)
+    with tempfile.NamedTemporaryFile('wb' if isinstance(content, bytes) else 'w', dir=directory,
+                                     prefix=file_name + ".", suffix=".tmp", delete=False) as file_pointer:
+        temporary_file_path = file_pointer.name
+        try:
+            file_pointer.write(content)
+        except Exception:
+            file_pointer.close()
+            os.remove(temporary_file_path)
+            raise
+    try:
+        # the temporary file is only readable by its owner
+        os.chmod(temporary_file_path, mode)
+        # os.rename does not replace existing files on Windows
+        getattr(os, 'replace', os.rename)(temporary_file_path, file_path)
+    except OSError:
+        os.remove(temporary_file_path)
+        raise
+
+
 def get_default_config_path():
     home_path = expanduser('~')
     if home_path:
@@ -24,7 +24,9 @@ class Hashable(object):
         :param obj_hash: The hash object (see Python hashlib documentation)
         :param object_: The value that should be added to the hash (can be another Hashable or a dictionary)
         """
-        if isinstance(object_, Hashable):
+        if isinstance(object_, MerkleHashable):
+            obj_hash.update(object_.merkle_digest())
+        elif isinstance(object_, Hashable):
             object_.update_hash(obj_hash)
         elif isinstance(object_, (list, set, tuple)):
             if isinstance(object_, set):  # A set is not ordered
@@ -68,3 +70,78 @@ class Hashable(object):
         if sys.version_info >= (3,):
             obj_hash_string = obj_hash_string.encode('utf-8')
         return obj_hash_string
+
+
+class MerkleHashable(Hashable):
+    """A Hashable caching the digest of its data fields as node of a Merkle tree
+
+    If a MerkleHashable is part of the hash of another Hashable, only its cached digest is added to the hash instead
+    of all its data fields. The object must call :meth:`invalidate_hash` after each change of its data fields, which
+    also invalidates the digests of the parents returned by :meth:`get_hash_parent`. Thus, after a change, only the
+    changed element and its parents are hashed again, all other elements contribute their cached digests.
+
+    The children of an element returned by :meth:`get_hash_children` allow to compare two trees of MerkleHashables
+    subtree by subtree, see :func:`diff_hash_trees`.
+    """
+    _merkle_digest = None
+
+    def merkle_digest(self):
+        """Returns the SHA-256 digest of the data fields of the object, which is cached until the next change
+
+        :rtype: bytes
+        """
+        digest = self._merkle_digest
+        if digest is None:
+            digest = self.mutable_hash().digest()
+            self._merkle_digest = digest
+        return digest
+
+    def invalidate_hash(self):
+        """Clears the cached digest of the object and of all its parents"""
+        element = self
+        while element is not None:
+            element._merkle_digest = None
+            element = element.get_hash_parent()
+
+    def get_hash_parent(self):
+        """Returns the MerkleHashable, whose hash contains the digest of this object
+
+        :rtype: MerkleHashable
+        """
+        return None
+
+    def get_hash_children(self):
+        """Returns the MerkleHashables, whose digests are contained in the hash of this object
+
+        :return: The children mapped by keys, which identify them within this object
+        :rtype: dict
+        """
+        return {}
+
+
+def diff_hash_trees(tree, other_tree, path=()):
+    """Compares two trees of MerkleHashables by the digests of their subtrees
+
+    Children are matched by their keys. Subtrees with equal digests are skipped, thus only the paths to the
+    differences are visited.
+
+    :param MerkleHashable tree: The root of the first tree
+    :param MerkleHashable other_tree: The root of the second tree
+    :param tuple path: The keys of the path to the roots, which is prepended to the paths of the differences
+    :return: The path of each differing element with either "added", "removed" or "changed". As the digest of an
+        element contains the digests of its children, the parents of a changed element are listed as changed, too.
+    :rtype: list[(tuple, str)]
+    """
+    if tree.merkle_digest() == other_tree.merkle_digest():
+        return []
+    differences = [(path, "changed")]
+    children = tree.get_hash_children()
+    other_children = other_tree.get_hash_children()
+    for key in sorted(set(children) | set(other_children), key=str):
+        if key not in other_children:
+            differences.append((path + (key,), "removed"))
+        elif key not in children:
+            differences.append((path + (key,), "added"))
+        else:
+            differences.extend(diff_hash_trees(children[key], other_children[key], path + (key,)))
+    return differences
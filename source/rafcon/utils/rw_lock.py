@@ -0,0 +1,73 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: rw_lock
+   :synopsis: A lock allowing concurrent readers and exclusive writers
+
+"""
+
+from builtins import object
+from contextlib import contextmanager
+from threading import Condition, Lock
+
+
+class ReadWriteLock(object):
+    """A lock, which can be held by many readers or by one writer
+
+    Writers are preferred: once a writer waits, new readers wait until the writer released the lock. Thus, writers
+    do not starve, if readers access the lock at high rates. The lock is not reentrant.
+    """
+
+    def __init__(self):
+        self._condition = Condition(Lock())
+        self._number_of_readers = 0
+        self._number_of_waiting_writers = 0
+        self._writing = False
+
+    def acquire_read(self):
+        with self._condition:
+            while self._writing or self._number_of_waiting_writers:
+                self._condition.wait()
+            self._number_of_readers += 1
+
+    def release_read(self):
+        with self._condition:
+            self._number_of_readers -= 1
+            if not self._number_of_readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        with self._condition:
+            self._number_of_waiting_writers += 1
+            while self._writing or self._number_of_readers:
+                self._condition.wait()
+            self._number_of_waiting_writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        """Context manager holding the lock as reader"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        """Context manager holding the lock as writer"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,373 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+#
+# Contributors:
+# Franz Steinmetz <franz.steinmetz@dlr.de>
+# Sebastian Brunner <sebastian.brunner@dlr.de>
+
+"""
+.. module:: segmented_log
+   :synopsis: An append-only, segmented file format for execution logs
+
+A segmented log is a directory holding numbered segment files. Each segment starts with a magic line followed by
+length-prefixed records::
+
+    | payload length | CRC32 | key length | run_id length | key | run_id | pickled record |
+
+All integers are big-endian, the CRC32 checksum covers key, run_id and the pickled record. When a segment is sealed,
+i.e. it exceeds the maximum segment size or the log is closed, an index sidecar file is written next to it, mapping
+the keys and run_ids of the records to their offsets. Segments without index, e.g. after a crash, are scanned instead.
+As records are only appended, the log can be read while it is written and a crash can at most truncate the last
+record, which is detected and skipped by the reader.
+"""
+from future.utils import native_str
+from builtins import object
+from builtins import str
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+import io
+import os
+import pickle
+import shelve
+import struct
+import zlib
+
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+MAGIC = b"RAFCON-SEGMENTED-LOG-1\n"
+SEGMENT_NAME_FORMAT = "segment_{0:06d}.log"
+INDEX_SUFFIX = ".idx"
+RECORD_HEADER = struct.Struct(">IIHH")
+
+
+def is_segmented_log(path):
+    """Checks whether a path points to a segmented log
+
+    :param str path: the path to check
+    :return: True, if the path is a directory containing a segmented log
+    """
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, SEGMENT_NAME_FORMAT.format(0)))
+
+
+def _segment_paths(path):
+    segment_paths = []
+    while os.path.isfile(os.path.join(path, SEGMENT_NAME_FORMAT.format(len(segment_paths)))):
+        segment_paths.append(os.path.join(path, SEGMENT_NAME_FORMAT.format(len(segment_paths))))
+    return segment_paths
+
+
+def _encode(text):
+    return str(text).encode("utf-8")
+
+
+class SegmentedLogWriter(object):
+    """Appends records to a segmented log
+
+    The writer provides the item assignment of a shelve, so that it can be used as store of the
+    :class:`rafcon.core.execution.execution_history.ExecutionHistoryStorage`. The writer is not thread-safe.
+
+    :ivar str path: the directory of the log
+    :ivar int max_segment_size: the size in bytes, after which a new segment is started
+    """
+
+    def __init__(self, path, max_segment_size=64 * 1024 * 1024):
+        self.path = path
+        self.max_segment_size = max_segment_size
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._segment_number = len(_segment_paths(path))
+        self._segment_file = None
+        self._index = []
+        self._open_segment()
+
+    def _open_segment(self):
+        segment_path = os.path.join(self.path, SEGMENT_NAME_FORMAT.format(self._segment_number))
+        self._segment_file = io.open(segment_path, "wb")
+        self._segment_file.write(MAGIC)
+        self._index = []
+
+    def _seal_segment(self):
+        segment_path = os.path.join(self.path, SEGMENT_NAME_FORMAT.format(self._segment_number))
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+        self._segment_file.close()
+        self._segment_file = None
+        # write the index to a temporary file first, so that the index is either complete or missing
+        index_path = segment_path + INDEX_SUFFIX
+        with io.open(index_path + ".tmp", "wb") as index_file:
+            pickle.dump(self._index, index_file, protocol=2)
+        os.rename(index_path + ".tmp", index_path)
+        self._index = []
+        self._segment_number += 1
+
+    def append(self, key, record):
+        """Appends a record to the log
+
+        :param key: the key of the record, e.g. the history item id
+        :param dict record: the record, its run_id is added to the index of the log
+        """
+        key = native_str(key)
+        run_id = record.get("run_id") if isinstance(record, dict) else None
+        run_id = "" if run_id is None else native_str(run_id)
+        encoded_key = _encode(key)
+        encoded_run_id = _encode(run_id)
+        payload = pickle.dumps(record, protocol=2)
+        checksum = zlib.crc32(encoded_key)
+        checksum = zlib.crc32(encoded_run_id, checksum)
+        checksum = zlib.crc32(payload, checksum) & 0xffffffff
+        offset = self._segment_file.tell()
+        self._segment_file.write(RECORD_HEADER.pack(len(payload), checksum, len(encoded_key), len(encoded_run_id)))
+        self._segment_file.write(encoded_key)
+        self._segment_file.write(encoded_run_id)
+        self._segment_file.write(payload)
+        self._index.append((key, run_id, offset))
+        if self._segment_file.tell() >= self.max_segment_size:
+            self._seal_segment()
+            self._open_segment()
+
+    def __setitem__(self, key, record):
+        self.append(key, record)
+
+    def sync(self, durable=False):
+        """Passes all written records to the operating system, so that readers can see them
+
+        :param bool durable: whether to force the operating system to write the records to disk
+        """
+        self._segment_file.flush()
+        if durable:
+            os.fsync(self._segment_file.fileno())
+
+    def close(self):
+        """Seals the current segment, afterwards the writer must not be used anymore"""
+        if self._segment_file is not None:
+            self._seal_segment()
+
+
+class SegmentedLogReader(Mapping):
+    """Reads the records of a segmented log
+
+    The reader behaves like a read-only dictionary mapping the keys of the log to their records, so that it can be
+    passed to the functions of :mod:`rafcon.utils.execution_log` instead of a shelve. Iterating over :meth:`items`
+    streams the records in the order they were written, without loading the whole log. Random access by key or run_id
+    uses the index of the log, which is loaded on first use and extended by the records appended since then, if the
+    log is still written.
+
+    :ivar str path: the directory of the log
+    :ivar bool truncated: whether a truncated or corrupted record was found at the end of a segment
+    """
+
+    def __init__(self, path):
+        if not is_segmented_log(path):
+            raise ValueError("{0} is not a segmented log".format(path))
+        self.path = path
+        self.truncated = False
+        self._segment_paths = _segment_paths(path)
+        self._key_index = None
+        self._run_id_index = None
+        # the segment number and offset of the last indexed record and the size of its segment when it was indexed
+        self._indexed_position = None
+        self._indexed_segment_size = None
+
+    def _read_header(self, segment_file, segment_size):
+        """Reads the header of the next record and checks that the record is complete
+
+        :return: the header fields or None, if there is no further complete record
+        """
+        offset = segment_file.tell()
+        header = segment_file.read(RECORD_HEADER.size)
+        if not header:
+            return None
+        if len(header) < RECORD_HEADER.size:
+            self._report_truncation(segment_file, offset)
+            return None
+        payload_length, checksum, key_length, run_id_length = RECORD_HEADER.unpack(header)
+        if offset + RECORD_HEADER.size + key_length + run_id_length + payload_length > segment_size:
+            self._report_truncation(segment_file, offset)
+            return None
+        return payload_length, checksum, key_length, run_id_length
+
+    def _report_truncation(self, segment_file, offset):
+        self.truncated = True
+        logger.warning("The execution log segment {0} is truncated at offset {1}, the remaining bytes are "
+                       "ignored".format(segment_file.name, offset))
+
+    def _open_segment(self, segment_path):
+        segment_file = io.open(segment_path, "rb")
+        if segment_file.read(len(MAGIC)) != MAGIC:
+            segment_file.close()
+            raise ValueError("{0} is not a segment of a segmented log".format(segment_path))
+        return segment_file
+
+    def _iter_segment(self, segment_path, with_records=True):
+        """Yields key, run_id, offset and, optionally, the record of all complete records of a segment"""
+        segment_size = os.path.getsize(segment_path)
+        with self._open_segment(segment_path) as segment_file:
+            while True:
+                offset = segment_file.tell()
+                header = self._read_header(segment_file, segment_size)
+                if header is None:
+                    return
+                payload_length, checksum, key_length, run_id_length = header
+                encoded_key = segment_file.read(key_length)
+                encoded_run_id = segment_file.read(run_id_length)
+                key = native_str(encoded_key.decode("utf-8"))
+                run_id = native_str(encoded_run_id.decode("utf-8"))
+                if not with_records:
+                    segment_file.seek(payload_length, io.SEEK_CUR)
+                    yield key, run_id, offset, None
+                    continue
+                payload = segment_file.read(payload_length)
+                actual_checksum = zlib.crc32(encoded_key)
+                actual_checksum = zlib.crc32(encoded_run_id, actual_checksum)
+                actual_checksum = zlib.crc32(payload, actual_checksum) & 0xffffffff
+                if actual_checksum != checksum:
+                    self._report_truncation(segment_file, offset)
+                    return
+                yield key, run_id, offset, pickle.loads(payload)
+
+    def _load_segment_index(self, segment_path):
+        index_path = segment_path + INDEX_SUFFIX
+        if os.path.isfile(index_path):
+            try:
+                with io.open(index_path, "rb") as index_file:
+                    return pickle.load(index_file)
+            except Exception as e:
+                logger.warning("Could not read the index {0}, the segment is scanned instead: {1}".format(index_path,
+                                                                                                         e))
+        return [(key, run_id, offset) for key, run_id, offset, _ in self._iter_segment(segment_path, False)]
+
+    def _load_index(self):
+        """Loads the index on first use or extends it by the records appended since it was loaded
+
+        Only the last indexed segment and new segments are read again, if their size changed.
+        """
+        if self._key_index is None:
+            self._key_index = {}
+            self._run_id_index = {}
+            self._indexed_position = (0, -1)
+            self._indexed_segment_size = None
+        last_segment_number = self._indexed_position[0]
+        last_segment_path = os.path.join(self.path, SEGMENT_NAME_FORMAT.format(last_segment_number))
+        next_segment_path = os.path.join(self.path, SEGMENT_NAME_FORMAT.format(last_segment_number + 1))
+        if self._indexed_segment_size == os.path.getsize(last_segment_path) and not os.path.isfile(next_segment_path):
+            return
+        self._segment_paths = _segment_paths(self.path)
+        for segment_number in range(last_segment_number, len(self._segment_paths)):
+            segment_path = self._segment_paths[segment_number]
+            segment_size = os.path.getsize(segment_path)
+            for key, run_id, offset in self._load_segment_index(segment_path):
+                if (segment_number, offset) <= self._indexed_position:
+                    continue
+                self._key_index[key] = (segment_number, offset)
+                self._run_id_index.setdefault(run_id, []).append((segment_number, offset))
+                self._indexed_position = (segment_number, offset)
+            if segment_number == self._indexed_position[0]:
+                self._indexed_segment_size = segment_size
+
+    def _read_record(self, segment_number, offset):
+        segment_path = self._segment_paths[segment_number]
+        with self._open_segment(segment_path) as segment_file:
+            segment_file.seek(offset)
+            header = self._read_header(segment_file, os.path.getsize(segment_path))
+            if header is None:
+                raise KeyError("No complete record at offset {0} of {1}".format(offset, segment_path))
+            payload_length, _, key_length, run_id_length = header
+            segment_file.seek(key_length + run_id_length, io.SEEK_CUR)
+            return pickle.loads(segment_file.read(payload_length))
+
+    def items(self):
+        """Streams all records in the order they were written
+
+        :return: a generator of (key, record) tuples
+        """
+        # segments might have been added since the last call, if the log is still written
+        self._segment_paths = _segment_paths(self.path)
+        for segment_path in self._segment_paths:
+            for key, _, _, record in self._iter_segment(segment_path):
+                yield key, record
+
+    def keys(self):
+        """Streams all keys in the order they were written
+
+        :return: a generator of keys
+        """
+        self._segment_paths = _segment_paths(self.path)
+        for segment_path in self._segment_paths:
+            for key, _, _, _ in self._iter_segment(segment_path, False):
+                yield key
+
+    def values(self):
+        """Streams all records in the order they were written
+
+        :return: a generator of records
+        """
+        for _, record in self.items():
+            yield record
+
+    def records_for_run_id(self, run_id):
+        """Returns all records of a run_id by seeking to them via the index
+
+        :param str run_id: the run_id
+        :return: the records with the given run_id in the order they were written
+        :rtype: list
+        """
+        self._load_index()
+        return [self._read_record(segment_number, offset)
+                for segment_number, offset in self._run_id_index.get(native_str(run_id), [])]
+
+    def __getitem__(self, key):
+        self._load_index()
+        if key not in self._key_index:
+            raise KeyError(key)
+        return self._read_record(*self._key_index[key])
+
+    def __contains__(self, key):
+        self._load_index()
+        return key in self._key_index
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        self._load_index()
+        return len(self._key_index)
+
+    def close(self):
+        """Releases the index, for compatibility with shelve"""
+        self._key_index = None
+        self._run_id_index = None
+        self._indexed_position = None
+        self._indexed_segment_size = None
+
+
+def convert_shelve_log(shelve_filename, path, max_segment_size=64 * 1024 * 1024):
+    """Converts an execution log from the shelve format into the segmented format
+
+    The records are written in the order of their timestamps, which restores the order of execution.
+
+    :param str shelve_filename: the path of the shelve log
+    :param str path: the directory of the new segmented log
+    :param int max_segment_size: the size in bytes, after which a new segment is started
+    :return: the number of converted records
+    """
+    shelve_log = shelve.open(shelve_filename, 'r')
+    try:
+        keys_and_timestamps = [(key, record.get('timestamp') or 0) for key, record in shelve_log.items()]
+        keys_and_timestamps.sort(key=lambda key_and_timestamp: key_and_timestamp[1])
+        writer = SegmentedLogWriter(path, max_segment_size)
+        try:
+            for key, _ in keys_and_timestamps:
+                writer.append(key, shelve_log[key])
+        finally:
+            writer.close()
+    finally:
+        shelve_log.close()
+    return len(keys_and_timestamps)
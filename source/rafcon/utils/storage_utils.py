@@ -19,9 +19,27 @@
 import json
 import yaml
 from time import gmtime, strftime, strptime, mktime
+from future.utils import string_types
 
+from jsonconversion.conversion import get_qualified_name_for_class_object, get_qualified_name_for_class
 from jsonconversion.decoder import JSONObjectDecoder
 from jsonconversion.encoder import JSONObjectEncoder
+from jsonconversion.jsonobject import JSONObject
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 substitute_modules = {
     # backward compatibiliy (remove in next minor release): state elements
@@ -99,6 +117,16 @@ def load_dict_from_yaml(path):
     return dictionary
 
 
+def dict_to_json_string(dictionary, **kwargs):
+    """
+    Converts a dictionary to the json string written by write_dict_to_json.
+    :param dictionary: The dictionary to be converted
+    :param kwargs: optional additional parameters for dumper
+    :return: The json string
+    """
+    return json.dumps(dictionary, cls=JSONObjectEncoder, indent=4, check_circular=False, sort_keys=True, **kwargs)
+
+
 def write_dict_to_json(dictionary, path, **kwargs):
     """
     Write a dictionary to a json file.
@@ -106,13 +134,23 @@ def write_dict_to_json(dictionary, path, **kwargs):
     :param dictionary: The dictionary to get saved
     :param kwargs: optional additional parameters for dumper
     """
-    result_string = json.dumps(dictionary, cls=JSONObjectEncoder,
-                               indent=4, check_circular=False, sort_keys=True, **kwargs)
+    result_string = dict_to_json_string(dictionary, **kwargs)
     with open(path, 'w') as f:
         # We cannot write directly to the file, as otherwise the 'encode' method wouldn't be called
         f.write(result_string)
 
 
+def load_objects_from_json_string(json_string, as_dict=False):
+    """Loads a dictionary from a json string, e.g. the content of a json file read before
+
+    :param json_string: The json string.
+    :return: The dictionary specified in the json string
+    """
+    if as_dict:
+        return json.loads(json_string)
+    return json.loads(json_string, cls=JSONObjectDecoder, substitute_modules=substitute_modules)
+
+
 def load_objects_from_json(path, as_dict=False):
     """Loads a dictionary from a json file.
 
@@ -126,3 +164,182 @@ def load_objects_from_json(path, as_dict=False):
         result = json.load(f, cls=JSONObjectDecoder, substitute_modules=substitute_modules)
     f.close()
     return result
+
+
+def _to_plain_data(obj):
+    """Converts an object into data only consisting of dicts, lists, strings, numbers, booleans and None
+
+    The conversion equals the one of the :class:`JSONObjectEncoder`, e.g. tuples and instances of `JSONObject` are
+    converted into dicts with a `__jsonqualname__` key, so that the decoders of all serializers can restore them.
+
+    :param obj: the object to be converted
+    :return: the plain data
+    :raises exceptions.TypeError: if the object or one of its elements cannot be converted
+    """
+    if obj is None or isinstance(obj, (string_types, bool, int, float)):
+        return obj
+    # dicts deriving from JSONObject, e.g. Vividicts, are converted as dicts by the JSONObjectEncoder as well
+    if isinstance(obj, dict):
+        return {key: _to_plain_data(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_to_plain_data(item) for item in obj]
+    if isinstance(obj, JSONObject):
+        dictionary = _to_plain_data(obj.to_dict())
+        dictionary['__jsonqualname__'] = get_qualified_name_for_class_object(obj)
+        return dictionary
+    if isinstance(obj, (tuple, set)):
+        return {'__jsonqualname__': get_qualified_name_for_class(type(obj)),
+                'items': [_to_plain_data(item) for item in obj]}
+    if isinstance(obj, type):
+        return {'__type__': get_qualified_name_for_class(obj)}
+    if np is not None and isinstance(obj, np.ndarray):
+        return {'__jsonqualname__': "numpy.ndarray", 'items': obj.tolist()}
+    raise TypeError("Object of type {0} cannot be serialized".format(type(obj).__name__))
+
+
+def _from_plain_data(data, object_hook):
+    """Restores the objects of plain data created by :func:`_to_plain_data`
+
+    :param data: the plain data
+    :param object_hook: the function restoring an object from a dict, whose elements were restored before
+    :return: the restored object
+    """
+    if isinstance(data, dict):
+        return object_hook({key: _from_plain_data(value, object_hook) for key, value in data.items()})
+    if isinstance(data, list):
+        return [_from_plain_data(item, object_hook) for item in data]
+    return data
+
+
+class Serializer(object):
+    """Base class of the serializers converting objects, e.g. states, into strings or bytes and back
+
+    Serializers are registered with :func:`register_serializer` and selected by their name, e.g. by the config option
+    STORAGE_SERIALIZER.
+
+    :ivar str name: the name of the serializer
+    :ivar bool binary: whether the serialized objects are bytes instead of strings
+    :ivar str file_extension: the extension of files containing serialized objects
+    """
+
+    name = None
+    binary = False
+    file_extension = ".json"
+
+    def dumps(self, obj):
+        """Serializes an object
+
+        :param obj: the object to be serialized
+        :return: the serialized object
+        :rtype: str or bytes
+        """
+        raise NotImplementedError()
+
+    def loads(self, data, as_dict=False):
+        """Restores a serialized object
+
+        :param data: the serialized object
+        :param bool as_dict: whether the object is returned as plain data instead of being restored
+        :return: the restored object
+        """
+        raise NotImplementedError()
+
+
+class JSONSerializer(Serializer):
+    """Serializes objects into indented JSON with sorted keys using jsonconversion, the default format of RAFCON"""
+
+    name = "json"
+
+    def dumps(self, obj):
+        return dict_to_json_string(obj)
+
+    def loads(self, data, as_dict=False):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return load_objects_from_json_string(data, as_dict)
+
+
+class CompactJSONSerializer(JSONSerializer):
+    """Serializes objects into compact JSON with sorted keys, using orjson if it is installed
+
+    The objects are converted into plain data, which is encoded by orjson or the C implementation of the json module
+    instead of the pure Python encoder of jsonconversion. The result is readable by all JSON serializers.
+    """
+
+    name = "compact_json"
+
+    def __init__(self):
+        self._object_hook = JSONObjectDecoder(substitute_modules=substitute_modules).object_hook
+
+    def dumps(self, obj):
+        data = _to_plain_data(obj)
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        return json.dumps(data, sort_keys=True, separators=(',', ':'), check_circular=False)
+
+    def loads(self, data, as_dict=False):
+        if orjson is None:
+            return super(CompactJSONSerializer, self).loads(data, as_dict)
+        data = orjson.loads(data)
+        if as_dict:
+            return data
+        return _from_plain_data(data, self._object_hook)
+
+
+class MsgpackSerializer(Serializer):
+    """Serializes objects into MessagePack, a compact binary format, which requires the Python package msgpack
+
+    The objects are converted into plain data as by the :class:`CompactJSONSerializer`.
+    """
+
+    name = "msgpack"
+    binary = True
+    file_extension = ".msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("The Python package 'msgpack' is required for the serializer 'msgpack'.")
+        self._object_hook = JSONObjectDecoder(substitute_modules=substitute_modules).object_hook
+
+    def dumps(self, obj):
+        return msgpack.packb(_to_plain_data(obj), use_bin_type=True)
+
+    def loads(self, data, as_dict=False):
+        data = msgpack.unpackb(data, raw=False, strict_map_key=False)
+        if as_dict:
+            return data
+        return _from_plain_data(data, self._object_hook)
+
+
+# the classes of the registered serializers and their instances, which are created on first use, by their name
+_serializer_classes = {}
+_serializers = {}
+
+
+def register_serializer(serializer_class):
+    """Registers a serializer, which can then be selected by its name
+
+    :param serializer_class: the class deriving from :class:`Serializer`
+    """
+    _serializer_classes[serializer_class.name] = serializer_class
+    _serializers.pop(serializer_class.name, None)
+
+
+def get_serializer(name):
+    """Returns the registered serializer with the given name
+
+    :param str name: the name of the serializer, e.g. "json", "compact_json" or "msgpack"
+    :rtype: Serializer
+    :raises exceptions.ValueError: if no serializer with that name is registered
+    :raises exceptions.ImportError: if a Python package required by the serializer is not installed
+    """
+    if name not in _serializers:
+        if name not in _serializer_classes:
+            raise ValueError("Unknown serializer {0}, available serializers are {1}".format(
+                name, ", ".join(sorted(_serializer_classes))))
+        _serializers[name] = _serializer_classes[name]()
+    return _serializers[name]
+
+
+for _serializer_class in (JSONSerializer, CompactJSONSerializer, MsgpackSerializer):
+    register_serializer(_serializer_class)
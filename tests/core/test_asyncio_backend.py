@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.execution import event_loop
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.states.preemptive_concurrency_state import PreemptiveConcurrencyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+
+# test environment elements
+import testing_utils
+
+WAITING_SCRIPT_TEXT = """
+import asyncio
+
+async def execute(self, inputs, outputs, gvm):
+    await asyncio.sleep({0})
+    outputs['slept'] = {0}
+    return 0
+"""
+
+
+def create_waiting_state(name, duration):
+    execution_state = ExecutionState(name)
+    execution_state.add_output_data_port("slept", "float")
+    execution_state.script_text = WAITING_SCRIPT_TEXT.format(duration)
+    return execution_state
+
+
+def execute(state_machine):
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+    rafcon.core.singleton.state_machine_execution_engine.join()
+    rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "classic"])
+def test_coroutine_script(caplog, backend):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_BACKEND": backend})
+    try:
+        execution_state = create_waiting_state("waiting", 0.01)
+        assert execution_state.script.is_coroutine_function()
+        execute(StateMachine(execution_state))
+        assert execution_state.final_outcome.outcome_id == 0
+        assert execution_state.output_data['slept'] == 0.01
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_many_waiting_branches(caplog, number_of_branches=500):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_BACKEND": "asyncio"})
+    try:
+        barrier_state = BarrierConcurrencyState("barrier")
+        for i in range(number_of_branches):
+            barrier_state.add_state(create_waiting_state("waiting_{0}".format(i), 0.5))
+        barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+        threads_before = threading.active_count()
+
+        state_machine = StateMachine(barrier_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        time.sleep(0.2)
+        # the waiting branches are tasks on the event loop thread instead of threads
+        assert threading.active_count() - threads_before < 10
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+        assert barrier_state.final_outcome.outcome_id == 0
+        assert all(state.final_outcome.outcome_id == 0 for state in barrier_state.states.values())
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "classic"])
+def test_preemption_cancels_coroutine(caplog, backend):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_BACKEND": backend})
+    try:
+        preemptive_state = PreemptiveConcurrencyState("preemptive")
+        fast_state = create_waiting_state("fast", 0.05)
+        slow_state = create_waiting_state("slow", 100)
+        for state in (fast_state, slow_state):
+            preemptive_state.add_state(state)
+            preemptive_state.add_transition(state.state_id, 0, preemptive_state.state_id, 0)
+
+        start = time.time()
+        execute(StateMachine(preemptive_state))
+        assert time.time() - start < 10
+        assert preemptive_state.final_outcome.outcome_id == 0
+        assert fast_state.final_outcome.outcome_id == 0
+        assert slow_state.final_outcome.outcome_id == -2
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_event_loop_restart():
+    assert event_loop.submit_coroutine(asyncio.sleep(0, 1)).result() == 1
+    event_loop.shutdown_event_loop()
+    assert event_loop.submit_coroutine(asyncio.sleep(0, 2)).result() == 2
+    event_loop.shutdown_event_loop()
+
+
+def test_blocking_steps_not_on_event_loop(caplog):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_BACKEND": "asyncio"})
+    try:
+        execution_state = create_waiting_state("waiting", 0.01)
+        threads = []
+
+        def record_thread(method):
+            def wrapper(*args, **kwargs):
+                threads.append(threading.current_thread())
+                return method(*args, **kwargs)
+            return wrapper
+        execution_state.prepare_run = record_thread(execution_state.prepare_run)
+        execution_state.complete_run = record_thread(execution_state.complete_run)
+
+        execute(StateMachine(execution_state))
+        assert execution_state.final_outcome.outcome_id == 0
+        # setting the state up and finalizing it may block, thus it must not happen on the event loop thread
+        assert len(threads) == 2
+        assert all(thread.name != "RAFCONEventLoop" for thread in threads)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
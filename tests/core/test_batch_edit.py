@@ -0,0 +1,120 @@
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    outputs['output'] = inputs['input'] + 1
+    return 0
+"""
+
+
+def create_execution_state(name):
+    execution_state = ExecutionState(name)
+    input_id = execution_state.add_input_data_port("input", "int", 0)
+    output_id = execution_state.add_output_data_port("output", "int")
+    execution_state.script_text = SCRIPT_TEXT
+    return execution_state, input_id, output_id
+
+
+def create_sequence(root_state, number_of_states):
+    """Adds a sequence of execution states, each incrementing the input of the root state"""
+    root_input_id = root_state.add_input_data_port("input", "int", 0)
+    root_output_id = root_state.add_output_data_port("output", "int")
+    states = [create_execution_state("state_{0}".format(i)) for i in range(number_of_states)]
+    # the transitions and data flows are added before the states, which is only possible within a batch edit
+    root_state.add_transition(None, None, states[0][0].state_id, None)
+    root_state.add_data_flow(root_state.state_id, root_input_id, states[0][0].state_id, states[0][1])
+    for (state, input_id, output_id), (next_state, next_input_id, _) in zip(states, states[1:]):
+        root_state.add_transition(state.state_id, 0, next_state.state_id, None)
+        root_state.add_data_flow(state.state_id, output_id, next_state.state_id, next_input_id)
+    root_state.add_transition(states[-1][0].state_id, 0, root_state.state_id, 0)
+    root_state.add_data_flow(states[-1][0].state_id, states[-1][2], root_state.state_id, root_output_id)
+    for state, _, _ in states:
+        root_state.add_state(state)
+
+
+def test_batch_edit_execution(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state = HierarchyState("root")
+        with root_state.batch_edit():
+            create_sequence(root_state, 50)
+        assert len(root_state.transitions) == 51 and len(root_state.data_flows) == 51
+        assert root_state.get_start_state() is not None
+
+        state_machine = StateMachine(root_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        assert root_state.final_outcome.outcome_id == 0
+        assert root_state.output_data["output"] == 50
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_batch_edit_invalid_elements():
+    root_state = HierarchyState("root")
+    first_state, first_input_id, first_output_id = create_execution_state("first")
+    second_state, second_input_id, _ = create_execution_state("second")
+    with pytest.raises(ValueError) as excinfo:
+        with root_state.batch_edit():
+            root_state.add_state(first_state)
+            root_state.add_state(second_state)
+            root_state.add_transition(None, None, first_state.state_id, None)
+            valid_transition_id = root_state.add_transition(first_state.state_id, 0, second_state.state_id, None)
+            valid_data_flow_id = root_state.add_data_flow(first_state.state_id, first_output_id,
+                                                          second_state.state_id, second_input_id)
+            # a second start transition, an already connected outcome, a duplicate and a dangling data flow
+            root_state.add_transition(None, None, second_state.state_id, None)
+            root_state.add_transition(first_state.state_id, 0, root_state.state_id, 0)
+            root_state.add_data_flow(first_state.state_id, first_output_id, second_state.state_id, second_input_id)
+            root_state.add_data_flow(first_state.state_id, 42, second_state.state_id, second_input_id)
+    message = str(excinfo.value)
+    assert "Only one start transition is allowed" in message
+    assert "transition origin already connected" in message
+    assert "Exactly the same data flow is already existing" in message
+    assert "Data flow origin not existing" in message
+
+    # the first valid elements are kept and indexed, the invalid ones are removed
+    assert len(root_state.transitions) == 2 and valid_transition_id in root_state.transitions
+    assert list(root_state.data_flows) == [valid_data_flow_id]
+    assert root_state.get_start_state() is first_state
+    assert root_state.get_transition_for_outcome(first_state, first_state.outcomes[0]).to_state == \
+        second_state.state_id
+    assert root_state._data_flows_by_origin == {
+        (first_state.state_id, first_output_id): (root_state.data_flows[valid_data_flow_id],)}
+
+    # outside of a batch edit, elements are validated on addition again
+    with pytest.raises(ValueError):
+        root_state.add_transition(None, None, second_state.state_id, None)
+
+
+def test_batch_edit_notifications(monkeypatch):
+    barrier_state = BarrierConcurrencyState("barrier")
+    notifications = []
+    monkeypatch.setattr(barrier_state, "_notify_method_after",
+                        lambda instance, method_name, *args: notifications.append(method_name))
+
+    with barrier_state.batch_edit():
+        with barrier_state.batch_edit():
+            for i in range(10):
+                barrier_state.add_state(create_execution_state("branch_{0}".format(i))[0])
+        barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    assert notifications == ["finish_batch_edit"]
+    # the transitions to the decider state are still created automatically
+    assert len(barrier_state.transitions) == 11
+
+    del notifications[:]
+    barrier_state.add_state(create_execution_state("branch")[0])
+    assert notifications == ["add_state", "add_transition"]
@@ -0,0 +1,123 @@
+import threading
+import time
+
+# core elements
+from rafcon.core.execution.execution_backend import WorkerPool, InlineRun, PooledRun
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
+# singleton elements
+import rafcon.core.singleton
+
+# test environment elements
+import testing_utils
+from core.test_concurrency_barrier_state import create_concurrency_barrier_state
+
+
+def test_worker_pool_reuses_workers():
+    pool = WorkerPool(max_idle_workers=2)
+    thread_names = []
+
+    def record_thread_name():
+        thread_names.append(threading.current_thread().name)
+
+    for _ in range(5):
+        state_run = InlineRun(record_thread_name)
+        pool.submit(state_run)
+        state_run.join()
+        # the worker becomes idle shortly after finishing the run
+        while pool.number_of_idle_workers == 0:
+            time.sleep(0.001)
+
+    assert len(thread_names) == 5
+    assert len(set(thread_names)) == 1
+    assert pool.number_of_workers == 1
+
+
+def test_state_run_is_alive_like_thread():
+    running = threading.Event()
+    proceed = threading.Event()
+
+    def wait():
+        running.set()
+        proceed.wait()
+
+    # like a thread, a run is neither alive before it is started nor after it finished
+    state_run = PooledRun(wait)
+    assert not state_run.is_alive()
+    state_run.start()
+    running.wait()
+    assert state_run.is_alive()
+    proceed.set()
+    state_run.join()
+    assert not state_run.is_alive()
+
+
+def test_worker_pool_nested_runs():
+    pool = WorkerPool(max_idle_workers=1)
+    results = []
+
+    def inner():
+        results.append("inner")
+
+    def outer():
+        inner_runs = [InlineRun(inner) for _ in range(3)]
+        for inner_run in inner_runs:
+            pool.submit(inner_run)
+        for inner_run in inner_runs:
+            inner_run.join()
+        results.append("outer")
+
+    outer_run = InlineRun(outer)
+    pool.submit(outer_run)
+    outer_run.join(timeout=5.)
+
+    assert not outer_run.is_alive()
+    assert results == ["inner"] * 3 + ["outer"]
+    assert pool.number_of_workers <= 1
+
+
+def test_pooled_backend_hierarchy_state(caplog):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_BACKEND": "pooled"})
+    try:
+        child_state = ExecutionState("child_state")
+        child_state.script_text = 'import threading\n' \
+                                  'def execute(self, inputs, outputs, gvm):\n' \
+                                  '    gvm.set_variable("child_thread", threading.current_thread().name)\n' \
+                                  '    return 0\n'
+        root_state = HierarchyState("root_state")
+        root_state.add_state(child_state)
+        root_state.set_start_state(child_state.state_id)
+        root_state.add_transition(child_state.state_id, 0, root_state.state_id, 0)
+        state_machine = StateMachine(root_state)
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+        assert root_state.final_outcome.outcome_id == 0
+        # the child state is executed in the worker thread of the root state
+        child_thread = rafcon.core.singleton.global_variable_manager.get_variable("child_thread")
+        assert child_thread.startswith("RAFCONWorker")
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_pooled_backend_barrier_concurrency_state(caplog):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_BACKEND": "pooled"})
+    try:
+        root_state = create_concurrency_barrier_state()
+        state_machine = StateMachine(root_state)
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+        assert rafcon.core.singleton.global_variable_manager.get_variable("var_x") == 10
+        assert rafcon.core.singleton.global_variable_manager.get_variable("var_y") == 20
+        assert root_state.final_outcome.outcome_id == 4
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=1)
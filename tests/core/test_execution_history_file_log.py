@@ -1,3 +1,8 @@
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
 # singleton elements
 import rafcon.core.singleton
 from rafcon.core.storage import storage as global_storage
@@ -7,13 +12,31 @@ import rafcon.utils.execution_log as log_helper
 import pytest
 import testing_utils
 import os
+import pickle
+import threading
+
+# the names of the threads pickling a PickledInThread
+pickling_threads = []
+
+
+class PickledInThread(object):
+    """A value recording the thread it is pickled in"""
+
+    def __deepcopy__(self, memo):
+        return PickledInThread()
 
+    def __getstate__(self):
+        pickling_threads.append(threading.current_thread().name)
+        return {}
 
-def test_execution_log(caplog):
+
+@pytest.mark.parametrize("log_format", ["segmented", "shelve"])
+def test_execution_log(caplog, log_format):
     try:
         testing_utils.initialize_environment_core(
             core_config={'EXECUTION_LOG_ENABLE': True,
-                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log'})
+                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log',
+                         'EXECUTION_LOG_FORMAT': log_format})
 
         state_machine = global_storage.load_state_machine_from_path(
             testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
@@ -23,9 +46,7 @@ def test_execution_log(caplog):
         rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
         rafcon.core.singleton.state_machine_execution_engine.join()
 
-        import shelve
-        import json
-        ss = shelve.open(state_machine.get_last_execution_log_filename())
+        ss = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
 
         assert len(ss) == 36
 
@@ -62,6 +83,165 @@ def test_execution_log(caplog):
     finally:
         testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
 
+def create_counting_state_machine():
+    count_state = ExecutionState("Count")
+    count_state.add_output_data_port("counter", "int")
+    count_state.script_text = 'def execute(self, inputs, outputs, gvm):\n' \
+                              '    counter = (gvm.get_variable("counter") or 0) + 1\n' \
+                              '    gvm.set_variable("counter", counter)\n' \
+                              '    outputs["counter"] = counter\n' \
+                              '    return 0 if counter < 3 else 1\n'
+    count_state.add_outcome("done", 1)
+    root_state = HierarchyState("Root")
+    root_state.add_state(count_state)
+    root_state.set_start_state(count_state.state_id)
+    root_state.add_transition(count_state.state_id, 0, count_state.state_id, None)
+    root_state.add_transition(count_state.state_id, 1, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+def test_streaming_and_columnar_log_analysis(caplog):
+    np = pytest.importorskip("numpy")
+    try:
+        testing_utils.initialize_environment_core(
+            core_config={'EXECUTION_LOG_ENABLE': True,
+                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log'})
+
+        state_machine = create_counting_state_machine()
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        ss = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+        start, next, concurrent, hierarchy, collapsed_items = log_helper.log_to_collapsed_structure(ss)
+        collapsed_items.pop(start['run_id'])
+        streamed_items = list(log_helper.iter_collapsed_items(ss))
+        assert len(streamed_items) == len(collapsed_items) == 4
+        for item in streamed_items:
+            assert item == collapsed_items[item['run_id']]
+        assert [item['state_name'] for item in streamed_items] == ['Count'] * 3 + ['Root']
+
+        # only the selected data ports are unpickled
+        projected_items = list(log_helper.iter_collapsed_items(ss, data_in_columns=[], data_out_columns=[],
+                                                               scoped_in_columns=['counter'], scoped_out_columns=[],
+                                                               semantic_data_columns=[]))
+        assert [item['data_outs'] for item in projected_items] == [{}] * 4
+        assert [len(item['scoped_data_ins']) for item in projected_items] == [0, 1, 1, 0]
+
+        directory = os.path.join(testing_utils.get_unique_temp_path(), 'columns')
+        assert log_helper.log_to_columns(ss, directory, data_out_columns=['counter'], chunk_size=3) == 4
+        columns, categories = log_helper.load_columns(directory)
+        assert isinstance(columns['timestamp_call'], np.memmap)
+        assert [categories['state_name'][code] for code in columns['state_name']] == ['Count'] * 3 + ['Root']
+        assert list(columns['data_outs__counter'][:3]) == [1, 2, 3]
+        assert np.isnan(columns['data_outs__counter'][3])
+        assert list(columns['outcome_id']) == [0, 0, 1, 0]
+        assert np.all(columns['timestamp_return'] >= columns['timestamp_call'])
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
+@pytest.mark.parametrize("backpressure_policy", ["block", "drop-payload", "drop-item"])
+def test_execution_history_storage_backpressure(backpressure_policy):
+    import time
+    from threading import Thread
+    from rafcon.core.execution.execution_history import ExecutionHistoryStorage
+
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log')
+    storage = ExecutionHistoryStorage(filename, queue_size=2, backpressure_policy=backpressure_policy, batch_size=1)
+    number_of_items = 10
+    # stall the writer thread, so that the queue fills up
+    with storage.store_lock:
+        if backpressure_policy == "drop-item":
+            for i in range(number_of_items):
+                storage.store_item(i, {'history_item_id': i})
+        else:
+            # the writer thread takes the first item and waits for the lock
+            storage.store_item(0, {'history_item_id': 0})
+            while storage.queue_depth > 0:
+                time.sleep(0.01)
+            for i in range(1, storage.queue_size + 1):
+                storage.store_item(i, {'history_item_id': i})
+            if backpressure_policy == "block":
+                # the next item waits for space in the queue
+                i += 1
+                number_of_items = i + 1
+                blocked_thread = Thread(target=storage.store_item, args=(i, {'history_item_id': i}))
+                blocked_thread.start()
+                blocked_thread.join(0.3)
+                assert blocked_thread.is_alive()
+                assert storage.queue_depth <= storage.queue_size
+            else:
+                # the next items are queued without their payload and without waiting for space
+                for i in range(storage.queue_size + 1, number_of_items):
+                    storage.store_item(i, {'history_item_id': i})
+                assert storage.queue_depth == number_of_items - 1
+                assert storage.dropped_payloads == number_of_items - storage.queue_size - 1
+    if backpressure_policy == "block":
+        blocked_thread.join()
+        for i in range(number_of_items, number_of_items + 5):
+            storage.store_item(i, {'history_item_id': i})
+        number_of_items += 5
+    storage.close()
+
+    assert storage.queue_depth == 0
+    if backpressure_policy == "drop-item":
+        assert storage.dropped_items >= number_of_items - 3
+    else:
+        assert storage.dropped_items == 0
+    if backpressure_policy == "block":
+        assert storage.dropped_payloads == 0
+    assert storage.written_items + storage.dropped_items == number_of_items
+    log = log_helper.open_execution_log(filename)
+    try:
+        assert len(log) == storage.written_items
+    finally:
+        log.close()
+
+
+def test_execution_history_storage_records(caplog):
+    import time
+    from rafcon.core.execution.execution_history import ExecutionHistoryStorage, CallItem, CallType
+
+    filename = os.path.join(testing_utils.get_unique_temp_path(), 'execution_log')
+    storage = ExecutionHistoryStorage(filename, queue_size=1, backpressure_policy="drop-payload", batch_size=1)
+    state = ExecutionState("before", state_id="STATE")
+    items = [CallItem(state, None, CallType.EXECUTE, None, {'value': i, 'pickled': PickledInThread()},
+                      "run_{0}".format(i)) for i in range(3)]
+    del pickling_threads[:]
+    with storage.store_lock:
+        storage.store_history_item(items[0])
+        while storage.queue_depth > 0:
+            time.sleep(0.01)
+        storage.store_history_item(items[1])
+        # the queue is full, the snapshot of the last item is taken without payload and queued without waiting
+        storage.store_history_item(items[2])
+        assert storage.queue_depth == 2
+        # the snapshots are taken when the items are stored, thus later changes of the state are not logged
+        state.name = "after"
+        # the data is pickled by the writer thread, not by the executing thread
+        assert pickling_threads == []
+    storage.flush()
+    storage.store_item("unwritable", {'value': lambda: None})
+    storage.close()
+
+    assert pickling_threads == ["ExecutionHistoryStorageWriter"] * 2
+    assert storage.dropped_payloads == 1
+    assert storage.dropped_items == 0
+    # the record, which cannot be pickled, is not counted as written
+    assert storage.written_items == 3
+    log = log_helper.open_execution_log(filename)
+    try:
+        records = [log[item.history_item_id] for item in items]
+    finally:
+        log.close()
+    assert [record['state_name'] for record in records] == ["before"] * 3
+    assert [record.get('payload_dropped', False) for record in records] == [False, False, True]
+    assert [pickle.loads(record['input_output_data']['value']) for record in records[:2]] == [0, 1]
+    testing_utils.assert_logger_warnings_and_errors(caplog, expected_warnings=1, expected_errors=1)
+
+
 if __name__ == '__main__':
-    test_execution_log(None)
+    test_execution_log(None, "segmented")
     # pytest.main([__file__])
@@ -0,0 +1,143 @@
+import gc
+import weakref
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.execution.execution_history import ExecutionHistory, CallType
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+import rafcon.utils.execution_log as log_helper
+
+# test environment elements
+import testing_utils
+
+NUMBER_OF_STATES = 20
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    last_state = None
+    for i in range(NUMBER_OF_STATES):
+        state = ExecutionState("state_{0}".format(i))
+        state.add_output_data_port("output", "object")
+        state.script_text = "def execute(self, inputs, outputs, gvm):\n    outputs['output'] = [0] * 1000\n" \
+                            "    return 0\n"
+        root_state.add_state(state)
+        if last_state is None:
+            root_state.set_start_state(state.state_id)
+        else:
+            root_state.add_transition(last_state.state_id, 0, state.state_id, None)
+        last_state = state
+    root_state.add_transition(last_state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+def execute(state_machine):
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+    rafcon.core.singleton.state_machine_execution_engine.join()
+
+
+def test_unlimited_execution_history(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        execute(state_machine)
+        statistics = state_machine.get_execution_history_statistics()
+        # start item, call and return item of the root state and each child
+        assert statistics['items'] == 3 + 2 * NUMBER_OF_STATES
+        assert statistics['evicted_items'] == statistics['dropped_items'] == 0
+        assert statistics['payload_bytes'] > NUMBER_OF_STATES * 1000
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_retained_items_are_dropped(caplog):
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_HISTORY_MAX_ITEMS": 10})
+    try:
+        state_machine = create_state_machine()
+        execute(state_machine)
+        execution_history = state_machine.execution_histories[0]
+        assert len(execution_history) == 10
+        assert execution_history[0].prev is None
+        assert [item.prev for item in execution_history[1:]] == list(execution_history)[:-1]
+        statistics = state_machine.get_execution_history_statistics()
+        assert statistics['items'] == 10
+        assert statistics['evicted_items'] == statistics['dropped_items'] == 3 + 2 * NUMBER_OF_STATES - 10
+        assert statistics['spilled_items'] == 0
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_evicted_items_are_spilled_to_execution_log(caplog):
+    testing_utils.initialize_environment_core(core_config={
+        "EXECUTION_HISTORY_MAX_ITEMS": 10, "EXECUTION_LOG_ENABLE": True,
+        "EXECUTION_LOG_PATH": testing_utils.get_unique_temp_path()})
+    try:
+        state_machine = create_state_machine()
+        execute(state_machine)
+        statistics = state_machine.get_execution_history_statistics()
+        assert statistics['spilled_items'] == statistics['evicted_items'] == 3 + 2 * NUMBER_OF_STATES - 10
+        assert statistics['dropped_items'] == 0
+
+        # the log is complete and the items are still linked by their ids
+        execution_log = log_helper.open_execution_log(state_machine.get_last_execution_log_filename())
+        assert len(execution_log) == 3 + 2 * NUMBER_OF_STATES
+        first_retained_item = state_machine.execution_histories[0][0]
+        prev_history_item_id = execution_log[first_retained_item.history_item_id]['prev_history_item_id']
+        assert prev_history_item_id in execution_log
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_evicted_items_are_released():
+    execution_history = ExecutionHistory()
+    execution_history.max_items = 3
+    root_state = HierarchyState("root")
+    first_item = execution_history.push_call_history_item(root_state, CallType.CONTAINER, root_state)
+    first_item_reference = weakref.ref(first_item)
+    del first_item
+    for _ in range(5):
+        execution_history.push_call_history_item(root_state, CallType.CONTAINER, root_state)
+    gc.collect()
+    assert first_item_reference() is None
+    assert len(execution_history) == 3
+    assert execution_history.get_statistics(estimate_memory=False)['evicted_items'] == 3
+
+
+def test_max_age():
+    execution_history = ExecutionHistory()
+    execution_history.max_age = 10.
+    root_state = HierarchyState("root")
+    for _ in range(4):
+        execution_history.push_call_history_item(root_state, CallType.CONTAINER, root_state).timestamp -= 20.
+    # the last items are always retained
+    assert len(execution_history) == ExecutionHistory.MIN_RETAINED_ITEMS
+    execution_history.push_call_history_item(root_state, CallType.CONTAINER, root_state)
+    assert len(execution_history) == ExecutionHistory.MIN_RETAINED_ITEMS
+    assert execution_history.get_statistics(estimate_memory=False)['evicted_items'] == 3
+
+
+def test_iteration_during_pushes():
+    from threading import Thread
+    execution_history = ExecutionHistory()
+    execution_history.max_items = 50
+    root_state = HierarchyState("root")
+    number_of_items = 20000
+
+    def push_items():
+        for _ in range(number_of_items):
+            execution_history.push_call_history_item(root_state, CallType.CONTAINER, root_state)
+
+    pusher = Thread(target=push_items)
+    pusher.start()
+    try:
+        # iterating a deque, which is modified concurrently, would raise a RuntimeError
+        while pusher.is_alive():
+            history_items = list(execution_history)
+            assert len(history_items) <= 50
+            assert all(item.next is history_items[index + 1] for index, item in enumerate(history_items[:-1]))
+    finally:
+        pusher.join()
+    assert len(execution_history) == 50
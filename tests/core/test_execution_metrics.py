@@ -0,0 +1,86 @@
+import os
+import json
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.config import global_config
+from rafcon.core.execution import execution_metrics
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+import testing_utils
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    execution_state = ExecutionState("execution")
+    execution_state.add_input_data_port("input", "int", 1)
+    execution_state.script_text = "def execute(self, inputs, outputs, gvm):\n    return 0\n"
+    root_state.add_state(execution_state)
+    root_state.set_start_state(execution_state.state_id)
+    root_state.add_transition(execution_state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state), execution_state
+
+
+def execute(state_machine):
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+    rafcon.core.singleton.state_machine_execution_engine.join()
+    rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+
+def test_histogram():
+    histogram = execution_metrics.Histogram()
+    for duration in (0.5e-6, 3e-6, 3e-6, 1e3):
+        histogram.observe(duration)
+    histogram_dict = histogram.to_dict()
+    assert histogram_dict['count'] == 4
+    assert histogram_dict['min'] == 0.5e-6 and histogram_dict['max'] == 1e3
+    buckets = dict(histogram_dict['buckets'])
+    assert buckets[1e-6] == 1
+    assert buckets[2e-6] == 1
+    assert buckets[4e-6] == 3
+    assert buckets[float('inf')] == 4
+
+
+def test_execution_metrics(caplog):
+    dump_path = os.path.join(testing_utils.get_unique_temp_path(), "metrics.prom")
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_METRICS_ENABLE": True,
+                                                           "EXECUTION_METRICS_DUMP_PATH": dump_path,
+                                                           "EXECUTION_METRICS_DUMP_INTERVAL": 60,
+                                                           "EXECUTION_METRICS_DUMP_FORMAT": "prometheus"})
+    execution_metrics.reset_metrics()
+    try:
+        state_machine, execution_state = create_state_machine()
+        execute(state_machine)
+
+        metrics = execution_metrics.get_metrics()
+        root_metrics = metrics[state_machine.root_state.get_path()]
+        state_metrics = metrics[execution_state.get_path()]
+        for metric in execution_metrics.METRICS:
+            assert state_metrics[metric]['count'] >= 1
+        assert root_metrics['state']['count'] == 1
+        assert root_metrics['state']['sum'] >= state_metrics['state']['sum']
+        assert root_metrics['last_entry'] <= state_metrics['last_entry'] <= state_metrics['last_exit'] <= \
+            root_metrics['last_exit']
+        assert json.loads(execution_metrics.to_json(metrics))[execution_state.get_path()]['script']['count'] == 1
+
+        # the metrics are written when the execution finished
+        with open(dump_path) as dump_file:
+            dumped_text = dump_file.read()
+        assert '# TYPE rafcon_script_duration_seconds histogram' in dumped_text
+        assert 'rafcon_script_duration_seconds_count{{state_path="{0}"}} 1'.format(execution_state.get_path()) \
+            in dumped_text
+
+        # nothing is recorded, if the metrics are disabled
+        execution_metrics.reset_metrics()
+        global_config.set_config_value("EXECUTION_METRICS_ENABLE", False)
+        execute(create_state_machine()[0])
+        assert execution_metrics.get_metrics() == {}
+    finally:
+        execution_metrics.stop_dumping()
+        execution_metrics.set_enabled(False)
+        execution_metrics.reset_metrics()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
@@ -1,7 +1,10 @@
 import pytest
+import numpy as np
+from threading import Thread
 
 # state machine
 import rafcon.core.singleton
+from rafcon.core.global_variable_manager import GlobalVariableManager
 from rafcon.core.states.execution_state import ExecutionState
 from rafcon.core.states.hierarchy_state import HierarchyState
 from rafcon.core.state_machine import StateMachine
@@ -46,5 +49,60 @@ def test_concurrency_barrier_state_execution(caplog):
         testing_utils.test_multithreading_lock.release()
 
 
+
+def test_immutable_snapshots():
+    gvm = GlobalVariableManager()
+    array = np.arange(10.)
+    gvm.set_variable("array", array)
+    array[0] = 42.
+    snapshot = gvm.get_variable("array")
+    assert snapshot[0] == 0.
+    # the snapshot is shared by all readers, thus it cannot be changed
+    assert snapshot is gvm.get_variable("array")
+    with pytest.raises(ValueError):
+        snapshot[0] = 42.
+
+    # mutable values are still copied
+    gvm.set_variable("list", [1, 2])
+    gvm.get_variable("list").append(3)
+    assert gvm.get_variable("list") == [1, 2]
+
+    # values stored by reference are not copied
+    gvm.set_variable("reference", array, per_reference=True)
+    assert gvm.get_variable("reference", per_reference=True) is array
+    with pytest.raises(RuntimeError):
+        gvm.get_variable("array", per_reference=True)
+    assert gvm.global_variable_dictionary["array"] is snapshot
+
+
+def test_explicitly_locked_variable():
+    gvm = GlobalVariableManager()
+    gvm.set_variable("sensor", 1.)
+    access_key = gvm.lock_variable("sensor")
+    assert gvm.is_locked("sensor")
+    with pytest.raises(RuntimeError):
+        gvm.set_variable("sensor", 2.)
+    with pytest.raises(RuntimeError):
+        gvm.get_variable("sensor", access_key="wrong_key")
+    gvm.set_locked_variable("sensor", access_key, 3.)
+    assert gvm.get_locked_variable("sensor", access_key) == 3.
+
+    # readers without access key wait until the variable is unlocked
+    values = []
+    reader = Thread(target=lambda: values.append(gvm.get_variable("sensor")))
+    reader.start()
+    reader.join(0.1)
+    assert not values
+    gvm.set_locked_variable("sensor", access_key, 4.)
+    gvm.unlock_variable("sensor", access_key)
+    reader.join()
+    assert values == [4.]
+
+    with pytest.raises(AttributeError):
+        gvm.delete_variable("not_existing")
+    gvm.delete_variable("sensor")
+    assert not gvm.variable_exist("sensor")
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
@@ -1,6 +1,9 @@
 import hashlib
+from copy import deepcopy
 
 from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
 from rafcon.utils.hashable import Hashable
 
 
@@ -71,3 +74,136 @@ def test_state_hash():
     Hashable.update_hash_from_dict(hash2, state2)
 
     assert hash1.hexdigest() == hash2.hexdigest()
+
+
+def create_state_machine():
+    root_state = HierarchyState("root", state_id="ROOT")
+    for name in ["first", "second"]:
+        state = ExecutionState(name, state_id=name.upper())
+        state.add_input_data_port("input", "int", 0, data_port_id=1)
+        root_state.add_state(state)
+    root_state.set_start_state("FIRST")
+    root_state.add_transition("FIRST", 0, "SECOND", None)
+    root_state.add_transition("SECOND", 0, "ROOT", 0)
+    return StateMachine(root_state)
+
+
+def get_fresh_hash(state_machine):
+    """Returns the hash of a copy of the state machine, which has no cached digests"""
+    return StateMachine(deepcopy(state_machine.root_state)).mutable_hash().hexdigest()
+
+
+def test_merkle_hash_invalidation():
+    state_machine = create_state_machine()
+    root_state = state_machine.root_state
+    first_state = root_state.states["FIRST"]
+    hashes = set()
+
+    def check_hash():
+        state_hash = state_machine.mutable_hash().hexdigest()
+        assert state_hash == get_fresh_hash(state_machine)
+        assert state_hash not in hashes
+        hashes.add(state_hash)
+
+    check_hash()
+    # the digests of unchanged elements are cached
+    assert all(state._merkle_digest is not None for state in root_state.states.values())
+
+    first_state.name = "renamed"
+    assert first_state._merkle_digest is None and root_state._merkle_digest is None
+    assert root_state.states["SECOND"]._merkle_digest is not None
+    check_hash()
+    first_state.input_data_ports[1].default_value = 2
+    check_hash()
+    first_state.outcomes[0].name = "done"
+    check_hash()
+    first_state.script_text = "def execute(self, inputs, outputs, gvm):\n    return 'done'\n"
+    check_hash()
+    first_state.add_semantic_data([], "value", "key")
+    check_hash()
+    root_state.transitions[list(root_state.transitions)[-1]].to_outcome = -1
+    check_hash()
+    root_state.remove_state("SECOND")
+    check_hash()
+
+
+def test_state_machine_diff():
+    state_machine = create_state_machine()
+    other_state_machine = StateMachine(deepcopy(state_machine.root_state))
+    assert state_machine.diff(other_state_machine) == []
+
+    other_root_state = other_state_machine.root_state
+    other_root_state.states["SECOND"].input_data_ports[1].name = "renamed"
+    other_root_state.add_output_data_port("output", "int", data_port_id=5)
+    transition_id = [t_id for t_id, t in other_root_state.transitions.items() if t.from_state == "SECOND"][0]
+    other_root_state.remove_transition(transition_id)
+    assert sorted(state_machine.diff(other_state_machine)) == sorted([
+        ("ROOT", "changed"),
+        ("ROOT/output_data_ports:5", "added"),
+        ("ROOT/SECOND", "changed"),
+        ("ROOT/SECOND/input_data_ports:1", "changed"),
+        ("ROOT/transitions:{0}".format(transition_id), "removed"),
+    ])
+
+
+def test_merkle_hash_after_state_id_change():
+    state_machine = create_state_machine()
+    root_state = state_machine.root_state
+    root_state.add_input_data_port("input", "int", 0, data_port_id=4)
+    root_state.add_data_flow("ROOT", 4, "FIRST", 1)
+    state_machine.mutable_hash()
+    assert all(element._merkle_digest is not None
+               for element in list(root_state.transitions.values()) + list(root_state.data_flows.values()))
+
+    # the transitions and data flows connected to the root state refer to its new id
+    root_state.change_state_id("RENAMED")
+    fresh_state_machine = StateMachine(deepcopy(root_state))
+    assert state_machine.mutable_hash().hexdigest() == fresh_state_machine.mutable_hash().hexdigest()
+    for elements, fresh_elements in [(root_state.transitions, fresh_state_machine.root_state.transitions),
+                                     (root_state.data_flows, fresh_state_machine.root_state.data_flows)]:
+        for element_id, element in elements.items():
+            assert element.merkle_digest() == fresh_elements[element_id].merkle_digest()
+    assert state_machine.diff(fresh_state_machine) == []
+
+
+def test_merkle_hash_of_unobserved_changes():
+    state_machine = create_state_machine()
+    first_state = state_machine.root_state.states["FIRST"]
+    state_hash = state_machine.mutable_hash().hexdigest()
+
+    # the script text is changed on the script object itself, which is not observed
+    first_state.script.script = "def execute(self, inputs, outputs, gvm):\n    return 'changed'\n"
+    assert first_state._merkle_digest is None
+    changed_hash = state_machine.mutable_hash().hexdigest()
+    assert changed_hash != state_hash
+    assert changed_hash == get_fresh_hash(state_machine)
+
+    # the semantic data is changed in place, also in nested dictionaries
+    state_hash = changed_hash
+    first_state.semantic_data["key"] = "value"
+    changed_hash = state_machine.mutable_hash().hexdigest()
+    assert changed_hash != state_hash
+    assert changed_hash == get_fresh_hash(state_machine)
+
+    state_hash = changed_hash
+    first_state.semantic_data["nested"]["key"] = "value"
+    changed_hash = state_machine.mutable_hash().hexdigest()
+    assert changed_hash != state_hash
+    assert changed_hash == get_fresh_hash(state_machine)
+
+    state_hash = changed_hash
+    first_state.semantic_data["nested"].update(key="other value")
+    changed_hash = state_machine.mutable_hash().hexdigest()
+    assert changed_hash != state_hash
+    assert changed_hash == get_fresh_hash(state_machine)
+
+    state_hash = changed_hash
+    del first_state.semantic_data["key"]
+    changed_hash = state_machine.mutable_hash().hexdigest()
+    assert changed_hash != state_hash
+    assert changed_hash == get_fresh_hash(state_machine)
+
+    # copies of the semantic data do not invalidate the digest of the original state
+    state_copy = deepcopy(first_state)
+    state_copy.semantic_data["copied"] = "value"
+    assert first_state._merkle_digest is not None
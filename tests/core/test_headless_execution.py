@@ -0,0 +1,52 @@
+# core elements
+import rafcon.core.singleton
+from rafcon.core.decorators import set_headless_mode
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+import testing_utils
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    last_state = None
+    for i in range(3):
+        state = ExecutionState("state_{0}".format(i))
+        state.script_text = "def execute(self, inputs, outputs, gvm):\n    return 0\n"
+        root_state.add_state(state)
+        if last_state is None:
+            root_state.set_start_state(state.state_id)
+        else:
+            root_state.add_transition(last_state.state_id, 0, state.state_id, None)
+        last_state = state
+    root_state.add_transition(last_state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+def test_headless_execution(caplog):
+    testing_utils.initialize_environment_core()
+    set_headless_mode(True)
+    try:
+        state_machine = create_state_machine()
+        observed_state = list(state_machine.root_state.states.values())[1]
+        execution_status_changes = []
+        observer = object()
+        observed_state.add_observer(observer, "state_execution_status",
+                                    notify_after_function=lambda *args: execution_status_changes.append(args))
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+        assert state_machine.root_state.final_outcome.outcome_id == 0
+        for state in state_machine.root_state.states.values():
+            assert state.state_execution_status is StateExecutionStatus.INACTIVE
+        # observed states still notify their observers
+        assert len(execution_status_changes) >= 2
+    finally:
+        set_headless_mode(False)
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
@@ -0,0 +1,54 @@
+import os
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.states.library_state import LibraryState
+
+# test environment elements
+import testing_utils
+
+
+def create_wait_library_states(number_of_states):
+    return [LibraryState("generic", "wait", "None", "wait_{0}".format(i)) for i in range(number_of_states)]
+
+
+def test_library_cache(caplog):
+    library_cache_path = os.path.join(testing_utils.get_unique_temp_path(), "library_cache")
+    testing_utils.initialize_environment_core(core_config={"LIBRARY_CACHE_PATH": library_cache_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        library_manager.clean_loaded_libraries()
+        library_manager.reset_cache_statistics()
+        library_states = create_wait_library_states(3)
+        assert library_manager.cache_statistics == {'memory_hits': 2, 'disk_hits': 0, 'misses': 1}
+        assert len(os.listdir(library_cache_path)) == 1
+
+        # all instances are independent of each other
+        root_states = [library_state.state_copy for library_state in library_states]
+        assert len(set(id(root_state) for root_state in root_states)) == 3
+        # the loaded library is only a template for the instances
+        template = library_manager._loaded_libraries[library_states[0].lib_os_path].root_state
+        assert all(root_state is not template for root_state in root_states)
+        assert root_states[0] == root_states[1] == root_states[2]
+        root_states[0].name = "changed"
+        assert create_wait_library_states(1)[0].state_copy.name == root_states[1].name
+
+        # a restart of RAFCON uses the library cache on disk
+        library_manager.clean_loaded_libraries()
+        library_manager.reset_cache_statistics()
+        assert create_wait_library_states(1)[0].state_copy == root_states[1]
+        assert library_manager.cache_statistics == {'memory_hits': 0, 'disk_hits': 1, 'misses': 0}
+
+        # the cache is invalidated, if the library changes
+        statemachine_file_path = os.path.join(library_states[0].lib_os_path, "statemachine.json")
+        statemachine_file_stat = os.stat(statemachine_file_path)
+        os.utime(statemachine_file_path, (0, 0))
+        try:
+            library_manager.clean_loaded_libraries()
+            create_wait_library_states(1)
+            assert library_manager.cache_statistics == {'memory_hits': 0, 'disk_hits': 1, 'misses': 1}
+        finally:
+            os.utime(statemachine_file_path, (statemachine_file_stat.st_atime, statemachine_file_stat.st_mtime))
+    finally:
+        library_manager.clean_loaded_libraries()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
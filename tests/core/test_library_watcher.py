@@ -0,0 +1,85 @@
+import os
+import time
+import shutil
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.library_manager import LibraryChange, RACY_MODIFICATION_TIME_INTERVAL
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+
+# test environment elements
+import testing_utils
+
+
+def save_library(library_root_path, library_folder, state_name):
+    storage.save_state_machine_to_path(StateMachine(ExecutionState(state_name)),
+                                       os.path.join(library_root_path, library_folder))
+
+
+def make_folders_old(path):
+    """Sets the modification time of all folders into the past, as recently modified folders are always listed"""
+    old_time = time.time() - 2 * RACY_MODIFICATION_TIME_INTERVAL
+    for dir_path, _, _ in os.walk(path):
+        os.utime(dir_path, (old_time, old_time))
+
+
+def test_incremental_library_update(caplog):
+    library_root_path = testing_utils.get_unique_temp_path()
+    save_library(library_root_path, "first", "first")
+    save_library(library_root_path, os.path.join("folder", "second"), "second")
+    make_folders_old(library_root_path)
+    testing_utils.initialize_environment_core(libraries={"watched": library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        assert list(library_manager.libraries["watched"].keys()) == ["first", "folder"]
+        assert library_manager.update_libraries() == []
+        libraries_before_update = library_manager.libraries
+
+        # add, remove and modify libraries
+        save_library(library_root_path, "third", "third")
+        shutil.rmtree(os.path.join(library_root_path, "folder"))
+        assert LibraryState("watched", "first", "None").state_copy.name == "first"
+        save_library(library_root_path, "first", "first renamed")
+        changes = library_manager.update_libraries()
+        third_os_path = os.path.join(library_root_path, "third")
+        assert sorted(changes) == sorted([
+            LibraryChange('added', "watched", "third", third_os_path),
+            LibraryChange('removed', "watched/folder", "second", os.path.join(library_root_path, "folder", "second")),
+            LibraryChange('modified', "watched", "first", os.path.join(library_root_path, "first"))])
+        assert list(library_manager.libraries["watched"].keys()) == ["first", "third"]
+        # the library tree is replaced instead of being modified, as it might be read concurrently
+        assert list(libraries_before_update["watched"].keys()) == ["first", "folder"]
+        assert LibraryState("watched", "first", "None").state_copy.name == "first renamed"
+        assert library_manager.is_library_in_libraries("watched", "third")
+
+        # unchanged folders are not listed again
+        save_library(library_root_path, os.path.join("folder", "second"), "second")
+        make_folders_old(library_root_path)
+        library_manager.update_libraries()
+        unchanged_folder_dict = library_manager.libraries["watched"]["folder"]
+        assert library_manager.update_libraries() == []
+        assert library_manager.libraries["watched"]["folder"] is unchanged_folder_dict
+    finally:
+        library_manager.clean_loaded_libraries()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_library_watcher(caplog):
+    library_root_path = testing_utils.get_unique_temp_path()
+    save_library(library_root_path, "first", "first")
+    testing_utils.initialize_environment_core(core_config={"LIBRARY_WATCH_INTERVAL": 0.05},
+                                              libraries={"watched": library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        save_library(library_root_path, "second", "second")
+        for _ in range(100):
+            if library_manager.is_library_in_libraries("watched", "second"):
+                break
+            time.sleep(0.05)
+        assert library_manager.is_library_in_libraries("watched", "second")
+    finally:
+        library_manager.stop_watching()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
@@ -0,0 +1,135 @@
+import os
+import time
+
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.execution.multi_instance_execution import MultiInstanceExecutor, create_instance
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+import time
+
+def execute(self, inputs, outputs, gvm):
+    time.sleep(0.05)
+    outputs['output'] = inputs['input'] * 2
+    return 0
+"""
+
+
+WAITING_SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    self.wait_for_interruption()
+    return 0
+"""
+
+
+def create_state_machine(script_text=SCRIPT_TEXT):
+    root_state = HierarchyState("root")
+    root_input_id = root_state.add_input_data_port("input", "int", 1)
+    root_output_id = root_state.add_output_data_port("output", "int")
+    barrier_state = BarrierConcurrencyState("barrier")
+    barrier_input_id = barrier_state.add_input_data_port("input", "int", 0)
+    barrier_output_id = barrier_state.add_output_data_port("output", "int")
+    root_state.add_state(barrier_state)
+    root_state.set_start_state(barrier_state.state_id)
+    root_state.add_transition(barrier_state.state_id, 0, root_state.state_id, 0)
+    root_state.add_data_flow(root_state.state_id, root_input_id, barrier_state.state_id, barrier_input_id)
+    root_state.add_data_flow(barrier_state.state_id, barrier_output_id, root_state.state_id, root_output_id)
+    for i in range(2):
+        execution_state = ExecutionState("execution_{0}".format(i))
+        input_id = execution_state.add_input_data_port("input", "int", 0)
+        output_id = execution_state.add_output_data_port("output", "int")
+        execution_state.script_text = script_text
+        barrier_state.add_state(execution_state)
+        barrier_state.add_data_flow(barrier_state.state_id, barrier_input_id, execution_state.state_id, input_id)
+        if i == 0:
+            barrier_state.add_data_flow(execution_state.state_id, output_id, barrier_state.state_id,
+                                        barrier_output_id)
+    barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+def test_create_instance():
+    state_machine = create_state_machine()
+    instance = create_instance(state_machine, {"input": 3})
+    assert instance is not state_machine
+    assert instance.state_machine_id != state_machine.state_machine_id
+    assert [port.default_value for port in instance.root_state.input_data_ports.values()] == [3]
+    assert [port.default_value for port in state_machine.root_state.input_data_ports.values()] == [1]
+    with pytest.raises(ValueError):
+        create_instance(state_machine, {"unknown": 3})
+
+
+def test_multi_instance_execution(caplog):
+    testing_utils.initialize_environment_core()
+    engine = rafcon.core.singleton.state_machine_execution_engine
+    execution_mode = engine.status.execution_mode
+    try:
+        state_machine = create_state_machine()
+        with MultiInstanceExecutor(max_workers=4) as executor:
+            futures = executor.map(state_machine, [{"input": i} for i in range(8)])
+            results = [future.result(timeout=30) for future in futures]
+
+        for i, result in enumerate(results):
+            assert result.final_outcome.outcome_id == 0
+            assert result.output_data == {"output": 2 * i}
+            # each instance has its own execution history
+            assert len(result.state_machine.execution_histories) == 1
+            assert result.state_machine.execution_engine.finished_or_stopped()
+            result.state_machine.destroy_execution_histories()
+        assert len(set(id(result.state_machine.execution_engine) for result in results)) == len(results)
+
+        # the engine singleton and the original state machine are not affected
+        assert engine.status.execution_mode is execution_mode
+        assert state_machine.execution_histories == []
+        assert state_machine.execution_engine is None
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_multi_instance_execution_logs(caplog):
+    execution_log_path = testing_utils.get_unique_temp_path()
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_LOG_ENABLE": True,
+                                                           "EXECUTION_LOG_PATH": execution_log_path})
+    try:
+        state_machine = create_state_machine()
+        with MultiInstanceExecutor(max_workers=4) as executor:
+            results = [future.result(timeout=30) for future in executor.map(state_machine, [{}] * 4)]
+
+        # the instances are started within the same second, but each of them writes its own execution log
+        log_paths = set()
+        for result in results:
+            execution_history = result.state_machine.execution_histories[0]
+            log_paths.add(execution_history.execution_history_storage.filename)
+            result.state_machine.destroy_execution_histories()
+        assert len(log_paths) == len(results)
+        assert len(os.listdir(execution_log_path)) == len(results)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_multi_instance_stop(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine(WAITING_SCRIPT_TEXT)
+        executor = MultiInstanceExecutor(max_workers=1)
+        futures = executor.map(state_machine, [{}, {}])
+        while not futures[0].running():
+            time.sleep(0.01)
+        time.sleep(0.2)
+        executor.shutdown(wait=True, stop=True)
+        assert futures[0].result().final_outcome.outcome_id == -2
+        futures[0].result().state_machine.destroy_execution_histories()
+        with pytest.raises(RuntimeError):
+            futures[1].result()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
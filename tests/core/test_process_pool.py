@@ -0,0 +1,129 @@
+import os
+import time
+
+import numpy
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.execution import process_pool
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+import os
+EXECUTE_IN_PROCESS = True
+
+def execute(self, inputs, outputs, gvm):
+    outputs['array'] = inputs['array'] * 2
+    outputs['pid'] = os.getpid()
+    gvm.set_variable('counter', gvm.get_variable('counter') + 1)
+    self.persistent_variables['runs'] = self.persistent_variables.get('runs', 0) + 1
+    return 'success'
+"""
+
+WAITING_SCRIPT_TEXT = """
+EXECUTE_IN_PROCESS = True
+
+def execute(self, inputs, outputs, gvm):
+    self.wait_for_interruption()
+    return 0
+"""
+
+FAILING_SCRIPT_TEXT = """
+EXECUTE_IN_PROCESS = True
+
+def execute(self, inputs, outputs, gvm):
+    raise ValueError('failure in worker')
+"""
+
+
+def create_state_machine(script_text):
+    execution_state = ExecutionState("cpu_bound")
+    execution_state.add_input_data_port("array", "object", None)
+    execution_state.add_output_data_port("array", "object")
+    execution_state.add_output_data_port("pid", "int")
+    execution_state.script_text = script_text
+    return StateMachine(execution_state)
+
+
+def execute(state_machine, input_data=None):
+    for port in state_machine.root_state.input_data_ports.values():
+        if input_data and port.name in input_data:
+            port.default_value = input_data[port.name]
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+    rafcon.core.singleton.state_machine_execution_engine.join()
+    rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    return state_machine.root_state
+
+
+def initialize_environment():
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_PROCESS_POOL_SIZE": 1,
+                                                           "EXECUTION_PROCESS_SHARED_MEMORY_THRESHOLD": 1024})
+
+
+def shutdown_environment(caplog, expected_errors=0):
+    process_pool.shutdown_process_pool()
+    testing_utils.shutdown_environment_only_core(caplog=caplog, expected_errors=expected_errors)
+
+
+def test_pack_data():
+    directory = testing_utils.get_unique_temp_path()
+    data = {'small': numpy.ones(10), 'large': numpy.ones(1000), 'other': "text"}
+    packed_data = process_pool.pack_data(data, 1024, directory)
+    assert isinstance(packed_data['large'], process_pool.SharedArray)
+    assert packed_data['small'] is data['small'] and packed_data['other'] == "text"
+    unpacked_data = process_pool.unpack_data(packed_data)
+    assert numpy.array_equal(unpacked_data['large'], data['large'])
+    assert os.listdir(directory) == []
+    assert process_pool.pack_data(data, 0, directory) is data
+
+
+def test_process_pool_execution(caplog):
+    initialize_environment()
+    try:
+        gvm = rafcon.core.singleton.global_variable_manager
+        gvm.set_variable('counter', 0)
+        state_machine = create_state_machine(SCRIPT_TEXT)
+        for run in range(1, 3):
+            array = numpy.arange(1000.)
+            state = execute(state_machine, {'array': array})
+            assert state.final_outcome.name == "success"
+            assert numpy.array_equal(state.output_data['array'], array * 2)
+            assert state.output_data['pid'] != os.getpid()
+            assert gvm.get_variable('counter') == run
+            assert state.persistent_variables['runs'] == run
+        # the worker process is reused
+        assert process_pool.get_process_pool().number_of_workers == 1
+    finally:
+        shutdown_environment(caplog)
+
+
+def test_process_pool_preemption(caplog):
+    initialize_environment()
+    try:
+        state_machine = create_state_machine(WAITING_SCRIPT_TEXT)
+        engine = rafcon.core.singleton.state_machine_execution_engine
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        engine.start(state_machine.state_machine_id)
+        time.sleep(1.)
+        engine.stop()
+        assert engine.join(10)
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        assert state_machine.root_state.final_outcome.outcome_id == -2
+    finally:
+        shutdown_environment(caplog)
+
+
+def test_process_pool_error(caplog):
+    initialize_environment()
+    try:
+        state = execute(create_state_machine(FAILING_SCRIPT_TEXT))
+        assert state.final_outcome.outcome_id == -1
+        assert isinstance(state.output_data['error'], ValueError)
+    finally:
+        # the traceback of the worker and the error of the state
+        shutdown_environment(caplog, expected_errors=2)
@@ -71,5 +71,70 @@ def test_scoped_data(caplog):
         testing_utils.test_multithreading_lock.release()
 
 
+def test_data_routing_after_modifications():
+    sm = create_state_machine()
+    root_state = sm.root_state
+    state1, state2 = [root_state.states[state_id] for state_id in root_state.states]
+    if state1.name != "first_state":
+        state1, state2 = state2, state1
+    output_port_id = state1.get_io_data_port_id_from_name_and_type("data_output_port1", OutputDataPort)
+    root_state.add_state_execution_output_to_scoped_data({"data_output_port1": 3.0}, state1)
+    assert root_state.get_inputs_for_state(state2)["data_input_port1"] == 3.0
+
+    # a renamed output port has to be resolved by its new name
+    state1.output_data_ports[output_port_id].name = "renamed_output_port"
+    root_state.add_state_execution_output_to_scoped_data({"renamed_output_port": 4.0}, state1)
+    assert root_state.get_inputs_for_state(state2)["data_input_port1"] == 4.0
+
+    # data flows with a modified target must not route data to the previous target anymore
+    data_flow = [df for df in root_state.data_flows.values() if df.to_state == state2.state_id][0]
+    root_state.add_scoped_variable("scoped", "float")
+    data_flow.modify_target(root_state.state_id, root_state.get_scoped_variable_from_name("scoped"))
+    assert root_state.get_inputs_for_state(state2)["data_input_port1"] is None
+    root_state.update_scoped_variables_with_output_dictionary({"renamed_output_port": 5.0}, state1)
+    scoped_variable_id = root_state.get_scoped_variable_from_name("scoped")
+    assert root_state.scoped_data[str(scoped_variable_id) + root_state.state_id].value == 5.0
+
+
+@pytest.mark.parametrize("by_reference", [False, True])
+def test_data_passing_by_reference(by_reference, caplog):
+    testing_utils.initialize_environment_core(core_config={"DATA_PASSING_BY_REFERENCE": by_reference})
+    try:
+        state1 = ExecutionState("first_state")
+        state1.script_text = 'def execute(self, inputs, outputs, gvm):\n' \
+                             '    outputs["data"] = inputs["data"]\n' \
+                             '    return 0\n'
+        state1.add_input_data_port("data", "list")
+        state1.add_output_data_port("data", "list")
+        root_state = HierarchyState("hierarchy_state")
+        root_state.add_state(state1)
+        root_state.set_start_state(state1.state_id)
+        root_state.add_transition(state1.state_id, 0, root_state.state_id, 0)
+        input_port_id = root_state.add_input_data_port("data", "list", [1, 2, 3])
+        output_port_id = root_state.add_output_data_port("data", "list")
+        root_state.add_data_flow(root_state.state_id, input_port_id, state1.state_id,
+                                 state1.get_io_data_port_id_from_name_and_type("data", InputDataPort))
+        root_state.add_data_flow(state1.state_id, state1.get_io_data_port_id_from_name_and_type("data", OutputDataPort),
+                                 root_state.state_id, output_port_id)
+        state_machine = StateMachine(root_state)
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        assert root_state.output_data["data"] == [1, 2, 3]
+        assert (root_state.output_data["data"] is root_state.input_data["data"]) is by_reference
+
+        # history items share the unchanged scoped data with each other if values are passed by reference
+        input_key = str(input_port_id) + root_state.state_id
+        snapshots = [item.scoped_data[input_key] for item in state_machine.execution_histories[0]
+                     if getattr(item, "scoped_data", None) and input_key in item.scoped_data]
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        assert len(snapshots) > 1
+        assert all((snapshot is snapshots[0]) is by_reference for snapshot in snapshots[1:])
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
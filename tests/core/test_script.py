@@ -0,0 +1,71 @@
+import os
+
+# core elements
+from rafcon.core import script
+from rafcon.core.script import Script
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = "counter = [0]\n\ndef execute(self, inputs, outputs, gvm):\n    counter[0] += 1\n    return counter[0]\n"
+
+
+def create_script(script_text=SCRIPT_TEXT):
+    state_script = Script(check_path=False)
+    state_script.script = script_text
+    state_script.build_module()
+    return state_script
+
+
+def test_code_cache(caplog):
+    code_cache_path = os.path.join(testing_utils.get_unique_temp_path(), "code_cache")
+    testing_utils.initialize_environment_core(core_config={"SCRIPT_CODE_CACHE_PATH": code_cache_path})
+    try:
+        script.clear_code_cache()
+        script.reset_code_cache_statistics()
+        first_script = create_script()
+        second_script = create_script()
+        assert script.get_code_cache_statistics() == {'memory_hits': 1, 'disk_hits': 0, 'misses': 1}
+        assert len(os.listdir(code_cache_path)) == 1
+
+        # the code object is shared, the modules are not
+        assert first_script.compiled_module is not second_script.compiled_module
+        assert first_script.execute(None) == 1
+        assert second_script.execute(None) == 1
+        assert first_script.execute(None) == 2
+
+        create_script(SCRIPT_TEXT + "# changed\n")
+        assert script.get_code_cache_statistics()['misses'] == 2
+
+        # a new process uses the code cache on disk
+        script.clear_code_cache()
+        script.reset_code_cache_statistics()
+        assert create_script().execute(None) == 1
+        assert script.get_code_cache_statistics() == {'memory_hits': 0, 'disk_hits': 1, 'misses': 0}
+    finally:
+        script.clear_code_cache()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_code_cache_size(caplog):
+    testing_utils.initialize_environment_core(core_config={"SCRIPT_CODE_CACHE_SIZE": 2})
+    try:
+        script.clear_code_cache()
+        script.reset_code_cache_statistics()
+        script_texts = [SCRIPT_TEXT + "# {0}\n".format(i) for i in range(3)]
+        create_script(script_texts[0])
+        create_script(script_texts[1])
+        # using the first script makes the second one the least recently used
+        create_script(script_texts[0])
+        create_script(script_texts[2])
+        assert len(script._code_cache) == 2
+        assert script.get_code_cache_statistics() == {'memory_hits': 1, 'disk_hits': 0, 'misses': 3}
+
+        create_script(script_texts[0])
+        assert script.get_code_cache_statistics()['memory_hits'] == 2
+        create_script(script_texts[1])
+        assert script.get_code_cache_statistics()['misses'] == 4
+        assert len(script._code_cache) == 2
+    finally:
+        script.clear_code_cache()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
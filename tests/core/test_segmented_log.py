@@ -0,0 +1,100 @@
+import os
+import shelve
+
+from rafcon.utils.segmented_log import SegmentedLogWriter, SegmentedLogReader, convert_shelve_log, \
+    SEGMENT_NAME_FORMAT, INDEX_SUFFIX
+
+# test environment elements
+import testing_utils
+
+
+def create_records(number_of_records):
+    return [(str(i), {'history_item_id': str(i), 'run_id': 'run_{0}'.format(i // 2), 'timestamp': float(i),
+                      'data': list(range(i))})
+            for i in range(number_of_records)]
+
+
+def test_write_and_read():
+    path = os.path.join(testing_utils.get_unique_temp_path(), 'log')
+    records = create_records(100)
+    writer = SegmentedLogWriter(path, max_segment_size=1024)
+    for key, record in records:
+        writer[key] = record
+    writer.close()
+    assert os.path.isfile(os.path.join(path, SEGMENT_NAME_FORMAT.format(1)))
+
+    reader = SegmentedLogReader(path)
+    assert list(reader.items()) == records
+    assert len(reader) == 100
+    assert '42' in reader
+    assert '100' not in reader
+    assert reader['42'] == records[42][1]
+    assert reader.records_for_run_id('run_21') == [records[42][1], records[43][1]]
+    assert not reader.truncated
+
+
+def test_read_while_writing_and_truncated_tail():
+    path = os.path.join(testing_utils.get_unique_temp_path(), 'log')
+    records = create_records(10)
+    writer = SegmentedLogWriter(path)
+    for key, record in records:
+        writer[key] = record
+    writer.sync()
+
+    # the log can be read before it is closed, the index is created by scanning the segment
+    assert list(SegmentedLogReader(path).items()) == records
+
+    # simulate a crash while writing the last record
+    segment_path = os.path.join(path, SEGMENT_NAME_FORMAT.format(0))
+    size = os.path.getsize(segment_path)
+    with open(segment_path, 'rb+') as segment_file:
+        segment_file.truncate(size - 3)
+    reader = SegmentedLogReader(path)
+    assert list(reader.items()) == records[:-1]
+    assert len(reader) == 9
+    assert reader.truncated
+    assert not os.path.isfile(segment_path + INDEX_SUFFIX)
+
+
+def test_lookup_of_records_appended_after_loading_the_index():
+    path = os.path.join(testing_utils.get_unique_temp_path(), 'log')
+    records = create_records(60)
+    writer = SegmentedLogWriter(path, max_segment_size=1024)
+    for key, record in records[:10]:
+        writer[key] = record
+    writer.sync()
+
+    reader = SegmentedLogReader(path)
+    assert len(reader) == 10
+    assert '30' not in reader
+
+    # the index is extended by the records appended since it was loaded, also in new segments
+    for key, record in records[10:]:
+        writer[key] = record
+    writer.sync()
+    assert os.path.isfile(os.path.join(path, SEGMENT_NAME_FORMAT.format(1)))
+    assert reader['30'] == records[30][1]
+    assert reader['59'] == records[59][1]
+    assert reader.records_for_run_id('run_4') == [records[8][1], records[9][1]]
+    assert reader.records_for_run_id('run_29') == [records[58][1], records[59][1]]
+    assert len(reader) == 60
+
+    # sealing the segments does not index their records twice
+    writer.close()
+    assert reader.records_for_run_id('run_29') == [records[58][1], records[59][1]]
+    assert len(reader) == 60
+    assert not reader.truncated
+
+
+def test_convert_shelve_log():
+    path = testing_utils.get_unique_temp_path()
+    shelve_filename = os.path.join(path, 'log.shelve')
+    records = create_records(20)
+    shelve_log = shelve.open(shelve_filename, flag='c', protocol=2)
+    for key, record in reversed(records):
+        shelve_log[key] = record
+    shelve_log.close()
+
+    assert convert_shelve_log(shelve_filename, os.path.join(path, 'log')) == 20
+    # the records are sorted by their timestamp
+    assert list(SegmentedLogReader(os.path.join(path, 'log')).items()) == records
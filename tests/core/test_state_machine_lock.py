@@ -0,0 +1,46 @@
+from threading import Thread
+
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    hierarchy_state = HierarchyState("hierarchy")
+    execution_state = ExecutionState("execution")
+    execution_state.add_output_data_port("output", "int")
+    hierarchy_state.add_state(execution_state)
+    root_state.add_state(hierarchy_state)
+    return StateMachine(root_state), hierarchy_state, execution_state
+
+
+def test_cached_state_machine_is_invalidated_on_reparenting():
+    state_machine, hierarchy_state, execution_state = create_state_machine()
+    assert execution_state.get_state_machine() is state_machine
+    assert execution_state.get_state_machine() is state_machine
+
+    state_machine.root_state.remove_state(hierarchy_state.state_id, recursive=False, destroy=False)
+    assert hierarchy_state.get_state_machine() is None
+    assert execution_state.get_state_machine() is None
+
+    other_state_machine = StateMachine(HierarchyState("other_root"))
+    other_state_machine.root_state.add_state(hierarchy_state)
+    assert execution_state.get_state_machine() is other_state_machine
+
+
+def test_scoped_data_does_not_lock_state_machine():
+    state_machine, hierarchy_state, execution_state = create_state_machine()
+    state_machine.acquire_modification_lock()
+    try:
+        # another thread changes the state machine, the scoped data can still be written
+        writer = Thread(target=hierarchy_state.add_state_execution_output_to_scoped_data,
+                        args=({"output": 42}, execution_state))
+        writer.start()
+        writer.join(5)
+        assert not writer.is_alive()
+    finally:
+        state_machine.release_modification_lock()
+    scoped_data = list(hierarchy_state.scoped_data.values())
+    assert len(scoped_data) == 1 and scoped_data[0].value == 42
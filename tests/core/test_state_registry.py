@@ -0,0 +1,102 @@
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+import testing_utils
+
+
+def create_nested_hierarchy(depth):
+    root_state = HierarchyState("root")
+    parent_state = root_state
+    for i in range(depth):
+        child_state = HierarchyState("level_{0}".format(i))
+        parent_state.add_state(child_state)
+        parent_state = child_state
+    parent_state.add_state(ExecutionState("leaf"))
+    return root_state
+
+
+def assert_paths_consistent(state_machine):
+    for path, state in state_machine._get_state_registry()[0].items():
+        assert state.get_path() == path
+        assert state_machine.get_state_by_path(path) is state
+
+
+def test_paths_after_hierarchy_changes():
+    root_state = create_nested_hierarchy(5)
+    state_machine = StateMachine(root_state)
+    assert len(state_machine._get_state_registry()[0]) == 7
+    assert_paths_consistent(state_machine)
+
+    level_0 = list(root_state.states.values())[0]
+    level_1 = list(level_0.states.values())[0]
+    leaf = level_1
+    while leaf.name != "leaf":
+        leaf = list(leaf.states.values())[0]
+    assert leaf.get_path().startswith("/".join([root_state.state_id, level_0.state_id, level_1.state_id]))
+
+    # reparenting a subtree changes the paths of all its states
+    old_path = level_1.get_path()
+    level_0.remove_state(level_1.state_id, recursive=False, destroy=False)
+    root_state.add_state(level_1)
+    assert level_1.get_path() == root_state.state_id + "/" + level_1.state_id
+    assert leaf.get_path().startswith(level_1.get_path() + "/")
+    assert state_machine.get_state_by_path(old_path, as_check=True) is None
+    assert state_machine.get_state_by_path(level_1.get_path()) is level_1
+    assert_paths_consistent(state_machine)
+
+    # changing an id changes the paths of all descendants
+    level_1.change_state_id("RENAMED")
+    assert level_1.get_path() == root_state.state_id + "/RENAMED"
+    assert leaf.get_path().startswith(root_state.state_id + "/RENAMED/")
+    assert state_machine.get_states_by_id("RENAMED") == (level_1,)
+    assert state_machine.get_state_by_path(leaf.get_path()) is leaf
+    assert_paths_consistent(state_machine)
+
+    # the path of a state with appendix or by name is not cached
+    assert leaf.get_path(appendix="x") == leaf.get_path() + "/x"
+    assert leaf.get_path(by_name=True).endswith("/leaf")
+
+
+def test_registry_after_replacing_the_root_state():
+    root_state = create_nested_hierarchy(1)
+    state_machine = StateMachine(root_state)
+    child_path = list(root_state.states.values())[0].get_path()
+    assert state_machine.get_state_by_path(child_path) is not None
+
+    new_root_state = create_nested_hierarchy(2)
+    state_machine.root_state = new_root_state
+    assert state_machine.get_state_by_path(child_path, as_check=True) is None
+    assert state_machine.get_state_by_path(new_root_state.get_path()) is new_root_state
+    assert len(state_machine._get_state_registry()[0]) == 4
+    assert_paths_consistent(state_machine)
+
+    state_machine.root_state = None
+    assert state_machine.get_state_by_path(new_root_state.get_path(), as_check=True) is None
+    assert state_machine.get_states_by_id(new_root_state.state_id) == ()
+
+
+def test_library_states_in_registry(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        root_state = HierarchyState("root")
+        library_states = [LibraryState("generic", "wait", "None", "wait_{0}".format(i)) for i in range(3)]
+        for library_state in library_states:
+            root_state.add_state(library_state)
+        state_machine = StateMachine(root_state)
+        assert_paths_consistent(state_machine)
+
+        # the state copies of the same library share their state id
+        state_copy_id = library_states[0].state_copy.state_id
+        states = state_machine.get_states_by_id(state_copy_id)
+        assert set(id(state) for state in states) == set(id(library_state.state_copy)
+                                                         for library_state in library_states)
+        for library_state in library_states:
+            path = library_state.get_path() + "/" + state_copy_id
+            assert state_machine.get_state_by_path(path) is library_state.state_copy
+        assert state_machine.get_states_by_id("not_existing") == ()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
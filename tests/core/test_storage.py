@@ -0,0 +1,257 @@
+import json
+import os
+import pytest
+
+# core elements
+from rafcon.core.config import global_config
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.utils import storage_utils
+
+# test environment elements
+import testing_utils
+
+
+def create_state_machine():
+    root_state = HierarchyState("root")
+    for i in range(3):
+        hierarchy_state = HierarchyState("hierarchy_{0}".format(i))
+        root_state.add_state(hierarchy_state)
+        last_state = None
+        for j in range(4):
+            execution_state = ExecutionState("execution_{0}_{1}".format(i, j))
+            execution_state.script_text = "def execute(self, inputs, outputs, gvm):\n    return {0}\n".format(j)
+            execution_state.semantic_data = {"index": j}
+            hierarchy_state.add_state(execution_state)
+            if last_state is None:
+                hierarchy_state.set_start_state(execution_state.state_id)
+            else:
+                hierarchy_state.add_transition(last_state.state_id, 0, execution_state.state_id, None)
+            last_state = execution_state
+    return StateMachine(root_state)
+
+
+@pytest.mark.parametrize("number_of_threads", [1, 4])
+def test_load_state_machine_with_threads(caplog, number_of_threads):
+    testing_utils.initialize_environment_core(core_config={"STORAGE_LOADING_THREADS": number_of_threads})
+    try:
+        state_machine = create_state_machine()
+        path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine")
+        storage.save_state_machine_to_path(state_machine, path)
+
+        loaded_state_machine = storage.load_state_machine_from_path(path)
+        assert loaded_state_machine.root_state == state_machine.root_state
+        for state in loaded_state_machine.root_state.states.values():
+            # the start transition and the transitions between the execution states
+            assert len(state.transitions) == 4
+            for child_state in state.states.values():
+                original_state = state_machine.get_state_by_path(child_state.get_path())
+                assert child_state.script_text == original_state.script_text
+                assert child_state.semantic_data == original_state.semantic_data
+                assert child_state.file_system_path.startswith(path)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_incremental_saving(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine")
+        # state machine file, core data and semantic data of 16 states and scripts of 12 execution states
+        assert storage.save_state_machine_to_path(state_machine, path) == 45
+        # the state machine file is written again, if its update time (in seconds) changed
+        assert storage.save_state_machine_to_path(state_machine, path) in (0, 1)
+
+        execution_state = list(list(state_machine.root_state.states.values())[0].states.values())[0]
+        execution_state.script_text += "# comment\n"
+        assert storage.save_state_machine_to_path(state_machine, path) in (1, 2)
+        execution_state.semantic_data["new_key"] = "value"
+        execution_state.name = "renamed"
+        # the state is moved to a new folder, as its name is part of the folder name
+        assert storage.save_state_machine_to_path(state_machine, path) in (3, 4)
+
+        # files modified by others are written again
+        os.remove(os.path.join(execution_state.file_system_path, storage.SEMANTIC_DATA_FILE))
+        assert storage.save_state_machine_to_path(state_machine, path) in (1, 2)
+        for root, directories, files in os.walk(path):
+            assert not [file_name for file_name in files if file_name.endswith(".tmp")]
+
+        loaded_state_machine = storage.load_state_machine_from_path(path)
+        assert loaded_state_machine.root_state == state_machine.root_state
+        # the files of a loaded state machine are not written again
+        assert storage.save_state_machine_to_path(loaded_state_machine, path) in (0, 1)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_unobserved_changes_are_saved(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        execution_state = list(list(state_machine.root_state.states.values())[0].states.values())[0]
+        port_id = execution_state.add_input_data_port("values", "list", [1])
+        path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine")
+        storage.save_state_machine_to_path(state_machine, path)
+
+        # an in-place change is not observed, but the content of the core data file changes
+        execution_state.input_data_ports[port_id].default_value.append(2)
+        assert storage.save_state_machine_to_path(state_machine, path) in (1, 2)
+        loaded_state_machine = storage.load_state_machine_from_path(path)
+        loaded_state = loaded_state_machine.get_state_by_path(execution_state.get_path())
+        assert loaded_state.input_data_ports[port_id].default_value == [1, 2]
+
+        # forgotten files are written again
+        storage.forget_stored_files(path)
+        assert storage.save_state_machine_to_path(state_machine, path) == 45
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_stored_file_hashes_are_bounded(caplog, monkeypatch):
+    testing_utils.initialize_environment_core()
+    try:
+        monkeypatch.setattr(storage, "MAX_STORED_FILE_HASHES", 10)
+        state_machine = create_state_machine()
+        path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine")
+        storage.save_state_machine_to_path(state_machine, path)
+        assert len(storage._stored_file_hashes) == 10
+        # the files saved last are remembered
+        file_path = list(storage._stored_file_hashes)[-1]
+        assert file_path.startswith(path)
+        with open(file_path) as file_pointer:
+            assert not storage.write_file_if_changed(file_path, file_pointer.read())
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_write_file_atomically():
+    from threading import Thread
+    from rafcon.utils.filesystem import write_file_atomically
+
+    directory = testing_utils.get_unique_temp_path()
+    file_path = os.path.join(directory, "file.json")
+    write_file_atomically(file_path, "content")
+    os.chmod(file_path, 0o640)
+    threads = [Thread(target=write_file_atomically, args=(file_path, "content {0}".format(i) * 1000))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(file_path) as file_pointer:
+        assert file_pointer.read() in ["content {0}".format(i) * 1000 for i in range(8)]
+    # the file keeps its permissions and no temporary files are left
+    assert os.stat(file_path).st_mode & 0o777 == 0o640
+    assert os.listdir(directory) == ["file.json"]
+
+
+def test_state_file_reader_prefetches_subtree():
+    path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine")
+    state_machine = create_state_machine()
+    storage.save_state_machine_to_path(state_machine, path)
+    root_state_path = os.path.join(path, storage.get_storage_id_for_state(state_machine.root_state))
+
+    state_file_reader = storage.StateFileReader(4)
+    try:
+        state_file_reader.prefetch(root_state_path)
+        root_state_files = state_file_reader.read(root_state_path)
+        assert len(root_state_files["child_state_paths"]) == 3
+        for child_state_path in root_state_files["child_state_paths"]:
+            child_state_files = state_file_reader.read(child_state_path)
+            assert len(child_state_files["child_state_paths"]) == 4
+            assert child_state_files["script"] is None
+    finally:
+        state_file_reader.shutdown()
+
+    with pytest.raises(ValueError):
+        storage.StateFileReader().read(path + "_not_existing")
+
+
+@pytest.mark.parametrize("serializer_name", ["json", "compact_json", "msgpack"])
+def test_serializers(serializer_name):
+    if serializer_name == "msgpack":
+        pytest.importorskip("msgpack")
+    serializer = storage_utils.get_serializer(serializer_name)
+    root_state = create_state_machine().root_state
+    # container states are restored with their transitions and data flows, but without their child states
+    state_info = serializer.loads(serializer.dumps(root_state))
+    assert isinstance(state_info, tuple) and state_info[0].state_id == root_state.state_id
+    assert state_info[1] == root_state.transitions
+    # the script and semantic data are not part of the core data of states
+    execution_state = list(list(root_state.states.values())[0].states.values())[0]
+    serialized_state = serializer.dumps(execution_state)
+    assert serializer.dumps(serializer.loads(serialized_state)) == serialized_state
+    semantic_data = {"tuple": (1, 2), "type": int, "nested": {"list": [1.5, None, True]}}
+    assert serializer.loads(serializer.dumps(semantic_data)) == semantic_data
+
+    # the plain data of the fast serializers restores the same objects as the JSON decoder of jsonconversion
+    def to_json_data(obj):
+        # JSON converts the integer keys of dicts into strings
+        return json.loads(json.dumps(storage_utils._to_plain_data(obj)))
+
+    plain_data = json.loads(storage_utils.dict_to_json_string(execution_state))
+    assert to_json_data(execution_state) == plain_data
+    object_hook = storage_utils.get_serializer("compact_json")._object_hook
+    assert to_json_data(storage_utils._from_plain_data(plain_data, object_hook)) == plain_data
+
+    with pytest.raises(ValueError):
+        storage_utils.get_serializer("not_existing")
+
+
+def test_folder_serializer(caplog):
+    testing_utils.initialize_environment_core(core_config={"STORAGE_SERIALIZER": "compact_json"})
+    try:
+        state_machine = create_state_machine()
+        path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine")
+        storage.save_state_machine_to_path(state_machine, path)
+        with open(os.path.join(path, storage.STATEMACHINE_FILE)) as state_machine_file:
+            assert "\n" not in state_machine_file.read()
+        assert storage.load_state_machine_from_path(path).root_state == state_machine.root_state
+
+        # files written by other JSON serializers can be read
+        global_config.set_config_value("STORAGE_SERIALIZER", "json")
+        assert storage.load_state_machine_from_path(path).root_state == state_machine.root_state
+        # binary serializers can only be used for packed files
+        global_config.set_config_value("STORAGE_SERIALIZER", "msgpack")
+        with pytest.raises((ValueError, ImportError)):
+            storage.save_state_machine_to_path(state_machine, path)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+@pytest.mark.parametrize("serializer_name", ["compact_json", "msgpack"])
+def test_packed_state_machine_file(caplog, serializer_name):
+    if serializer_name == "msgpack":
+        pytest.importorskip("msgpack")
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine.zip")
+        storage.save_state_machine_to_packed_file(state_machine, path, serializer_name)
+        assert storage.is_packed_file(path)
+        assert state_machine.file_system_path is None
+
+        loaded_state_machine = storage.load_state_machine_from_path(path)
+        assert loaded_state_machine.file_system_path == path
+        assert loaded_state_machine.root_state == state_machine.root_state
+        for state in loaded_state_machine.root_state.states.values():
+            assert len(state.transitions) == 4
+            for child_state in state.states.values():
+                original_state = state_machine.get_state_by_path(child_state.get_path())
+                assert child_state.script_text == original_state.script_text
+                assert child_state.semantic_data == original_state.semantic_data
+        assert storage.read_state_machine_files(path)['serializer'] == serializer_name
+
+        # a subtree is loaded without reading the other states
+        hierarchy_state = list(state_machine.root_state.states.values())[1]
+        state_path = os.path.join(path, storage.get_storage_id_for_state(state_machine.root_state),
+                                  storage.get_storage_id_for_state(hierarchy_state))
+        subtree_files = storage.read_packed_state_machine_files(path, os.path.relpath(state_path, path))
+        assert len(subtree_files['states']) == 5
+        loaded_state = storage.load_state_from_path(state_path)
+        assert loaded_state == hierarchy_state and loaded_state.parent is None
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
@@ -84,5 +84,34 @@ def test_transition_creation(caplog):
     rafcon.core.singleton.state_machine_manager.delete_all_state_machines()
 
 
+def test_transition_lookup_for_outcome():
+    sm = create_state_machine()
+    root_state = sm.root_state
+    state1, state2, state3 = [state for state in root_state.states.values()
+                              if state.name in ("DummyState1", "DummyState2", "DummyState3")]
+
+    transition = root_state.get_transition_for_outcome(state1, state1.outcomes[3])
+    assert transition.to_state == state2.state_id
+    assert root_state.get_transition_for_outcome(state1, state1.outcomes[0]) is None
+
+    # modified origins have to be found under the new outcome
+    transition.from_outcome = 0
+    assert root_state.get_transition_for_outcome(state1, state1.outcomes[0]) is transition
+    assert root_state.get_transition_for_outcome(state1, state1.outcomes[3]) is None
+    transition.modify_origin(state1.state_id, 3)
+    assert root_state.get_transition_for_outcome(state1, state1.outcomes[3]) is transition
+
+    # removed transitions must not be found anymore
+    root_state.remove_transition(transition.transition_id)
+    assert root_state.get_transition_for_outcome(state1, state1.outcomes[3]) is None
+
+    # the index is recreated, if the transitions are replaced
+    transitions = root_state.transitions
+    root_state.transitions = {}
+    assert root_state.get_transition_for_outcome(state3, state3.outcomes[4]) is None
+    root_state.transitions = transitions
+    assert root_state.get_transition_for_outcome(state3, state3.outcomes[4]).to_state == root_state.state_id
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,60 @@
+"""Configures the pytest-benchmark plugin for the benchmarks in test_benchmarks.py
+
+The benchmarks are compared against the baseline stored in the `benchmarks` directory next to this file:
+
+    py.test tests/performance/test_benchmarks.py --benchmark-save-baseline
+    py.test tests/performance/test_benchmarks.py --benchmark-regression-threshold=20
+
+The first command stores a new baseline, the second one fails, if the mean duration of a benchmark exceeds the
+mean duration of the latest baseline by more than 20 percent. Baselines are only comparable on the same machine,
+thus only the baselines stored for the type of the current machine are used.
+"""
+import os
+
+BENCHMARK_STORAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+BASELINE_NAME = "baseline"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark-save-baseline", action="store_true", default=False,
+                    help="Save the benchmark results as new baseline in {0}".format(BENCHMARK_STORAGE_PATH))
+    group.addoption("--benchmark-regression-threshold", metavar="PERCENT", type=int, default=None,
+                    help="Fail, if the mean duration of a benchmark exceeds the latest baseline by more than PERCENT")
+
+
+def get_latest_baseline_path():
+    """Returns the path of the latest baseline stored for this machine
+
+    pytest-benchmark stores the results of each machine type in a directory named by its machine id, e.g.
+    Linux-CPython-3.7-64bit. Baselines of other machines are ignored.
+    """
+    from pytest_benchmark.utils import get_machine_id
+    machine_path = os.path.join(BENCHMARK_STORAGE_PATH, get_machine_id())
+    if not os.path.isdir(machine_path):
+        return None
+    baseline_paths = [os.path.join(machine_path, file_name) for file_name in os.listdir(machine_path)
+                      if file_name.endswith("_{0}.json".format(BASELINE_NAME))]
+    return max(baseline_paths, key=os.path.basename) if baseline_paths else None
+
+
+def pytest_configure(config):
+    if not config.pluginmanager.hasplugin("benchmark"):
+        return
+    save_baseline = config.getoption("benchmark_save_baseline")
+    threshold = config.getoption("benchmark_regression_threshold")
+    if not save_baseline and threshold is None:
+        return
+    # runs before the configuration of pytest-benchmark, which evaluates the options
+    config.option.benchmark_storage = "file://" + BENCHMARK_STORAGE_PATH
+    if save_baseline:
+        config.option.benchmark_save = BASELINE_NAME
+    if threshold is not None:
+        from pytest_benchmark.utils import PercentageRegressionCheck
+        baseline_path = get_latest_baseline_path()
+        if baseline_path is None:
+            from pytest_benchmark.utils import get_machine_id
+            raise ValueError("No benchmark baseline stored for {0} in {1}".format(get_machine_id(),
+                                                                                 BENCHMARK_STORAGE_PATH))
+        config.option.benchmark_compare = baseline_path
+        config.option.benchmark_compare_fail = [PercentageRegressionCheck("mean", threshold)]
@@ -1,4 +1,5 @@
 # core elements
+from __future__ import print_function
 from builtins import range
 from builtins import str
 import rafcon.core.singleton
@@ -10,6 +11,8 @@ from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
 from rafcon.core.state_elements.data_port import InputDataPort, OutputDataPort
 from rafcon.core.state_machine import StateMachine
 
+from timeit import default_timer as timer
+
 from rafcon.utils.timer import measure_time
 
 import testing_utils
@@ -87,6 +90,59 @@ def test_hierarchy_state_execution(number_child_states=100):
     execute_state(hierarchy_state)
 
 
+def test_transition_lookup_scaling(numbers_of_transitions=(10, 100, 300), repetitions=100):
+    """Measures the time needed to determine the next transition of a child state
+
+    The lookup is done for each step of a container state and should not depend on the number of transitions.
+    """
+    for number_of_transitions in numbers_of_transitions:
+        hierarchy_state = create_hierarchy_state(number_of_transitions)
+        child_states = list(hierarchy_state.states.values())
+        start = timer()
+        for _ in range(repetitions):
+            for child_state in child_states:
+                hierarchy_state.get_transition_for_outcome(child_state, child_state.outcomes[0])
+        duration = (timer() - start) / (repetitions * len(child_states))
+        print("transition lookup with {0} transitions: {1:.3f} us".format(len(hierarchy_state.transitions),
+                                                                         duration * 1e6))
+
+
+def test_hierarchy_state_step_latency(numbers_of_transitions=(10, 100, 300)):
+    """Measures the average execution time per child state of a hierarchy state"""
+    for number_of_transitions in numbers_of_transitions:
+        hierarchy_state = create_hierarchy_state(number_of_transitions)
+        start = timer()
+        execute_state(hierarchy_state)
+        duration = (timer() - start) / number_of_transitions
+        print("step latency with {0} transitions: {1:.3f} ms".format(len(hierarchy_state.transitions),
+                                                                    duration * 1e3))
+
+
+def test_execution_backends(number_child_states=10, number_childs_per_child=10):
+    """Compares the execution time of the classic and the pooled execution backend"""
+    from rafcon.core.config import global_config
+    for backend in ("classic", "pooled"):
+        global_config.set_config_value("EXECUTION_BACKEND", backend)
+        barrier_state = create_barrier_concurrency_state(number_child_states, number_childs_per_child)
+        start = timer()
+        execute_state(barrier_state)
+        print("{0} backend: {1:.3f} s".format(backend, timer() - start))
+    global_config.set_config_value("EXECUTION_BACKEND", "classic")
+
+
+def test_execution_log_overhead(number_child_states=100):
+    """Compares the execution time of a hierarchy state with and without execution log"""
+    from rafcon.core.config import global_config
+    for log_enabled in (False, True):
+        global_config.set_config_value("EXECUTION_LOG_ENABLE", log_enabled)
+        global_config.set_config_value("EXECUTION_LOG_PATH", testing_utils.get_unique_temp_path())
+        hierarchy_state = create_hierarchy_state(number_child_states)
+        start = timer()
+        execute_state(hierarchy_state)
+        print("execution log {0}: {1:.3f} s".format("enabled" if log_enabled else "disabled", timer() - start))
+    global_config.set_config_value("EXECUTION_LOG_ENABLE", False)
+
+
 @measure_time
 def test_barrier_concurrency_state_execution(number_child_states=10, number_childs_per_child=10):
     barrier_state = create_barrier_concurrency_state(number_child_states, number_childs_per_child)
@@ -112,9 +168,147 @@ def test_preemption_concurrency_state_execution(number_child_states=10, number_c
     execute_state(preemption_state)
 
 
+
+def test_script_build_performance(number_of_scripts=500, number_of_script_lines=300):
+    """Measures building the modules of identical scripts, e.g. of library instances, with and without code cache"""
+    import os
+    from rafcon.core import script
+    from rafcon.core.script import Script
+    from rafcon.core.config import global_config
+    script_text = "\n".join(["def function_{0}(value):\n    return value * {0}\n".format(i)
+                             for i in range(number_of_script_lines // 3)]) + \
+        "\ndef execute(self, inputs, outputs, gvm):\n    return 0\n"
+    scripts = []
+    for _ in range(number_of_scripts):
+        state_script = Script(check_path=False)
+        state_script.script = script_text
+        scripts.append(state_script)
+
+    def build_modules(clear_cache):
+        start = timer()
+        for state_script in scripts:
+            if clear_cache:
+                script.clear_code_cache()
+            state_script.build_module()
+        return timer() - start
+
+    global_config.set_config_value("SCRIPT_CODE_CACHE_PATH", os.path.join(testing_utils.get_unique_temp_path(),
+                                                                          "code_cache"))
+    try:
+        print("{0} scripts without code cache: {1:.3f} s".format(number_of_scripts, build_modules(True)))
+        script.clear_code_cache()
+        script.reset_code_cache_statistics()
+        print("{0} scripts with code cache: {1:.3f} s, {2}".format(number_of_scripts, build_modules(False),
+                                                                   script.get_code_cache_statistics()))
+        script.clear_code_cache()
+        script.reset_code_cache_statistics()
+        scripts[0].build_module()
+        print("first script from code cache on disk: {0}".format(script.get_code_cache_statistics()))
+    finally:
+        global_config.set_config_value("SCRIPT_CODE_CACHE_PATH", None)
+        script.clear_code_cache()
+
+
+
+def test_headless_execution(number_of_setter_calls=100000, number_child_states=300):
+    """Compares setting execution data and executing a hierarchy state with and without headless mode"""
+    from rafcon.core.decorators import set_headless_mode
+    from rafcon.core.state_elements.scope import ScopedData
+    from rafcon.core.state_elements.data_port import OutputDataPort
+    from rafcon.core.states.state import StateExecutionStatus
+    hierarchy_state = create_hierarchy_state(number_child_states)
+    state = list(hierarchy_state.states.values())[0]
+    state_machine = StateMachine(hierarchy_state)
+    for headless in (False, True):
+        set_headless_mode(headless)
+        try:
+            start = timer()
+            for i in range(number_of_setter_calls):
+                state.state_execution_status = StateExecutionStatus.ACTIVE
+                state.input_data = {}
+                state.output_data = {}
+            setter_duration = (timer() - start) / (3 * number_of_setter_calls)
+            start = timer()
+            for i in range(number_of_setter_calls // 10):
+                ScopedData("output1", float(i), float, state.state_id, OutputDataPort, parent=hierarchy_state)
+            scoped_data_duration = (timer() - start) / (number_of_setter_calls // 10)
+            print("headless mode {0}: setter {1:.2f} us, scoped data creation {2:.2f} us".format(
+                headless, setter_duration * 1e6, scoped_data_duration * 1e6))
+            test_hierarchy_state_step_latency((number_child_states,))
+        finally:
+            set_headless_mode(False)
+    state_machine.destroy_execution_histories()
+
+
+def test_state_machine_lock_overhead(depths=(1, 10, 50), number_of_calls=20000):
+    """Measures methods decorated with lock_state_machine for states at different depths of a hierarchy"""
+    for depth in depths:
+        root_state = container_state = HierarchyState("root")
+        for i in range(depth - 1):
+            child_state = HierarchyState("hierarchy_{0}".format(i))
+            container_state.add_state(child_state)
+            container_state = child_state
+        execution_state = ExecutionState("execution")
+        container_state.add_state(execution_state)
+        state_machine = StateMachine(root_state)
+        start = timer()
+        for i in range(number_of_calls):
+            execution_state.get_state_machine()
+        get_duration = (timer() - start) / number_of_calls
+        start = timer()
+        for i in range(number_of_calls):
+            execution_state.description = "description"
+        print("depth {0}: get_state_machine {1:.2f} us, locked setter {2:.2f} us".format(
+            depth, get_duration * 1e6, (timer() - start) / number_of_calls * 1e6))
+
+def test_execution_metrics_overhead(number_child_states=300):
+    """Compares the execution time of a hierarchy state with and without execution metrics"""
+    from rafcon.core.config import global_config
+    from rafcon.core.execution import execution_metrics
+    for metrics_enabled in (False, True):
+        global_config.set_config_value("EXECUTION_METRICS_ENABLE", metrics_enabled)
+        hierarchy_state = create_hierarchy_state(number_child_states)
+        start = timer()
+        execute_state(hierarchy_state)
+        print("execution metrics {0}: {1:.3f} ms per step".format("enabled" if metrics_enabled else "disabled",
+                                                                (timer() - start) / number_child_states * 1e3))
+    global_config.set_config_value("EXECUTION_METRICS_ENABLE", False)
+    execution_metrics.set_enabled(False)
+    execution_metrics.reset_metrics()
+
+def test_execution_history_memory(number_of_runs=10, number_child_states=100, max_items=(0, 100)):
+    """Compares the memory of the execution history with an unlimited history and with a retention policy"""
+    from rafcon.core.config import global_config
+    for max_history_items in max_items:
+        global_config.set_config_value("EXECUTION_HISTORY_MAX_ITEMS", max_history_items)
+        hierarchy_state = create_hierarchy_state(number_child_states)
+        state_machine = StateMachine(hierarchy_state)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        start = timer()
+        for _ in range(number_of_runs):
+            rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+            rafcon.core.singleton.state_machine_execution_engine.join()
+        duration = timer() - start
+        statistics = state_machine.get_execution_history_statistics()
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+        print("max items {0}: {1:.3f} s, {2} items with {3:.1f} kB kept, {4} items dropped".format(
+            max_history_items, duration, statistics['items'], statistics['payload_bytes'] / 1e3,
+            statistics['dropped_items']))
+    global_config.set_config_value("EXECUTION_HISTORY_MAX_ITEMS", 0)
+
+
 if __name__ == '__main__':
     # test_hierarchy_state_execution(10)
     test_hierarchy_state_execution(100)
+    # test_transition_lookup_scaling()
+    # test_hierarchy_state_step_latency()
+    # test_execution_backends()
+    # test_execution_log_overhead()
+    # test_script_build_performance()
+    # test_headless_execution()
+    # test_state_machine_lock_overhead()
+    # test_execution_metrics_overhead()
+    # test_execution_history_memory()
     # TODO: state creation takes too long (> 100 seconds) => investigate
     # test_hierarchy_state_execution(1000)
     # test_barrier_concurrency_state_execution(10, 10)
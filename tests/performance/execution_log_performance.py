@@ -0,0 +1,124 @@
+from __future__ import print_function
+from builtins import range
+from builtins import str
+import os
+import pickle
+import random
+import shelve
+from timeit import default_timer as timer
+
+from rafcon.utils.segmented_log import SegmentedLogWriter, SegmentedLogReader
+import rafcon.utils.execution_log as log_helper
+
+import testing_utils
+
+
+def create_record(i):
+    return {'history_item_id': str(i), 'run_id': 'run_{0}'.format(i // 2), 'prev_history_item_id': str(i - 1),
+            'item_type': 'CallItem' if i % 2 else 'ReturnItem', 'timestamp': float(i), 'state_name': 'state',
+            'scoped_data': {}, 'input_output_data': {}}
+
+
+def create_history_item(i, number_of_data_ports):
+    """Creates the call (even i) or return item (odd i) of an execution state with pickled data ports
+
+    The item with id 0 is the start item of the state machine.
+    """
+    history_item_id = '{0:020d}'.format(i + 1)
+    data = {'port_{0}'.format(j): pickle.dumps(list(range(100)) if j else i // 2, protocol=2)
+            for j in range(number_of_data_ports)}
+    return history_item_id, {
+        'history_item_id': history_item_id, 'run_id': 'run_{0}'.format(i // 2),
+        'prev_history_item_id': '{0:020d}'.format(i), 'item_type': 'ReturnItem' if i % 2 else 'CallItem',
+        'call_type': 'EXECUTE', 'timestamp': float(i), 'state_name': 'state', 'state_type': 'ExecutionState',
+        'path': 'root/state', 'path_by_name': 'root/state', 'description': None, 'outcome_name': 'success',
+        'outcome_id': 0, 'scoped_data': {}, 'input_output_data': data}
+
+
+def measure(description, function, *args):
+    start = timer()
+    result = function(*args)
+    print("{0}: {1:.3f} s".format(description, timer() - start))
+    return result
+
+
+def write_segmented_log(path, number_of_items):
+    writer = SegmentedLogWriter(path)
+    for i in range(number_of_items):
+        writer.append(str(i), create_record(i))
+    writer.close()
+
+
+def write_shelve_log(filename, number_of_items):
+    shelve_log = shelve.open(filename, flag='c', protocol=2, writeback=False)
+    for i in range(number_of_items):
+        shelve_log[str(i)] = create_record(i)
+    shelve_log.close()
+
+
+def stream_log(log):
+    return sum(1 for _ in log.items())
+
+
+def random_access(log, keys):
+    for key in keys:
+        log[key]
+
+
+def test_segmented_log_read_performance(number_of_items=100000, number_of_random_accesses=1000,
+                                        compare_with_shelve=True):
+    """Measures writing and reading of an execution log with the given number of items
+
+    Call with number_of_items=10000000 to benchmark logs with 10M items, which takes several minutes and requires a
+    few GB of disk space.
+    """
+    path = testing_utils.get_unique_temp_path()
+    keys = [str(random.randrange(number_of_items)) for _ in range(number_of_random_accesses)]
+    print("{0} items".format(number_of_items))
+
+    log_path = os.path.join(path, 'segmented_log')
+    measure("segmented log: write", write_segmented_log, log_path, number_of_items)
+    reader = SegmentedLogReader(log_path)
+    measure("segmented log: stream all items", stream_log, reader)
+    measure("segmented log: load index", len, reader)
+    measure("segmented log: {0} random accesses".format(number_of_random_accesses), random_access, reader, keys)
+    measure("segmented log: seek by run_id", reader.records_for_run_id, 'run_{0}'.format(number_of_items // 4))
+
+    if compare_with_shelve:
+        shelve_filename = os.path.join(path, 'log.shelve')
+        measure("shelve: write", write_shelve_log, shelve_filename, number_of_items)
+        shelve_log = shelve.open(shelve_filename, 'r')
+        measure("shelve: stream all items", stream_log, shelve_log)
+        measure("shelve: {0} random accesses".format(number_of_random_accesses), random_access, shelve_log, keys)
+        shelve_log.close()
+
+
+def test_execution_log_analysis_performance(number_of_executions=50000, number_of_data_ports=20):
+    """Compares the analysis of all items of a log with the projected, streaming and columnar analysis"""
+    path = testing_utils.get_unique_temp_path()
+    log_path = os.path.join(path, 'segmented_log')
+    writer = SegmentedLogWriter(log_path)
+    writer.append('{0:020d}'.format(0), {'history_item_id': '{0:020d}'.format(0), 'run_id': 'start',
+                                         'item_type': 'StateMachineStartItem', 'state_type': None,
+                                         'timestamp': 0.})
+    for i in range(2 * number_of_executions):
+        writer.append(*create_history_item(i, number_of_data_ports))
+    writer.close()
+    reader = SegmentedLogReader(log_path)
+    print("{0} executions with {1} data ports".format(number_of_executions, number_of_data_ports))
+
+    measure("collapsed structure", log_helper.log_to_collapsed_structure, reader)
+    measure("stream all data ports", lambda: sum(1 for _ in log_helper.iter_collapsed_items(reader)))
+    measure("stream one data port", lambda: sum(1 for _ in log_helper.iter_collapsed_items(
+        reader, data_in_columns=[], data_out_columns=['port_0'], scoped_in_columns=[], scoped_out_columns=[],
+        semantic_data_columns=[])))
+    columns_path = os.path.join(path, 'columns')
+    measure("export columns", log_helper.log_to_columns, reader, columns_path, [], ['port_0'])
+    columns, _ = log_helper.load_columns(columns_path)
+    measure("mean of a memory-mapped column", lambda: columns['data_outs__port_0'].mean())
+
+
+if __name__ == '__main__':
+    test_segmented_log_read_performance()
+    test_execution_log_analysis_performance()
+    # test_segmented_log_read_performance(10000000, compare_with_shelve=False)
@@ -0,0 +1,48 @@
+from __future__ import print_function
+from builtins import range
+from threading import Thread
+from timeit import default_timer as timer
+
+import numpy as np
+
+from rafcon.core.global_variable_manager import GlobalVariableManager
+
+
+def read_variables(global_variable_manager, keys, number_of_reads):
+    for i in range(number_of_reads):
+        global_variable_manager.get_variable(keys[i % len(keys)])
+
+
+def write_variables(global_variable_manager, keys, values, number_of_writes):
+    for i in range(number_of_writes):
+        global_variable_manager.set_variable(keys[i % len(keys)], values[i % len(keys)])
+
+
+def test_global_variable_contention(numbers_of_readers=(1, 4, 16), number_of_reads=2000, number_of_writes=200,
+                                    number_of_keys=8, array_size=100000):
+    """Measures concurrent readers of global variables, while one thread writes them
+
+    Half of the global variables are floats, the other half large numpy arrays.
+    """
+    keys = ["sensor_{0}".format(i) for i in range(number_of_keys)]
+    values = [float(i) if i % 2 else np.arange(array_size, dtype=float) for i in range(number_of_keys)]
+    for number_of_readers in numbers_of_readers:
+        global_variable_manager = GlobalVariableManager()
+        write_variables(global_variable_manager, keys, values, number_of_keys)
+        threads = [Thread(target=read_variables, args=(global_variable_manager, keys, number_of_reads))
+                   for _ in range(number_of_readers)]
+        threads.append(Thread(target=write_variables,
+                              args=(global_variable_manager, keys, values, number_of_writes)))
+        start = timer()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = timer() - start
+        print("{0} readers with {1} reads each and one writer with {2} writes: {3:.3f} s ({4:.1f} us per access)"
+              "".format(number_of_readers, number_of_reads, number_of_writes, duration,
+                        duration / (number_of_readers * number_of_reads + number_of_writes) * 1e6))
+
+
+if __name__ == '__main__':
+    test_global_variable_contention()
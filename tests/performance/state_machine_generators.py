@@ -0,0 +1,124 @@
+"""Generators of synthetic state machines, parameterized by their size, for the benchmarks"""
+from builtins import range
+from builtins import str
+
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState
+from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
+
+SCRIPT_TEXT = "def execute(self, inputs, outputs, gvm):\n    outputs['output'] = inputs['input'] + 1\n    return 0\n"
+CPU_BOUND_SCRIPT_TEXT = """
+EXECUTE_IN_PROCESS = {0}
+
+def execute(self, inputs, outputs, gvm):
+    outputs['output'] = sum(i % 7 for i in range(inputs['input'] + 1000000))
+    return 0
+"""
+WAITING_SCRIPT_TEXT = """
+import asyncio
+import time
+
+{0}def execute(self, inputs, outputs, gvm):
+    {1}sleep({2})
+    outputs['output'] = inputs['input']
+    return 0
+"""
+
+
+def create_execution_state(name):
+    """Creates an execution state incrementing its integer input
+
+    :return: the state and the ids of its input and its output port
+    """
+    execution_state = ExecutionState(name)
+    input_port_id = execution_state.add_input_data_port("input", "int", 0)
+    output_port_id = execution_state.add_output_data_port("output", "int")
+    execution_state.script_text = SCRIPT_TEXT
+    return execution_state, input_port_id, output_port_id
+
+
+def create_sequence_state(number_of_states, name="sequence", batch_edit=False):
+    """Creates a hierarchy state executing its children one after another and passing an integer through them
+
+    :param bool batch_edit: whether the children are added within a batch edit of the hierarchy state
+    """
+    hierarchy_state = HierarchyState(name)
+    if batch_edit:
+        with hierarchy_state.batch_edit():
+            _add_sequence(hierarchy_state, number_of_states, name)
+    else:
+        _add_sequence(hierarchy_state, number_of_states, name)
+    return hierarchy_state
+
+
+def _add_sequence(hierarchy_state, number_of_states, name):
+    last_state_id = hierarchy_state.state_id
+    last_port_id = hierarchy_state.add_input_data_port("input", "int", 0)
+    for i in range(number_of_states):
+        state, input_port_id, output_port_id = create_execution_state("{0}_{1}".format(name, i))
+        hierarchy_state.add_state(state)
+        if last_state_id == hierarchy_state.state_id:
+            hierarchy_state.set_start_state(state.state_id)
+        else:
+            hierarchy_state.add_transition(last_state_id, 0, state.state_id, None)
+        hierarchy_state.add_data_flow(last_state_id, last_port_id, state.state_id, input_port_id)
+        last_state_id, last_port_id = state.state_id, output_port_id
+    hierarchy_state.add_transition(last_state_id, 0, hierarchy_state.state_id, 0)
+    hierarchy_state.add_data_flow(last_state_id, last_port_id, hierarchy_state.state_id,
+                                  hierarchy_state.add_output_data_port("output", "int"))
+
+
+def create_barrier_concurrency_state(number_of_branches, states_per_branch):
+    """Creates a barrier concurrency state with `number_of_branches` sequences of `states_per_branch` states"""
+    barrier_state = BarrierConcurrencyState("barrier")
+    for i in range(number_of_branches):
+        branch = create_sequence_state(states_per_branch, "branch_{0}".format(i))
+        # the transitions of the branches to the decider state are added automatically
+        barrier_state.add_state(branch)
+    barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    return barrier_state
+
+
+def create_state_tree(depth, width, name="tree"):
+    """Creates a tree of hierarchy states with `width` children each, the leafs are execution states
+
+    A deep state machine has a small width and a large depth, a wide state machine vice versa.
+    """
+    if depth == 0:
+        return create_execution_state(name)[0]
+    hierarchy_state = HierarchyState(name)
+    for i in range(width):
+        hierarchy_state.add_state(create_state_tree(depth - 1, width, name + "_" + str(i)))
+    return hierarchy_state
+
+
+
+def create_cpu_bound_barrier_state(number_of_branches, in_process):
+    """Creates a barrier concurrency state with `number_of_branches` execution states computing for a while
+
+    :param bool in_process: whether the scripts are executed in worker processes
+    """
+    barrier_state = BarrierConcurrencyState("cpu_bound_barrier")
+    for i in range(number_of_branches):
+        execution_state = create_execution_state("cpu_bound_{0}".format(i))[0]
+        execution_state.script_text = CPU_BOUND_SCRIPT_TEXT.format(in_process)
+        barrier_state.add_state(execution_state)
+    barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    return barrier_state
+
+
+def create_waiting_barrier_state(number_of_branches, duration, asynchronous):
+    """Creates a barrier concurrency state with `number_of_branches` execution states waiting for `duration` seconds
+
+    :param bool asynchronous: whether the scripts await ``asyncio.sleep`` instead of blocking in ``time.sleep``
+    """
+    script_text = WAITING_SCRIPT_TEXT.format(*(("async ", "await asyncio.", duration) if asynchronous else
+                                               ("", "time.", duration)))
+    barrier_state = BarrierConcurrencyState("waiting_barrier")
+    for i in range(number_of_branches):
+        execution_state = create_execution_state("waiting_{0}".format(i))[0]
+        execution_state.script_text = script_text
+        barrier_state.add_state(execution_state)
+    barrier_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, barrier_state.state_id, 0)
+    return barrier_state
@@ -0,0 +1,152 @@
+from __future__ import print_function
+from builtins import range
+from builtins import str
+import os
+import shutil
+import time
+from timeit import default_timer as timer
+
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+
+import testing_utils
+
+
+def create_state_tree(depth, width, prefix="state"):
+    """Creates a tree of hierarchy states with `width` children each, the leafs are execution states"""
+    if depth == 0:
+        return ExecutionState(prefix)
+    hierarchy_state = HierarchyState(prefix)
+    for i in range(width):
+        hierarchy_state.add_state(create_state_tree(depth - 1, width, prefix + "_" + str(i)))
+    return hierarchy_state
+
+
+def measure_loading(path, number_of_threads, repetitions):
+    testing_utils.initialize_environment_core(core_config={"STORAGE_LOADING_THREADS": number_of_threads})
+    try:
+        durations = []
+        for _ in range(repetitions):
+            start = timer()
+            storage.load_state_machine_from_path(path)
+            durations.append(timer() - start)
+        return min(durations)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+
+
+def test_loading_performance(shapes=((1, 100), (2, 30), (3, 10), (6, 3), (12, 2)), threads=(1, 4, 8, 16),
+                             repetitions=3):
+    """Measures the loading time of state machines with the given (depth, width) shapes
+
+    The files are in the page cache after the first repetition, use a network file system to measure cold reads.
+    """
+    for depth, width in shapes:
+        path = os.path.join(testing_utils.get_unique_temp_path(), "depth_{0}_width_{1}".format(depth, width))
+        testing_utils.initialize_environment_core()
+        try:
+            state_machine = StateMachine(create_state_tree(depth, width))
+            number_of_states = state_machine.root_state.get_states_statistics(0)[0]
+            storage.save_state_machine_to_path(state_machine, path)
+        finally:
+            testing_utils.shutdown_environment_only_core()
+        for number_of_threads in threads:
+            print("depth {0}, width {1} ({2} states), {3} threads: {4:.3f} s".format(
+                depth, width, number_of_states, number_of_threads,
+                measure_loading(path, number_of_threads, repetitions)))
+
+
+def test_saving_performance(depth=3, width=10):
+    """Measures saving a state machine initially and after changing the script of a single state"""
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = StateMachine(create_state_tree(depth, width))
+        path = os.path.join(testing_utils.get_unique_temp_path(), "state_machine")
+        start = timer()
+        number_of_written_files = storage.save_state_machine_to_path(state_machine, path)
+        print("initial save: {0:.3f} s, {1} files written".format(timer() - start, number_of_written_files))
+
+        execution_state = state_machine.root_state
+        while not isinstance(execution_state, ExecutionState):
+            execution_state = list(execution_state.states.values())[0]
+        execution_state.script_text += "# one line\n"
+        start = timer()
+        number_of_written_files = storage.save_state_machine_to_path(state_machine, path)
+        print("save after script change: {0:.3f} s, {1} files written".format(timer() - start,
+                                                                              number_of_written_files))
+    finally:
+        testing_utils.shutdown_environment_only_core()
+
+
+def test_library_instantiation_performance(depth=3, width=10, number_of_instances=10):
+    """Measures the instantiation of a library without and with library cache on disk"""
+    library_root_path = testing_utils.get_unique_temp_path()
+    testing_utils.initialize_environment_core(
+        core_config={"LIBRARY_CACHE_PATH": os.path.join(testing_utils.get_unique_temp_path(), "library_cache")},
+        libraries={"benchmark": library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        storage.save_state_machine_to_path(StateMachine(create_state_tree(depth, width)),
+                                           os.path.join(library_root_path, "library"))
+        library_manager.initialize()
+        for description in ["without library cache", "with library cache"]:
+            library_manager.clean_loaded_libraries()
+            library_manager.reset_cache_statistics()
+            start = timer()
+            LibraryState("benchmark", "library", "None")
+            first_instance_duration = timer() - start
+            start = timer()
+            for _ in range(number_of_instances):
+                LibraryState("benchmark", "library", "None")
+            print("{0}: first instance {1:.3f} s, {2} further instances {3:.3f} s, {4}".format(
+                description, first_instance_duration, number_of_instances, timer() - start,
+                library_manager.cache_statistics))
+    finally:
+        library_manager.clean_loaded_libraries()
+        testing_utils.shutdown_environment_only_core()
+
+
+
+def test_library_refresh_performance(number_of_folders=100, libraries_per_folder=20):
+    """Compares searching all libraries with the incremental update of the libraries"""
+    library_root_path = testing_utils.get_unique_temp_path()
+    library_path = os.path.join(testing_utils.get_unique_temp_path(), "library")
+    testing_utils.initialize_environment_core()
+    try:
+        storage.save_state_machine_to_path(StateMachine(ExecutionState("library")), library_path)
+    finally:
+        testing_utils.shutdown_environment_only_core()
+    for i in range(number_of_folders):
+        for j in range(libraries_per_folder):
+            shutil.copytree(library_path, os.path.join(library_root_path, "folder_" + str(i), "library_" + str(j)))
+    old_time = time.time() - 10.
+    for dir_path, _, _ in os.walk(library_root_path):
+        os.utime(dir_path, (old_time, old_time))
+
+    testing_utils.initialize_environment_core(libraries={"benchmark": library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        start = timer()
+        library_manager.initialize()
+        print("{0} libraries, initialize: {1:.3f} s".format(number_of_folders * libraries_per_folder,
+                                                           timer() - start))
+        start = timer()
+        library_manager.update_libraries()
+        print("update without changes: {0:.3f} s".format(timer() - start))
+        shutil.copytree(library_path, os.path.join(library_root_path, "folder_0", "new_library"))
+        start = timer()
+        changes = library_manager.update_libraries()
+        print("update with {0} change: {1:.3f} s".format(len(changes), timer() - start))
+    finally:
+        testing_utils.shutdown_environment_only_core()
+
+
+if __name__ == '__main__':
+    test_loading_performance()
+    test_saving_performance()
+    test_library_instantiation_performance()
+    test_library_refresh_performance()
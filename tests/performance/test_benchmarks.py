@@ -0,0 +1,294 @@
+"""Benchmarks of the core, the storage, the execution log and the GUI models, based on pytest-benchmark
+
+See conftest.py for storing a baseline and failing on regressions. The sizes of the synthetic state machines are
+parameters of the benchmarks, so that the scaling behaviour can be compared.
+"""
+from builtins import range
+from builtins import str
+import os
+import shutil
+from threading import Thread
+
+import pytest
+
+import rafcon.core.singleton
+from rafcon.core.config import global_config
+from rafcon.core.execution import process_pool
+from rafcon.core.execution.multi_instance_execution import MultiInstanceExecutor
+from rafcon.core.global_variable_manager import GlobalVariableManager
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.utils.segmented_log import SegmentedLogWriter, SegmentedLogReader
+
+import testing_utils
+from .execution_log_performance import create_record
+from .state_machine_generators import create_sequence_state, create_barrier_concurrency_state, create_state_tree, \
+    create_cpu_bound_barrier_state, create_waiting_barrier_state
+
+ROUNDS = 5
+# (depth, width) of deep and wide state machines with a similar number of states
+SHAPES = {"deep": (8, 2), "wide": (1, 400)}
+
+
+@pytest.fixture
+def core_environment(caplog):
+    testing_utils.initialize_environment_core()
+    yield
+    testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def execute_state_machine(state_machine):
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    rafcon.core.singleton.state_machine_execution_engine.start(state_machine.state_machine_id)
+    rafcon.core.singleton.state_machine_execution_engine.join()
+    rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    state_machine.destroy_execution_histories()
+    assert state_machine.root_state.final_outcome.outcome_id == 0
+
+
+@pytest.mark.parametrize("number_of_states", [10, 100])
+def test_hierarchy_execution(benchmark, core_environment, number_of_states):
+    benchmark.pedantic(execute_state_machine, rounds=ROUNDS,
+                       setup=lambda: ((StateMachine(create_sequence_state(number_of_states)),), {}))
+
+
+@pytest.mark.parametrize("number_of_branches", [4, 16])
+def test_concurrency_execution(benchmark, core_environment, number_of_branches, states_per_branch=10):
+    benchmark.pedantic(execute_state_machine, rounds=ROUNDS, setup=lambda: (
+        (StateMachine(create_barrier_concurrency_state(number_of_branches, states_per_branch)),), {}))
+
+
+@pytest.mark.parametrize("in_process", [False, True])
+@pytest.mark.parametrize("number_of_branches", [1, 2, 4])
+def test_cpu_bound_concurrency_execution(benchmark, core_environment, number_of_branches, in_process):
+    """Shows the scaling of CPU-bound concurrent states with the number of cores, if executed in worker processes"""
+    try:
+        # the first round starts the worker processes
+        benchmark.pedantic(execute_state_machine, rounds=ROUNDS, warmup_rounds=1, setup=lambda: (
+            (StateMachine(create_cpu_bound_barrier_state(number_of_branches, in_process)),), {}))
+    finally:
+        process_pool.shutdown_process_pool()
+
+
+@pytest.mark.parametrize("backend", ["classic", "pooled", "asyncio"])
+@pytest.mark.parametrize("number_of_branches", [100, 1000])
+def test_waiting_concurrency_execution(benchmark, caplog, number_of_branches, backend, duration=0.2):
+    """Shows the overhead of many concurrent states waiting for I/O, which are event loop tasks with asyncio"""
+    testing_utils.initialize_environment_core(core_config={"EXECUTION_BACKEND": backend})
+    try:
+        benchmark.pedantic(execute_state_machine, rounds=ROUNDS, setup=lambda: ((StateMachine(
+            create_waiting_barrier_state(number_of_branches, duration, backend == "asyncio")),), {}))
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+@pytest.mark.parametrize("batch_edit", [False, True])
+@pytest.mark.parametrize("number_of_states", [100, 1000])
+def test_state_machine_construction(benchmark, core_environment, number_of_states, batch_edit):
+    """Shows the cost of validating each transition and data flow on addition compared to a single batch validation"""
+    benchmark.pedantic(create_sequence_state, args=(number_of_states,), kwargs={"batch_edit": batch_edit},
+                       rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("edit", [False, True])
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_state_machine_hash(benchmark, core_environment, shape, edit):
+    """Hashes a new state machine or a hashed one after renaming a single state, whose parents are hashed again"""
+    state_machine = StateMachine(create_state_tree(*SHAPES[shape]))
+    state_machine.mutable_hash()
+    leaf_state = state_machine.root_state
+    while getattr(leaf_state, "states", None):
+        leaf_state = list(leaf_state.states.values())[-1]
+    names = ("leaf_{0}".format(i) for i in range(1000))
+
+    def setup():
+        if edit:
+            leaf_state.name = next(names)
+            return (state_machine,), {}
+        return (StateMachine(create_state_tree(*SHAPES[shape])),), {}
+
+    benchmark.pedantic(lambda state_machine: state_machine.mutable_hash().hexdigest(), rounds=ROUNDS, setup=setup)
+
+
+def look_up_all_states(state_machine, paths):
+    for path in paths:
+        assert state_machine.get_state_by_path(path).get_path() == path
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_state_lookup(benchmark, core_environment, shape):
+    """Looks up every state of a state machine by its path, as done when executing or selecting states"""
+    state_machine = StateMachine(create_state_tree(*SHAPES[shape]))
+    paths = list(state_machine._get_state_registry()[0])
+    benchmark.pedantic(look_up_all_states, args=(state_machine, paths), rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_state_machine_save(benchmark, core_environment, shape):
+    state_machine = StateMachine(create_state_tree(*SHAPES[shape]))
+    base_path = testing_utils.get_unique_temp_path()
+    paths = (os.path.join(base_path, str(i)) for i in range(1000))
+    # each round saves to a new path, as unchanged files are not written again
+    benchmark.pedantic(lambda path: storage.save_state_machine_to_path(state_machine, path), rounds=ROUNDS,
+                       setup=lambda: ((next(paths),), {}))
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_state_machine_load(benchmark, core_environment, shape):
+    path = os.path.join(testing_utils.get_unique_temp_path(), shape)
+    storage.save_state_machine_to_path(StateMachine(create_state_tree(*SHAPES[shape])), path)
+    benchmark.pedantic(storage.load_state_machine_from_path, args=(path,), rounds=ROUNDS)
+
+
+# the layouts and serializers compared with the folder layout with indented JSON of the benchmarks above
+STORAGE_FORMATS = {"folder-compact_json": (False, "compact_json"), "packed-compact_json": (True, "compact_json"),
+                   "packed-msgpack": (True, "msgpack")}
+
+
+def save_in_storage_format(state_machine, path, storage_format):
+    packed, serializer_name = STORAGE_FORMATS[storage_format]
+    if packed:
+        storage.save_state_machine_to_packed_file(state_machine, path, serializer_name)
+    else:
+        global_config.set_config_value("STORAGE_SERIALIZER", serializer_name)
+        storage.save_state_machine_to_path(state_machine, path)
+
+
+@pytest.fixture(params=sorted(STORAGE_FORMATS))
+def storage_format(request, core_environment):
+    if STORAGE_FORMATS[request.param][1] == "msgpack":
+        pytest.importorskip("msgpack")
+    yield request.param
+    global_config.set_config_value("STORAGE_SERIALIZER", "json")
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_state_machine_save_formats(benchmark, storage_format, shape):
+    state_machine = StateMachine(create_state_tree(*SHAPES[shape]))
+    base_path = testing_utils.get_unique_temp_path()
+    paths = (os.path.join(base_path, str(i)) for i in range(1000))
+    benchmark.pedantic(save_in_storage_format, rounds=ROUNDS,
+                       setup=lambda: ((state_machine, next(paths), storage_format), {}))
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_state_machine_load_formats(benchmark, storage_format, shape):
+    path = os.path.join(testing_utils.get_unique_temp_path(), shape)
+    save_in_storage_format(StateMachine(create_state_tree(*SHAPES[shape])), path, storage_format)
+    benchmark.pedantic(storage.load_state_machine_from_path, args=(path,), rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_subtree_load(benchmark, core_environment, packed):
+    """Loads a single leaf state of the deep state machine, from the packed file via its index"""
+    state_machine = StateMachine(create_state_tree(*SHAPES["deep"]))
+    path = os.path.join(testing_utils.get_unique_temp_path(), "deep")
+    if packed:
+        storage.save_state_machine_to_packed_file(state_machine, path)
+    else:
+        storage.save_state_machine_to_path(state_machine, path)
+    leaf_state = state_machine.root_state
+    while getattr(leaf_state, "states", None):
+        leaf_state = list(leaf_state.states.values())[-1]
+    state_path = os.path.join(path, leaf_state.get_storage_path())
+    assert benchmark.pedantic(storage.load_state_from_path, args=(state_path,), rounds=ROUNDS).state_id == \
+        leaf_state.state_id
+
+
+@pytest.mark.parametrize("loaded", [False, True])
+@pytest.mark.parametrize("depth", [2, 3])
+def test_library_instantiation(benchmark, caplog, depth, loaded, width=8):
+    """Instantiates a library, which is either loaded from the library cache on disk or already loaded"""
+    library_root_path = testing_utils.get_unique_temp_path()
+    testing_utils.initialize_environment_core(libraries={"benchmark": library_root_path})
+    library_manager = rafcon.core.singleton.library_manager
+    try:
+        storage.save_state_machine_to_path(StateMachine(create_state_tree(depth, width)),
+                                           os.path.join(library_root_path, "library"))
+        library_manager.initialize()
+        LibraryState("benchmark", "library", "None")
+        benchmark.pedantic(LibraryState, args=("benchmark", "library", "None"), rounds=ROUNDS,
+                           setup=None if loaded else library_manager.clean_loaded_libraries)
+    finally:
+        library_manager.clean_loaded_libraries()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def execute_instances(state_machine, number_of_instances, max_workers):
+    with MultiInstanceExecutor(max_workers) as executor:
+        for future in executor.map(state_machine, [{"input": i} for i in range(number_of_instances)]):
+            result = future.result()
+            result.state_machine.destroy_execution_histories()
+            assert result.output_data["output"] == result.state_machine.root_state.input_data["input"] + 10
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_multi_instance_execution(benchmark, core_environment, max_workers, number_of_instances=16):
+    state_machine = StateMachine(create_sequence_state(10))
+    benchmark.pedantic(execute_instances, args=(state_machine, number_of_instances, max_workers), rounds=ROUNDS)
+
+
+def write_execution_log(path, number_of_items):
+    writer = SegmentedLogWriter(path)
+    for i in range(number_of_items):
+        writer.append(str(i), create_record(i))
+    writer.close()
+
+
+def read_execution_log(path):
+    return sum(1 for _ in SegmentedLogReader(path).items())
+
+
+@pytest.mark.parametrize("number_of_items", [1000, 10000])
+def test_execution_log_write(benchmark, number_of_items):
+    base_path = testing_utils.get_unique_temp_path()
+    paths = (os.path.join(base_path, str(i)) for i in range(1000))
+    benchmark.pedantic(write_execution_log, rounds=ROUNDS, setup=lambda: ((next(paths), number_of_items), {}))
+    shutil.rmtree(base_path)
+
+
+@pytest.mark.parametrize("number_of_items", [1000, 10000])
+def test_execution_log_read(benchmark, number_of_items):
+    path = os.path.join(testing_utils.get_unique_temp_path(), "log")
+    write_execution_log(path, number_of_items)
+    assert benchmark.pedantic(read_execution_log, args=(path,), rounds=ROUNDS) == number_of_items
+
+
+def access_global_variables(number_of_readers, number_of_accesses=1000, number_of_keys=8):
+    """Lets `number_of_readers` threads read global variables, while one thread writes them"""
+    global_variable_manager = GlobalVariableManager()
+    keys = ["variable_{0}".format(i) for i in range(number_of_keys)]
+    for key in keys:
+        global_variable_manager.set_variable(key, 0.)
+
+    def read():
+        for i in range(number_of_accesses):
+            global_variable_manager.get_variable(keys[i % number_of_keys])
+
+    def write():
+        for i in range(number_of_accesses // 10):
+            global_variable_manager.set_variable(keys[i % number_of_keys], float(i))
+
+    threads = [Thread(target=read) for _ in range(number_of_readers)] + [Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@pytest.mark.parametrize("number_of_readers", [1, 8])
+def test_global_variable_contention(benchmark, number_of_readers):
+    benchmark.pedantic(access_global_variables, args=(number_of_readers,), rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("number_of_states", [10, 100])
+def test_state_machine_model_construction(benchmark, core_environment, number_of_states):
+    """Constructs the GUI models of a state machine without running the GUI"""
+    pytest.importorskip("gi")
+    from rafcon.gui.config import global_gui_config
+    from rafcon.gui.models.state_machine import StateMachineModel
+    global_gui_config.set_config_value('HISTORY_ENABLED', False)
+    global_gui_config.set_config_value('AUTO_BACKUP_ENABLED', False)
+    state_machine = StateMachine(create_sequence_state(number_of_states))
+    benchmark.pedantic(lambda: StateMachineModel(state_machine).destroy(), rounds=ROUNDS)